@@ -0,0 +1,265 @@
+# busqueda.py para la app common
+# Búsqueda de texto indexada - tsvector y trigramas en PostgreSQL, FTS5 en SQLite
+
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from rest_framework.pagination import PageNumberPagination
+
+
+# Con menos caracteres no hay trigramas que buscar
+LONGITUD_MINIMA_TRIGRAMA = 3
+
+
+class PaginacionBusqueda(PageNumberPagination):
+    """Paginación de los resultados de una búsqueda, ordenados por relevancia."""
+
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+def _escapar_like(texto):
+    return texto.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class BusquedaTexto:
+    """
+    Búsqueda de texto sobre columnas de una tabla, con índice y ranking.
+
+    Hay dos modos:
+    - 'palabras': texto libre (títulos, mensajes). En PostgreSQL un tsvector
+      con un peso por campo, en el orden dado, más similitud de trigramas
+      sobre el primer campo para tolerar errores de tipeo.
+    - 'subcadena': nombres (archivos, códigos). En PostgreSQL un ILIKE
+      '%texto%' que resuelve un índice de trigramas (pg_trgm).
+
+    En SQLite ambos modos usan una tabla FTS5 `<tabla>_fts` que mantienen
+    triggers; en cualquier otro motor, o si la tabla FTS5 no está, se cae a
+    icontains sin ranking.
+
+    Los índices se crean desde una migración con crear_indices(). En SQLite
+    las migraciones que reconstruyen la tabla (AlterField) borran los
+    triggers: la búsqueda lo detecta y usa icontains hasta que otra
+    migración vuelva a llamar crear_indices().
+    """
+
+    MODOS = ('palabras', 'subcadena')
+    PESOS = ('A', 'B', 'C', 'D')
+
+    def __init__(self, tabla, campos, modo='palabras', config='spanish'):
+        if modo not in self.MODOS:
+            raise ValueError(f"Modo de búsqueda inválido: {modo}")
+        if modo == 'palabras' and len(campos) > len(self.PESOS):
+            raise ValueError("PostgreSQL admite hasta cuatro pesos de campo.")
+        self.tabla = tabla
+        self.campos = list(campos)
+        self.modo = modo
+        self.config = config
+
+    @property
+    def tabla_fts(self):
+        return f"{self.tabla}_fts"
+
+    def _columna(self, campo, calificada=True):
+        if calificada:
+            return f'"{self.tabla}"."{campo}"'
+        return f'"{campo}"'
+
+    # PostgreSQL
+
+    def _vector(self, calificada=True):
+        # La misma expresión se usa en el índice y en la consulta: si no
+        # coinciden, PostgreSQL no usa el índice
+        return ' || '.join(
+            f"setweight(to_tsvector('{self.config}'::regconfig, "
+            f"coalesce({self._columna(campo, calificada)}, '')), '{peso}')"
+            for campo, peso in zip(self.campos, self.PESOS)
+        )
+
+    def _consulta_ts(self):
+        return f"websearch_to_tsquery('{self.config}'::regconfig, %s)"
+
+    def _sql_indices_postgresql(self):
+        sentencias = ['CREATE EXTENSION IF NOT EXISTS pg_trgm']
+        if self.modo == 'palabras':
+            sentencias.append(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{self.tabla}_busqueda_tsv" '
+                f'ON "{self.tabla}" USING gin (({self._vector(calificada=False)}))'
+            )
+            campos_trigrama = self.campos[:1]
+        else:
+            campos_trigrama = self.campos
+        for campo in campos_trigrama:
+            sentencias.append(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{self.tabla}_{campo}_trgm" '
+                f'ON "{self.tabla}" USING gin ("{campo}" gin_trgm_ops)'
+            )
+        return sentencias
+
+    def _indices_postgresql(self):
+        nombres = [f"{self.tabla}_{campo}_trgm" for campo in self.campos]
+        if self.modo == 'palabras':
+            nombres = [f"{self.tabla}_busqueda_tsv", nombres[0]]
+        return nombres
+
+    def _filtro_postgresql(self, texto):
+        if self.modo == 'palabras':
+            vector = self._vector()
+            principal = self._columna(self.campos[0])
+            condicion = RawSQL(
+                f"({vector}) @@ {self._consulta_ts()} OR {principal} %% %s",
+                [texto, texto],
+                output_field=BooleanField()
+            )
+            relevancia = RawSQL(
+                f"ts_rank({vector}, {self._consulta_ts()}) + similarity({principal}, %s)",
+                [texto, texto],
+                output_field=FloatField()
+            )
+            return condicion, relevancia
+
+        patron = f"%{_escapar_like(texto)}%"
+        columnas = [self._columna(campo) for campo in self.campos]
+        condicion = RawSQL(
+            ' OR '.join(f"{columna} ILIKE %s" for columna in columnas),
+            [patron] * len(columnas),
+            output_field=BooleanField()
+        )
+        relevancia = RawSQL(
+            f"greatest({', '.join(f'similarity({columna}, %s)' for columna in columnas)})",
+            [texto] * len(columnas),
+            output_field=FloatField()
+        )
+        return condicion, relevancia
+
+    # SQLite
+
+    def _sql_indices_sqlite(self):
+        fts = self.tabla_fts
+        tokenizador = 'trigram' if self.modo == 'subcadena' else 'unicode61 remove_diacritics 2'
+        columnas = ', '.join(f'"{campo}"' for campo in self.campos)
+        nuevos = ', '.join(f'new."{campo}"' for campo in self.campos)
+        viejos = ', '.join(f'old."{campo}"' for campo in self.campos)
+        insertar = f'INSERT INTO "{fts}"(rowid, {columnas}) VALUES (new.id, {nuevos});'
+        borrar = (
+            f'INSERT INTO "{fts}"("{fts}", rowid, {columnas}) '
+            f"VALUES ('delete', old.id, {viejos});"
+        )
+        return [
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS "{fts}" USING fts5({columnas}, '
+            f"content='{self.tabla}', content_rowid='id', tokenize='{tokenizador}')",
+            f'CREATE TRIGGER IF NOT EXISTS "{fts}_ai" AFTER INSERT ON "{self.tabla}" '
+            f'BEGIN {insertar} END',
+            f'CREATE TRIGGER IF NOT EXISTS "{fts}_ad" AFTER DELETE ON "{self.tabla}" '
+            f'BEGIN {borrar} END',
+            f'CREATE TRIGGER IF NOT EXISTS "{fts}_au" AFTER UPDATE OF {columnas} ON "{self.tabla}" '
+            f'BEGIN {borrar} {insertar} END',
+            f'INSERT INTO "{fts}"("{fts}") VALUES (\'rebuild\')',
+        ]
+
+    def _objetos_sqlite(self):
+        fts = self.tabla_fts
+        return [fts, f"{fts}_ai", f"{fts}_ad", f"{fts}_au"]
+
+    def _fts_disponible(self, conexion):
+        objetos = self._objetos_sqlite()
+        with conexion.cursor() as cursor:
+            cursor.execute(
+                f"SELECT count(*) FROM sqlite_master WHERE name IN ({', '.join(['%s'] * len(objetos))})",
+                objetos
+            )
+            return cursor.fetchone()[0] == len(objetos)
+
+    def _consulta_fts(self, texto):
+        """Expresión MATCH de FTS5 con el texto del usuario escapado."""
+        if self.modo == 'subcadena':
+            if len(texto) < LONGITUD_MINIMA_TRIGRAMA:
+                return None
+            return '"' + texto.replace('"', '""') + '"'
+
+        # Todas las palabras, cada una como prefijo
+        palabras = re.findall(r'\w+', texto)
+        return ' '.join(f'"{palabra}"*' for palabra in palabras) or None
+
+    def _filtro_sqlite(self, consulta):
+        fts = self.tabla_fts
+        # En FTS5 el primer campo pesa más, como en el tsvector de PostgreSQL
+        pesos = ', '.join(str(10.0 / (10 ** indice)) for indice in range(len(self.campos)))
+        condicion = RawSQL(
+            f'"{self.tabla}"."id" IN (SELECT rowid FROM "{fts}" WHERE "{fts}" MATCH %s)',
+            [consulta],
+            output_field=BooleanField()
+        )
+        # bm25() es negativo y menor cuanto más relevante
+        relevancia = RawSQL(
+            f'(SELECT -bm25("{fts}", {pesos}) FROM "{fts}" '
+            f'WHERE "{fts}" MATCH %s AND rowid = "{self.tabla}"."id")',
+            [consulta],
+            output_field=FloatField()
+        )
+        return condicion, relevancia
+
+    # Sin índice
+
+    def _filtro_icontains(self, texto):
+        condicion = Q()
+        for campo in self.campos:
+            condicion |= Q(**{f"{campo}__icontains": texto})
+        return condicion, Value(0.0, output_field=FloatField())
+
+    def filtrar(self, queryset, texto):
+        """
+        Filtrar el queryset por el texto y ordenarlo por relevancia.
+
+        Returns:
+            QuerySet: Anotado con `relevancia`, de la más alta a la más baja
+        """
+        texto = texto.strip()
+        conexion = connections[queryset.db]
+
+        condicion = None
+        if conexion.vendor == 'postgresql':
+            condicion, relevancia = self._filtro_postgresql(texto)
+        elif conexion.vendor == 'sqlite':
+            consulta = self._consulta_fts(texto)
+            if consulta and self._fts_disponible(conexion):
+                condicion, relevancia = self._filtro_sqlite(consulta)
+        if condicion is None:
+            condicion, relevancia = self._filtro_icontains(texto)
+
+        return queryset.filter(condicion).annotate(
+            relevancia=relevancia
+        ).order_by('-relevancia', '-id')
+
+    # Migraciones
+
+    def crear_indices(self, schema_editor):
+        """
+        Crear los índices de búsqueda del motor actual. En PostgreSQL se crean
+        CONCURRENTLY para no bloquear escrituras, así que la migración debe
+        declarar atomic = False.
+        """
+        vendor = schema_editor.connection.vendor
+        if vendor == 'postgresql':
+            sentencias = self._sql_indices_postgresql()
+        elif vendor == 'sqlite':
+            sentencias = self._sql_indices_sqlite()
+        else:
+            return
+        for sentencia in sentencias:
+            schema_editor.execute(sentencia, params=None)
+
+    def eliminar_indices(self, schema_editor):
+        """Deshacer crear_indices()."""
+        vendor = schema_editor.connection.vendor
+        if vendor == 'postgresql':
+            for nombre in self._indices_postgresql():
+                schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{nombre}"', params=None)
+        elif vendor == 'sqlite':
+            fts, *triggers = self._objetos_sqlite()
+            for trigger in triggers:
+                schema_editor.execute(f'DROP TRIGGER IF EXISTS "{trigger}"', params=None)
+            schema_editor.execute(f'DROP TABLE IF EXISTS "{fts}"', params=None)
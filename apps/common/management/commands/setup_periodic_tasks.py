@@ -89,6 +89,8 @@ class Command(BaseCommand):
                 'Envío Semanal de Resumen a Profesores',
                 'Limpieza Automática de Notificaciones Antiguas',
                 'Resumen Diario de Notificaciones',
+                'Limpieza Automática de Reportes Antiguos',
+                'Actualización de Resúmenes de Inscripciones',
             ]
             
             eliminadas = 0
@@ -117,13 +119,17 @@ class Command(BaseCommand):
                     'Envío Semanal de Resumen a Profesores',
                     'Limpieza Automática de Notificaciones Antiguas',
                     'Resumen Diario de Notificaciones',
+                    'Limpieza Automática de Reportes Antiguos',
+                    'Actualización de Resúmenes de Inscripciones',
                 ]
             ).order_by('name')
             
             for tarea in tareas:
                 estado = '🟢 ACTIVA' if tarea.enabled else '🔴 INACTIVA'
                 
-                if tarea.crontab:
+                if tarea.crontab and tarea.crontab.hour == '*':
+                    horario = f"cada hora (minuto {tarea.crontab.minute})"
+                elif tarea.crontab:
                     horario = f"{tarea.crontab.hour:02d}:{tarea.crontab.minute:02d}"
                     if tarea.crontab.day_of_week != '*':
                         dias = ['Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom']
@@ -0,0 +1,86 @@
+"""
+Tests para la búsqueda de texto indexada de la app common.
+"""
+
+import pytest
+from django.db import connection
+from django.test import TransactionTestCase
+from rest_framework.test import APIClient
+
+from apps.common.busqueda import BusquedaTexto
+from apps.notificaciones.models import Notificacion
+from apps.notificaciones.views import BUSQUEDA_NOTIFICACIONES
+from apps.users.models import User
+
+
+@pytest.mark.django_db
+class TestBusquedaTexto(TransactionTestCase):
+    """Tests para BusquedaTexto sobre las notificaciones (FTS5 en SQLite)."""
+
+    def setUp(self):
+        """Configuración inicial para cada test."""
+        self.usuario = User.objects.create_user(
+            username='admin',
+            email='admin@test.com',
+            password='password123',
+            role='admin'
+        )
+        self.en_titulo = self._crear('Calificación publicada', 'Revisa el detalle en el sistema.')
+        self.en_mensaje = self._crear('Aviso', 'Se publicó una calificación de Matemáticas.')
+        self.sin_coincidencia = self._crear('Matrícula', 'Tu matrícula quedó activa.')
+
+    def _crear(self, titulo, mensaje):
+        return Notificacion.objects.create(
+            usuario=self.usuario, tipo='sistema', titulo=titulo, mensaje=mensaje
+        )
+
+    def _buscar(self, texto):
+        return list(BUSQUEDA_NOTIFICACIONES.filtrar(Notificacion.objects.all(), texto))
+
+    def test_ordena_por_relevancia_con_el_titulo_primero(self):
+        """Test que una coincidencia en el título pesa más que una en el mensaje."""
+        resultados = self._buscar('calificación')
+
+        self.assertEqual(resultados, [self.en_titulo, self.en_mensaje])
+        self.assertGreater(resultados[0].relevancia, resultados[1].relevancia)
+
+    def test_ignora_tildes_y_busca_prefijos(self):
+        """Test que 'calif' encuentra 'Calificación' sin importar tildes."""
+        self.assertEqual(len(self._buscar('calif')), 2)
+        self.assertEqual(self._buscar('matricula'), [self.sin_coincidencia])
+
+    def test_todas_las_palabras_deben_coincidir(self):
+        """Test que varias palabras se combinan con AND."""
+        self.assertEqual(self._buscar('calificación matemáticas'), [self.en_mensaje])
+
+    def test_comillas_y_operadores_no_rompen_la_consulta(self):
+        """Test que el texto del usuario se escapa antes de pasarlo a MATCH."""
+        self.assertEqual(self._buscar('"aviso" OR NEAR('), [])
+        self.assertEqual(self._buscar('***'), [])
+
+    def test_sin_triggers_cae_a_icontains(self):
+        """Test que sin los triggers de FTS5 (índice desactualizado) se usa icontains."""
+        busqueda = BusquedaTexto('notificaciones', ['titulo', 'mensaje'])
+        with connection.schema_editor() as schema_editor:
+            busqueda.eliminar_indices(schema_editor)
+        try:
+            resultados = list(busqueda.filtrar(Notificacion.objects.all(), 'Aviso'))
+            self.assertEqual(resultados, [self.en_mensaje])
+            self.assertEqual(resultados[0].relevancia, 0.0)
+        finally:
+            with connection.schema_editor() as schema_editor:
+                busqueda.crear_indices(schema_editor)
+
+        self.assertEqual(self._buscar('aviso'), [self.en_mensaje])
+
+    def test_endpoint_buscar_paginado(self):
+        """Test que /notificaciones/buscar/ devuelve resultados paginados por relevancia."""
+        client = APIClient()
+        client.force_authenticate(user=self.usuario)
+
+        response = client.get('/api/v1/notificaciones/notificaciones/buscar/', {'q': 'calificación', 'page_size': 1})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual([n['id'] for n in response.data['results']], [self.en_titulo.id])
+        self.assertIsNotNone(response.data['next'])
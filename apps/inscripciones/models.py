@@ -8,6 +8,8 @@ from django.db.models import Avg
 from apps.users.models import User
 from apps.materias.models import Materia, Periodo
 
+from .validators import ValidacionInscripcion
+
 
 class Inscripcion(models.Model):
     """
@@ -86,31 +88,28 @@ class Inscripcion(models.Model):
         """Validamos que el estudiante pueda inscribirse a esta materia."""
         super().clean()
         
+        validacion = self._obtener_validacion()
+        
         # Validar que el estudiante tenga rol de estudiante
-        if self.estudiante.role != 'estudiante':
+        if not validacion.es_estudiante:
             raise ValidationError({
                 'estudiante': 'El usuario debe tener rol de estudiante.'
             })
         
         # Validar que no haya inscripción duplicada
-        if self.pk is None:  # Solo para nuevas inscripciones
-            if Inscripcion.objects.filter(
-                estudiante=self.estudiante,
-                materia=self.materia,
-                periodo=self.periodo
-            ).exists():
-                raise ValidationError(
-                    'El estudiante ya está inscrito en esta materia para este período.'
-                )
+        if self.pk is None and validacion.duplicada:  # Solo para nuevas inscripciones
+            raise ValidationError(
+                'El estudiante ya está inscrito en esta materia para este período.'
+            )
         
         # Validar prerrequisitos
-        if not self._validar_prerrequisitos():
+        if not validacion.cumple_prerrequisitos:
             raise ValidationError(
                 'El estudiante no cumple con los prerrequisitos para esta materia.'
             )
         
         # Validar límite de créditos
-        if not self._validar_limite_creditos():
+        if validacion.excede_creditos:
             raise ValidationError(
                 'El estudiante excede el límite de créditos permitidos.'
             )
@@ -120,40 +119,17 @@ class Inscripcion(models.Model):
         self.full_clean()
         super().save(*args, **kwargs)
     
-    def _validar_prerrequisitos(self):
-        """Validar que el estudiante cumpla con los prerrequisitos de la materia."""
-        prerrequisitos = self.materia.prerrequisitos.filter(tipo='obligatorio')
-        
-        for prereq in prerrequisitos:
-            # Verificar si el estudiante aprobó el prerrequisito
-            inscripcion_prereq = Inscripcion.objects.filter(
-                estudiante=self.estudiante,
-                materia=prereq.prerrequisito,
-                estado='aprobada'
-            ).first()
-            
-            if not inscripcion_prereq:
-                return False
-        
-        return True
-    
-    def _validar_limite_creditos(self):
-        """Validar que el estudiante no exceda el límite de créditos."""
-        # Obtener créditos actuales del período
-        creditos_actuales = Inscripcion.objects.filter(
-            estudiante=self.estudiante,
-            periodo=self.periodo,
-            estado='activa'
-        ).aggregate(
-            total_creditos=models.Sum('materia__creditos')
-        )['total_creditos'] or 0
-        
-        # Agregar créditos de la nueva materia
-        creditos_totales = creditos_actuales + self.materia.creditos
-        
-        # Límite de 24 créditos por período (configurable)
-        LIMITE_CREDITOS = 24
-        return creditos_totales <= LIMITE_CREDITOS
+    def _obtener_validacion(self):
+        """
+        Reutilizar la validación que dejó el serializer (una sola vez, para
+        no arrastrar un resultado viejo a otro save) o hacerla ahora.
+        """
+        validacion = self.__dict__.pop('_validacion', None)
+        if validacion is not None and validacion.corresponde(
+            self.estudiante_id, self.materia_id, self.periodo_id
+        ):
+            return validacion
+        return ValidacionInscripcion(self.estudiante, self.materia, self.periodo)
     
     @property
     def aprobada(self):
@@ -265,18 +241,40 @@ class Calificacion(models.Model):
         calificaciones = Calificacion.objects.filter(inscripcion=self.inscripcion)
         
         if calificaciones.exists():
-            # Calcular promedio ponderado
-            suma_ponderada = sum(cal.nota * cal.peso for cal in calificaciones)
-            peso_total = sum(cal.peso for cal in calificaciones)
+            resultado = Calificacion.calcular_nota_final(
+                (cal.nota, cal.peso) for cal in calificaciones
+            )
             
-            if peso_total > 0:
-                nota_final = suma_ponderada / peso_total
-                self.inscripcion.nota_final = round(nota_final, 2)
-                
-                # Actualizar estado basado en la nota
-                if nota_final >= 3.0:
-                    self.inscripcion.estado = 'aprobada'
-                else:
-                    self.inscripcion.estado = 'reprobada'
-                
-                self.inscripcion.save(update_fields=['nota_final', 'estado']) 
\ No newline at end of file
+            if resultado is not None:
+                self.inscripcion.nota_final, self.inscripcion.estado = resultado
+                self.inscripcion.save(update_fields=['nota_final', 'estado'])
+    
+    @staticmethod
+    def calcular_nota_final(notas_y_pesos):
+        """
+        Promedio ponderado de las calificaciones de una inscripción.
+        
+        La carga individual (save) y la masiva (services) usan esta misma
+        cuenta, así que redondean igual.
+        
+        Args:
+            notas_y_pesos: Pares (nota, peso) de todas las calificaciones
+        
+        Returns:
+            tuple: (nota_final redondeada a 2 decimales, estado) o None si
+            el peso total es 0
+        """
+        suma_ponderada = 0
+        peso_total = 0
+        for nota, peso in notas_y_pesos:
+            suma_ponderada += nota * peso
+            peso_total += peso
+        
+        if peso_total <= 0:
+            return None
+        
+        nota_final = suma_ponderada / peso_total
+        
+        # Actualizar estado basado en la nota
+        estado = 'aprobada' if nota_final >= 3.0 else 'reprobada'
+        return round(nota_final, 2), estado
@@ -3,6 +3,13 @@
 
 from rest_framework import serializers
 from .models import Inscripcion, Calificacion
+from .services import (
+    MAXIMO_FILAS,
+    inscribir_en_lote,
+    registrar_calificaciones_en_lote,
+    validar_calificaciones_en_lote,
+)
+from .validators import validar_inscripcion
 from apps.users.serializers import UserSerializer
 from apps.materias.serializers import MateriaSerializer, PeriodoSerializer
 
@@ -111,18 +118,20 @@ class InscripcionCreateSerializer(serializers.ModelSerializer):
         materia = attrs.get('materia')
         periodo = attrs.get('periodo')
         
+        # Las reglas se evalúan una vez por request (los decoradores de la
+        # vista ya pudieron hacerlo) y el modelo reutiliza el resultado
+        validacion = validar_inscripcion(
+            estudiante, materia, periodo, request=self.context.get('request')
+        )
+        
         # Verificar que el estudiante tenga rol de estudiante
-        if estudiante.role != 'estudiante':
+        if not validacion.es_estudiante:
             raise serializers.ValidationError({
                 'estudiante': 'El usuario debe tener rol de estudiante.'
             })
         
         # Verificar que no haya inscripción duplicada
-        if Inscripcion.objects.filter(
-            estudiante=estudiante,
-            materia=materia,
-            periodo=periodo
-        ).exists():
+        if validacion.duplicada:
             raise serializers.ValidationError(
                 'El estudiante ya está inscrito en esta materia para este período.'
             )
@@ -133,7 +142,31 @@ class InscripcionCreateSerializer(serializers.ModelSerializer):
                 'periodo': 'El período debe estar activo para realizar inscripciones.'
             })
         
+        # Verificar prerrequisitos aprobados
+        if not validacion.cumple_prerrequisitos:
+            faltantes = ', '.join(p['nombre'] for p in validacion.prerrequisitos_faltantes)
+            raise serializers.ValidationError({
+                'materia': f'Debe aprobar los prerrequisitos: {faltantes}.'
+            })
+        
+        # Verificar límite de créditos del período
+        if validacion.excede_creditos:
+            raise serializers.ValidationError({
+                'materia': (
+                    f'Excede el límite de créditos por período. Actual: {validacion.creditos_actuales}, '
+                    f'Límite: {validacion.limite_creditos}, Materia: {materia.creditos}'
+                )
+            })
+        
+        self._validacion = validacion
         return attrs
+    
+    def create(self, validated_data):
+        """Crear la inscripción sin repetir en el modelo las validaciones ya hechas."""
+        inscripcion = Inscripcion(**validated_data)
+        inscripcion._validacion = getattr(self, '_validacion', None)
+        inscripcion.save()
+        return inscripcion
 
 
 class InscripcionUpdateSerializer(serializers.ModelSerializer):
@@ -194,23 +227,91 @@ class InscripcionListSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'fecha_inscripcion']
 
 
+class CalificacionFilaSerializer(serializers.ModelSerializer):
+    """
+    Una fila de la carga masiva de calificaciones. Solo valida los campos;
+    la inscripción, los tipos repetidos y los pesos se validan para todas
+    las filas juntas en CalificacionBulkCreateSerializer.
+    """
+    
+    inscripcion = serializers.IntegerField(min_value=1)
+    
+    class Meta:
+        model = Calificacion
+        fields = [
+            'inscripcion',
+            'tipo',
+            'nota',
+            'peso',
+            'comentarios'
+        ]
+        # Sin el validador de unique_together, que consultaría por fila
+        validators = []
+
+
 class CalificacionBulkCreateSerializer(serializers.Serializer):
-    """Serializer para crear múltiples calificaciones a la vez."""
+    """
+    Serializer para crear múltiples calificaciones a la vez.
+    
+    La carga es todo o nada, como antes: si alguna fila no cumple las reglas
+    no se crea ninguna y los errores vienen por fila. Ver
+    services.validar_calificaciones_en_lote y registrar_calificaciones_en_lote.
+    """
     
-    calificaciones = CalificacionCreateSerializer(many=True)
+    calificaciones = CalificacionFilaSerializer(many=True, allow_empty=False, max_length=MAXIMO_FILAS)
+    
+    def validate(self, attrs):
+        """Validamos todas las filas con una consulta por tabla."""
+        errores, self._inscripciones = validar_calificaciones_en_lote(attrs['calificaciones'])
+        if any(errores):
+            raise serializers.ValidationError({'calificaciones': errores})
+        return attrs
     
     def create(self, validated_data):
         """Crear múltiples calificaciones."""
-        calificaciones_data = validated_data.pop('calificaciones')
-        calificaciones = []
-        
-        for cal_data in calificaciones_data:
-            calificacion = Calificacion.objects.create(**cal_data)
-            calificaciones.append(calificacion)
-        
+        calificaciones = registrar_calificaciones_en_lote(
+            validated_data['calificaciones'], self._inscripciones
+        )
         return {'calificaciones': calificaciones}
 
 
+class InscripcionFilaSerializer(serializers.Serializer):
+    """Una fila de la inscripción masiva: solo ids, sin consultar la base."""
+
+    estudiante = serializers.IntegerField(min_value=1)
+    materia = serializers.IntegerField(min_value=1)
+    periodo = serializers.IntegerField(min_value=1)
+
+
+class InscripcionBulkCreateSerializer(serializers.Serializer):
+    """
+    Serializer para inscribir muchos estudiantes a la vez.
+
+    Las reglas de negocio se validan por conjuntos en
+    services.inscribir_en_lote; las filas que no las cumplen se informan en
+    'errores' sin impedir que se creen las demás.
+    """
+
+    inscripciones = InscripcionFilaSerializer(many=True, allow_empty=False, max_length=MAXIMO_FILAS)
+
+    def create(self, validated_data):
+        """Crear las inscripciones válidas e informar las rechazadas."""
+        resultado = inscribir_en_lote(validated_data['inscripciones'])
+        return {
+            'creadas': len(resultado['creadas']),
+            'inscripciones': [
+                {
+                    'id': inscripcion.id,
+                    'estudiante': inscripcion.estudiante_id,
+                    'materia': inscripcion.materia_id,
+                    'periodo': inscripcion.periodo_id,
+                }
+                for inscripcion in resultado['creadas']
+            ],
+            'errores': resultado['errores'],
+        }
+
+
 class InscripcionResumenSerializer(serializers.ModelSerializer):
     """Serializer para resumen de inscripciones de un estudiante."""
     
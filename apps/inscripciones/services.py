@@ -1,4 +1,334 @@
 # services.py para la app inscripciones
 # Lógica para inscribir estudiantes - validar prerrequisitos, límites de créditos
 
-# TODO: lógica de negocio cuando la necesitemos 
\ No newline at end of file
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Inscripcion
+from .validators import ESTADOS_PERIODO_ACTIVO, LIMITE_CREDITOS
+
+
+logger = logging.getLogger(__name__)
+
+# Filas por INSERT al crear las inscripciones
+TAMANO_LOTE = 500
+
+# Filas que acepta una inscripción masiva
+MAXIMO_FILAS = 10000
+
+
+def _error(indice, fila, codigo, mensaje):
+    return {
+        'fila': indice,
+        'estudiante': fila['estudiante'],
+        'materia': fila['materia'],
+        'periodo': fila['periodo'],
+        'codigo_error': codigo,
+        'error': mensaje,
+    }
+
+
+def inscribir_en_lote(filas):
+    """
+    Inscribir muchos (estudiante, materia, período) a la vez.
+
+    Las reglas de una inscripción individual (rol de estudiante, período
+    activo, duplicados, prerrequisitos obligatorios aprobados y límite de
+    créditos) se validan por conjuntos: una consulta por tabla para todas
+    las filas, y los prerrequisitos desde el grafo en memoria. Las filas se
+    evalúan en orden, así que los créditos de las filas aceptadas cuentan
+    para las siguientes del mismo estudiante y período.
+
+    Las inscripciones válidas se insertan con bulk_create, sin pasar por
+    Inscripcion.save(): cada estudiante recibe una sola notificación con
+    todas sus materias y los resúmenes de reportes se recalculan una vez
+    por grupo al confirmar.
+
+    Args:
+        filas: Lista de dicts con ids 'estudiante', 'materia' y 'periodo'
+
+    Returns:
+        dict: 'creadas' (inscripciones nuevas, en el orden de las filas) y
+        'errores' (por fila rechazada: índice, ids, codigo_error y error)
+    """
+    from apps.materias.grafo import obtener_grafo
+    from apps.materias.models import Materia, Periodo
+    from apps.users.models import User
+
+    grafo = obtener_grafo()
+    estudiante_ids = {fila['estudiante'] for fila in filas}
+    periodo_ids = {fila['periodo'] for fila in filas}
+    prerrequisitos = {
+        materia_id: grafo.prerrequisitos(materia_id, solo_obligatorios=True)
+        for materia_id in {fila['materia'] for fila in filas}
+    }
+    todos_prerrequisitos = {
+        prerrequisito_id for ids in prerrequisitos.values() for prerrequisito_id in ids
+    }
+
+    estudiantes = User.objects.in_bulk(estudiante_ids)
+    materias = Materia.objects.in_bulk(set(prerrequisitos) | todos_prerrequisitos)
+    periodos = Periodo.objects.in_bulk(periodo_ids)
+
+    # Una pasada por las inscripciones de los estudiantes: las del período
+    # (duplicados y créditos activos) y las aprobadas de los prerrequisitos
+    existentes = set()
+    creditos = defaultdict(int)
+    aprobadas = set()
+    condicion = Q(periodo_id__in=periodo_ids)
+    if todos_prerrequisitos:
+        condicion |= Q(materia_id__in=todos_prerrequisitos, estado='aprobada')
+    for estudiante_id, materia_id, periodo_id, estado, creditos_materia in Inscripcion.objects.filter(
+        condicion, estudiante_id__in=estudiante_ids
+    ).values_list('estudiante_id', 'materia_id', 'periodo_id', 'estado', 'materia__creditos'):
+        if periodo_id in periodo_ids:
+            existentes.add((estudiante_id, materia_id, periodo_id))
+            if estado == 'activa':
+                creditos[(estudiante_id, periodo_id)] += creditos_materia
+        if estado == 'aprobada':
+            aprobadas.add((estudiante_id, materia_id))
+
+    nuevas, errores = [], []
+    for indice, fila in enumerate(filas):
+        estudiante = estudiantes.get(fila['estudiante'])
+        materia = materias.get(fila['materia'])
+        periodo = periodos.get(fila['periodo'])
+        clave = (fila['estudiante'], fila['materia'], fila['periodo'])
+
+        if estudiante is None or estudiante.role != 'estudiante':
+            errores.append(_error(indice, fila, 'ESTUDIANTE_INVALIDO', 'El usuario debe tener rol de estudiante.'))
+            continue
+        if materia is None:
+            errores.append(_error(indice, fila, 'MATERIA_INEXISTENTE', 'La materia no existe.'))
+            continue
+        if periodo is None:
+            errores.append(_error(indice, fila, 'PERIODO_INEXISTENTE', 'El período no existe.'))
+            continue
+        if periodo.estado not in ESTADOS_PERIODO_ACTIVO:
+            errores.append(_error(
+                indice, fila, 'PERIODO_INACTIVO',
+                'El período debe estar activo para realizar inscripciones.'
+            ))
+            continue
+        if clave in existentes:
+            errores.append(_error(
+                indice, fila, 'INSCRIPCION_DUPLICADA',
+                'El estudiante ya está inscrito en esta materia para este período.'
+            ))
+            continue
+
+        faltantes = sorted(
+            (materias[prerrequisito_id] for prerrequisito_id in prerrequisitos[materia.id]
+             if (estudiante.id, prerrequisito_id) not in aprobadas),
+            key=lambda prerrequisito: prerrequisito.codigo
+        )
+        if faltantes:
+            errores.append(_error(
+                indice, fila, 'PREREQUISITO_NO_APROBADO',
+                f"Debe aprobar los prerrequisitos: {', '.join(p.nombre for p in faltantes)}."
+            ))
+            continue
+
+        actuales = creditos[(estudiante.id, periodo.id)]
+        if actuales + materia.creditos > LIMITE_CREDITOS:
+            errores.append(_error(
+                indice, fila, 'LIMITE_CREDITOS_EXCEDIDO',
+                f"Excede el límite de créditos por período. Actual: {actuales}, "
+                f"Límite: {LIMITE_CREDITOS}, Materia: {materia.creditos}"
+            ))
+            continue
+
+        existentes.add(clave)
+        creditos[(estudiante.id, periodo.id)] += materia.creditos
+        nuevas.append(Inscripcion(estudiante=estudiante, materia=materia, periodo=periodo))
+
+    with transaction.atomic():
+        creadas = Inscripcion.objects.bulk_create(nuevas, batch_size=TAMANO_LOTE)
+        _despues_de_inscribir(creadas)
+
+    return {'creadas': creadas, 'errores': errores}
+
+
+def _despues_de_inscribir(inscripciones):
+    """
+    Lo que harían las señales de post_save de cada inscripción, agrupado:
+    una notificación por estudiante y un recálculo por grupo de resumen.
+    """
+    from apps.notificaciones.models import Notificacion
+    from apps.reportes.resumenes import programar_recalculo
+
+    por_estudiante = defaultdict(list)
+    grupos = set()
+    for inscripcion in inscripciones:
+        por_estudiante[inscripcion.estudiante].append(inscripcion)
+        grupos.add((inscripcion.periodo_id, inscripcion.materia_id))
+
+    for periodo_id, materia_id in grupos:
+        programar_recalculo(periodo_id, materia_id)
+
+    try:
+        # En un savepoint para que un fallo no deje la transacción rota
+        with transaction.atomic():
+            Notificacion.notificar_inscripciones_exitosas(por_estudiante)
+    except Exception as e:
+        # Como en las señales: un fallo al notificar no deshace las inscripciones
+        logger.error(f"Error al crear notificaciones de inscripción masiva: {e}")
+
+
+def validar_calificaciones_en_lote(filas):
+    """
+    Validar una carga de calificaciones con una consulta por tabla.
+
+    Aplica las reglas de Calificacion.clean() y del serializer individual
+    (inscripción existente, un solo registro por tipo y pesos que no pasen
+    del 100%) a todas las filas a la vez: las calificaciones ya guardadas de
+    las inscripciones involucradas se leen en una consulta y las filas de la
+    carga se acumulan en orden sobre ellas.
+
+    Args:
+        filas: Lista de dicts con 'inscripcion' (id), 'tipo', 'nota' y 'peso'
+
+    Returns:
+        tuple: (errores, inscripciones). errores tiene un dict por fila,
+        vacío si la fila es válida; inscripciones es {id: Inscripcion} con
+        estudiante, materia y periodo cargados
+    """
+    from rest_framework.relations import PrimaryKeyRelatedField
+
+    from .models import Calificacion
+
+    inscripciones = Inscripcion.objects.select_related(
+        'estudiante', 'materia', 'periodo'
+    ).in_bulk({fila['inscripcion'] for fila in filas})
+
+    tipos = set()
+    pesos = defaultdict(int)
+    for inscripcion_id, tipo, peso in Calificacion.objects.filter(
+        inscripcion_id__in=inscripciones
+    ).values_list('inscripcion_id', 'tipo', 'peso'):
+        tipos.add((inscripcion_id, tipo))
+        pesos[inscripcion_id] += peso
+
+    errores = []
+    for fila in filas:
+        inscripcion_id, tipo = fila['inscripcion'], fila['tipo']
+        if inscripcion_id not in inscripciones:
+            mensaje = PrimaryKeyRelatedField.default_error_messages['does_not_exist']
+            errores.append({'inscripcion': mensaje.format(pk_value=inscripcion_id)})
+        elif (inscripcion_id, tipo) in tipos:
+            errores.append({
+                'tipo': f'Ya existe una calificación de tipo {tipo} para esta inscripción.'
+            })
+        elif pesos[inscripcion_id] + fila['peso'] > 100:
+            errores.append({
+                'peso': (
+                    'El peso total de las evaluaciones no puede exceder 100%. '
+                    f"Actual: {pesos[inscripcion_id] + fila['peso']}%"
+                )
+            })
+        else:
+            tipos.add((inscripcion_id, tipo))
+            pesos[inscripcion_id] += fila['peso']
+            errores.append({})
+
+    return errores, inscripciones
+
+
+def actualizar_notas_finales(inscripciones):
+    """
+    Recalcular nota_final y estado de varias inscripciones con una lectura
+    y un UPDATE.
+
+    Las notas y pesos de todas las inscripciones se leen en una consulta y
+    cada promedio se calcula con Calificacion.calcular_nota_final(), la
+    misma cuenta de la carga individual, para que ambas redondeen igual (en
+    SQL la división y ROUND dependen del motor). El resultado se escribe con
+    bulk_update y queda también en los objetos recibidos.
+
+    Args:
+        inscripciones: {id: Inscripcion} a recalcular
+
+    Returns:
+        int: Inscripciones actualizadas
+    """
+    from django.utils import timezone
+
+    from .models import Calificacion
+
+    notas = defaultdict(list)
+    for inscripcion_id, nota, peso in Calificacion.objects.filter(
+        inscripcion_id__in=inscripciones
+    ).values_list('inscripcion_id', 'nota', 'peso'):
+        notas[inscripcion_id].append((nota, peso))
+
+    ahora = timezone.now()
+    cambiadas = []
+    for inscripcion_id, notas_y_pesos in notas.items():
+        resultado = Calificacion.calcular_nota_final(notas_y_pesos)
+        if resultado is None:
+            continue
+        inscripcion = inscripciones[inscripcion_id]
+        inscripcion.nota_final, inscripcion.estado = resultado
+        inscripcion.updated_at = ahora
+        cambiadas.append(inscripcion)
+
+    return Inscripcion.objects.bulk_update(
+        cambiadas, ['nota_final', 'estado', 'updated_at'], batch_size=TAMANO_LOTE
+    )
+
+
+def registrar_calificaciones_en_lote(filas, inscripciones):
+    """
+    Guardar una carga de calificaciones ya validada.
+
+    Las calificaciones se insertan con bulk_create, sin pasar por
+    Calificacion.save(): la nota final y el estado de las inscripciones se
+    recalculan con una lectura y un UPDATE, y las señales se reemplazan por un recálculo
+    de resúmenes por grupo y un INSERT con todas las notificaciones.
+
+    Args:
+        filas: Filas validadas por validar_calificaciones_en_lote
+        inscripciones: {id: Inscripcion} devuelto por la validación
+
+    Returns:
+        list: Calificaciones creadas, en el orden de las filas
+    """
+    from apps.notificaciones.models import Notificacion
+    from apps.reportes.resumenes import programar_recalculo
+
+    from .models import Calificacion
+
+    with transaction.atomic():
+        calificaciones = Calificacion.objects.bulk_create(
+            [
+                Calificacion(
+                    inscripcion=inscripciones[fila['inscripcion']],
+                    tipo=fila['tipo'],
+                    nota=fila['nota'],
+                    peso=fila['peso'],
+                    comentarios=fila.get('comentarios', ''),
+                )
+                for fila in filas
+            ],
+            batch_size=TAMANO_LOTE
+        )
+
+        afectadas = {calificacion.inscripcion_id for calificacion in calificaciones}
+        actualizar_notas_finales({i: inscripciones[i] for i in afectadas})
+
+        for periodo_id, materia_id in {
+            (inscripciones[i].periodo_id, inscripciones[i].materia_id) for i in afectadas
+        }:
+            programar_recalculo(periodo_id, materia_id)
+
+        try:
+            # En un savepoint para que un fallo no deje la transacción rota
+            with transaction.atomic():
+                Notificacion.notificar_calificaciones_publicadas(calificaciones)
+        except Exception as e:
+            logger.error(f"Error al crear notificaciones de carga de calificaciones: {e}")
+
+    return calificaciones
@@ -0,0 +1,346 @@
+"""
+Tests para services de la app inscripciones.
+"""
+
+import pytest
+from decimal import Decimal
+from datetime import date, timedelta
+from django.db import connection
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from apps.users.models import User
+from apps.materias.grafo import obtener_grafo
+from apps.materias.models import Materia, Prerrequisito, Periodo
+from apps.inscripciones.models import Inscripcion, Calificacion
+from apps.inscripciones.services import inscribir_en_lote
+from apps.notificaciones.models import Notificacion
+from apps.reportes.models import ResumenInscripciones
+
+
+URL_INSCRIPCION_MASIVA = '/api/v1/inscripciones/inscripciones/bulk_create/'
+URL_CALIFICACIONES_MASIVA = '/api/v1/inscripciones/calificaciones/bulk_create/'
+
+
+@pytest.mark.django_db
+class TestInscribirEnLote(TransactionTestCase):
+    """Tests para la inscripción masiva con validación por conjuntos."""
+
+    def setUp(self):
+        """Configuración inicial para cada test."""
+        self.admin = User.objects.create_user(
+            username='admin',
+            email='admin@test.com',
+            password='password123',
+            role='admin'
+        )
+
+        self.estudiantes = [
+            User.objects.create_user(
+                username=f'estudiante{i}',
+                email=f'est{i}@test.com',
+                password='password123',
+                role='estudiante'
+            )
+            for i in range(3)
+        ]
+
+        self.periodo_anterior = Periodo.objects.create(
+            nombre='2023-2',
+            fecha_inicio=date.today() - timedelta(days=200),
+            fecha_fin=date.today() - timedelta(days=80),
+            estado='finalizado'
+        )
+
+        self.periodo = Periodo.objects.create(
+            nombre='2024-1',
+            fecha_inicio=date.today(),
+            fecha_fin=date.today() + timedelta(days=120),
+            estado='inscripciones'
+        )
+
+        self.matematicas = Materia.objects.create(codigo='MAT101', nombre='Matemáticas Básicas', creditos=3)
+        self.fisica = Materia.objects.create(codigo='FIS101', nombre='Física I', creditos=4)
+        self.calculo = Materia.objects.create(codigo='MAT201', nombre='Cálculo I', creditos=4)
+        self.electivas = [
+            Materia.objects.create(codigo=f'ELE10{i}', nombre=f'Electiva {i}', creditos=10)
+            for i in range(2)
+        ]
+
+        Prerrequisito.objects.create(materia=self.calculo, prerrequisito=self.matematicas, tipo='obligatorio')
+        Prerrequisito.objects.create(materia=self.calculo, prerrequisito=self.fisica, tipo='recomendado')
+
+        # El primer estudiante aprobó matemáticas en el período anterior
+        inscripcion = Inscripcion.objects.create(
+            estudiante=self.estudiantes[0],
+            materia=self.matematicas,
+            periodo=self.periodo_anterior
+        )
+        Calificacion.objects.create(inscripcion=inscripcion, tipo='final', nota=Decimal('4.0'), peso=100)
+
+    def _fila(self, estudiante, materia, periodo=None):
+        return {
+            'estudiante': estudiante.id,
+            'materia': materia.id,
+            'periodo': (periodo or self.periodo).id,
+        }
+
+    def test_mismas_reglas_que_la_inscripcion_individual(self):
+        """Test que cada fila inválida se rechaza con su código y las válidas se crean."""
+        aprobado, sin_prerrequisito, otro = self.estudiantes
+        Inscripcion.objects.create(estudiante=otro, materia=self.fisica, periodo=self.periodo)
+
+        resultado = inscribir_en_lote([
+            self._fila(aprobado, self.calculo),
+            self._fila(sin_prerrequisito, self.calculo),
+            self._fila(self.admin, self.fisica),
+            self._fila(aprobado, self.fisica, self.periodo_anterior),
+            self._fila(otro, self.fisica),
+            self._fila(aprobado, self.calculo),
+            self._fila(aprobado, self.electivas[0]),
+            # 4 + 10 + 10 = 24 créditos, justo el límite; la física ya no cabe
+            self._fila(aprobado, self.electivas[1]),
+            self._fila(aprobado, self.fisica),
+        ])
+
+        self.assertEqual(
+            [(i.estudiante_id, i.materia_id) for i in resultado['creadas']],
+            [(aprobado.id, self.calculo.id), (aprobado.id, self.electivas[0].id), (aprobado.id, self.electivas[1].id)]
+        )
+        self.assertTrue(all(inscripcion.pk for inscripcion in resultado['creadas']))
+        self.assertEqual(
+            [(error['fila'], error['codigo_error']) for error in resultado['errores']],
+            [
+                (1, 'PREREQUISITO_NO_APROBADO'),
+                (2, 'ESTUDIANTE_INVALIDO'),
+                (3, 'PERIODO_INACTIVO'),
+                (4, 'INSCRIPCION_DUPLICADA'),
+                (5, 'INSCRIPCION_DUPLICADA'),
+                (8, 'LIMITE_CREDITOS_EXCEDIDO'),
+            ]
+        )
+        self.assertEqual(
+            resultado['errores'][0]['error'],
+            'Debe aprobar los prerrequisitos: Matemáticas Básicas.'
+        )
+        self.assertEqual(Inscripcion.objects.filter(periodo=self.periodo, estudiante=aprobado).count(), 3)
+
+    def test_efectos_agrupados(self):
+        """Test que hay una notificación por estudiante y los resúmenes quedan al día."""
+        primero, segundo, _ = self.estudiantes
+
+        inscribir_en_lote([
+            self._fila(primero, self.fisica),
+            self._fila(primero, self.electivas[0]),
+            self._fila(segundo, self.fisica),
+        ])
+
+        # La inscripción aprobada del setUp ya tiene su notificación individual
+        notificaciones = Notificacion.objects.filter(
+            tipo='inscripcion_exitosa', usuario=primero, titulo__startswith='Inscripciones Exitosas'
+        )
+        self.assertEqual(notificaciones.count(), 1)
+        self.assertEqual(notificaciones.get().titulo, 'Inscripciones Exitosas - 2 materias')
+        self.assertIn('Electiva 0 (ELE100)', notificaciones.get().mensaje)
+        self.assertEqual(Notificacion.objects.filter(tipo='inscripcion_exitosa', usuario=segundo).count(), 1)
+
+        resumen = ResumenInscripciones.objects.get(periodo=self.periodo, materia=self.fisica, estado='activa')
+        self.assertEqual(resumen.total, 2)
+
+    def test_consultas_no_dependen_de_las_filas(self):
+        """Test que el número de consultas es el mismo para pocas y muchas filas."""
+        obtener_grafo()
+        materias = [
+            Materia.objects.create(codigo=f'OPT{i:03d}', nombre=f'Optativa {i}', creditos=1)
+            for i in range(12)
+        ]
+
+        with CaptureQueriesContext(connection) as pocas:
+            inscribir_en_lote([self._fila(self.estudiantes[0], materias[0])])
+        with CaptureQueriesContext(connection) as muchas:
+            inscribir_en_lote([
+                self._fila(estudiante, materia)
+                for estudiante in self.estudiantes[1:]
+                for materia in materias[1:]
+            ])
+
+        self.assertEqual(Inscripcion.objects.filter(materia__in=materias).count(), 23)
+        self.assertEqual(len(muchas.captured_queries), len(pocas.captured_queries))
+
+    def test_api_solo_admin(self):
+        """Test que el endpoint es solo para administradores y responde por fila."""
+        client = APIClient()
+        datos = {'inscripciones': [
+            self._fila(self.estudiantes[1], self.fisica),
+            self._fila(self.estudiantes[1], self.calculo),
+        ]}
+
+        client.force_authenticate(user=self.estudiantes[1])
+        response = client.post(URL_INSCRIPCION_MASIVA, datos, format='json')
+        self.assertEqual(response.status_code, 403)
+
+        client.force_authenticate(user=self.admin)
+        response = client.post(URL_INSCRIPCION_MASIVA, datos, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['creadas'], 1)
+        self.assertEqual(response.data['inscripciones'][0]['materia'], self.fisica.id)
+        self.assertEqual(response.data['errores'][0]['codigo_error'], 'PREREQUISITO_NO_APROBADO')
+
+        # Si no se crea ninguna, la respuesta es un error
+        response = client.post(URL_INSCRIPCION_MASIVA, datos, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['creadas'], 0)
+
+        response = client.post(URL_INSCRIPCION_MASIVA, {'inscripciones': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+@pytest.mark.django_db
+class TestCalificacionesEnLote(TransactionTestCase):
+    """Tests para la carga masiva de calificaciones por conjuntos."""
+
+    def setUp(self):
+        """Configuración inicial para cada test."""
+        self.profesor = User.objects.create_user(
+            username='profesor',
+            email='prof@test.com',
+            password='password123',
+            role='profesor'
+        )
+
+        self.periodo = Periodo.objects.create(
+            nombre='2024-1',
+            fecha_inicio=date.today(),
+            fecha_fin=date.today() + timedelta(days=120),
+            estado='en_curso'
+        )
+        self.materia = Materia.objects.create(
+            codigo='MAT101', nombre='Matemáticas Básicas', creditos=3, profesor=self.profesor
+        )
+
+        self.inscripciones = [
+            Inscripcion.objects.create(
+                estudiante=User.objects.create_user(
+                    username=f'estudiante{i}',
+                    email=f'est{i}@test.com',
+                    password='password123',
+                    role='estudiante'
+                ),
+                materia=self.materia,
+                periodo=self.periodo
+            )
+            for i in range(4)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.profesor)
+
+    def _cargar(self, filas):
+        return self.client.post(URL_CALIFICACIONES_MASIVA, {'calificaciones': filas}, format='json')
+
+    def test_misma_nota_final_que_la_carga_individual(self):
+        """Test que el UPDATE por conjuntos calcula lo mismo que Calificacion.save()."""
+        individual, masiva, reprobada, _ = self.inscripciones
+        notas = [('parcial_1', '3.33', 30), ('parcial_2', '2.87', 70)]
+        for tipo, nota, peso in notas:
+            Calificacion.objects.create(inscripcion=individual, tipo=tipo, nota=Decimal(nota), peso=peso)
+
+        response = self._cargar(
+            [{'inscripcion': masiva.id, 'tipo': tipo, 'nota': nota, 'peso': peso} for tipo, nota, peso in notas]
+            + [{'inscripcion': reprobada.id, 'tipo': 'final', 'nota': '2.99', 'peso': 40}]
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['calificaciones']), 3)
+        individual.refresh_from_db()
+        masiva.refresh_from_db()
+        reprobada.refresh_from_db()
+        self.assertEqual(individual.nota_final, Decimal('3.01'))
+        self.assertEqual((masiva.nota_final, masiva.estado), (individual.nota_final, individual.estado))
+        self.assertEqual((reprobada.nota_final, reprobada.estado), (Decimal('2.99'), 'reprobada'))
+
+        resumen = ResumenInscripciones.objects.get(periodo=self.periodo, materia=self.materia, estado='aprobada')
+        self.assertEqual(resumen.total, 2)
+
+    def test_notas_enteras_y_empates_como_la_carga_individual(self):
+        """Test de notas enteras (4.00 y 3.00) y de un empate en .xx5 contra Calificacion.save()."""
+        casos = [
+            [('parcial_1', '4.00', 50), ('parcial_2', '3.00', 50)],
+            # 3.125 exacto: se redondea igual que round(Decimal, 2)
+            [('parcial_1', '3.25', 50), ('parcial_2', '3.00', 50)],
+        ]
+        for notas in casos:
+            individual, masiva = [
+                Inscripcion.objects.create(
+                    estudiante=User.objects.create_user(
+                        username=f'extra{Inscripcion.objects.count()}',
+                        email=f'extra{Inscripcion.objects.count()}@test.com',
+                        password='password123',
+                        role='estudiante'
+                    ),
+                    materia=self.materia,
+                    periodo=self.periodo
+                )
+                for _ in range(2)
+            ]
+            for tipo, nota, peso in notas:
+                Calificacion.objects.create(inscripcion=individual, tipo=tipo, nota=Decimal(nota), peso=peso)
+
+            response = self._cargar([
+                {'inscripcion': masiva.id, 'tipo': tipo, 'nota': nota, 'peso': peso}
+                for tipo, nota, peso in notas
+            ])
+
+            self.assertEqual(response.status_code, 201)
+            individual.refresh_from_db()
+            masiva.refresh_from_db()
+            self.assertEqual((masiva.nota_final, masiva.estado), (individual.nota_final, individual.estado))
+
+        self.assertEqual(individual.nota_final, Decimal('3.12'))
+        self.assertEqual(
+            Inscripcion.objects.filter(nota_final=Decimal('3.50'), estado='aprobada').count(), 2
+        )
+
+    def test_rechaza_todo_si_una_fila_falla(self):
+        """Test que los errores vienen por fila y no se crea ninguna calificación."""
+        primera, segunda, _, _ = self.inscripciones
+        Calificacion.objects.create(inscripcion=primera, tipo='parcial_1', nota=Decimal('4.0'), peso=60)
+
+        response = self._cargar([
+            {'inscripcion': segunda.id, 'tipo': 'parcial_1', 'nota': '4.0', 'peso': 30},
+            {'inscripcion': primera.id, 'tipo': 'parcial_1', 'nota': '4.0', 'peso': 10},
+            {'inscripcion': segunda.id, 'tipo': 'parcial_1', 'nota': '4.0', 'peso': 10},
+            {'inscripcion': primera.id, 'tipo': 'parcial_2', 'nota': '4.0', 'peso': 30},
+            {'inscripcion': primera.id, 'tipo': 'final', 'nota': '4.0', 'peso': 20},
+            {'inscripcion': 999999, 'tipo': 'final', 'nota': '4.0', 'peso': 20},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        errores = response.data['calificaciones']
+        self.assertEqual(errores[0], {})
+        self.assertIn('tipo', errores[1])
+        self.assertIn('tipo', errores[2])
+        self.assertEqual(errores[3], {})
+        self.assertIn('Actual: 110%', str(errores[4]['peso']))
+        self.assertIn('inscripcion', errores[5])
+        self.assertEqual(Calificacion.objects.count(), 1)
+
+    def test_notificaciones_y_consultas(self):
+        """Test que hay una notificación por calificación y las consultas no crecen con las filas."""
+        with CaptureQueriesContext(connection) as pocas:
+            self._cargar([{'inscripcion': self.inscripciones[0].id, 'tipo': 'final', 'nota': '4.5', 'peso': 50}])
+        with CaptureQueriesContext(connection) as muchas:
+            response = self._cargar([
+                {'inscripcion': inscripcion.id, 'tipo': tipo, 'nota': '3.5', 'peso': 20}
+                for inscripcion in self.inscripciones[1:]
+                for tipo in ('parcial_1', 'parcial_2', 'trabajo')
+            ])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(muchas.captured_queries), len(pocas.captured_queries))
+
+        notificaciones = Notificacion.objects.filter(tipo='calificacion_publicada')
+        self.assertEqual(notificaciones.count(), 10)
+        self.assertIn(
+            'Tu nota final actual es: 4.50',
+            notificaciones.get(usuario=self.inscripciones[0].estudiante).mensaje
+        )
@@ -0,0 +1,165 @@
+"""
+Tests para validators de la app inscripciones.
+"""
+
+import pytest
+from decimal import Decimal
+from datetime import date, timedelta
+from django.db import connection
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from apps.users.models import User
+from apps.materias.grafo import obtener_grafo
+from apps.materias.models import Materia, Prerrequisito, Periodo
+from apps.inscripciones.models import Inscripcion, Calificacion
+from apps.inscripciones.validators import LIMITE_CREDITOS, ValidacionInscripcion
+
+
+URL_INSCRIPCIONES = '/api/v1/inscripciones/inscripciones/'
+
+
+@pytest.mark.django_db
+class TestValidacionInscripcion(TransactionTestCase):
+    """Tests para el motor de validación compartido de inscripciones."""
+
+    def setUp(self):
+        """Configuración inicial para cada test."""
+        self.admin = User.objects.create_user(
+            username='admin',
+            email='admin@test.com',
+            password='password123',
+            role='admin'
+        )
+
+        self.estudiante = User.objects.create_user(
+            username='estudiante1',
+            email='est1@test.com',
+            password='password123',
+            role='estudiante'
+        )
+
+        self.periodo_anterior = Periodo.objects.create(
+            nombre='2023-2',
+            fecha_inicio=date.today() - timedelta(days=200),
+            fecha_fin=date.today() - timedelta(days=80),
+            estado='finalizado'
+        )
+
+        self.periodo = Periodo.objects.create(
+            nombre='2024-1',
+            fecha_inicio=date.today(),
+            fecha_fin=date.today() + timedelta(days=120),
+            estado='inscripciones'
+        )
+
+        self.matematicas = Materia.objects.create(codigo='MAT101', nombre='Matemáticas Básicas', creditos=3)
+        self.fisica = Materia.objects.create(codigo='FIS101', nombre='Física I', creditos=4)
+        self.calculo = Materia.objects.create(codigo='MAT201', nombre='Cálculo I', creditos=4)
+
+        Prerrequisito.objects.create(materia=self.calculo, prerrequisito=self.matematicas, tipo='obligatorio')
+        Prerrequisito.objects.create(materia=self.calculo, prerrequisito=self.fisica, tipo='recomendado')
+
+    def _aprobar_matematicas(self, nota=Decimal('4.0')):
+        inscripcion = Inscripcion.objects.create(
+            estudiante=self.estudiante,
+            materia=self.matematicas,
+            periodo=self.periodo_anterior
+        )
+        Calificacion.objects.create(inscripcion=inscripcion, tipo='final', nota=nota, peso=100)
+
+    def test_reglas_en_una_consulta(self):
+        """Test que con el grafo cargado, créditos y duplicados salen de una consulta."""
+        self._aprobar_matematicas()
+        Inscripcion.objects.create(estudiante=self.estudiante, materia=self.fisica, periodo=self.periodo)
+        obtener_grafo()
+
+        with self.assertNumQueries(1):
+            validacion = ValidacionInscripcion(self.estudiante, self.calculo, self.periodo)
+
+        self.assertTrue(validacion.es_estudiante)
+        self.assertFalse(validacion.duplicada)
+        # El prerrequisito recomendado (física) no bloquea
+        self.assertTrue(validacion.cumple_prerrequisitos)
+        self.assertEqual(validacion.creditos_actuales, 4)
+        self.assertEqual(validacion.creditos_totales, 8)
+        self.assertEqual(validacion.limite_creditos, LIMITE_CREDITOS)
+        self.assertFalse(validacion.excede_creditos)
+
+    def test_prerrequisito_reprobado(self):
+        """Test que un prerrequisito reprobado se informa con su nota."""
+        self._aprobar_matematicas(nota=Decimal('2.5'))
+
+        validacion = ValidacionInscripcion(self.estudiante, self.calculo, self.periodo)
+
+        self.assertEqual(validacion.prerrequisitos_faltantes, [{
+            'id': self.matematicas.id,
+            'nombre': 'Matemáticas Básicas',
+            'codigo': 'MAT101',
+            'inscrito': True,
+            'nota_actual': Decimal('2.5'),
+        }])
+
+    def test_actualizar_no_cuenta_sus_propios_creditos(self):
+        """Test que al guardar una inscripción existente no se suman sus créditos dos veces."""
+        for i in range(2):
+            materia = Materia.objects.create(codigo=f'ELE10{i}', nombre=f'Electiva {i}', creditos=10)
+            Inscripcion.objects.create(estudiante=self.estudiante, materia=materia, periodo=self.periodo)
+        inscripcion = Inscripcion.objects.create(
+            estudiante=self.estudiante,
+            materia=self.fisica,
+            periodo=self.periodo
+        )
+
+        # 10 + 10 + 4 = 24 créditos, justo el límite
+        inscripcion.fecha_retiro = None
+        inscripcion.save()
+
+        validacion = ValidacionInscripcion(self.estudiante, self.fisica, self.periodo)
+        self.assertTrue(validacion.duplicada)
+        self.assertEqual(validacion.creditos_totales, LIMITE_CREDITOS)
+
+    def test_api_valida_una_sola_vez(self):
+        """Test que decoradores, serializer y modelo comparten una validación por request."""
+        self._aprobar_matematicas()
+        client = APIClient()
+        client.force_authenticate(user=self.admin)
+        obtener_grafo()
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = client.post(URL_INSCRIPCIONES, {
+                'estudiante': self.estudiante.id,
+                'materia': self.calculo.id,
+                'periodo': self.periodo.id
+            }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Inscripcion.objects.filter(
+            estudiante=self.estudiante, materia=self.calculo, periodo=self.periodo
+        ).exists())
+        # Una sola lectura de las inscripciones del estudiante, y el grafo sin consultas
+        consultas_validacion = [
+            consulta for consulta in consultas.captured_queries
+            if 'FROM "inscripciones"' in consulta['sql'] and '"materias"."creditos"' in consulta['sql']
+        ]
+        self.assertEqual(len(consultas_validacion), 1)
+        self.assertFalse(any(
+            'FROM "materias_prerrequisitos"' in consulta['sql']
+            for consulta in consultas.captured_queries
+        ))
+
+    def test_api_rechaza_prerrequisito_no_inscrito(self):
+        """Test que los decoradores del ViewSet validan antes de crear."""
+        client = APIClient()
+        client.force_authenticate(user=self.admin)
+
+        response = client.post(URL_INSCRIPCIONES, {
+            'estudiante': self.estudiante.id,
+            'materia': self.calculo.id,
+            'periodo': self.periodo.id
+        }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['codigo_error'], 'PREREQUISITO_NO_INSCRITO')
+        self.assertEqual(response.data['materia_prerrequisito']['codigo'], 'MAT101')
+        self.assertFalse(Inscripcion.objects.filter(materia=self.calculo).exists())
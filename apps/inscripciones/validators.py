@@ -1,4 +1,146 @@
 # validators.py para la app inscripciones
-# Validaciones para inscripciones - prerrequisitos cumplidos, cupos disponibles
+# Validaciones para inscripciones - prerrequisitos cumplidos, límite de créditos
 
-# TODO: validadores cuando los necesitemos 
\ No newline at end of file
+from django.db.models import Q
+
+
+# Créditos activos que un estudiante puede tener en un mismo período
+LIMITE_CREDITOS = 24
+
+# Estados en los que un período admite inscripciones (ver Periodo.es_activo)
+ESTADOS_PERIODO_ACTIVO = ('inscripciones', 'en_curso')
+
+# Atributo del request donde queda la validación ya hecha
+ATRIBUTO_REQUEST = '_validacion_inscripcion'
+
+
+class ValidacionInscripcion:
+    """
+    Reglas para inscribir a un estudiante en una materia y período.
+
+    Los prerrequisitos obligatorios salen del grafo en memoria (ver
+    apps/materias/grafo.py) y todo lo demás de una consulta: las
+    inscripciones del estudiante en el período (créditos activos y
+    duplicados) y en las materias prerrequisito (aprobadas o no). Solo si
+    falta algún prerrequisito se consultan sus nombres para el mensaje. Los
+    decoradores de la vista, el serializer y Inscripcion.clean() usan el
+    mismo resultado dentro de un request.
+    """
+
+    def __init__(self, estudiante, materia, periodo):
+        from apps.inscripciones.models import Inscripcion
+        from apps.materias.grafo import obtener_grafo
+        from apps.materias.models import Materia
+
+        self.estudiante = estudiante
+        self.materia = materia
+        self.periodo = periodo
+        self.es_estudiante = estudiante.role == 'estudiante'
+        self.limite_creditos = LIMITE_CREDITOS
+
+        prerrequisitos = obtener_grafo().prerrequisitos(materia.id, solo_obligatorios=True)
+
+        periodo_id = periodo.id if periodo is not None else None
+        condicion = Q(materia_id__in=prerrequisitos)
+        if periodo_id is not None:
+            condicion |= Q(periodo_id=periodo_id)
+        filas = Inscripcion.objects.filter(condicion, estudiante_id=estudiante.id).values_list(
+            'materia_id', 'periodo_id', 'estado', 'nota_final', 'materia__creditos'
+        )
+
+        self.duplicada = False
+        self.creditos_actuales = 0
+        aprobadas = set()
+        notas = {}
+        for materia_id, fila_periodo_id, estado, nota_final, creditos in filas:
+            if fila_periodo_id == periodo_id:
+                if materia_id == materia.id:
+                    # Es esta misma inscripción (o un duplicado): no suma créditos
+                    self.duplicada = True
+                elif estado == 'activa':
+                    self.creditos_actuales += creditos
+            if estado == 'aprobada':
+                aprobadas.add(materia_id)
+            # Mejor nota final de cada materia inscrita (None si no tiene)
+            mejor = notas.get(materia_id)
+            if nota_final is not None and (mejor is None or nota_final > mejor):
+                notas[materia_id] = nota_final
+            else:
+                notas.setdefault(materia_id, None)
+
+        # Prerrequisitos sin aprobar, por código
+        faltantes = [
+            prerrequisito_id for prerrequisito_id in prerrequisitos
+            if prerrequisito_id not in aprobadas
+        ]
+        self.prerrequisitos_faltantes = []
+        if faltantes:
+            self.prerrequisitos_faltantes = [
+                {
+                    'id': prerrequisito_id,
+                    'nombre': nombre,
+                    'codigo': codigo,
+                    'inscrito': prerrequisito_id in notas,
+                    'nota_actual': notas.get(prerrequisito_id),
+                }
+                for prerrequisito_id, nombre, codigo in Materia.objects.filter(
+                    id__in=faltantes
+                ).order_by('codigo').values_list('id', 'nombre', 'codigo')
+            ]
+
+    @property
+    def cumple_prerrequisitos(self):
+        return not self.prerrequisitos_faltantes
+
+    @property
+    def creditos_totales(self):
+        """Créditos activos del período contando la materia nueva."""
+        return self.creditos_actuales + self.materia.creditos
+
+    @property
+    def excede_creditos(self):
+        return self.creditos_totales > self.limite_creditos
+
+    def corresponde(self, estudiante_id, materia_id, periodo_id):
+        """Verificar si la validación es para esta combinación de ids."""
+        periodo_propio = self.periodo.id if self.periodo is not None else None
+        return (
+            str(self.estudiante.id), str(self.materia.id), str(periodo_propio)
+        ) == (str(estudiante_id), str(materia_id), str(periodo_id))
+
+
+def periodo_activo():
+    """Período más reciente que admite inscripciones, o None."""
+    from apps.materias.models import Periodo
+
+    return Periodo.objects.filter(estado__in=ESTADOS_PERIODO_ACTIVO).first()
+
+
+def validacion_guardada(request, estudiante_id, materia_id, periodo_id):
+    """Validación ya hecha en este request para estos ids, o None."""
+    validacion = getattr(request, ATRIBUTO_REQUEST, None)
+    if validacion is not None and validacion.corresponde(estudiante_id, materia_id, periodo_id):
+        return validacion
+    return None
+
+
+def validar_inscripcion(estudiante, materia, periodo, request=None):
+    """
+    Validar la inscripción de un estudiante a una materia en un período.
+
+    Con un request, el resultado se guarda en él y las siguientes llamadas
+    del mismo request con los mismos datos lo reutilizan sin consultar.
+
+    Returns:
+        ValidacionInscripcion: Resultado de todas las reglas
+    """
+    periodo_id = periodo.id if periodo is not None else None
+    if request is not None:
+        validacion = validacion_guardada(request, estudiante.id, materia.id, periodo_id)
+        if validacion is not None:
+            return validacion
+
+    validacion = ValidacionInscripcion(estudiante, materia, periodo)
+    if request is not None:
+        setattr(request, ATRIBUTO_REQUEST, validacion)
+    return validacion
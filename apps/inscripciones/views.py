@@ -13,6 +13,7 @@ from .models import Inscripcion, Calificacion
 from .serializers import (
     InscripcionSerializer,
     InscripcionCreateSerializer,
+    InscripcionBulkCreateSerializer,
     InscripcionUpdateSerializer,
     InscripcionDetalleSerializer,
     InscripcionListSerializer,
@@ -43,6 +44,8 @@ class InscripcionViewSet(viewsets.ModelViewSet):
         """Retornar el serializer apropiado según la acción."""
         if self.action == 'create':
             return InscripcionCreateSerializer
+        elif self.action == 'bulk_create':
+            return InscripcionBulkCreateSerializer
         elif self.action in ['update', 'partial_update']:
             return InscripcionUpdateSerializer
         elif self.action == 'retrieve':
@@ -55,6 +58,8 @@ class InscripcionViewSet(viewsets.ModelViewSet):
         """Configurar permisos según la acción."""
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
             permission_classes = [IsAdminOrProfesorOrSelf]
+        elif self.action == 'bulk_create':
+            permission_classes = [IsAdminUser]
         else:
             permission_classes = [IsAuthenticated]
         
@@ -69,6 +74,19 @@ class InscripcionViewSet(viewsets.ModelViewSet):
         """
         return super().create(request, *args, **kwargs)
     
+    @action(detail=False, methods=['post'])
+    def bulk_create(self, request):
+        """
+        Inscribir muchos estudiantes a la vez (solo administradores).
+        Las filas inválidas se informan en 'errores' y no impiden crear las demás.
+        """
+        serializer = self.get_serializer(data=request.data)
+        if serializer.is_valid():
+            result = serializer.save()
+            response_status = status.HTTP_201_CREATED if result['creadas'] else status.HTTP_400_BAD_REQUEST
+            return Response(result, status=response_status)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
     def get_queryset(self):
         """
         Filtrar queryset según el rol del usuario y optimizar consultas.
@@ -267,7 +285,8 @@ class CalificacionViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
             result = serializer.save()
-            return Response(result, status=status.HTTP_201_CREATED)
+            calificaciones = CalificacionSerializer(result['calificaciones'], many=True)
+            return Response({'calificaciones': calificaciones.data}, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     @action(detail=False, methods=['get'])
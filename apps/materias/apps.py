@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class MateriasConfig(AppConfig):
+    """
+    Configuración de la app materias.
+    Registra las señales que mantienen el cierre de prerrequisitos.
+    """
+    name = 'apps.materias'
+    verbose_name = 'Materias'
+    
+    def ready(self):
+        """Importar señales cuando la app esté lista."""
+        import apps.materias.signals  # noqa F401
@@ -0,0 +1,204 @@
+# cierre.py para la app materias
+# Cierre transitivo de prerrequisitos - detección de ciclos en una consulta
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+
+
+# Filas por INSERT/UPDATE al escribir el cierre
+TAMANO_LOTE = 1000
+
+
+def _combinar_tipo(*tipos):
+    """Un camino es obligatorio solo si todas sus aristas lo son (None = sin aristas)."""
+    return 'recomendado' if 'recomendado' in tipos else 'obligatorio'
+
+
+def crearia_ciclo(materia_id, prerrequisito_id):
+    """
+    Verificar si hacer a `prerrequisito_id` prerrequisito de `materia_id`
+    cerraría un ciclo: pasa si la materia ya es requisito, directo o
+    indirecto, del prerrequisito (o si son la misma materia).
+    """
+    from .models import CierrePrerrequisito
+
+    if materia_id == prerrequisito_id:
+        return True
+    return CierrePrerrequisito.objects.filter(
+        materia_id=prerrequisito_id,
+        prerrequisito_id=materia_id
+    ).exists()
+
+
+def _caminos_por_arista(materia_id, prerrequisito_id, tipo):
+    """
+    Caminos que pasan por la arista prerrequisito -> materia: cada
+    prerrequisito del prerrequisito (o él mismo) combinado con cada materia
+    que exige a la materia (o ella misma). Se lee el cierre en una consulta.
+
+    Returns:
+        dict: {(materia_id, prerrequisito_id, profundidad, tipo): caminos}
+    """
+    from .models import CierrePrerrequisito
+
+    ancestros = [(prerrequisito_id, 0, None, 1)]
+    descendientes = [(materia_id, 0, None, 1)]
+    filas = CierrePrerrequisito.objects.filter(
+        Q(materia_id=prerrequisito_id) | Q(prerrequisito_id=materia_id)
+    ).values_list('materia_id', 'prerrequisito_id', 'profundidad', 'tipo', 'caminos')
+    for fila_materia, fila_prerrequisito, profundidad, fila_tipo, caminos in filas:
+        if fila_materia == prerrequisito_id:
+            ancestros.append((fila_prerrequisito, profundidad, fila_tipo, caminos))
+        else:
+            descendientes.append((fila_materia, profundidad, fila_tipo, caminos))
+
+    resultado = defaultdict(int)
+    for ancestro, profundidad_a, tipo_a, caminos_a in ancestros:
+        for descendiente, profundidad_d, tipo_d, caminos_d in descendientes:
+            clave = (
+                descendiente,
+                ancestro,
+                profundidad_a + 1 + profundidad_d,
+                _combinar_tipo(tipo_a, tipo, tipo_d),
+            )
+            resultado[clave] += caminos_a * caminos_d
+    return resultado
+
+
+def _aplicar(caminos, signo):
+    """Sumar (signo 1) o restar (signo -1) caminos al cierre."""
+    from .models import CierrePrerrequisito
+
+    if not caminos:
+        return
+
+    existentes = {
+        (fila.materia_id, fila.prerrequisito_id, fila.profundidad, fila.tipo): fila
+        for fila in CierrePrerrequisito.objects.filter(
+            materia_id__in={clave[0] for clave in caminos},
+            prerrequisito_id__in={clave[1] for clave in caminos},
+        )
+    }
+
+    nuevas, cambiadas, vacias = [], [], []
+    for clave, cantidad in caminos.items():
+        fila = existentes.get(clave)
+        if fila is None:
+            if signo > 0:
+                materia_id, prerrequisito_id, profundidad, tipo = clave
+                nuevas.append(CierrePrerrequisito(
+                    materia_id=materia_id,
+                    prerrequisito_id=prerrequisito_id,
+                    profundidad=profundidad,
+                    tipo=tipo,
+                    caminos=cantidad,
+                ))
+            continue
+        fila.caminos += signo * cantidad
+        if fila.caminos > 0:
+            cambiadas.append(fila)
+        else:
+            vacias.append(fila.pk)
+
+    CierrePrerrequisito.objects.bulk_create(nuevas, batch_size=TAMANO_LOTE)
+    CierrePrerrequisito.objects.bulk_update(cambiadas, ['caminos'], batch_size=TAMANO_LOTE)
+    if vacias:
+        CierrePrerrequisito.objects.filter(pk__in=vacias).delete()
+
+
+def agregar_arista(materia_id, prerrequisito_id, tipo):
+    """Sumar al cierre los caminos que abre un prerrequisito nuevo."""
+    with transaction.atomic():
+        _aplicar(_caminos_por_arista(materia_id, prerrequisito_id, tipo), 1)
+
+
+def quitar_arista(materia_id, prerrequisito_id, tipo):
+    """Restar del cierre los caminos que pasaban por un prerrequisito borrado."""
+    with transaction.atomic():
+        _aplicar(_caminos_por_arista(materia_id, prerrequisito_id, tipo), -1)
+
+
+def calcular_cierre(aristas):
+    """
+    Cierre completo a partir de las aristas (materia_id, prerrequisito_id,
+    tipo), recorriendo las materias en orden topológico. Las materias que
+    forman un ciclo quedan fuera.
+
+    Returns:
+        dict: {(materia_id, prerrequisito_id, profundidad, tipo): caminos}
+    """
+    requisitos = defaultdict(list)
+    exige = defaultdict(list)
+    pendientes = defaultdict(int)
+    for materia_id, prerrequisito_id, tipo in aristas:
+        requisitos[materia_id].append((prerrequisito_id, tipo))
+        exige[prerrequisito_id].append(materia_id)
+        pendientes[materia_id] += 1
+
+    materias = set(requisitos) | set(exige)
+    listas = [materia_id for materia_id in materias if not pendientes[materia_id]]
+
+    # Caminos de cada materia hacia sus prerrequisitos
+    por_materia = {}
+    while listas:
+        materia_id = listas.pop()
+        propios = defaultdict(int)
+        for prerrequisito_id, tipo in requisitos[materia_id]:
+            propios[(prerrequisito_id, 1, tipo)] += 1
+            for (ancestro, profundidad, tipo_a), caminos in por_materia[prerrequisito_id].items():
+                propios[(ancestro, profundidad + 1, _combinar_tipo(tipo_a, tipo))] += caminos
+        por_materia[materia_id] = propios
+
+        for siguiente in exige[materia_id]:
+            pendientes[siguiente] -= 1
+            if not pendientes[siguiente]:
+                listas.append(siguiente)
+
+    return {
+        (materia_id, ancestro, profundidad, tipo): caminos
+        for materia_id, propios in por_materia.items()
+        for (ancestro, profundidad, tipo), caminos in propios.items()
+    }
+
+
+def reconstruir_cierre(prerrequisito_modelo=None, cierre_modelo=None):
+    """
+    Recalcular todo el cierre desde la tabla de prerrequisitos. Sirve para
+    la migración inicial y después de cargas que no disparan señales
+    (bulk_create, update()).
+
+    Los modelos se pueden pasar para usar los históricos de una migración.
+
+    Returns:
+        int: Filas escritas
+    """
+    if prerrequisito_modelo is None or cierre_modelo is None:
+        from .models import CierrePrerrequisito, Prerrequisito
+        prerrequisito_modelo = prerrequisito_modelo or Prerrequisito
+        cierre_modelo = cierre_modelo or CierrePrerrequisito
+
+    aristas = prerrequisito_modelo.objects.values_list('materia_id', 'prerrequisito_id', 'tipo')
+    cierre = calcular_cierre(aristas.iterator())
+
+    with transaction.atomic():
+        cierre_modelo.objects.all().delete()
+        cierre_modelo.objects.bulk_create(
+            (
+                cierre_modelo(
+                    materia_id=materia_id,
+                    prerrequisito_id=prerrequisito_id,
+                    profundidad=profundidad,
+                    tipo=tipo,
+                    caminos=caminos,
+                )
+                for (materia_id, prerrequisito_id, profundidad, tipo), caminos in cierre.items()
+            ),
+            batch_size=TAMANO_LOTE,
+        )
+
+    # Las cargas que obligan a reconstruir tampoco avisaron al grafo en memoria
+    from .grafo import invalidar_grafo
+    invalidar_grafo()
+    return len(cierre)
@@ -0,0 +1,176 @@
+# grafo.py para la app materias
+# Grafo de prerrequisitos en memoria del proceso - se recarga cuando cambia su versión
+
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+
+CLAVE_VERSION = 'materias:grafo_prerrequisitos:version'
+
+# (versión, grafo) cargado en este proceso; se reemplaza entero, nunca se modifica
+_cargado = None
+_candado = threading.Lock()
+
+
+class GrafoPrerrequisitos:
+    """
+    Aristas de prerrequisitos como listas de adyacencia compactas.
+
+    Cada dirección (materia -> sus prerrequisitos y prerrequisito -> las
+    materias que lo exigen) guarda los ids de origen ordenados, el inicio
+    de sus vecinos y los vecinos con su marca de obligatorio en arreglos
+    planos: unos pocos bytes por arista y búsquedas binarias sin consultar
+    la base de datos.
+    """
+
+    def __init__(self, aristas):
+        """
+        Args:
+            aristas: Iterable de (materia_id, prerrequisito_id, tipo)
+        """
+        directas, inversas = [], []
+        for materia_id, prerrequisito_id, tipo in aristas:
+            obligatoria = tipo == 'obligatorio'
+            directas.append((materia_id, prerrequisito_id, obligatoria))
+            inversas.append((prerrequisito_id, materia_id, obligatoria))
+        self.total_aristas = len(directas)
+        self._prerrequisitos = self._indexar(directas)
+        self._requeridas_por = self._indexar(inversas)
+
+    @staticmethod
+    def _indexar(aristas):
+        nodos, inicios, vecinos, obligatorias = array('q'), array('q'), array('q'), array('b')
+        for origen, destino, obligatoria in sorted(aristas):
+            if not nodos or nodos[-1] != origen:
+                nodos.append(origen)
+                inicios.append(len(vecinos))
+            vecinos.append(destino)
+            obligatorias.append(obligatoria)
+        inicios.append(len(vecinos))
+        return nodos, inicios, vecinos, obligatorias
+
+    @staticmethod
+    def _vecinos(indice, nodo, solo_obligatorios):
+        nodos, inicios, vecinos, obligatorias = indice
+        posicion = bisect_left(nodos, nodo)
+        if posicion == len(nodos) or nodos[posicion] != nodo:
+            return []
+        return [
+            vecinos[i]
+            for i in range(inicios[posicion], inicios[posicion + 1])
+            if obligatorias[i] or not solo_obligatorios
+        ]
+
+    def prerrequisitos(self, materia_id, solo_obligatorios=False):
+        """Ids de los prerrequisitos directos de una materia."""
+        return self._vecinos(self._prerrequisitos, materia_id, solo_obligatorios)
+
+    def requeridas_por(self, materia_id, solo_obligatorios=False):
+        """Ids de las materias que exigen directamente a esta."""
+        return self._vecinos(self._requeridas_por, materia_id, solo_obligatorios)
+
+    def cadena(self, materia_id, solo_obligatorios=False):
+        """
+        Todos los prerrequisitos de una materia, directos e indirectos.
+
+        Returns:
+            dict: {materia_id: profundidad del camino más corto}, por profundidad
+        """
+        profundidades = {}
+        nivel = [materia_id]
+        profundidad = 0
+        while nivel:
+            profundidad += 1
+            siguiente = []
+            for actual in nivel:
+                for prerrequisito_id in self.prerrequisitos(actual, solo_obligatorios):
+                    if prerrequisito_id not in profundidades and prerrequisito_id != materia_id:
+                        profundidades[prerrequisito_id] = profundidad
+                        siguiente.append(prerrequisito_id)
+            nivel = siguiente
+        return profundidades
+
+
+def _version():
+    """Versión actual del grafo; cambia con cada alta, baja o cambio de prerrequisito."""
+    version = cache.get(CLAVE_VERSION)
+    if version is None:
+        # Un valor inicial que no repita uno anterior si la cache se vació
+        cache.add(CLAVE_VERSION, time.time_ns(), timeout=None)
+        version = cache.get(CLAVE_VERSION)
+    return version
+
+
+def _incrementar_version():
+    try:
+        cache.incr(CLAVE_VERSION)
+    except ValueError:
+        cache.add(CLAVE_VERSION, time.time_ns(), timeout=None)
+
+
+def invalidar_grafo():
+    """
+    Hacer que todos los procesos recarguen el grafo en su próximo uso.
+
+    Se incrementa ahora (este proceso ve el cambio dentro de su transacción)
+    y otra vez al confirmar, por si otro proceso recargó antes del commit y
+    se quedó con el grafo anterior.
+    """
+    _incrementar_version()
+    transaction.on_commit(_incrementar_version)
+
+
+def _invalidado_en_transaccion():
+    """
+    Verificar si la transacción en curso cambió prerrequisitos que todavía
+    no se confirmaron: su incremento de versión sigue pendiente en los
+    callbacks de on_commit (Django los descarta si se revierte el bloque
+    o el savepoint que los registró).
+    """
+    if not connection.in_atomic_block:
+        return False
+    return any(entrada[1] is _incrementar_version for entrada in connection.run_on_commit)
+
+
+def _cargar():
+    from .models import Prerrequisito
+
+    return GrafoPrerrequisitos(
+        Prerrequisito.objects.order_by().values_list('materia_id', 'prerrequisito_id', 'tipo')
+    )
+
+
+def obtener_grafo():
+    """
+    Grafo de prerrequisitos de este proceso, recargado si cambió la versión.
+
+    Si la transacción en curso cambió prerrequisitos sin confirmar, el grafo
+    se lee para esa llamada y no se guarda: incluye cambios que otros
+    procesos no ven y que todavía se pueden deshacer. En cualquier otro
+    caso, dentro o fuera de una transacción (ATOMIC_REQUESTS, cargas
+    masivas), se usa y se guarda el grafo del proceso.
+
+    Returns:
+        GrafoPrerrequisitos
+    """
+    global _cargado
+
+    if _invalidado_en_transaccion():
+        return _cargar()
+
+    version = _version()
+    cargado = _cargado
+    if cargado is not None and cargado[0] == version:
+        return cargado[1]
+
+    with _candado:
+        cargado = _cargado
+        if cargado is None or cargado[0] != version:
+            cargado = (version, _cargar())
+            _cargado = cargado
+    return cargado[1]
@@ -0,0 +1,92 @@
+# Generated by Django 4.2.30 on 2026-10-18 05:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from apps.materias.cierre import reconstruir_cierre
+
+
+def calcular_cierre_inicial(apps, schema_editor):
+    reconstruir_cierre(
+        apps.get_model("materias", "Prerrequisito"),
+        apps.get_model("materias", "CierrePrerrequisito"),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("materias", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CierrePrerrequisito",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "profundidad",
+                    models.PositiveIntegerField(verbose_name="Profundidad"),
+                ),
+                (
+                    "tipo",
+                    models.CharField(
+                        choices=[
+                            ("obligatorio", "Obligatorio"),
+                            ("recomendado", "Recomendado"),
+                        ],
+                        max_length=20,
+                        verbose_name="Tipo",
+                    ),
+                ),
+                (
+                    "caminos",
+                    models.PositiveIntegerField(default=1, verbose_name="Caminos"),
+                ),
+                (
+                    "materia",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        db_index=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="cierre_prerrequisitos",
+                        to="materias.materia",
+                        verbose_name="Materia",
+                    ),
+                ),
+                (
+                    "prerrequisito",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        db_index=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="cierre_requerida_por",
+                        to="materias.materia",
+                        verbose_name="Prerrequisito",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Cierre de prerrequisitos",
+                "verbose_name_plural": "Cierre de prerrequisitos",
+                "db_table": "materias_prerrequisitos_cierre",
+                "indexes": [
+                    models.Index(
+                        fields=["prerrequisito", "materia"],
+                        name="cierre_prerreq_materia_idx",
+                    )
+                ],
+                "unique_together": {
+                    ("materia", "prerrequisito", "profundidad", "tipo")
+                },
+            },
+        ),
+        migrations.RunPython(calcular_cierre_inicial, migrations.RunPython.noop),
+    ]
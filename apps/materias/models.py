@@ -159,18 +159,68 @@ class Prerrequisito(models.Model):
             )
     
     def _crearia_ciclo(self):
-        """Verificar si agregar este prerrequisito crearía un ciclo."""
-        # Implementación simplificada - en producción se necesitaría un algoritmo más robusto
-        prereqs_actuales = set()
-        self._obtener_prerrequisitos_recursivos(self.prerrequisito, prereqs_actuales)
-        return self.materia in prereqs_actuales
-    
-    def _obtener_prerrequisitos_recursivos(self, materia, prereqs_set):
-        """Obtener todos los prerrequisitos de una materia de forma recursiva."""
-        for prereq in materia.prerrequisitos.all():
-            if prereq.prerrequisito not in prereqs_set:
-                prereqs_set.add(prereq.prerrequisito)
-                self._obtener_prerrequisitos_recursivos(prereq.prerrequisito, prereqs_set)
+        """Verificar si agregar este prerrequisito crearía un ciclo (una consulta al cierre)."""
+        from .cierre import crearia_ciclo
+        return crearia_ciclo(self.materia_id, self.prerrequisito_id)
+
+
+class CierrePrerrequisito(models.Model):
+    """
+    Cierre transitivo del grafo de prerrequisitos: una fila por cada forma
+    en que `prerrequisito` es requisito, directo o indirecto, de `materia`.
+
+    `profundidad` es la cantidad de aristas del camino (1 = directo), `tipo`
+    es 'obligatorio' solo si todas las aristas del camino lo son y `caminos`
+    cuenta los caminos distintos con esa profundidad y tipo, para poder
+    restar al quitar una arista sin recorrer el grafo. Lo mantienen las
+    señales de Prerrequisito (ver cierre.py); nunca se edita a mano.
+
+    Las claves foráneas no tienen restricción ni cascada en la base de
+    datos: al borrar una materia, las señales de sus prerrequisitos restan
+    los caminos que pasaban por ella antes de que desaparezcan las filas.
+    """
+    
+    materia = models.ForeignKey(
+        Materia,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        related_name='cierre_prerrequisitos',
+        verbose_name='Materia'
+    )
+    
+    prerrequisito = models.ForeignKey(
+        Materia,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        related_name='cierre_requerida_por',
+        verbose_name='Prerrequisito'
+    )
+    
+    profundidad = models.PositiveIntegerField(verbose_name='Profundidad')
+    
+    tipo = models.CharField(
+        max_length=20,
+        choices=Prerrequisito.TIPO_CHOICES,
+        verbose_name='Tipo'
+    )
+    
+    caminos = models.PositiveIntegerField(default=1, verbose_name='Caminos')
+    
+    class Meta:
+        verbose_name = 'Cierre de prerrequisitos'
+        verbose_name_plural = 'Cierre de prerrequisitos'
+        db_table = 'materias_prerrequisitos_cierre'
+        # La restricción única sirve las búsquedas por materia (sus prerrequisitos)
+        # y el índice las búsquedas por prerrequisito (las materias que lo exigen)
+        unique_together = ['materia', 'prerrequisito', 'profundidad', 'tipo']
+        indexes = [
+            models.Index(fields=['prerrequisito', 'materia'], name='cierre_prerreq_materia_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.materia_id} requiere {self.prerrequisito_id} (profundidad {self.profundidad})"
 
 
 class Periodo(models.Model):
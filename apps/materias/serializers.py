@@ -3,6 +3,7 @@
 
 from rest_framework import serializers
 from .models import Materia, Prerrequisito, Periodo
+from .cierre import crearia_ciclo
 from apps.users.serializers import UserSerializer
 
 
@@ -109,6 +110,12 @@ class PrerrequisitoCreateSerializer(serializers.ModelSerializer):
                 'Una materia no puede ser prerrequisito de sí misma.'
             )
         
+        # Verificar que no se cierre un ciclo de prerrequisitos
+        if crearia_ciclo(materia.id, prerrequisito.id):
+            raise serializers.ValidationError(
+                'No se puede crear un ciclo de prerrequisitos.'
+            )
+        
         # Verificar que no exista ya este prerrequisito
         if Prerrequisito.objects.filter(
             materia=materia,
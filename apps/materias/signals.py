@@ -1,4 +1,50 @@
 # signals.py para la app materias
-# Señales automáticas - notificar cuando se abren cupos, cambios de horario
+# Señales automáticas - mantener el cierre y el grafo de prerrequisitos
 
-# TODO: señales cuando las necesitemos 
\ No newline at end of file
+from django.db.models.signals import post_migrate, post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Prerrequisito
+from .cierre import agregar_arista, quitar_arista
+from .grafo import invalidar_grafo
+
+
+@receiver(pre_save, sender=Prerrequisito)
+def prerrequisito_por_guardar(sender, instance, **kwargs):
+    """Anotar la arista anterior si un prerrequisito existente va a cambiar."""
+    instance._arista_anterior = None
+    if instance.pk is None:
+        return
+    instance._arista_anterior = Prerrequisito.objects.filter(pk=instance.pk).values_list(
+        'materia_id', 'prerrequisito_id', 'tipo'
+    ).first()
+
+
+@receiver(post_save, sender=Prerrequisito)
+def prerrequisito_guardado(sender, instance, created, **kwargs):
+    """Sumar al cierre la arista nueva (y restar la anterior si cambió)."""
+    arista = (instance.materia_id, instance.prerrequisito_id, instance.tipo)
+    anterior = getattr(instance, '_arista_anterior', None)
+    if anterior == arista:
+        return
+    if anterior is not None:
+        quitar_arista(*anterior)
+    agregar_arista(*arista)
+    invalidar_grafo()
+
+
+@receiver(post_delete, sender=Prerrequisito)
+def prerrequisito_eliminado(sender, instance, **kwargs):
+    """Restar del cierre los caminos que pasaban por el prerrequisito."""
+    quitar_arista(instance.materia_id, instance.prerrequisito_id, instance.tipo)
+    invalidar_grafo()
+
+
+@receiver(post_migrate)
+def base_migrada(sender, **kwargs):
+    """
+    Recargar el grafo después de migrar o de vaciar la base (flush), que
+    cambian los prerrequisitos sin pasar por las señales del modelo.
+    """
+    if sender.name == 'apps.materias':
+        invalidar_grafo()
@@ -0,0 +1,105 @@
+"""
+Tests para el cierre transitivo de prerrequisitos de la app materias.
+"""
+
+import pytest
+from django.test import TestCase
+from django.core.exceptions import ValidationError
+from apps.materias.cierre import crearia_ciclo, reconstruir_cierre
+from apps.materias.models import Materia, Prerrequisito, CierrePrerrequisito
+from apps.materias.serializers import PrerrequisitoCreateSerializer
+
+
+@pytest.mark.django_db
+class TestCierrePrerrequisitos(TestCase):
+    """Tests para el mantenimiento y las consultas del cierre."""
+
+    def setUp(self):
+        """Configuración inicial: álgebra <- cálculo I <- cálculo II <- ecuaciones."""
+        self.algebra = Materia.objects.create(codigo='MAT100', nombre='Álgebra', creditos=3)
+        self.calculo_1 = Materia.objects.create(codigo='MAT101', nombre='Cálculo I', creditos=4)
+        self.calculo_2 = Materia.objects.create(codigo='MAT102', nombre='Cálculo II', creditos=4)
+        self.ecuaciones = Materia.objects.create(codigo='MAT201', nombre='Ecuaciones', creditos=4)
+
+        Prerrequisito.objects.create(materia=self.calculo_1, prerrequisito=self.algebra)
+        Prerrequisito.objects.create(materia=self.calculo_2, prerrequisito=self.calculo_1)
+        Prerrequisito.objects.create(materia=self.ecuaciones, prerrequisito=self.calculo_2)
+
+    def _cierre(self):
+        return set(CierrePrerrequisito.objects.values_list(
+            'materia__codigo', 'prerrequisito__codigo', 'profundidad', 'tipo', 'caminos'
+        ))
+
+    def test_cadena(self):
+        """Test que cada materia queda ligada a todos sus prerrequisitos con su profundidad."""
+        self.assertEqual(self._cierre(), {
+            ('MAT101', 'MAT100', 1, 'obligatorio', 1),
+            ('MAT102', 'MAT101', 1, 'obligatorio', 1),
+            ('MAT102', 'MAT100', 2, 'obligatorio', 1),
+            ('MAT201', 'MAT102', 1, 'obligatorio', 1),
+            ('MAT201', 'MAT101', 2, 'obligatorio', 1),
+            ('MAT201', 'MAT100', 3, 'obligatorio', 1),
+        })
+
+    def test_ciclo_en_una_consulta(self):
+        """Test que detectar un ciclo indirecto cuesta una consulta."""
+        with self.assertNumQueries(1):
+            self.assertTrue(crearia_ciclo(self.algebra.id, self.ecuaciones.id))
+        self.assertFalse(crearia_ciclo(self.ecuaciones.id, self.algebra.id))
+
+        with self.assertRaises(ValidationError):
+            Prerrequisito(materia=self.algebra, prerrequisito=self.ecuaciones).full_clean()
+
+        serializer = PrerrequisitoCreateSerializer(data={
+            'materia': self.algebra.id,
+            'prerrequisito': self.calculo_2.id,
+            'tipo': 'obligatorio'
+        })
+        self.assertFalse(serializer.is_valid())
+
+    def test_caminos_multiples_y_borrado(self):
+        """Test que un prerrequisito alcanzable por dos caminos sobrevive al borrar uno."""
+        atajo = Prerrequisito.objects.create(
+            materia=self.ecuaciones,
+            prerrequisito=self.calculo_1,
+            tipo='recomendado'
+        )
+        self.assertIn(('MAT201', 'MAT101', 1, 'recomendado', 1), self._cierre())
+        self.assertIn(('MAT201', 'MAT100', 2, 'recomendado', 1), self._cierre())
+
+        # El camino obligatorio de profundidad 3 se conserva junto al atajo
+        self.assertIn(('MAT201', 'MAT100', 3, 'obligatorio', 1), self._cierre())
+
+        atajo.delete()
+        self.assertNotIn(('MAT201', 'MAT101', 1, 'recomendado', 1), self._cierre())
+        self.assertIn(('MAT201', 'MAT101', 2, 'obligatorio', 1), self._cierre())
+
+    def test_cambio_de_tipo(self):
+        """Test que cambiar el tipo de una arista cambia el de los caminos que pasan por ella."""
+        arista = Prerrequisito.objects.get(materia=self.calculo_2)
+        arista.tipo = 'recomendado'
+        arista.save()
+
+        self.assertIn(('MAT201', 'MAT100', 3, 'recomendado', 1), self._cierre())
+        self.assertIn(('MAT101', 'MAT100', 1, 'obligatorio', 1), self._cierre())
+        self.assertFalse(CierrePrerrequisito.objects.filter(
+            materia=self.ecuaciones, prerrequisito=self.algebra, tipo='obligatorio'
+        ).exists())
+
+    def test_borrar_materia_intermedia(self):
+        """Test que al borrar una materia desaparecen los caminos que pasaban por ella."""
+        self.calculo_2.delete()
+
+        self.assertEqual(self._cierre(), {('MAT101', 'MAT100', 1, 'obligatorio', 1)})
+
+    def test_reconstruir_coincide_con_incremental(self):
+        """Test que reconstruir desde cero da el mismo cierre que las señales."""
+        Prerrequisito.objects.create(
+            materia=self.ecuaciones,
+            prerrequisito=self.algebra,
+            tipo='recomendado'
+        )
+        incremental = self._cierre()
+
+        self.assertEqual(reconstruir_cierre(), len(incremental))
+        self.assertEqual(self._cierre(), incremental)
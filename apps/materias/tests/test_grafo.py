@@ -0,0 +1,112 @@
+"""
+Tests para el grafo de prerrequisitos en memoria de la app materias.
+"""
+
+import pytest
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
+from apps.materias import grafo
+from apps.materias.grafo import CLAVE_VERSION, GrafoPrerrequisitos, obtener_grafo
+from apps.materias.models import Materia, Prerrequisito
+
+
+class TestGrafoPrerrequisitos(TestCase):
+    """Tests para las consultas sobre las listas de adyacencia."""
+
+    def setUp(self):
+        """Configuración inicial: 1 <- 2 <- 4, 1 <- 3 <- 4 (recomendado) y 4 <- 5."""
+        self.grafo = GrafoPrerrequisitos([
+            (2, 1, 'obligatorio'),
+            (3, 1, 'obligatorio'),
+            (4, 2, 'obligatorio'),
+            (4, 3, 'recomendado'),
+            (5, 4, 'obligatorio'),
+        ])
+
+    def test_vecinos_directos(self):
+        """Test de prerrequisitos directos y de las materias que los exigen."""
+        self.assertEqual(self.grafo.total_aristas, 5)
+        self.assertEqual(self.grafo.prerrequisitos(4), [2, 3])
+        self.assertEqual(self.grafo.prerrequisitos(4, solo_obligatorios=True), [2])
+        self.assertEqual(self.grafo.requeridas_por(1), [2, 3])
+        self.assertEqual(self.grafo.prerrequisitos(1), [])
+        self.assertEqual(self.grafo.prerrequisitos(99), [])
+
+    def test_cadena(self):
+        """Test de la cadena completa con la profundidad del camino más corto."""
+        self.assertEqual(self.grafo.cadena(5), {4: 1, 2: 2, 3: 2, 1: 3})
+        self.assertEqual(self.grafo.cadena(5, solo_obligatorios=True), {4: 1, 2: 2, 1: 3})
+        self.assertEqual(self.grafo.cadena(1), {})
+
+
+@pytest.mark.django_db
+class TestGrafoVersionado(TransactionTestCase):
+    """Tests para la carga por proceso y la invalidación por versión."""
+
+    def setUp(self):
+        """Configuración inicial para cada test."""
+        self.algebra = Materia.objects.create(codigo='MAT100', nombre='Álgebra', creditos=3)
+        self.calculo = Materia.objects.create(codigo='MAT101', nombre='Cálculo I', creditos=4)
+        self.fisica = Materia.objects.create(codigo='FIS101', nombre='Física I', creditos=4)
+        Prerrequisito.objects.create(materia=self.calculo, prerrequisito=self.algebra)
+
+    def test_se_carga_una_vez(self):
+        """Test que el grafo se lee una vez y después no consulta la base."""
+        obtener_grafo()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(obtener_grafo().prerrequisitos(self.calculo.id), [self.algebra.id])
+
+    def test_cambios_de_prerrequisitos_invalidan(self):
+        """Test que altas, cambios y bajas de prerrequisitos cambian la versión."""
+        obtener_grafo()
+        version = cache.get(CLAVE_VERSION)
+
+        arista = Prerrequisito.objects.create(materia=self.fisica, prerrequisito=self.calculo)
+        self.assertNotEqual(cache.get(CLAVE_VERSION), version)
+        self.assertEqual(obtener_grafo().cadena(self.fisica.id), {self.calculo.id: 1, self.algebra.id: 2})
+
+        arista.tipo = 'recomendado'
+        arista.save()
+        self.assertEqual(obtener_grafo().prerrequisitos(self.fisica.id, solo_obligatorios=True), [])
+
+        arista.delete()
+        self.assertEqual(obtener_grafo().prerrequisitos(self.fisica.id), [])
+
+    def test_cache_vaciada(self):
+        """Test que si la cache pierde la versión el grafo se vuelve a leer."""
+        viejo = obtener_grafo()
+        cache.delete(CLAVE_VERSION)
+
+        self.assertIsNot(obtener_grafo(), viejo)
+        self.assertEqual(grafo._cargado[0], cache.get(CLAVE_VERSION))
+
+    def test_dentro_de_transaccion_usa_el_grafo_guardado(self):
+        """Test que dentro de un bloque atómico sin cambios el grafo no se relee."""
+        from django.db import transaction
+
+        with transaction.atomic():
+            obtener_grafo()
+            with self.assertNumQueries(0):
+                self.assertEqual(obtener_grafo().prerrequisitos(self.calculo.id), [self.algebra.id])
+
+    def test_cambios_sin_confirmar_no_se_guardan(self):
+        """Test que la transacción que cambia prerrequisitos ve su grafo y los demás no."""
+        from django.db import transaction
+
+        viejo = obtener_grafo()
+
+        class Revertir(Exception):
+            pass
+
+        with self.assertRaises(Revertir):
+            with transaction.atomic():
+                Prerrequisito.objects.create(materia=self.fisica, prerrequisito=self.calculo)
+                self.assertEqual(obtener_grafo().prerrequisitos(self.fisica.id), [self.calculo.id])
+                # Se lee de nuevo en cada llamada mientras el cambio siga pendiente
+                with self.assertNumQueries(1):
+                    obtener_grafo()
+                raise Revertir()
+
+        self.assertEqual(obtener_grafo().prerrequisitos(self.fisica.id), [])
+        self.assertIsNot(grafo._cargado[1], viejo)
@@ -9,6 +9,7 @@ from django.db.models import Q, Count, Avg
 from django.shortcuts import get_object_or_404
 
 from .models import Materia, Prerrequisito, Periodo
+from .grafo import obtener_grafo
 from .serializers import (
     MateriaSerializer,
     MateriaCreateSerializer,
@@ -130,6 +131,37 @@ class MateriaViewSet(viewsets.ModelViewSet):
             'estudiantes': estudiantes
         })
     
+    @action(detail=True, methods=['get'])
+    def prerrequisitos_transitivos(self, request, pk=None):
+        """
+        Obtener todos los prerrequisitos de una materia, directos e indirectos.
+        Con ?obligatorios=true solo los que se exigen por caminos obligatorios.
+        """
+        materia = self.get_object()
+        solo_obligatorios = request.query_params.get('obligatorios', '').lower() in ('1', 'true')
+        
+        # La estructura sale del grafo en memoria; a la base solo se piden los datos
+        cadena = obtener_grafo().cadena(materia.id, solo_obligatorios=solo_obligatorios)
+        prerrequisitos = sorted(
+            (
+                {
+                    'id': prerrequisito.id,
+                    'codigo': prerrequisito.codigo,
+                    'nombre': prerrequisito.nombre,
+                    'creditos': prerrequisito.creditos,
+                    'profundidad': cadena[prerrequisito.id]
+                }
+                for prerrequisito in Materia.objects.filter(id__in=cadena)
+            ),
+            key=lambda prerrequisito: (prerrequisito['profundidad'], prerrequisito['codigo'])
+        )
+        
+        return Response({
+            'materia': materia.codigo,
+            'total_prerrequisitos': len(prerrequisitos),
+            'prerrequisitos': prerrequisitos
+        })
+    
     @action(detail=False, methods=['get'])
     def disponibles(self, request):
         """Obtener materias disponibles para inscripción."""
@@ -171,6 +171,41 @@ class Notificacion(models.Model):
             mensaje=mensaje.strip()
         )
     
+    @classmethod
+    def notificar_inscripciones_exitosas(cls, inscripciones_por_estudiante):
+        """
+        Crear una notificación por estudiante con todas sus inscripciones
+        nuevas (inscripción masiva), en un solo INSERT.
+        
+        Args:
+            inscripciones_por_estudiante: {estudiante: [inscripciones]} con
+                materia y periodo ya cargados
+        """
+        notificaciones = []
+        for estudiante, inscripciones in inscripciones_por_estudiante.items():
+            detalle = '\n'.join(
+                f"        - {inscripcion.materia.nombre} ({inscripcion.materia.codigo}), "
+                f"{inscripcion.materia.creditos} créditos, período {inscripcion.periodo.nombre}"
+                for inscripcion in inscripciones
+            )
+            mensaje = f"""
+        Hola {estudiante.get_full_name()},
+        
+        Fuiste inscrito en {len(inscripciones)} materias:
+        
+{detalle}
+        
+        ¡Buena suerte en tus cursos!
+        """
+            notificaciones.append(cls(
+                usuario=estudiante,
+                tipo='inscripcion_exitosa',
+                titulo=f"Inscripciones Exitosas - {len(inscripciones)} materias",
+                mensaje=mensaje.strip()
+            ))
+        
+        return cls.objects.bulk_create(notificaciones)
+    
     @classmethod
     def notificar_inscripcion_rechazada(cls, estudiante, materia, periodo, motivo):
         """Crear notificación de inscripción rechazada."""
@@ -196,6 +231,26 @@ class Notificacion(models.Model):
     @classmethod
     def notificar_calificacion_publicada(cls, calificacion):
         """Crear notificación de calificación publicada."""
+        return cls.crear_notificacion(**cls._datos_calificacion_publicada(calificacion))
+    
+    @classmethod
+    def notificar_calificaciones_publicadas(cls, calificaciones):
+        """
+        Crear las notificaciones de una carga de calificaciones en un solo
+        INSERT, una por calificación como en la carga individual.
+        
+        Args:
+            calificaciones: Calificaciones con inscripción, estudiante y
+                materia ya cargados
+        """
+        return cls.objects.bulk_create(
+            cls(**cls._datos_calificacion_publicada(calificacion))
+            for calificacion in calificaciones
+        )
+    
+    @staticmethod
+    def _datos_calificacion_publicada(calificacion):
+        """Campos de la notificación de una calificación publicada."""
         inscripcion = calificacion.inscripcion
         titulo = f"Nueva Calificación - {inscripcion.materia.codigo}"
         mensaje = f"""
@@ -212,12 +267,12 @@ class Notificacion(models.Model):
         Tu nota final actual es: {inscripcion.nota_final or 'Pendiente'}
         """
         
-        return cls.crear_notificacion(
-            usuario=inscripcion.estudiante,
-            tipo='calificacion_publicada',
-            titulo=titulo,
-            mensaje=mensaje.strip()
-        )
+        return {
+            'usuario': inscripcion.estudiante,
+            'tipo': 'calificacion_publicada',
+            'titulo': titulo,
+            'mensaje': mensaje.strip(),
+        }
     
     @classmethod
     def notificar_materia_asignada(cls, materia, profesor):
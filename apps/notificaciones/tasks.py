@@ -197,6 +197,51 @@ def configurar_tareas_periodicas():
         if created:
             tareas_creadas.append('Resumen diario notificaciones')
         
+        # 4. Tarea diaria: Limpieza por lotes de reportes antiguos (3:00 AM)
+        schedule_reportes, created = CrontabSchedule.objects.get_or_create(
+            minute=0,
+            hour=3,
+            day_of_week='*',
+            day_of_month='*',
+            month_of_year='*',
+        )
+        
+        tarea_reportes, created = PeriodicTask.objects.get_or_create(
+            crontab=schedule_reportes,
+            name='Limpieza Automática de Reportes Antiguos',
+            task='apps.reportes.tasks.limpiar_reportes_antiguos_task',
+            defaults={
+                'enabled': True,
+                'kwargs': json.dumps({'dias': 30}),
+                'description': 'Elimina por lotes reportes y archivos con más de 30 días'
+            }
+        )
+        
+        if created:
+            tareas_creadas.append('Limpieza reportes')
+        
+        # 5. Tarea horaria: Resúmenes de inscripciones modificadas con update()
+        schedule_resumenes, created = CrontabSchedule.objects.get_or_create(
+            minute=15,
+            hour='*',
+            day_of_week='*',
+            day_of_month='*',
+            month_of_year='*',
+        )
+        
+        tarea_resumenes, created = PeriodicTask.objects.get_or_create(
+            crontab=schedule_resumenes,
+            name='Actualización de Resúmenes de Inscripciones',
+            task='apps.reportes.tasks.actualizar_resumenes_task',
+            defaults={
+                'enabled': True,
+                'description': 'Recalcula los resúmenes por período y materia con inscripciones modificadas'
+            }
+        )
+        
+        if created:
+            tareas_creadas.append('Resúmenes inscripciones')
+        
         resultado = {
             'tareas_configuradas': len(tareas_creadas),
             'nuevas_tareas': tareas_creadas,
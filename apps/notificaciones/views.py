@@ -5,7 +5,6 @@ from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q
 from django.utils import timezone
 from datetime import datetime
 
@@ -26,9 +25,14 @@ from .signals import (
     crear_notificacion_sistema,
     crear_recordatorio
 )
+from apps.common.busqueda import BusquedaTexto, PaginacionBusqueda
 from apps.users.permissions import IsAdminUser
 
 
+# Índices creados en la migración 0002_notificacion_busqueda
+BUSQUEDA_NOTIFICACIONES = BusquedaTexto('notificaciones', ['titulo', 'mensaje'], modo='palabras')
+
+
 class NotificacionViewSet(viewsets.ModelViewSet):
     """ViewSet para gestión de notificaciones."""
     
@@ -279,7 +283,7 @@ class NotificacionViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def buscar(self, request):
-        """Buscar notificaciones por texto."""
+        """Buscar notificaciones por título y mensaje, de las más relevantes a las menos."""
         query = request.query_params.get('q', '')
         
         if not query:
@@ -288,11 +292,9 @@ class NotificacionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        notificaciones = self.get_queryset().filter(
-            Q(titulo__icontains=query) |
-            Q(mensaje__icontains=query) |
-            Q(tipo__icontains=query)
-        )
+        notificaciones = BUSQUEDA_NOTIFICACIONES.filtrar(self.get_queryset(), query)
         
-        serializer = self.get_serializer(notificaciones, many=True)
-        return Response(serializer.data) 
\ No newline at end of file
+        paginador = PaginacionBusqueda()
+        pagina = paginador.paginate_queryset(notificaciones, request, view=self)
+        serializer = self.get_serializer(pagina, many=True)
+        return paginador.get_paginated_response(serializer.data)
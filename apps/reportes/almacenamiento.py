@@ -0,0 +1,369 @@
+# almacenamiento.py para la app reportes
+# Dónde se guardan los archivos de reportes, a través de la API Storage de Django
+
+import hashlib
+import io
+import os
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import File
+from django.core.files.storage import FileSystemStorage, Storage
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+# Backends disponibles por nombre corto en REPORTES_ALMACENAMIENTO; también
+# se acepta la ruta de cualquier clase Storage (por ejemplo la de S3 de
+# django-storages)
+BACKENDS = {
+    'local': 'apps.reportes.almacenamiento.AlmacenamientoLocal',
+    'tmpfs': 'apps.reportes.almacenamiento.AlmacenamientoTmpfs',
+    'memoria': 'apps.reportes.almacenamiento.AlmacenamientoObjetosMemoria',
+}
+
+# S3 exige al menos 5 MB por parte, salvo la última
+TAMANO_PARTE_MINIMO = 5 * 1024 * 1024
+TAMANO_PARTE = 8 * 1024 * 1024
+
+TAMANO_BLOQUE_LECTURA = 1024 * 1024
+
+
+class AlmacenamientoLocal(FileSystemStorage):
+    """
+    Reportes en un directorio del nodo, por defecto MEDIA_ROOT/reportes.
+
+    Solo sirve si web y workers ven el mismo directorio (mismo nodo o un
+    volumen compartido).
+    """
+
+    def __init__(self, location=None, **kwargs):
+        if location is None:
+            location = os.path.join(settings.MEDIA_ROOT, 'reportes')
+        super().__init__(location=location, **kwargs)
+
+
+class AlmacenamientoTmpfs(AlmacenamientoLocal):
+    """
+    Reportes en un tmpfs (memoria del nodo), por defecto REPORTES_TMPFS_DIR.
+
+    Evita el disco en reportes de vida corta, pero los archivos se pierden al
+    reiniciar el nodo y ocupan RAM hasta que la limpieza los borra.
+    """
+
+    def __init__(self, location=None, **kwargs):
+        if location is None:
+            location = getattr(settings, 'REPORTES_TMPFS_DIR', '/dev/shm/reportes')
+        super().__init__(location=location, **kwargs)
+
+
+class AlmacenamientoObjetosMemoria(Storage):
+    """
+    Almacenamiento de objetos en memoria con la semántica de S3, para
+    desarrollo y tests sin un bucket real.
+
+    Como S3: los nombres son claves planas, guardar sobre una clave existente
+    la reemplaza, no hay rutas locales y los objetos grandes se suben en
+    partes (multipart) que solo quedan visibles al completar la subida. Los
+    buckets se comparten entre instancias del mismo proceso.
+    """
+
+    _buckets = {}
+    _subidas = {}
+    _lock = threading.Lock()
+
+    def __init__(self, bucket='reportes', tamano_parte=None, tamano_parte_minimo=TAMANO_PARTE_MINIMO):
+        self.bucket = bucket
+        self.tamano_parte_minimo = tamano_parte_minimo
+        self.tamano_parte = max(
+            tamano_parte or getattr(settings, 'REPORTES_TAMANO_PARTE', TAMANO_PARTE),
+            tamano_parte_minimo
+        )
+
+    @property
+    def _objetos(self):
+        with self._lock:
+            return self._buckets.setdefault(self.bucket, {})
+
+    @classmethod
+    def vaciar(cls):
+        """Borrar todos los buckets y subidas en curso."""
+        with cls._lock:
+            cls._buckets.clear()
+            cls._subidas.clear()
+
+    def _open(self, name, mode='rb'):
+        if 'w' in mode or 'a' in mode:
+            raise ValueError("Los objetos se escriben con save() o con una subida multipart.")
+        try:
+            datos, _ = self._objetos[name]
+        except KeyError:
+            raise FileNotFoundError(name)
+        return File(io.BytesIO(datos), name=name)
+
+    def _save(self, name, content):
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        self._objetos[name] = (b''.join(content.chunks()), timezone.now())
+        return name
+
+    def get_available_name(self, name, max_length=None):
+        # Como en S3, guardar sobre una clave existente la reemplaza
+        return name
+
+    def exists(self, name):
+        return name in self._objetos
+
+    def delete(self, name):
+        self._objetos.pop(name, None)
+
+    def size(self, name):
+        try:
+            return len(self._objetos[name][0])
+        except KeyError:
+            raise FileNotFoundError(name)
+
+    def get_modified_time(self, name):
+        try:
+            return self._objetos[name][1]
+        except KeyError:
+            raise FileNotFoundError(name)
+
+    def listdir(self, path):
+        prefijo = f"{path.rstrip('/')}/" if path else ''
+        directorios, archivos = set(), []
+        for nombre in list(self._objetos):
+            if not nombre.startswith(prefijo):
+                continue
+            resto = nombre[len(prefijo):]
+            if '/' in resto:
+                directorios.add(resto.split('/', 1)[0])
+            else:
+                archivos.append(resto)
+        return sorted(directorios), sorted(archivos)
+
+    # Subida multipart (CreateMultipartUpload / UploadPart / CompleteMultipartUpload)
+
+    def iniciar_multiparte(self, name):
+        """Iniciar una subida en partes. Retorna el id de la subida."""
+        subida_id = uuid.uuid4().hex
+        with self._lock:
+            self._subidas[subida_id] = (self.bucket, name, {})
+        return subida_id
+
+    def subir_parte(self, subida_id, numero, datos):
+        """Subir la parte `numero` (desde 1) de una subida en curso."""
+        with self._lock:
+            self._subidas[subida_id][2][numero] = bytes(datos)
+
+    def completar_multiparte(self, subida_id):
+        """
+        Unir las partes en orden y publicar el objeto.
+
+        Raises:
+            ValueError: Si una parte que no es la última es menor al mínimo
+        """
+        with self._lock:
+            _, name, partes = self._subidas.pop(subida_id)
+
+        numeros = sorted(partes)
+        for numero in numeros[:-1]:
+            if len(partes[numero]) < self.tamano_parte_minimo:
+                raise ValueError(f"La parte {numero} de '{name}' es menor al mínimo de una subida multipart.")
+
+        self._objetos[name] = (b''.join(partes[numero] for numero in numeros), timezone.now())
+        return name
+
+    def abortar_multiparte(self, subida_id):
+        """Descartar una subida en curso y sus partes."""
+        with self._lock:
+            self._subidas.pop(subida_id, None)
+
+
+def almacenamiento_reportes():
+    """Instancia del almacenamiento configurado en REPORTES_ALMACENAMIENTO."""
+    backend = getattr(settings, 'REPORTES_ALMACENAMIENTO', 'local') or 'local'
+    clase = import_string(BACKENDS.get(backend, backend))
+    return clase(**getattr(settings, 'REPORTES_ALMACENAMIENTO_OPCIONES', {}))
+
+
+def ruta_local(nombre, almacenamiento=None):
+    """Ruta en el sistema de archivos del nodo, o None si el almacenamiento no es local."""
+    almacenamiento = almacenamiento or almacenamiento_reportes()
+    try:
+        return almacenamiento.path(nombre)
+    except NotImplementedError:
+        return None
+
+
+class _Escritura(io.RawIOBase):
+    """
+    Archivo binario de solo escritura hacia el almacenamiento.
+
+    Calcula el SHA-256 de los bytes a medida que pasan, así que el checksum
+    del reporte queda listo al cerrar sin volver a leer el archivo.
+    """
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.sha = hashlib.sha256()
+        self.posicion = 0
+
+    @property
+    def checksum(self):
+        return self.sha.hexdigest()
+
+    def writable(self):
+        return True
+
+    def tell(self):
+        return self.posicion
+
+    def write(self, datos):
+        if self.closed:
+            raise ValueError("Escritura sobre un archivo cerrado.")
+        self.sha.update(datos)
+        self._escribir(datos)
+        self.posicion += len(datos)
+        return len(datos)
+
+    def close(self):
+        if not self.closed:
+            try:
+                self._finalizar()
+            finally:
+                super().close()
+
+    def _escribir(self, datos):
+        raise NotImplementedError
+
+    def _finalizar(self):
+        raise NotImplementedError
+
+
+class EscrituraArchivo(_Escritura):
+    """Escritura sobre un archivo ya abierto (local o el que devuelve Storage.open)."""
+
+    def __init__(self, nombre, archivo):
+        super().__init__(nombre)
+        self.archivo = archivo
+
+    def _escribir(self, datos):
+        self.archivo.write(datos)
+
+    def _finalizar(self):
+        self.archivo.close()
+
+
+class EscrituraMultiparte(_Escritura):
+    """
+    Escritura en partes de `tamano_parte` bytes mientras se genera el
+    reporte, sin armar el archivo completo en memoria ni en disco.
+
+    La subida empieza con la primera parte llena y se completa al cerrar.
+    """
+
+    def __init__(self, nombre, almacenamiento):
+        super().__init__(nombre)
+        self.almacenamiento = almacenamiento
+        self.tamano_parte = getattr(almacenamiento, 'tamano_parte', TAMANO_PARTE)
+        self.pendiente = bytearray()
+        self.subida_id = None
+        self.partes = 0
+
+    def _subir(self, datos):
+        if self.subida_id is None:
+            self.subida_id = self.almacenamiento.iniciar_multiparte(self.nombre)
+        self.partes += 1
+        self.almacenamiento.subir_parte(self.subida_id, self.partes, datos)
+
+    def _escribir(self, datos):
+        self.pendiente += datos
+        while len(self.pendiente) >= self.tamano_parte:
+            self._subir(self.pendiente[:self.tamano_parte])
+            del self.pendiente[:self.tamano_parte]
+
+    def _finalizar(self):
+        try:
+            # La última parte puede ser menor al mínimo (o la única, vacía)
+            if self.pendiente or not self.partes:
+                self._subir(self.pendiente)
+            self.almacenamiento.completar_multiparte(self.subida_id)
+        except Exception:
+            if self.subida_id is not None:
+                self.almacenamiento.abortar_multiparte(self.subida_id)
+            raise
+
+
+def abrir_destino(nombre, almacenamiento=None):
+    """
+    Abrir un archivo del almacenamiento para escribirlo en binario.
+
+    Los almacenamientos con subida multipart reciben el archivo por partes;
+    los locales se escriben directo en su ruta, y el resto a través de
+    Storage.open(nombre, 'wb').
+    """
+    almacenamiento = almacenamiento or almacenamiento_reportes()
+    if hasattr(almacenamiento, 'iniciar_multiparte'):
+        return EscrituraMultiparte(nombre, almacenamiento)
+
+    ruta = ruta_local(nombre, almacenamiento)
+    if ruta is None:
+        return EscrituraArchivo(nombre, almacenamiento.open(nombre, 'wb'))
+
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    return EscrituraArchivo(nombre, open(ruta, 'wb'))
+
+
+def abrir_origen(nombre, almacenamiento=None):
+    """Abrir un archivo del almacenamiento para leerlo en binario."""
+    almacenamiento = almacenamiento or almacenamiento_reportes()
+    return almacenamiento.open(nombre, 'rb')
+
+
+def existe(nombre, almacenamiento=None):
+    """
+    Verificar si el archivo existe. Las rutas absolutas de reportes
+    anteriores al almacenamiento configurable que quedaron fuera de su
+    directorio cuentan como inexistentes.
+    """
+    almacenamiento = almacenamiento or almacenamiento_reportes()
+    try:
+        return bool(nombre) and almacenamiento.exists(nombre)
+    except SuspiciousFileOperation:
+        return False
+
+
+def eliminar(nombre, almacenamiento=None):
+    """Eliminar un archivo del almacenamiento. Retorna True si se borró."""
+    almacenamiento = almacenamiento or almacenamiento_reportes()
+    try:
+        if not existe(nombre, almacenamiento):
+            return False
+        almacenamiento.delete(nombre)
+        return True
+    except OSError:
+        return False  # No se puede borrar
+
+
+def checksum_archivo(nombre, almacenamiento=None, tamano_bloque=TAMANO_BLOQUE_LECTURA):
+    """SHA-256 del archivo tal como está en el almacenamiento."""
+    sha = hashlib.sha256()
+    with abrir_origen(nombre, almacenamiento) as archivo:
+        for bloque in iter(lambda: archivo.read(tamano_bloque), b''):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+def sincronizar(nombre, almacenamiento=None):
+    """
+    Forzar a disco un archivo local. En almacenamientos de objetos no hace
+    nada: el objeto ya es durable cuando la subida termina.
+    """
+    ruta = ruta_local(nombre, almacenamiento)
+    if ruta is None:
+        return
+    with open(ruta, 'rb') as archivo:
+        os.fsync(archivo.fileno())
@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class ReportesConfig(AppConfig):
+    """
+    Configuración de la app reportes.
+    Registra las señales que mantienen al día las estadísticas cacheadas.
+    """
+    name = 'apps.reportes'
+    verbose_name = 'Reportes'
+    
+    def ready(self):
+        """Importar señales cuando la app esté lista."""
+        import apps.reportes.signals  # noqa F401
@@ -0,0 +1,350 @@
+# benchmark.py para la app reportes
+# Benchmark de la generación de reportes sobre un conjunto de datos sintético
+
+import json
+import random
+import time
+import tracemalloc
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.inscripciones.models import Calificacion, Inscripcion
+from apps.materias.models import Materia, Periodo
+from apps.users.models import User
+from .almacenamiento import eliminar
+from .instrumentacion import MedidorGeneracion
+from .models import ReporteGenerado
+from .resumenes import reconstruir_resumenes
+
+
+# Todo lo que crea el benchmark lleva este prefijo, para reutilizarlo o borrarlo
+PREFIJO = 'bench'
+
+DATOS_POR_DEFECTO = {
+    'estudiantes': 10000,
+    'materias': 500,
+    'inscripciones': 200000,
+    'profesores': 100,
+}
+
+# Estudiantes del reporte por lote
+ESTUDIANTES_LOTE = 500
+
+# Márgenes absolutos bajo los que una diferencia se considera ruido
+MARGEN_SEGUNDOS = 0.05
+MARGEN_MEMORIA_KB = 1024
+
+TAMANO_LOTE_INSERCION = 5000
+
+
+def _nombre_periodo(indice):
+    return f'{PREFIJO.upper()}-{indice + 1}'
+
+
+def datos_existentes():
+    """
+    Tamaño del conjunto sintético ya cargado en la base, o None si no hay.
+
+    Returns:
+        dict: Mismas claves que DATOS_POR_DEFECTO
+    """
+    estudiantes = User.objects.filter(username__startswith=f'{PREFIJO}_est_').count()
+    if not estudiantes:
+        return None
+    materias = Materia.objects.filter(codigo__startswith=PREFIJO.upper())
+    return {
+        'estudiantes': estudiantes,
+        'materias': materias.count(),
+        'inscripciones': Inscripcion.objects.filter(materia__in=materias).count(),
+        'profesores': User.objects.filter(username__startswith=f'{PREFIJO}_prof_').count(),
+    }
+
+
+def borrar_datos():
+    """Borrar el conjunto sintético y los reportes que pidió el benchmark."""
+    with transaction.atomic():
+        solicitudes = ReporteGenerado.objects.filter(solicitante__username=f'{PREFIJO}_admin')
+        for ruta in solicitudes.values_list('ruta_archivo', flat=True):
+            eliminar(ruta)
+        solicitudes.delete()
+
+        # Las inscripciones y calificaciones caen en cascada
+        Materia.objects.filter(codigo__startswith=PREFIJO.upper()).delete()
+        Periodo.objects.filter(nombre__startswith=f'{PREFIJO.upper()}-').delete()
+        User.objects.filter(username__startswith=f'{PREFIJO}_').delete()
+
+    reconstruir_resumenes()
+
+
+def _insertar(modelo, objetos):
+    modelo.objects.bulk_create(objetos, batch_size=TAMANO_LOTE_INSERCION)
+
+
+def crear_datos(estudiantes, materias, inscripciones, profesores, semilla=42):
+    """
+    Cargar el conjunto sintético con inserciones masivas (bulk_create).
+
+    Cada estudiante cursa inscripciones / estudiantes materias distintas,
+    repartidas entre dos períodos; el 90% tiene nota final (y una
+    calificación) y el resto sigue activa. bulk_create no dispara señales,
+    así que las tablas resumen se reconstruyen al final.
+    """
+    periodos_por_estudiante = 2
+    if inscripciones > estudiantes * materias * periodos_por_estudiante:
+        raise ValueError("Hay más inscripciones que combinaciones de estudiante, materia y período.")
+
+    rng = random.Random(semilla)
+    sin_contrasena = make_password(None)
+    hoy = date.today()
+
+    with transaction.atomic():
+        User.objects.create(
+            username=f'{PREFIJO}_admin', email=f'{PREFIJO}_admin@example.com',
+            role='admin', password=sin_contrasena
+        )
+        _insertar(User, [
+            User(
+                username=f'{PREFIJO}_prof_{i:04d}', email=f'{PREFIJO}_prof_{i}@example.com',
+                first_name='Profesor', last_name=f'Sintético {i}', role='profesor',
+                password=sin_contrasena
+            )
+            for i in range(profesores)
+        ])
+        _insertar(User, [
+            User(
+                username=f'{PREFIJO}_est_{i:05d}', email=f'{PREFIJO}_est_{i}@example.com',
+                first_name='Estudiante', last_name=f'Sintético {i}', role='estudiante',
+                password=sin_contrasena
+            )
+            for i in range(estudiantes)
+        ])
+
+        periodos = [
+            Periodo.objects.create(
+                nombre=_nombre_periodo(i),
+                fecha_inicio=hoy - timedelta(days=180 * (periodos_por_estudiante - i)),
+                fecha_fin=hoy - timedelta(days=180 * (periodos_por_estudiante - i) - 120),
+                estado='finalizado'
+            )
+            for i in range(periodos_por_estudiante)
+        ]
+        profesor_ids = list(User.objects.filter(
+            username__startswith=f'{PREFIJO}_prof_'
+        ).order_by('id').values_list('id', flat=True))
+        _insertar(Materia, [
+            Materia(
+                codigo=f'{PREFIJO.upper()}{i:04d}', nombre=f'Materia sintética {i}',
+                creditos=rng.randint(1, 5),
+                profesor_id=profesor_ids[i % len(profesor_ids)] if profesor_ids else None
+            )
+            for i in range(materias)
+        ])
+
+        materia_ids = list(Materia.objects.filter(
+            codigo__startswith=PREFIJO.upper()
+        ).order_by('id').values_list('id', flat=True))
+        estudiante_ids = list(User.objects.filter(
+            username__startswith=f'{PREFIJO}_est_'
+        ).order_by('id').values_list('id', flat=True))
+
+        # Combinaciones (materia, período) distintas para cada estudiante
+        combinaciones = len(materia_ids) * len(periodos)
+        base, resto = divmod(inscripciones, estudiantes)
+        lote = []
+        for posicion, estudiante_id in enumerate(estudiante_ids):
+            for combinacion in rng.sample(range(combinaciones), base + (posicion < resto)):
+                materia_indice, periodo_indice = divmod(combinacion, len(periodos))
+                nota = Decimal(rng.randint(10, 50)) / 10 if rng.random() < 0.9 else None
+                lote.append(Inscripcion(
+                    estudiante_id=estudiante_id,
+                    materia_id=materia_ids[materia_indice],
+                    periodo=periodos[periodo_indice],
+                    nota_final=nota,
+                    estado='activa' if nota is None else 'aprobada' if nota >= 3 else 'reprobada'
+                ))
+            if len(lote) >= TAMANO_LOTE_INSERCION:
+                _insertar(Inscripcion, lote)
+                lote = []
+        _insertar(Inscripcion, lote)
+
+        calificadas = Inscripcion.objects.filter(
+            periodo__in=periodos, nota_final__isnull=False
+        ).values_list('id', 'nota_final').iterator(chunk_size=TAMANO_LOTE_INSERCION)
+        lote = []
+        for inscripcion_id, nota in calificadas:
+            lote.append(Calificacion(inscripcion_id=inscripcion_id, tipo='final', nota=nota, peso=100))
+            if len(lote) >= TAMANO_LOTE_INSERCION:
+                _insertar(Calificacion, lote)
+                lote = []
+        _insertar(Calificacion, lote)
+
+    reconstruir_resumenes()
+    return datos_existentes()
+
+
+def _limpiar_reporte(reporte):
+    # Sin el reporte, la siguiente repetición no puede salir de la cache
+    eliminar(reporte.ruta_archivo)
+    reporte.delete()
+
+
+def _consumir(respuesta):
+    """Leer todo el cuerpo de una respuesta (streaming o no)."""
+    if respuesta.streaming:
+        return sum(len(parte) for parte in respuesta.streaming_content)
+    return len(respuesta.content)
+
+
+def casos():
+    """
+    Casos a medir: cada tipo de reporte generado con ReporteService y las
+    dos vistas CSV directas.
+
+    Returns:
+        dict: {nombre: (ejecutar, limpiar)}; limpiar recibe lo que devolvió
+        ejecutar y no se mide
+    """
+    from .services import ReporteService
+    from .views import EstudianteReportAPIView, ProfesorReportAPIView
+
+    admin = User.objects.get(username=f'{PREFIJO}_admin')
+    estudiantes = User.objects.filter(username__startswith=f'{PREFIJO}_est_').order_by('id')
+    estudiante = estudiantes.first()
+    profesor = User.objects.filter(username__startswith=f'{PREFIJO}_prof_').order_by('id').first()
+    materia = Materia.objects.filter(codigo__startswith=PREFIJO.upper()).order_by('id').first()
+    periodo = Periodo.objects.get(nombre=_nombre_periodo(0))
+    lote_ids = list(estudiantes.values_list('id', flat=True)[:ESTUDIANTES_LOTE])
+
+    def servicio():
+        return ReporteService(admin)
+
+    fabrica = APIRequestFactory()
+
+    def vista_csv(vista, url, objeto_id):
+        def ejecutar():
+            solicitud = fabrica.get(url)
+            force_authenticate(solicitud, user=admin)
+            respuesta = vista.as_view()(solicitud, id=objeto_id)
+            if respuesta.status_code != 200:
+                raise RuntimeError(f"{url} respondió {respuesta.status_code}")
+            return _consumir(respuesta)
+        return ejecutar, None
+
+    return {
+        'reporte_estudiante': (lambda: servicio().generar_reporte_estudiante(estudiante.id), _limpiar_reporte),
+        'reporte_profesor': (lambda: servicio().generar_reporte_profesor(profesor.id), _limpiar_reporte),
+        'reporte_materia': (lambda: servicio().generar_reporte_por_materia(materia.id), _limpiar_reporte),
+        'reporte_periodo': (lambda: servicio().generar_reporte_por_periodo(periodo.id), _limpiar_reporte),
+        'reporte_lote': (lambda: servicio().generar_reporte_lote(estudiante_ids=lote_ids), _limpiar_reporte),
+        'reporte_general': (lambda: servicio().generar_reporte_general(), _limpiar_reporte),
+        'api_csv_estudiante': vista_csv(
+            EstudianteReportAPIView, f'/api/v1/reportes/estudiante/{estudiante.id}/', estudiante.id
+        ),
+        'api_csv_profesor': vista_csv(
+            ProfesorReportAPIView, f'/api/v1/reportes/profesor/{profesor.id}/', profesor.id
+        ),
+    }
+
+
+def medir(ejecutar, limpiar=None, repeticiones=1):
+    """
+    Medir un caso: tiempo de reloj (el mejor de las repeticiones), consultas
+    SQL y pico de memoria asignada por Python.
+
+    La memoria se mide en una corrida aparte con tracemalloc, que hace más
+    lenta la ejecución y arruinaría el tiempo.
+    """
+    tiempos = []
+    consultas = 0
+    for _ in range(repeticiones):
+        medidor = MedidorGeneracion()
+        with medidor.medir():
+            resultado = ejecutar()
+        tiempos.append(medidor.duracion)
+        consultas = medidor.consultas
+        if limpiar:
+            limpiar(resultado)
+
+    tracemalloc.start()
+    try:
+        resultado = ejecutar()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    if limpiar:
+        limpiar(resultado)
+
+    return {
+        'segundos': round(min(tiempos), 4),
+        'consultas': consultas,
+        'memoria_pico_kb': pico // 1024,
+    }
+
+
+def ejecutar_benchmark(nombres=None, repeticiones=1, progreso=None):
+    """
+    Medir los casos pedidos (todos si nombres es None).
+
+    Returns:
+        dict: {caso: métricas de medir()}
+    """
+    disponibles = casos()
+    nombres = nombres or list(disponibles)
+    desconocidos = set(nombres) - set(disponibles)
+    if desconocidos:
+        raise ValueError(f"Casos desconocidos: {', '.join(sorted(desconocidos))}")
+
+    resultados = {}
+    for nombre in nombres:
+        inicio = time.perf_counter()
+        ejecutar, limpiar = disponibles[nombre]
+        resultados[nombre] = medir(ejecutar, limpiar, repeticiones)
+        if progreso:
+            progreso(nombre, resultados[nombre], time.perf_counter() - inicio)
+    return resultados
+
+
+def comparar(resultados, referencia, umbral):
+    """
+    Comparar resultados con una referencia guardada.
+
+    Un caso empeora si tarda o usa memoria más de `umbral` (fracción) por
+    encima de la referencia, descontando los márgenes de ruido, o si hace
+    más consultas: con los mismos datos la cantidad de consultas es exacta.
+
+    Returns:
+        list: Descripción de cada regresión encontrada
+    """
+    regresiones = []
+    for nombre, actual in resultados.items():
+        base = referencia.get(nombre)
+        if base is None:
+            continue
+
+        for metrica, margen in (('segundos', MARGEN_SEGUNDOS), ('memoria_pico_kb', MARGEN_MEMORIA_KB)):
+            limite = base[metrica] * (1 + umbral)
+            if actual[metrica] > limite and actual[metrica] - base[metrica] > margen:
+                regresiones.append(
+                    f"{nombre}: {metrica} {actual[metrica]} supera {base[metrica]} en más de {umbral:.0%}"
+                )
+        if actual['consultas'] > base['consultas']:
+            regresiones.append(
+                f"{nombre}: consultas {actual['consultas']} (referencia {base['consultas']})"
+            )
+    return regresiones
+
+
+def guardar_referencia(ruta, datos, resultados):
+    """Guardar los resultados como referencia, junto con el tamaño de los datos."""
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump({'datos': datos, 'resultados': resultados}, archivo, indent=2, sort_keys=True)
+
+
+def leer_referencia(ruta):
+    """Leer una referencia guardada con guardar_referencia()."""
+    with open(ruta, encoding='utf-8') as archivo:
+        return json.load(archivo)
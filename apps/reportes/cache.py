@@ -0,0 +1,149 @@
+# cache.py para la app reportes
+# Reutilización de archivos de reportes ya generados con los mismos datos
+
+import hashlib
+import json
+
+from django.db.models import Count, Max, Q
+
+from apps.inscripciones.models import Inscripcion, Calificacion
+from apps.materias.models import Materia, Periodo
+from apps.users.models import User
+from .almacenamiento import existe
+from .models import ReporteGenerado
+
+
+# Parámetros que describen quién o cómo se pidió el reporte y no cambian los
+# datos que lee. El archivo no muestra quién lo pidió, así que se comparte
+# entre solicitantes igual que los trabajos de la cola (ver cola.clave_trabajo)
+PARAMETROS_IGNORADOS = {'generado_por', 'fragmentos'}
+
+
+def _inscripciones_en_alcance(tipo, parametros):
+    """Inscripciones cuyos datos aparecen en un reporte del tipo dado."""
+    inscripciones = Inscripcion.objects.all()
+
+    if tipo == 'estudiante':
+        inscripciones = inscripciones.filter(estudiante_id=parametros.get('estudiante_id'))
+    elif tipo == 'profesor':
+        inscripciones = inscripciones.filter(materia__profesor_id=parametros.get('profesor_id'))
+    elif tipo == 'materia':
+        inscripciones = inscripciones.filter(materia_id=parametros.get('materia_id'))
+    elif tipo == 'lote':
+        inscripciones = inscripciones.filter(estudiante_id__in=parametros.get('estudiante_ids', []))
+
+    if parametros.get('periodo_id'):
+        inscripciones = inscripciones.filter(periodo_id=parametros['periodo_id'])
+
+    return inscripciones
+
+
+def _sello(queryset):
+    """Cantidad de filas y última modificación de un queryset."""
+    sello = queryset.aggregate(total=Count('id'), ultima=Max('updated_at'))
+    return [sello['total'], sello['ultima']]
+
+
+def version_datos(tipo, parametros):
+    """
+    Sello de versión de los datos que alimentan un reporte.
+
+    Combina la última fecha de modificación y la cantidad de las filas en
+    alcance: inscripciones y calificaciones, y también las materias,
+    períodos y usuarios cuyos nombres se escriben en el archivo. El reporte
+    general imprime además los totales de la institución, así que sella
+    todas las materias y todos los estudiantes y profesores. Cualquier alta,
+    cambio o borrado produce un sello distinto.
+    """
+    inscripciones = _inscripciones_en_alcance(tipo, parametros)
+    calificaciones = Calificacion.objects.filter(inscripcion__in=inscripciones.values('id'))
+
+    filtro_materias = Q(id__in=inscripciones.values('materia_id'))
+    if tipo == 'profesor':
+        # El reporte del profesor lista también sus materias sin inscripciones
+        filtro_materias |= Q(profesor_id=parametros.get('profesor_id'))
+    elif tipo == 'materia':
+        filtro_materias |= Q(id=parametros.get('materia_id'))
+    elif tipo == 'general':
+        # Los totales cuentan también materias sin inscripciones
+        filtro_materias = Q()
+    materias = Materia.objects.filter(filtro_materias)
+
+    filtro_periodos = Q(id__in=inscripciones.values('periodo_id'))
+    if parametros.get('periodo_id'):
+        filtro_periodos |= Q(id=parametros['periodo_id'])
+
+    filtro_usuarios = (
+        Q(id__in=inscripciones.values('estudiante_id'))
+        | Q(id__in=materias.values('profesor_id'))
+    )
+    if tipo == 'general':
+        # Los totales cuentan también estudiantes y profesores sin inscripciones
+        filtro_usuarios |= Q(role__in=['estudiante', 'profesor'])
+    for clave in ('estudiante_id', 'profesor_id'):
+        if parametros.get(clave):
+            filtro_usuarios |= Q(id=parametros[clave])
+
+    return {
+        'inscripciones': _sello(inscripciones),
+        'calificaciones': _sello(calificaciones),
+        'materias': _sello(materias),
+        'periodos': _sello(Periodo.objects.filter(filtro_periodos)),
+        'usuarios': _sello(User.objects.filter(filtro_usuarios)),
+    }
+
+
+def calcular_huella(tipo, parametros):
+    """
+    Huella SHA-256 de un reporte: tipo, parámetros normalizados y versión
+    de datos. Dos solicitudes con la misma huella producirían el mismo
+    archivo, aunque las pida otro usuario.
+    """
+    parametros_normalizados = {
+        clave: valor for clave, valor in parametros.items()
+        if clave not in PARAMETROS_IGNORADOS
+    }
+    contenido = json.dumps(
+        {
+            'tipo': tipo,
+            'parametros': parametros_normalizados,
+            'version': version_datos(tipo, parametros),
+        },
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def buscar_reporte_en_cache(huella, excluir_id=None):
+    """
+    Buscar el reporte completado más reciente con la misma huella.
+
+    Returns:
+        ReporteGenerado o None si no hay uno cuyo archivo siga almacenado
+    """
+    candidatos = ReporteGenerado.objects.filter(
+        huella=huella,
+        estado='completado'
+    ).exclude(id=excluir_id).order_by('-completado_at')
+
+    for reporte in candidatos[:5]:
+        if existe(reporte.ruta_archivo):
+            return reporte
+    return None
+
+
+def rutas_en_uso(rutas, excluir_ids):
+    """
+    Rutas de la lista que todavía usa algún reporte fuera de excluir_ids.
+    Los reportes expirados ya no tienen archivo y no cuentan.
+    """
+    return set(
+        ReporteGenerado.objects.filter(
+            ruta_archivo__in=rutas
+        ).exclude(
+            id__in=excluir_ids
+        ).exclude(
+            estado='expirado'
+        ).values_list('ruta_archivo', flat=True)
+    )
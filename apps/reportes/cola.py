@@ -0,0 +1,249 @@
+# cola.py para la app reportes
+# Cola de generación de reportes: prioridades, límite por tipo y deduplicación
+
+import hashlib
+import json
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .cache import PARAMETROS_IGNORADOS
+from .estadisticas import invalidar_estadisticas
+from .models import ReporteGenerado
+
+
+# Las colas, prioridades y límites por tipo se configuran solo en settings
+# (REPORTES_COLAS, REPORTES_PRIORIDADES y REPORTES_CONCURRENCIA, ver
+# config/settings/base.py). Un tipo sin cola asignada va a la pesada.
+COLA_PESADA = 'reportes_pesados'
+
+# Reportes en cola que se revisan en cada despacho
+CANDIDATOS_POR_DESPACHO = 200
+
+CLAVE_BLOQUEO = 'reportes:cola:bloqueo'
+
+
+def clave_trabajo(tipo, parametros, formato='csv'):
+    """
+    Clave de deduplicación: tipo, formato y parámetros que cambian el
+    contenido. A diferencia de la huella no incluye la versión de los
+    datos, así que se calcula sin consultas.
+    """
+    contenido = json.dumps(
+        {
+            'tipo': tipo,
+            'formato': formato,
+            'parametros': {
+                clave: valor for clave, valor in parametros.items()
+                if clave not in PARAMETROS_IGNORADOS
+            },
+        },
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def prioridad_tipo(tipo):
+    """Prioridad de despacho de un tipo de reporte según REPORTES_PRIORIDADES."""
+    return settings.REPORTES_PRIORIDADES.get(tipo, 0)
+
+
+def _vencimiento():
+    """Momento antes del cual un despacho se considera perdido."""
+    return timezone.now() - timedelta(seconds=getattr(settings, 'REPORTES_COLA_VENCIMIENTO', 3600))
+
+
+def _en_curso():
+    """
+    Reportes despachados que todavía no terminaron.
+
+    Los despachados hace más de REPORTES_COLA_VENCIMIENTO segundos no
+    cuentan: su worker probablemente murió y no deben ocupar un lugar para
+    siempre.
+    """
+    return ReporteGenerado.objects.filter(
+        estado__in=['pendiente', 'generando'],
+        encolado_at__gte=_vencimiento()
+    )
+
+
+def _en_espera():
+    """
+    Reportes pendientes que se pueden despachar: los que nunca se enviaron
+    y los despachados hace más de REPORTES_COLA_VENCIMIENTO segundos que
+    siguen pendientes (ningún worker los tomó), que se vuelven a enviar.
+    """
+    return ReporteGenerado.objects.filter(
+        Q(encolado_at__isnull=True) | Q(encolado_at__lt=_vencimiento()),
+        estado='pendiente'
+    )
+
+
+def vencer_en_generacion():
+    """
+    Pasar a error los reportes que siguen generándose más de
+    REPORTES_COLA_VENCIMIENTO segundos después de despacharse: su worker
+    murió o el chord de fragmentos nunca llegó a unirlos, y sin esto el
+    solicitante no recibiría nunca un archivo ni un error.
+
+    Returns:
+        int: Reportes vencidos
+    """
+    vencidos = ReporteGenerado.objects.filter(
+        estado='generando', encolado_at__lt=_vencimiento()
+    ).update(
+        estado='error',
+        mensaje_error='La generación no terminó a tiempo; vuelva a solicitar el reporte.',
+        updated_at=timezone.now()
+    )
+    if vencidos:
+        invalidar_estadisticas()
+    return vencidos
+
+
+@contextmanager
+def _bloqueo_despacho(espera=5.0):
+    """
+    Serializar los despachos entre procesos con un candado en la cache.
+    Si no se obtiene en `espera` segundos se despacha igual: en el peor caso
+    un tipo supera su límite por un reporte.
+    """
+    limite = time.monotonic() + espera
+    obtenido = cache.add(CLAVE_BLOQUEO, 1, timeout=30)
+    while not obtenido and time.monotonic() < limite:
+        time.sleep(0.05)
+        obtenido = cache.add(CLAVE_BLOQUEO, 1, timeout=30)
+    try:
+        yield
+    finally:
+        if obtenido:
+            cache.delete(CLAVE_BLOQUEO)
+
+
+def _reservar_despachos():
+    """
+    Elegir los reportes en cola que se pueden despachar y marcarlos.
+
+    Se recorren por prioridad y antigüedad; un reporte espera si su tipo
+    llegó al límite de REPORTES_CONCURRENCIA o si hay otro igual (misma
+    clave) en curso: ese otro dejará su archivo en la cache y este se
+    resolverá desde ahí sin repetir la consulta.
+
+    Returns:
+        list: Reportes reservados (encolado_at ya guardado)
+    """
+    limites = settings.REPORTES_CONCURRENCIA
+    en_curso = list(_en_curso().values_list('tipo', 'clave_cola'))
+
+    ocupados = {}
+    for tipo, _ in en_curso:
+        ocupados[tipo] = ocupados.get(tipo, 0) + 1
+    claves = {clave for _, clave in en_curso if clave}
+
+    candidatos = _en_espera().order_by(
+        '-prioridad', 'created_at', 'id'
+    )[:CANDIDATOS_POR_DESPACHO]
+
+    reservados = []
+    for reporte in candidatos:
+        limite = limites.get(reporte.tipo)
+        if limite is not None and ocupados.get(reporte.tipo, 0) >= limite:
+            continue
+        if reporte.clave_cola and reporte.clave_cola in claves:
+            continue
+
+        # Solo un despachador gana la fila aunque el candado haya vencido
+        anterior = reporte.encolado_at
+        reporte.encolado_at = timezone.now()
+        if not ReporteGenerado.objects.filter(
+            id=reporte.id, estado='pendiente', encolado_at=anterior
+        ).update(encolado_at=reporte.encolado_at):
+            continue
+
+        ocupados[reporte.tipo] = ocupados.get(reporte.tipo, 0) + 1
+        if reporte.clave_cola:
+            claves.add(reporte.clave_cola)
+        reservados.append(reporte)
+
+    return reservados
+
+
+def despachar_pendientes():
+    """
+    Enviar a Celery los reportes en cola que ya pueden correr, cada uno a
+    la cola de su tipo (REPORTES_COLAS).
+
+    Se llama al encolar un reporte y cada vez que uno termina.
+
+    Returns:
+        int: Reportes despachados
+    """
+    from .tasks import generar_reporte_task
+
+    with _bloqueo_despacho():
+        vencer_en_generacion()
+        reservados = _reservar_despachos()
+
+    # Fuera del candado: con Celery en modo eager la tarea corre aquí mismo
+    # y vuelve a despachar al terminar
+    colas = settings.REPORTES_COLAS
+    for reporte in reservados:
+        generar_reporte_task.apply_async(
+            (reporte.id,), queue=colas.get(reporte.tipo, COLA_PESADA)
+        )
+
+    return len(reservados)
+
+
+def encolar_reporte(reporte):
+    """
+    Poner en la cola un reporte pendiente recién registrado (la clave y la
+    prioridad se asignan al crearlo, ver ReporteService._crear_reporte).
+
+    Returns:
+        str: 'despachado' si ya se envió a Celery, 'duplicado' si espera a
+        otro reporte igual en curso, o 'en_espera' si su tipo está en el
+        límite de concurrencia
+    """
+    duplicado = _en_curso().filter(clave_cola=reporte.clave_cola).exclude(id=reporte.id).exists()
+
+    despachar_pendientes()
+
+    reporte.refresh_from_db(fields=['estado', 'encolado_at'])
+    if reporte.encolado_at:
+        return 'despachado'
+    return 'duplicado' if duplicado else 'en_espera'
+
+
+def estado_cola():
+    """
+    Resumen de la cola por tipo: reportes en curso, en espera y el límite.
+
+    Returns:
+        dict: {tipo: {'en_curso', 'en_espera', 'limite', 'cola'}}
+    """
+    limites = settings.REPORTES_CONCURRENCIA
+    colas = settings.REPORTES_COLAS
+
+    en_curso = dict(
+        _en_curso().values_list('tipo').annotate(total=Count('id')).order_by()
+    )
+    en_espera = dict(
+        _en_espera().values_list('tipo').annotate(total=Count('id')).order_by()
+    )
+
+    return {
+        tipo: {
+            'en_curso': en_curso.get(tipo, 0),
+            'en_espera': en_espera.get(tipo, 0),
+            'limite': limites.get(tipo),
+            'cola': colas.get(tipo, COLA_PESADA),
+        }
+        for tipo in sorted(set(colas) | set(en_curso) | set(en_espera))
+    }
@@ -0,0 +1,112 @@
+# compresion.py para la app reportes
+# Formatos de almacenamiento comprimido de los archivos de reportes
+
+import gzip
+import io
+
+from django.conf import settings
+
+try:
+    import zstandard
+except ImportError:  # zstd es opcional; sin la librería se usa gzip
+    zstandard = None
+
+
+SIN_COMPRESION = 'ninguna'
+
+# Extensión que se agrega al nombre del archivo y valor de Content-Encoding
+EXTENSIONES = {
+    'gzip': '.gz',
+    'zstd': '.zst',
+}
+
+CONTENT_ENCODING = {
+    'gzip': 'gzip',
+    'zstd': 'zstd',
+}
+
+TAMANO_BLOQUE = 64 * 1024
+
+
+def compresion_configurada():
+    """
+    Formato de compresión para los reportes nuevos según REPORTES_COMPRESION.
+    Si se pide zstd y la librería zstandard no está instalada se usa gzip.
+    """
+    compresion = getattr(settings, 'REPORTES_COMPRESION', SIN_COMPRESION) or SIN_COMPRESION
+    if compresion == 'zstd' and zstandard is None:
+        return 'gzip'
+    if compresion not in EXTENSIONES:
+        return SIN_COMPRESION
+    return compresion
+
+
+def ruta_con_extension(ruta, compresion):
+    """Agregar a la ruta la extensión del formato de compresión."""
+    return ruta + EXTENSIONES.get(compresion, '')
+
+
+class _GzipQueCierra(gzip.GzipFile):
+    """GzipFile que al cerrarse también cierra el archivo que envuelve."""
+
+    def close(self):
+        archivo = self.fileobj
+        try:
+            super().close()
+        finally:
+            if archivo is not None:
+                archivo.close()
+
+
+def abrir_escritura(destino, compresion=SIN_COMPRESION):
+    """
+    Envolver un archivo binario abierto (ver almacenamiento.abrir_destino)
+    para escribir texto CSV, comprimido según el formato.
+    El llamador usa el resultado igual que open(ruta, 'w', newline=''); al
+    cerrarlo se cierra también `destino`.
+    """
+    if compresion == 'gzip':
+        destino = _GzipQueCierra(fileobj=destino, mode='wb')
+    elif compresion == 'zstd':
+        destino = zstandard.ZstdCompressor().stream_writer(destino, closefd=True)
+
+    return io.TextIOWrapper(destino, newline='', encoding='utf-8')
+
+
+def abrir_lectura(origen, compresion=SIN_COMPRESION):
+    """Envolver un archivo binario abierto para leerlo descomprimido."""
+    if compresion == 'gzip':
+        return _GzipQueCierra(fileobj=origen, mode='rb')
+
+    if compresion == 'zstd':
+        return zstandard.ZstdDecompressor().stream_reader(origen, closefd=True)
+
+    return origen
+
+
+def leer_por_bloques(archivo, tamano=TAMANO_BLOQUE):
+    """Iterar el contenido de un archivo abierto por bloques y cerrarlo al final."""
+    try:
+        while True:
+            bloque = archivo.read(tamano)
+            if not bloque:
+                break
+            yield bloque
+    finally:
+        archivo.close()
+
+
+def acepta_codificacion(accept_encoding, codificacion):
+    """
+    Verificar si el encabezado Accept-Encoding del cliente admite una codificación.
+    Respeta q=0 como rechazo explícito.
+    """
+    for parte in (accept_encoding or '').split(','):
+        valores = [valor.strip() for valor in parte.split(';')]
+        if valores[0].lower() not in (codificacion, '*'):
+            continue
+        for parametro in valores[1:]:
+            if parametro.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+                return False
+        return True
+    return False
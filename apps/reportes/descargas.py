@@ -0,0 +1,191 @@
+# descargas.py para la app reportes
+# Respuestas HTTP para descargar los archivos de reportes
+
+import csv
+import re
+
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .compresion import (
+    SIN_COMPRESION,
+    CONTENT_ENCODING,
+    TAMANO_BLOQUE,
+    abrir_lectura,
+    acepta_codificacion,
+    leer_por_bloques,
+)
+from .almacenamiento import abrir_origen, almacenamiento_reportes, checksum_archivo
+
+
+RANGO_BYTES = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+    'zip': 'application/zip',
+}
+
+
+class PseudoBuffer:
+    """
+    Objeto con la interfaz de un archivo que devuelve lo escrito en vez de
+    guardarlo, para que csv.writer produzca cada línea por separado.
+    """
+
+    def write(self, valor):
+        return valor
+
+
+def respuesta_csv_en_streaming(filas, nombre_archivo):
+    """
+    Enviar un CSV a medida que se generan sus filas.
+
+    La primera fila sale apenas el generador la produce, sin esperar a
+    recorrer todos los datos ni armar el archivo completo en memoria.
+
+    Args:
+        filas: Iterable de filas (encabezado incluido)
+        nombre_archivo: Nombre sugerido para la descarga
+    """
+    writer = csv.writer(PseudoBuffer())
+    response = StreamingHttpResponse(
+        (writer.writerow(fila) for fila in filas),
+        content_type='text/csv'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}"'
+    return response
+
+
+def _rango_solicitado(request, tamano, etag):
+    """
+    Interpretar el encabezado Range para un archivo de `tamano` bytes.
+
+    Returns:
+        None si se debe enviar el archivo completo, (inicio, fin) inclusivos
+        para un rango válido, o False si el rango no se puede satisfacer.
+        Los rangos múltiples se ignoran y se envía el archivo completo.
+    """
+    rango = request.META.get('HTTP_RANGE')
+    if not rango:
+        return None
+
+    # If-Range: solo se responde el rango si el cliente tiene esta misma versión
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range != etag:
+        return None
+
+    coincidencia = RANGO_BYTES.match(rango.strip())
+    if not coincidencia:
+        return None
+
+    inicio, fin = coincidencia.groups()
+    if not inicio and not fin:
+        return None
+
+    if not inicio:
+        # bytes=-N: los últimos N bytes
+        sufijo = int(fin)
+        if sufijo == 0:
+            return False
+        return max(tamano - sufijo, 0), tamano - 1
+
+    inicio = int(inicio)
+    fin = min(int(fin), tamano - 1) if fin else tamano - 1
+    if inicio >= tamano or fin < inicio:
+        return False
+    return inicio, fin
+
+
+def _leer_rango(archivo, inicio, fin):
+    """Iterar por bloques los bytes [inicio, fin] de un archivo abierto y cerrarlo al final."""
+    with archivo:
+        archivo.seek(inicio)
+        pendiente = fin - inicio + 1
+        while pendiente > 0:
+            bloque = archivo.read(min(TAMANO_BLOQUE, pendiente))
+            if not bloque:
+                break
+            pendiente -= len(bloque)
+            yield bloque
+
+
+def _respuesta_archivo(request, reporte, etag):
+    """Enviar los bytes del archivo almacenado, completos o el rango pedido."""
+    almacenamiento = almacenamiento_reportes()
+    tamano = almacenamiento.size(reporte.ruta_archivo)
+    rango = _rango_solicitado(request, tamano, etag)
+
+    if rango is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{tamano}'
+        return response
+
+    if rango is None:
+        response = FileResponse(abrir_origen(reporte.ruta_archivo, almacenamiento), content_type=CONTENT_TYPES[reporte.formato])
+    else:
+        inicio, fin = rango
+        response = StreamingHttpResponse(
+            _leer_rango(abrir_origen(reporte.ruta_archivo, almacenamiento), inicio, fin),
+            status=206,
+            content_type=CONTENT_TYPES[reporte.formato]
+        )
+        response['Content-Range'] = f'bytes {inicio}-{fin}/{tamano}'
+        response['Content-Length'] = fin - inicio + 1
+
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def respuesta_descarga(request, reporte):
+    """
+    Construir la respuesta de descarga de un reporte completado.
+
+    Los reportes comprimidos se envían tal como están almacenados con
+    Content-Encoding si el cliente acepta esa codificación; si no, se
+    descomprimen al vuelo mientras se envían.
+
+    El ETag es fuerte y sale del checksum del archivo, así que If-None-Match
+    responde 304 sin leer el archivo, y Range permite reanudar descargas de
+    los bytes almacenados. La versión descomprimida al vuelo tiene su propio
+    ETag y no admite rangos porque su tamaño no se conoce de antemano.
+    """
+    if not reporte.checksum:
+        # Reportes completados antes de guardar el checksum
+        reporte.checksum = checksum_archivo(reporte.ruta_archivo)
+        reporte.save(update_fields=['checksum'])
+
+    comprimido = reporte.compresion != SIN_COMPRESION
+    enviar_comprimido = comprimido and acepta_codificacion(
+        request.META.get('HTTP_ACCEPT_ENCODING'), CONTENT_ENCODING[reporte.compresion]
+    )
+    descomprimir = comprimido and not enviar_comprimido
+
+    etag = quote_etag(f'{reporte.checksum}-identity' if descomprimir else reporte.checksum)
+    ultima_modificacion = (
+        int(reporte.completado_at.timestamp()) if reporte.completado_at else None
+    )
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=ultima_modificacion
+    )
+    if response is None:
+        if descomprimir:
+            response = StreamingHttpResponse(
+                leer_por_bloques(abrir_lectura(abrir_origen(reporte.ruta_archivo), reporte.compresion)),
+                content_type=CONTENT_TYPES[reporte.formato]
+            )
+        else:
+            response = _respuesta_archivo(request, reporte, etag)
+            if enviar_comprimido and response.status_code != 416:
+                response['Content-Encoding'] = CONTENT_ENCODING[reporte.compresion]
+        response['Content-Disposition'] = f'attachment; filename="{reporte.nombre_archivo}"'
+
+    response['ETag'] = etag
+    if ultima_modificacion is not None:
+        response['Last-Modified'] = http_date(ultima_modificacion)
+    if comprimido:
+        patch_vary_headers(response, ['Accept-Encoding'])
+
+    return response
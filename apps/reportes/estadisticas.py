@@ -0,0 +1,142 @@
+# estadisticas.py para la app reportes
+# Estadísticas de reportes calculadas en la base de datos, con cache corta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, FloatField, Q
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Cast
+
+from .instrumentacion import FASES
+from .models import ReporteGenerado
+
+
+CLAVE_VERSION = 'reportes:estadisticas:version'
+
+
+def _version():
+    """Versión actual de las estadísticas; cambia con cada cambio de estado."""
+    version = cache.get(CLAVE_VERSION)
+    if version is None:
+        cache.add(CLAVE_VERSION, 1, timeout=None)
+        version = cache.get(CLAVE_VERSION, 1)
+    return version
+
+
+def invalidar_estadisticas():
+    """Descartar las estadísticas cacheadas de todos los usuarios."""
+    try:
+        cache.incr(CLAVE_VERSION)
+    except ValueError:
+        # La clave no existe (cache vacía o reiniciada): no hay nada que invalidar
+        cache.add(CLAVE_VERSION, 1, timeout=None)
+
+
+def _metrica(*ruta):
+    """Valor numérico de ReporteGenerado.metricas en la ruta de claves dada."""
+    expresion = 'metricas'
+    for clave in ruta[:-1]:
+        expresion = KeyTextTransform(clave, expresion)
+    return Cast(KeyTextTransform(ruta[-1], expresion), FloatField())
+
+
+# Promedios de rendimiento por tipo de reporte, sobre las métricas guardadas
+METRICAS_RENDIMIENTO = {
+    'duracion_segundos': ('duracion_segundos',),
+    'consultas': ('consultas',),
+    'filas_por_segundo': ('filas_por_segundo',),
+    'rss_incremento_kb': ('rss_incremento_kb',),
+    **{f'fase_{fase}': ('fases', fase) for fase in FASES},
+}
+
+
+def calcular_estadisticas(queryset):
+    """
+    Calcular las estadísticas de un queryset de reportes en una sola consulta.
+
+    Los conteos por tipo y por estado son agregados condicionales y el tiempo
+    promedio de generación se resuelve con aritmética de fechas en SQL. El
+    rendimiento por tipo promedia las métricas instrumentadas (ver
+    instrumentacion.py) de los reportes que las tienen.
+    """
+    agregados = {
+        'total_reportes': Count('id'),
+        'promedio_tiempo_generacion': Avg(
+            ExpressionWrapper(F('completado_at') - F('created_at'), output_field=DurationField()),
+            filter=Q(estado='completado', completado_at__isnull=False)
+        ),
+    }
+    for tipo, _ in ReporteGenerado.TIPO_CHOICES:
+        agregados[f'tipo_{tipo}'] = Count('id', filter=Q(tipo=tipo))
+        agregados[f'medidos_{tipo}'] = Count('id', filter=Q(tipo=tipo, metricas__has_key='duracion_segundos'))
+        for nombre, ruta in METRICAS_RENDIMIENTO.items():
+            agregados[f'{nombre}_{tipo}'] = Avg(_metrica(*ruta), filter=Q(tipo=tipo))
+    for estado, _ in ReporteGenerado.ESTADO_CHOICES:
+        agregados[f'estado_{estado}'] = Count('id', filter=Q(estado=estado))
+
+    resultado = queryset.order_by().aggregate(**agregados)
+
+    promedio_tiempo = resultado['promedio_tiempo_generacion']
+    reportes_por_tipo = {
+        tipo: resultado[f'tipo_{tipo}']
+        for tipo, _ in ReporteGenerado.TIPO_CHOICES
+        if resultado[f'tipo_{tipo}']
+    }
+    reportes_por_estado = {
+        estado: resultado[f'estado_{estado}']
+        for estado, _ in ReporteGenerado.ESTADO_CHOICES
+        if resultado[f'estado_{estado}']
+    }
+
+    rendimiento_por_tipo = {}
+    for tipo, _ in ReporteGenerado.TIPO_CHOICES:
+        if not resultado[f'medidos_{tipo}']:
+            continue
+        promedios = {
+            nombre: resultado[f'{nombre}_{tipo}']
+            for nombre in METRICAS_RENDIMIENTO
+        }
+        rendimiento_por_tipo[tipo] = {
+            'reportes_medidos': resultado[f'medidos_{tipo}'],
+            'duracion_promedio': round(promedios['duracion_segundos'] or 0, 3),
+            'consultas_promedio': round(promedios['consultas'] or 0, 1),
+            'filas_por_segundo_promedio': round(promedios['filas_por_segundo'] or 0, 1),
+            'rss_incremento_kb_promedio': (
+                round(promedios['rss_incremento_kb'])
+                if promedios['rss_incremento_kb'] is not None else None
+            ),
+            'fases_promedio': {
+                fase: round(promedios[f'fase_{fase}'] or 0, 4)
+                for fase in FASES
+            },
+        }
+
+    return {
+        'total_reportes': resultado['total_reportes'],
+        'reportes_completados': resultado['estado_completado'],
+        'reportes_pendientes': resultado['estado_pendiente'],
+        'reportes_error': resultado['estado_error'],
+        'promedio_tiempo_generacion': round(promedio_tiempo.total_seconds(), 2) if promedio_tiempo else 0,
+        'reportes_por_tipo': reportes_por_tipo,
+        'reportes_por_estado': reportes_por_estado,
+        'rendimiento_por_tipo': rendimiento_por_tipo
+    }
+
+
+def obtener_estadisticas(queryset, alcance):
+    """
+    Estadísticas de reportes con cache de pocos segundos.
+
+    Args:
+        queryset: Reportes visibles para el usuario
+        alcance: Identificador de ese conjunto ('todos' o 'usuario:<id>')
+
+    La entrada se descarta sola al vencer REPORTES_ESTADISTICAS_TTL o cuando
+    cualquier reporte cambia de estado (ver signals.py).
+    """
+    clave = f'reportes:estadisticas:{_version()}:{alcance}'
+    stats = cache.get(clave)
+    if stats is None:
+        stats = calcular_estadisticas(queryset)
+        cache.set(clave, stats, timeout=getattr(settings, 'REPORTES_ESTADISTICAS_TTL', 30))
+    return stats
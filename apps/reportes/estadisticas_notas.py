@@ -0,0 +1,212 @@
+# estadisticas_notas.py para la app reportes
+# Estadísticas de notas (promedio, mediana, percentiles, histograma) sobre arreglos compactos
+
+import math
+from array import array
+from bisect import bisect_left
+
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional; sin él se calcula sobre array('d')
+    np = None
+
+
+NOTA_APROBACION = 3.0
+
+# Bordes de las cubetas del histograma: [0, 1), [1, 2), [2, 3), [3, 4), [4, 5]
+LIMITES_HISTOGRAMA = (0.0, 1.0, 2.0, 3.0, 4.0, 5.0)
+
+PERCENTILES = (25, 75, 90)
+
+# Filas por viaje a la base de datos al leer las notas
+TAMANO_LECTURA = 5000
+
+
+def numpy_disponible():
+    """Verificar si numpy está instalado."""
+    return np is not None
+
+
+def cargar_notas(queryset, campo_grupo=None, campo_nota='nota_final'):
+    """
+    Leer las notas de un queryset en un arreglo de floats, en una consulta.
+
+    La base de datos convierte las notas a float y las ordena por grupo y
+    nota, así que no se crea un Decimal por fila y cada grupo queda como un
+    tramo ordenado del arreglo (la mediana y los percentiles salen por
+    posición, sin volver a ordenar).
+
+    Returns:
+        tuple: (grupos, valores, inicios): el valor de agrupación de cada
+        tramo, las notas en un array('d') y la posición donde empieza cada
+        tramo. Sin campo_grupo hay un solo tramo, con grupo None.
+    """
+    notas = queryset.filter(**{f'{campo_nota}__isnull': False}).annotate(
+        valor_nota=Cast(campo_nota, FloatField())
+    )
+
+    if campo_grupo is None:
+        valores = array('d', notas.order_by('valor_nota').values_list(
+            'valor_nota', flat=True
+        ).iterator(chunk_size=TAMANO_LECTURA))
+        return ([None], valores, [0]) if valores else ([], valores, [])
+
+    grupos, valores, inicios = [], array('d'), []
+    filas = notas.order_by(campo_grupo, 'valor_nota').values_list(
+        campo_grupo, 'valor_nota'
+    ).iterator(chunk_size=TAMANO_LECTURA)
+    for grupo, valor in filas:
+        if not grupos or grupo != grupos[-1]:
+            grupos.append(grupo)
+            inicios.append(len(valores))
+        valores.append(valor)
+    return grupos, valores, inicios
+
+
+def _vacio():
+    return {
+        'cantidad': 0,
+        'promedio': None,
+        'mediana': None,
+        'desviacion': None,
+        'minimo': None,
+        'maximo': None,
+        'percentiles': {f'p{percentil}': None for percentil in PERCENTILES},
+        'histograma': [0] * (len(LIMITES_HISTOGRAMA) - 1),
+        'aprobados': 0,
+        'porcentaje_aprobacion': None,
+    }
+
+
+def _percentil_ordenado(valores, percentil):
+    """Percentil con interpolación lineal (el método por defecto de numpy)."""
+    posicion = (len(valores) - 1) * percentil / 100
+    bajo = math.floor(posicion)
+    alto = math.ceil(posicion)
+    return valores[bajo] + (valores[alto] - valores[bajo]) * (posicion - bajo)
+
+
+def _estadisticas_python(valores, inicios):
+    """Estadísticas de cada tramo ordenado, sin numpy."""
+    fines = list(inicios[1:]) + [len(valores)]
+    resultados = []
+
+    for inicio, fin in zip(inicios, fines):
+        tramo = valores[inicio:fin]
+        cantidad = len(tramo)
+        promedio = math.fsum(tramo) / cantidad
+        varianza = math.fsum((valor - promedio) ** 2 for valor in tramo) / cantidad
+
+        # El tramo está ordenado: los conteos por umbral son búsquedas binarias
+        cortes = [bisect_left(tramo, limite) for limite in LIMITES_HISTOGRAMA[1:-1]]
+        histograma = [b - a for a, b in zip([0] + cortes, cortes + [cantidad])]
+        aprobados = cantidad - bisect_left(tramo, NOTA_APROBACION)
+
+        resultados.append({
+            'cantidad': cantidad,
+            'promedio': promedio,
+            'mediana': _percentil_ordenado(tramo, 50),
+            'desviacion': math.sqrt(varianza),
+            'minimo': tramo[0],
+            'maximo': tramo[-1],
+            'percentiles': {
+                f'p{percentil}': _percentil_ordenado(tramo, percentil) for percentil in PERCENTILES
+            },
+            'histograma': histograma,
+            'aprobados': aprobados,
+            'porcentaje_aprobacion': aprobados / cantidad * 100,
+        })
+
+    return resultados
+
+
+def _estadisticas_numpy(valores, inicios):
+    """Estadísticas de todos los tramos ordenados a la vez, con numpy."""
+    notas = np.frombuffer(valores, dtype=np.float64)
+    inicios = np.asarray(inicios, dtype=np.intp)
+    cantidades = np.diff(np.append(inicios, len(notas)))
+    tramo_de_cada_nota = np.repeat(np.arange(len(inicios)), cantidades)
+
+    promedios = np.add.reduceat(notas, inicios) / cantidades
+    desvios = notas - promedios[tramo_de_cada_nota]
+    desviaciones = np.sqrt(np.add.reduceat(desvios * desvios, inicios) / cantidades)
+
+    def percentil(q):
+        posicion = inicios + (cantidades - 1) * q / 100
+        bajo = np.floor(posicion).astype(np.intp)
+        alto = np.ceil(posicion).astype(np.intp)
+        return notas[bajo] + (notas[alto] - notas[bajo]) * (posicion - bajo)
+
+    cubetas = len(LIMITES_HISTOGRAMA) - 1
+    cubeta_de_cada_nota = np.clip(
+        np.searchsorted(LIMITES_HISTOGRAMA, notas, side='right') - 1, 0, cubetas - 1
+    )
+    histogramas = np.bincount(
+        tramo_de_cada_nota * cubetas + cubeta_de_cada_nota, minlength=len(inicios) * cubetas
+    ).reshape(len(inicios), cubetas)
+    aprobados = np.add.reduceat((notas >= NOTA_APROBACION).astype(np.int64), inicios)
+
+    medianas = percentil(50)
+    por_percentil = {f'p{q}': percentil(q).tolist() for q in PERCENTILES}
+    minimos = notas[inicios]
+    maximos = notas[inicios + cantidades - 1]
+
+    return [
+        {
+            'cantidad': int(cantidades[i]),
+            'promedio': float(promedios[i]),
+            'mediana': float(medianas[i]),
+            'desviacion': float(desviaciones[i]),
+            'minimo': float(minimos[i]),
+            'maximo': float(maximos[i]),
+            'percentiles': {clave: valores_q[i] for clave, valores_q in por_percentil.items()},
+            'histograma': histogramas[i].tolist(),
+            'aprobados': int(aprobados[i]),
+            'porcentaje_aprobacion': float(aprobados[i] / cantidades[i] * 100),
+        }
+        for i in range(len(inicios))
+    ]
+
+
+def _calcular(valores, inicios):
+    if not inicios:
+        return []
+    if np is not None:
+        return _estadisticas_numpy(valores, inicios)
+    return _estadisticas_python(valores, inicios)
+
+
+def estadisticas_por_grupo(queryset, campo_grupo, campo_nota='nota_final'):
+    """
+    Estadísticas de las notas de un queryset agrupadas por un campo
+    (materia_id, periodo_id, materia__profesor_id, ...), con una consulta.
+
+    Returns:
+        dict: {valor del grupo: estadísticas}; los grupos sin notas no aparecen
+    """
+    grupos, valores, inicios = cargar_notas(queryset, campo_grupo, campo_nota)
+    return dict(zip(grupos, _calcular(valores, inicios)))
+
+
+def estadisticas_notas(queryset, campo_nota='nota_final'):
+    """
+    Estadísticas de todas las notas de un queryset, con una consulta.
+
+    Returns:
+        dict: cantidad, promedio, mediana, desviacion (poblacional), minimo,
+        maximo, percentiles, histograma (ver LIMITES_HISTOGRAMA), aprobados y
+        porcentaje_aprobacion. Sin notas, cantidad es 0 y el resto None.
+    """
+    _, valores, inicios = cargar_notas(queryset, None, campo_nota)
+    resultados = _calcular(valores, inicios)
+    return resultados[0] if resultados else _vacio()
+
+
+def resumir_notas(notas):
+    """Estadísticas de notas ya leídas (floats o Decimal, en cualquier orden)."""
+    valores = array('d', sorted(float(nota) for nota in notas))
+    resultados = _calcular(valores, [0] if valores else [])
+    return resultados[0] if resultados else _vacio()
@@ -0,0 +1,142 @@
+# instrumentacion.py para la app reportes
+# Métricas de cada generación: tiempo por fase, consultas SQL, filas/s y memoria
+
+import sys
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+
+from .almacenamiento import sincronizar
+
+try:
+    import resource
+except ImportError:  # No existe en Windows; ahí no se reporta la memoria
+    resource = None
+
+
+FASES = ('consulta', 'serializacion', 'escritura', 'fsync')
+
+
+def rss_pico_kb():
+    """
+    Pico de memoria residente del proceso en KB, o None si no se puede medir.
+    Es el pico de toda la vida del proceso, no el de una generación.
+    """
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KB; macOS, bytes
+    return pico // 1024 if sys.platform == 'darwin' else pico
+
+
+class MedidorGeneracion:
+    """
+    Acumula las métricas de la generación de un reporte.
+
+    - consulta: tiempo dentro de las consultas SQL ejecutadas
+    - escritura: tiempo de escribir las filas en el archivo
+    - serializacion: el resto de la generación (armar las filas en Python)
+    - fsync: tiempo de forzar el archivo a disco al terminar (0 en
+      almacenamientos de objetos, donde la subida ya es durable)
+
+    La memoria es cuánto subió el pico del proceso durante la medición: 0 si
+    la generación no superó el pico que el worker ya tenía.
+    """
+
+    def __init__(self):
+        self.fases = dict.fromkeys(FASES, 0.0)
+        self.consultas = 0
+        self.duracion = 0.0
+        self.rss_inicial = None
+
+    def _contar_consulta(self, execute, sql, params, many, context):
+        """execute_wrapper que cuenta y cronometra cada consulta."""
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.fases['consulta'] += time.perf_counter() - inicio
+            self.consultas += 1
+
+    @contextmanager
+    def medir(self):
+        """Medir la generación completa y las consultas que ejecuta."""
+        if self.rss_inicial is None:
+            self.rss_inicial = rss_pico_kb()
+        inicio = time.perf_counter()
+        try:
+            with connection.execute_wrapper(self._contar_consulta):
+                yield self
+        finally:
+            self.duracion += time.perf_counter() - inicio
+
+    def sumar(self, fase, segundos):
+        """Sumar tiempo medido por fuera a una fase."""
+        self.fases[fase] += segundos
+
+    def sincronizar(self, nombre, almacenamiento=None):
+        """Forzar el archivo a disco y registrar lo que tarda (fase fsync)."""
+        inicio = time.perf_counter()
+        sincronizar(nombre, almacenamiento)
+        segundos = time.perf_counter() - inicio
+        self.fases['fsync'] += segundos
+        self.duracion += segundos
+
+    def resultado(self, registros):
+        """
+        Métricas listas para guardar en ReporteGenerado.metricas.
+
+        Args:
+            registros: Filas escritas en el reporte
+        """
+        rss_final = rss_pico_kb()
+        incremento = (
+            max(rss_final - self.rss_inicial, 0)
+            if rss_final is not None and self.rss_inicial is not None else None
+        )
+
+        fases = dict(self.fases)
+        fases['serializacion'] = max(
+            self.duracion - fases['consulta'] - fases['escritura'] - fases['fsync'], 0.0
+        )
+
+        return {
+            'duracion_segundos': round(self.duracion, 4),
+            'fases': {fase: round(segundos, 4) for fase, segundos in fases.items()},
+            'consultas': self.consultas,
+            'registros': registros,
+            'filas_por_segundo': round(registros / self.duracion, 1) if self.duracion > 0 else 0,
+            'rss_incremento_kb': incremento,
+        }
+
+
+def combinar_metricas(partes, registros):
+    """
+    Unir las métricas de una generación repartida entre varios workers.
+
+    Los tiempos y las consultas se suman (tiempo de trabajo total, no de
+    reloj) y el incremento de memoria es el máximo de los workers.
+
+    Args:
+        partes: Lista de diccionarios devueltos por MedidorGeneracion.resultado
+        registros: Filas escritas en el reporte final
+    """
+    duracion = sum(parte['duracion_segundos'] for parte in partes)
+    incrementos = [
+        parte['rss_incremento_kb'] for parte in partes
+        if parte.get('rss_incremento_kb') is not None
+    ]
+
+    return {
+        'duracion_segundos': round(duracion, 4),
+        'fases': {
+            fase: round(sum(parte['fases'][fase] for parte in partes), 4)
+            for fase in FASES
+        },
+        'consultas': sum(parte['consultas'] for parte in partes),
+        'registros': registros,
+        'filas_por_segundo': round(registros / duracion, 1) if duracion > 0 else 0,
+        'rss_incremento_kb': max(incrementos) if incrementos else None,
+        'workers': len(partes),
+    }
@@ -0,0 +1,122 @@
+# limpieza.py para la app reportes
+# Limpieza por lotes de reportes antiguos y sus archivos
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial
+
+from django.db import connection
+from django.utils import timezone
+
+from .almacenamiento import almacenamiento_reportes, eliminar
+from .cache import rutas_en_uso
+from .estadisticas import invalidar_estadisticas
+from .models import ReporteGenerado
+
+
+TAMANO_LOTE = 500
+HILOS_ARCHIVOS = 8
+
+
+def _borrar_lote(ids):
+    """
+    Borrar las filas de un lote con un solo DELETE.
+
+    QuerySet.delete() cargaría cada instancia porque hay un receptor de
+    post_delete (reporte_eliminado), que solo invalida las estadísticas y
+    limpiar_reportes ya lo hace una vez al final. Si algún modelo llega a
+    apuntar a ReporteGenerado se usa delete() para que resuelva las cascadas.
+    """
+    opciones = ReporteGenerado._meta
+    if opciones.related_objects:
+        ReporteGenerado.objects.filter(id__in=ids).delete()
+        return
+
+    marcadores = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {connection.ops.quote_name(opciones.db_table)} "
+            f"WHERE {connection.ops.quote_name(opciones.pk.column)} IN ({marcadores})",
+            ids
+        )
+
+
+def limpiar_reportes(dias=30, estados=None, expirar=False,
+                     tamano_lote=TAMANO_LOTE, hilos=HILOS_ARCHIVOS):
+    """
+    Limpiar los reportes creados hace más de `dias` días.
+
+    Recorre los ids por lotes (sin cargar instancias completas), borra los
+    archivos de cada lote en paralelo con un pool de hilos y luego elimina
+    las filas, o las marca como expiradas, con una consulta por lote y sin
+    señales por fila.
+    Los archivos que otro reporte vigente comparte (cache) no se borran.
+
+    Args:
+        dias: Antigüedad mínima de los reportes a limpiar
+        estados: Estados a limpiar; None limpia todos
+        expirar: Si es True las filas quedan en estado 'expirado' en vez de eliminarse
+        tamano_lote: Reportes por lote
+        hilos: Hilos para borrar archivos
+
+    Returns:
+        dict: Métricas de la limpieza
+    """
+    inicio = time.monotonic()
+    fecha_limite = timezone.now() - timedelta(days=dias)
+
+    reportes = ReporteGenerado.objects.filter(created_at__lt=fecha_limite)
+    if estados:
+        reportes = reportes.filter(estado__in=estados)
+    if expirar:
+        reportes = reportes.exclude(estado='expirado')
+
+    metricas = {
+        'reportes_procesados': 0,
+        'archivos_eliminados': 0,
+        'archivos_conservados': 0,
+        'lotes': 0,
+    }
+    ultimo_id = 0
+
+    eliminar_archivo = partial(eliminar, almacenamiento=almacenamiento_reportes())
+
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        while True:
+            lote = list(
+                reportes.filter(id__gt=ultimo_id).order_by('id').values_list('id', 'ruta_archivo')[:tamano_lote]
+            )
+            if not lote:
+                break
+
+            ids = [reporte_id for reporte_id, _ in lote]
+            ultimo_id = ids[-1]
+
+            rutas = {ruta for _, ruta in lote if ruta}
+            compartidas = rutas_en_uso(rutas, ids)
+            eliminados = sum(pool.map(eliminar_archivo, rutas - compartidas))
+
+            if expirar:
+                ReporteGenerado.objects.filter(id__in=ids).update(
+                    estado='expirado',
+                    updated_at=timezone.now()
+                )
+            else:
+                # Los archivos ya se borraron
+                _borrar_lote(ids)
+
+            metricas['reportes_procesados'] += len(ids)
+            metricas['archivos_eliminados'] += eliminados
+            metricas['archivos_conservados'] += len(compartidas)
+            metricas['lotes'] += 1
+
+    if metricas['reportes_procesados']:
+        invalidar_estadisticas()
+
+    duracion = time.monotonic() - inicio
+    metricas['duracion_segundos'] = round(duracion, 3)
+    metricas['reportes_por_segundo'] = (
+        round(metricas['reportes_procesados'] / duracion, 1) if duracion > 0 else 0
+    )
+    return metricas
@@ -0,0 +1,142 @@
+"""
+Comando para medir la generación de reportes sobre un conjunto de datos sintético.
+Uso: python manage.py benchmark_reportes --referencia benchmark.json
+"""
+
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.reportes import benchmark
+
+
+class Command(BaseCommand):
+    """
+    Carga (o reutiliza) estudiantes, materias e inscripciones sintéticos,
+    mide tiempo, consultas y memoria de cada tipo de reporte y de las vistas
+    CSV, y falla si algún caso empeora respecto de una referencia guardada.
+    """
+
+    help = 'Medir la generación de reportes y detectar regresiones de rendimiento'
+
+    def add_arguments(self, parser):
+        for nombre, valor in benchmark.DATOS_POR_DEFECTO.items():
+            parser.add_argument(
+                f'--{nombre}',
+                type=int,
+                default=valor,
+                help=f'Cantidad de {nombre} sintéticos (por defecto {valor})',
+            )
+        parser.add_argument(
+            '--recrear',
+            action='store_true',
+            help='Borrar y volver a cargar los datos sintéticos aunque ya existan',
+        )
+        parser.add_argument(
+            '--borrar-datos',
+            action='store_true',
+            help='Solo borrar los datos sintéticos y terminar',
+        )
+        parser.add_argument(
+            '--casos',
+            help='Casos a medir separados por coma (por defecto todos)',
+        )
+        parser.add_argument(
+            '--repeticiones',
+            type=int,
+            default=1,
+            help='Corridas por caso; se informa la más rápida',
+        )
+        parser.add_argument(
+            '--referencia',
+            help='JSON con resultados anteriores contra los que comparar',
+        )
+        parser.add_argument(
+            '--guardar-referencia',
+            help='Guardar los resultados en este JSON para comparar después',
+        )
+        parser.add_argument(
+            '--umbral',
+            type=float,
+            default=0.25,
+            help='Empeoramiento tolerado en tiempo y memoria (0.25 = 25%%)',
+        )
+        parser.add_argument(
+            '--forzar',
+            action='store_true',
+            help='Correr aunque DEBUG esté desactivado (los datos se escriben en la base configurada)',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['forzar']:
+            raise CommandError(
+                'El benchmark escribe datos sintéticos en la base configurada; '
+                'con DEBUG desactivado hay que confirmarlo con --forzar.'
+            )
+
+        if options['borrar_datos']:
+            benchmark.borrar_datos()
+            self.stdout.write(self.style.SUCCESS('Datos sintéticos borrados'))
+            return
+
+        pedidos = {nombre: options[nombre] for nombre in benchmark.DATOS_POR_DEFECTO}
+        datos = self._preparar_datos(pedidos, options['recrear'])
+
+        referencia = None
+        if options['referencia'] and os.path.exists(options['referencia']):
+            referencia = benchmark.leer_referencia(options['referencia'])
+            if referencia['datos'] != datos:
+                raise CommandError(
+                    f"La referencia se tomó con otros datos ({referencia['datos']}); "
+                    f"use --recrear con esos tamaños o guarde una nueva referencia."
+                )
+        elif options['referencia']:
+            self.stdout.write(self.style.WARNING(
+                f"No existe {options['referencia']}: no hay contra qué comparar"
+            ))
+
+        nombres = options['casos'].split(',') if options['casos'] else None
+        try:
+            resultados = benchmark.ejecutar_benchmark(
+                nombres, options['repeticiones'], progreso=self._informar
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['guardar_referencia']:
+            benchmark.guardar_referencia(options['guardar_referencia'], datos, resultados)
+            self.stdout.write(f"Referencia guardada en {options['guardar_referencia']}")
+
+        if referencia is None:
+            return
+
+        regresiones = benchmark.comparar(resultados, referencia['resultados'], options['umbral'])
+        if regresiones:
+            for regresion in regresiones:
+                self.stdout.write(self.style.ERROR(regresion))
+            raise CommandError(f'{len(regresiones)} regresiones de rendimiento')
+        self.stdout.write(self.style.SUCCESS('Sin regresiones respecto de la referencia'))
+
+    def _preparar_datos(self, pedidos, recrear):
+        """Reutilizar los datos sintéticos si coinciden; si no, cargarlos de nuevo."""
+        existentes = benchmark.datos_existentes()
+        if existentes == pedidos and not recrear:
+            self.stdout.write(f'Reutilizando datos sintéticos: {existentes}')
+            return existentes
+
+        if existentes:
+            benchmark.borrar_datos()
+        self.stdout.write(f'Cargando datos sintéticos: {pedidos}')
+        try:
+            return benchmark.crear_datos(**pedidos)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+    def _informar(self, nombre, resultado, segundos):
+        self.stdout.write(
+            f"{nombre:<20} {resultado['segundos']:>9.3f} s "
+            f"{resultado['consultas']:>7} consultas "
+            f"{resultado['memoria_pico_kb']:>9} KB "
+            f"({segundos:.1f} s en total)"
+        )
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reportes", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reportegenerado",
+            name="huella",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                max_length=64,
+                verbose_name="Huella del Reporte",
+            ),
+        ),
+    ]
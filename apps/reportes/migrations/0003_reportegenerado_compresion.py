@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reportes", "0002_reportegenerado_huella"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reportegenerado",
+            name="compresion",
+            field=models.CharField(
+                choices=[
+                    ("ninguna", "Sin compresión"),
+                    ("gzip", "gzip"),
+                    ("zstd", "Zstandard"),
+                ],
+                default="ninguna",
+                max_length=10,
+                verbose_name="Compresión",
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reportes", "0003_reportegenerado_compresion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reportegenerado",
+            name="checksum",
+            field=models.CharField(
+                blank=True, max_length=64, verbose_name="Checksum del Archivo"
+            ),
+        ),
+    ]
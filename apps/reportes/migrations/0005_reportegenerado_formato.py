@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reportes", "0004_reportegenerado_checksum"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reportegenerado",
+            name="formato",
+            field=models.CharField(
+                choices=[("csv", "CSV"), ("parquet", "Parquet")],
+                default="csv",
+                max_length=10,
+                verbose_name="Formato",
+            ),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reportes", "0005_reportegenerado_formato"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="reportegenerado",
+            name="formato",
+            field=models.CharField(
+                choices=[
+                    ("csv", "CSV"),
+                    ("parquet", "Parquet"),
+                    ("zip", "ZIP (un CSV por estudiante)"),
+                ],
+                default="csv",
+                max_length=10,
+                verbose_name="Formato",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="reportegenerado",
+            name="tipo",
+            field=models.CharField(
+                choices=[
+                    ("estudiante", "Reporte de Estudiante"),
+                    ("profesor", "Reporte de Profesor"),
+                    ("materia", "Reporte de Materia"),
+                    ("periodo", "Reporte de Período"),
+                    ("general", "Reporte General"),
+                    ("lote", "Reporte por Lote de Estudiantes"),
+                ],
+                max_length=20,
+                verbose_name="Tipo de Reporte",
+            ),
+        ),
+    ]
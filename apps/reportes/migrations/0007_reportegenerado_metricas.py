@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 05:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reportes", "0006_alter_reportegenerado_formato_tipo"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reportegenerado",
+            name="metricas",
+            field=models.JSONField(
+                blank=True, default=dict, verbose_name="Métricas de Generación"
+            ),
+        ),
+    ]
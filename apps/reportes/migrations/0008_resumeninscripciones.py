@@ -0,0 +1,118 @@
+# Generated by Django 4.2.30 on 2026-10-18 05:07
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+import django.db.models.deletion
+
+
+def poblar_resumenes(apps, schema_editor):
+    """Calcular los resúmenes de las inscripciones existentes."""
+    Inscripcion = apps.get_model("inscripciones", "Inscripcion")
+    ResumenInscripciones = apps.get_model("reportes", "ResumenInscripciones")
+
+    totales = Inscripcion.objects.values("periodo_id", "materia_id", "estado").annotate(
+        total=Count("id"), con_nota=Count("nota_final"), suma_notas=Sum("nota_final")
+    ).order_by()
+
+    ResumenInscripciones.objects.bulk_create(
+        [
+            ResumenInscripciones(
+                periodo_id=fila["periodo_id"],
+                materia_id=fila["materia_id"],
+                estado=fila["estado"],
+                total=fila["total"],
+                con_nota=fila["con_nota"],
+                suma_notas=fila["suma_notas"] or 0,
+            )
+            for fila in totales
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("inscripciones", "0001_initial"),
+        ("materias", "0001_initial"),
+        ("reportes", "0007_reportegenerado_metricas"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ResumenInscripciones",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "estado",
+                    models.CharField(
+                        max_length=20, verbose_name="Estado de Inscripción"
+                    ),
+                ),
+                (
+                    "total",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Inscripciones"
+                    ),
+                ),
+                (
+                    "con_nota",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Inscripciones con Nota"
+                    ),
+                ),
+                (
+                    "suma_notas",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="Suma de Notas Finales",
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Fecha de actualización"
+                    ),
+                ),
+                (
+                    "materia",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="materias.materia",
+                        verbose_name="Materia",
+                    ),
+                ),
+                (
+                    "periodo",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="materias.periodo",
+                        verbose_name="Período",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Resumen de Inscripciones",
+                "verbose_name_plural": "Resúmenes de Inscripciones",
+                "db_table": "reportes_resumen_inscripciones",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="resumeninscripciones",
+            constraint=models.UniqueConstraint(
+                fields=("periodo", "materia", "estado"), name="resumen_unico_por_grupo"
+            ),
+        ),
+        migrations.RunPython(poblar_resumenes, migrations.RunPython.noop),
+    ]
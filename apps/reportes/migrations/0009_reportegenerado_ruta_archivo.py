@@ -0,0 +1,50 @@
+# Generated by Django 4.2.30 on 2026-10-18 05:17
+
+import os
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr
+
+
+def _directorio_reportes():
+    return os.path.join(str(settings.MEDIA_ROOT), "reportes") + os.sep
+
+
+def rutas_a_nombres(apps, schema_editor):
+    """Pasar las rutas absolutas bajo MEDIA_ROOT/reportes a nombres del almacenamiento."""
+    ReporteGenerado = apps.get_model("reportes", "ReporteGenerado")
+    directorio = _directorio_reportes()
+
+    ReporteGenerado.objects.filter(ruta_archivo__startswith=directorio).update(
+        ruta_archivo=Substr(F("ruta_archivo"), len(directorio) + 1)
+    )
+
+
+def nombres_a_rutas(apps, schema_editor):
+    """Volver a las rutas absolutas en MEDIA_ROOT/reportes."""
+    ReporteGenerado = apps.get_model("reportes", "ReporteGenerado")
+
+    ReporteGenerado.objects.exclude(ruta_archivo__startswith=os.sep).exclude(ruta_archivo="").update(
+        ruta_archivo=Concat(Value(_directorio_reportes()), F("ruta_archivo"))
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reportes", "0008_resumeninscripciones"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="reportegenerado",
+            name="ruta_archivo",
+            field=models.CharField(
+                help_text="Nombre del archivo dentro del almacenamiento de reportes",
+                max_length=500,
+                verbose_name="Ruta del Archivo",
+            ),
+        ),
+        migrations.RunPython(rutas_a_nombres, nombres_a_rutas),
+    ]
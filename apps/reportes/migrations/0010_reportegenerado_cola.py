@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-18 05:22
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def marcar_despachados(apps, schema_editor):
+    """Los reportes existentes ya se enviaron a Celery: no se vuelven a despachar."""
+    ReporteGenerado = apps.get_model("reportes", "ReporteGenerado")
+    ReporteGenerado.objects.update(encolado_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reportes", "0009_reportegenerado_ruta_archivo"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reportegenerado",
+            name="clave_cola",
+            field=models.CharField(
+                blank=True, max_length=64, verbose_name="Clave en la Cola"
+            ),
+        ),
+        migrations.AddField(
+            model_name="reportegenerado",
+            name="encolado_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Fecha de despacho"
+            ),
+        ),
+        migrations.AddField(
+            model_name="reportegenerado",
+            name="prioridad",
+            field=models.PositiveSmallIntegerField(default=0, verbose_name="Prioridad"),
+        ),
+        migrations.AddIndex(
+            model_name="reportegenerado",
+            index=models.Index(
+                fields=["estado", "encolado_at"], name="reportes_ge_estado_d44ec9_idx"
+            ),
+        ),
+        migrations.RunPython(marcar_despachados, migrations.RunPython.noop),
+    ]
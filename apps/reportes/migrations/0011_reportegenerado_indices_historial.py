@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 05:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reportes", "0010_reportegenerado_cola"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="reportegenerado",
+            index=models.Index(
+                fields=["solicitante", "created_at", "id"],
+                name="reportes_ge_solicit_d36d52_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="reportegenerado",
+            index=models.Index(
+                fields=["created_at", "id"], name="reportes_ge_created_9d8fbf_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:10
+
+from django.db import migrations
+
+from apps.common.busqueda import BusquedaTexto
+
+
+BUSQUEDA = BusquedaTexto('reportes_generados', ['nombre_archivo'], modo='subcadena')
+
+
+def crear_indices(apps, schema_editor):
+    BUSQUEDA.crear_indices(schema_editor)
+
+
+def eliminar_indices(apps, schema_editor):
+    BUSQUEDA.eliminar_indices(schema_editor)
+
+
+class Migration(migrations.Migration):
+    # Los índices de PostgreSQL se crean CONCURRENTLY, fuera de una transacción
+    atomic = False
+
+    dependencies = [
+        ("reportes", "0011_reportegenerado_indices_historial"),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices, eliminar_indices),
+    ]
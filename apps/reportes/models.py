@@ -26,6 +26,7 @@ class ReporteGenerado(models.Model):
         ('materia', 'Reporte de Materia'),
         ('periodo', 'Reporte de Período'),
         ('general', 'Reporte General'),
+        ('lote', 'Reporte por Lote de Estudiantes'),
     ]
     
     tipo = models.CharField(
@@ -42,7 +43,43 @@ class ReporteGenerado(models.Model):
     
     ruta_archivo = models.CharField(
         max_length=500,
-        verbose_name='Ruta del Archivo'
+        verbose_name='Ruta del Archivo',
+        help_text='Nombre del archivo dentro del almacenamiento de reportes'
+    )
+    
+    # SHA-256 del archivo en disco, base del ETag de la descarga
+    checksum = models.CharField(
+        max_length=64,
+        blank=True,
+        verbose_name='Checksum del Archivo'
+    )
+    
+    # Formato del contenido del archivo
+    FORMATO_CHOICES = [
+        ('csv', 'CSV'),
+        ('parquet', 'Parquet'),
+        ('zip', 'ZIP (un CSV por estudiante)'),
+    ]
+    
+    formato = models.CharField(
+        max_length=10,
+        choices=FORMATO_CHOICES,
+        default='csv',
+        verbose_name='Formato'
+    )
+    
+    # Formato en que se guardó el archivo
+    COMPRESION_CHOICES = [
+        ('ninguna', 'Sin compresión'),
+        ('gzip', 'gzip'),
+        ('zstd', 'Zstandard'),
+    ]
+    
+    compresion = models.CharField(
+        max_length=10,
+        choices=COMPRESION_CHOICES,
+        default='ninguna',
+        verbose_name='Compresión'
     )
     
     # Parámetros del reporte
@@ -51,6 +88,40 @@ class ReporteGenerado(models.Model):
         verbose_name='Parámetros del Reporte'
     )
     
+    # Huella de tipo + parámetros + versión de datos, para reutilizar archivos
+    huella = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        verbose_name='Huella del Reporte'
+    )
+    
+    # Métricas de la última generación (ver instrumentacion.py)
+    metricas = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Métricas de Generación'
+    )
+    
+    # Cola de generación (ver cola.py): mayor prioridad se despacha primero,
+    # la clave agrupa solicitudes iguales y encolado_at marca el despacho
+    prioridad = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Prioridad'
+    )
+    
+    clave_cola = models.CharField(
+        max_length=64,
+        blank=True,
+        verbose_name='Clave en la Cola'
+    )
+    
+    encolado_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Fecha de despacho'
+    )
+    
     # Estado del reporte
     ESTADO_CHOICES = [
         ('pendiente', 'Pendiente'),
@@ -96,19 +167,32 @@ class ReporteGenerado(models.Model):
         indexes = [
             models.Index(fields=['solicitante', 'tipo']),
             models.Index(fields=['estado', 'created_at']),
+            models.Index(fields=['estado', 'encolado_at']),
+            # Historial paginado por cursor (created_at, id): propio y de todos
+            models.Index(fields=['solicitante', 'created_at', 'id']),
+            models.Index(fields=['created_at', 'id']),
         ]
     
     def __str__(self):
         return f"{self.get_tipo_display()} - {self.solicitante.username} - {self.created_at.strftime('%Y-%m-%d %H:%M')}"
     
-    def marcar_completado(self, registros_procesados=0):
-        """Marcar el reporte como completado."""
+    def marcar_completado(self, registros_procesados=0, metricas=None):
+        """Marcar el reporte como completado, con las métricas de la generación si las hay."""
         from django.utils import timezone
         
+        from .almacenamiento import checksum_archivo, existe
+        
         self.estado = 'completado'
         self.registros_procesados = registros_procesados
         self.completado_at = timezone.now()
-        self.save(update_fields=['estado', 'registros_procesados', 'completado_at'])
+        if metricas is not None:
+            self.metricas = metricas
+        if not self.checksum and existe(self.ruta_archivo):
+            self.checksum = checksum_archivo(self.ruta_archivo)
+        self.save(update_fields=[
+            'estado', 'registros_procesados', 'completado_at',
+            'ruta_archivo', 'huella', 'compresion', 'checksum', 'metricas'
+        ])
     
     def marcar_error(self, mensaje_error):
         """Marcar el reporte como error."""
@@ -121,6 +205,13 @@ class ReporteGenerado(models.Model):
         self.estado = 'generando'
         self.save(update_fields=['estado'])
     
+    def actualizar_progreso(self, registros_procesados):
+        """Publicar cuántos registros lleva escritos un reporte en generación."""
+        self.registros_procesados = registros_procesados
+        ReporteGenerado.objects.filter(pk=self.pk).update(
+            registros_procesados=registros_procesados
+        )
+    
     @property
     def es_completado(self):
         """Verificar si el reporte está completado."""
@@ -147,30 +238,72 @@ class ReporteGenerado(models.Model):
     def limpiar_reportes_antiguos(cls, dias=30):
         """
         Limpiar reportes antiguos para liberar espacio.
+        Elimina por lotes los reportes completados o con error y sus archivos.
         """
-        from django.utils import timezone
-        from datetime import timedelta
-        
-        fecha_limite = timezone.now() - timedelta(days=dias)
-        
-        # Obtener reportes antiguos
-        reportes_antiguos = cls.objects.filter(
-            created_at__lt=fecha_limite,
-            estado__in=['completado', 'error']
-        )
-        
-        count = reportes_antiguos.count()
-        
-        # Eliminar archivos físicos y registros
-        for reporte in reportes_antiguos:
-            try:
-                import os
-                if os.path.exists(reporte.ruta_archivo):
-                    os.remove(reporte.ruta_archivo)
-            except Exception:
-                pass  # Ignorar errores al eliminar archivos
+        from .limpieza import limpiar_reportes
         
-        # Eliminar registros de la base de datos
-        reportes_antiguos.delete()
-        
-        return count 
\ No newline at end of file
+        metricas = limpiar_reportes(dias, estados=['completado', 'error'])
+        return metricas['reportes_procesados']
+
+
+class ResumenInscripciones(models.Model):
+    """
+    Totales de inscripciones por período, materia y estado.
+
+    Se mantiene en forma incremental desde el guardado de inscripciones (ver
+    resumenes.py) para que el reporte general y los tableros lean una fila
+    por grupo en vez de recorrer todas las inscripciones.
+    """
+    
+    periodo = models.ForeignKey(
+        'materias.Periodo',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Período'
+    )
+    
+    materia = models.ForeignKey(
+        'materias.Materia',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Materia'
+    )
+    
+    estado = models.CharField(
+        max_length=20,
+        verbose_name='Estado de Inscripción'
+    )
+    
+    total = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Inscripciones'
+    )
+    
+    # Inscripciones con nota final y la suma de esas notas, para promediar sin recorrerlas
+    con_nota = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Inscripciones con Nota'
+    )
+    
+    suma_notas = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        verbose_name='Suma de Notas Finales'
+    )
+    
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Fecha de actualización')
+    
+    class Meta:
+        verbose_name = 'Resumen de Inscripciones'
+        verbose_name_plural = 'Resúmenes de Inscripciones'
+        db_table = 'reportes_resumen_inscripciones'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['periodo', 'materia', 'estado'],
+                name='resumen_unico_por_grupo'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.periodo_id}/{self.materia_id}/{self.estado}: {self.total}"
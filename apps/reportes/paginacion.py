@@ -0,0 +1,90 @@
+# paginacion.py para la app reportes
+# Paginación por cursor (keyset) del historial de reportes
+
+from datetime import datetime
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+class PaginacionKeyset(CursorPagination):
+    """
+    Paginación por cursor sobre (created_at, id), de lo más reciente a lo
+    más antiguo.
+
+    El cursor guarda la fecha y el id de la última fila enviada y la página
+    siguiente se pide con "anteriores a esa fila", así que cualquier página
+    cuesta lo mismo que la primera (no hay OFFSET) y dos reportes creados en
+    el mismo instante no se saltan ni se repiten. No se informa el total:
+    contarlo recorrería toda la tabla.
+    """
+
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+    def _posicion(self, reporte):
+        return f"{reporte.created_at.isoformat()}|{reporte.id}"
+
+    def _leer_posicion(self, posicion):
+        try:
+            fecha, reporte_id = posicion.rsplit('|', 1)
+            return datetime.fromisoformat(fecha), int(reporte_id)
+        except (AttributeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.request = request
+
+        cursor = self.decode_cursor(request)
+        self.cursor = cursor
+        hacia_atras = bool(cursor and cursor.reverse)
+
+        if cursor is not None and cursor.position is not None:
+            fecha, reporte_id = self._leer_posicion(cursor.position)
+            # created_at <= fecha acota el rango del índice; el exclude
+            # descarta los empates ya enviados
+            if hacia_atras:
+                queryset = queryset.filter(created_at__gte=fecha).exclude(
+                    created_at=fecha, id__lte=reporte_id
+                )
+            else:
+                queryset = queryset.filter(created_at__lte=fecha).exclude(
+                    created_at=fecha, id__gte=reporte_id
+                )
+
+        if hacia_atras:
+            queryset = queryset.order_by('created_at', 'id')
+        else:
+            queryset = queryset.order_by('-created_at', '-id')
+
+        filas = list(queryset[:self.page_size + 1])
+        hay_mas = len(filas) > self.page_size
+        self.page = filas[:self.page_size]
+        if hacia_atras:
+            self.page.reverse()
+
+        con_cursor = cursor is not None and cursor.position is not None
+        self.has_next = hay_mas if not hacia_atras else con_cursor
+        self.has_previous = con_cursor if not hacia_atras else hay_mas
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=self._posicion(self.page[-1]))
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=self._posicion(self.page[0]))
+        )
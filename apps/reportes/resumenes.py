@@ -0,0 +1,223 @@
+# resumenes.py para la app reportes
+# Tablas resumen de inscripciones por período, materia y estado
+
+import threading
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.inscripciones.models import Inscripcion
+from .models import ResumenInscripciones
+
+
+CLAVE_MARCA = 'reportes:resumenes:marca'
+
+# Grupos por consulta al recalcular
+GRUPOS_POR_LOTE = 200
+
+# Grupos (periodo_id, materia_id) a recalcular al confirmar la transacción
+_pendientes = threading.local()
+
+
+def _filtro_grupos(grupos):
+    """Q que selecciona las filas de los grupos (periodo_id, materia_id) dados."""
+    filtro = Q()
+    for periodo_id, materia_id in grupos:
+        filtro |= Q(periodo_id=periodo_id, materia_id=materia_id)
+    return filtro
+
+
+def recalcular_grupos(grupos):
+    """
+    Recalcular las filas resumen de los grupos (periodo_id, materia_id) dados.
+
+    Cada grupo se recalcula completo con una consulta agrupada por estado
+    sobre sus inscripciones, así que el costo no depende de cuántos cambios
+    hubo. Las filas se insertan o actualizan (upsert) y se borran las de
+    estados que ya no tienen inscripciones.
+
+    Returns:
+        int: Grupos recalculados
+    """
+    grupos = sorted(set(grupos))
+
+    for inicio in range(0, len(grupos), GRUPOS_POR_LOTE):
+        lote = grupos[inicio:inicio + GRUPOS_POR_LOTE]
+        filtro = _filtro_grupos(lote)
+
+        totales = Inscripcion.objects.filter(filtro).values(
+            'periodo_id', 'materia_id', 'estado'
+        ).annotate(
+            total=Count('id'),
+            con_nota=Count('nota_final'),
+            suma_notas=Sum('nota_final')
+        ).order_by()
+
+        filas = [
+            ResumenInscripciones(
+                periodo_id=fila['periodo_id'],
+                materia_id=fila['materia_id'],
+                estado=fila['estado'],
+                total=fila['total'],
+                con_nota=fila['con_nota'],
+                suma_notas=fila['suma_notas'] or 0,
+                updated_at=timezone.now()
+            )
+            for fila in totales
+        ]
+
+        vigentes = Q()
+        for fila in filas:
+            vigentes |= Q(periodo_id=fila.periodo_id, materia_id=fila.materia_id, estado=fila.estado)
+
+        with transaction.atomic():
+            ResumenInscripciones.objects.bulk_create(
+                filas,
+                update_conflicts=True,
+                unique_fields=['periodo', 'materia', 'estado'],
+                update_fields=['total', 'con_nota', 'suma_notas', 'updated_at']
+            )
+            obsoletas = ResumenInscripciones.objects.filter(filtro)
+            if filas:
+                obsoletas = obsoletas.exclude(vigentes)
+            obsoletas.delete()
+
+    return len(grupos)
+
+
+def programar_recalculo(periodo_id, materia_id):
+    """
+    Anotar un grupo para recalcularlo al confirmar la transacción actual.
+
+    Los cambios de un mismo grupo dentro de una transacción (por ejemplo
+    una carga de notas) se recalculan una sola vez. Fuera de una
+    transacción el recálculo es inmediato.
+    """
+    grupos = getattr(_pendientes, 'grupos', None)
+    if grupos is None:
+        grupos = _pendientes.grupos = set()
+    grupos.add((periodo_id, materia_id))
+
+    # El primer callback que corre recalcula todo lo pendiente; los demás no
+    # encuentran nada. Si la transacción se revierte, los grupos quedan para
+    # el siguiente commit, lo que solo cuesta un recálculo de más.
+    transaction.on_commit(_recalcular_pendientes)
+
+
+def _recalcular_pendientes():
+    """Recalcular los grupos anotados por programar_recalculo."""
+    grupos = getattr(_pendientes, 'grupos', None)
+    _pendientes.grupos = None
+    if grupos:
+        recalcular_grupos(grupos)
+
+
+def reconstruir_resumenes():
+    """Recalcular todas las filas resumen desde cero."""
+    grupos = Inscripcion.objects.values_list('periodo_id', 'materia_id').distinct().order_by()
+
+    with transaction.atomic():
+        ResumenInscripciones.objects.all().delete()
+        return recalcular_grupos(grupos)
+
+
+def actualizar_resumenes_modificados():
+    """
+    Recalcular los grupos con inscripciones modificadas desde la última corrida.
+
+    Cubre los cambios que no pasan por save(), como queryset.update(). La
+    marca de la última corrida vive en la cache; si no está, se reconstruye
+    todo.
+
+    Returns:
+        dict: Grupos recalculados y si fue una reconstrucción completa
+    """
+    ahora = timezone.now()
+    marca = cache.get(CLAVE_MARCA)
+
+    if marca is None:
+        grupos = reconstruir_resumenes()
+    else:
+        grupos = recalcular_grupos(
+            Inscripcion.objects.filter(updated_at__gte=marca).values_list(
+                'periodo_id', 'materia_id'
+            ).distinct().order_by()
+        )
+
+    cache.set(CLAVE_MARCA, ahora, timeout=None)
+    return {
+        'grupos_recalculados': grupos,
+        'reconstruccion_completa': marca is None
+    }
+
+
+def totales_inscripciones(periodo_id=None):
+    """
+    Totales de inscripciones leídos de las filas resumen.
+
+    Returns:
+        dict: total, aprobados y promedio de nota final (None si no hay notas)
+    """
+    resumenes = ResumenInscripciones.objects.all()
+    if periodo_id:
+        resumenes = resumenes.filter(periodo_id=periodo_id)
+
+    resultado = resumenes.aggregate(
+        inscripciones=Sum('total'),
+        aprobadas=Sum('total', filter=Q(estado='aprobada')),
+        inscripciones_con_nota=Sum('con_nota'),
+        notas=Sum('suma_notas')
+    )
+    con_nota = resultado['inscripciones_con_nota']
+
+    return {
+        'total': resultado['inscripciones'] or 0,
+        'aprobados': resultado['aprobadas'] or 0,
+        'promedio': resultado['notas'] / con_nota if con_nota else None,
+    }
+
+
+def resumen_por_materia(periodo_id=None):
+    """
+    Filas resumen agrupadas por período y materia, con el conteo por estado.
+
+    Returns:
+        list: Un diccionario por (período, materia), ordenado por período y código
+    """
+    resumenes = ResumenInscripciones.objects.all()
+    if periodo_id:
+        resumenes = resumenes.filter(periodo_id=periodo_id)
+
+    filas = resumenes.order_by('periodo__nombre', 'materia__codigo', 'estado').values_list(
+        'periodo_id', 'periodo__nombre', 'materia_id', 'materia__codigo', 'materia__nombre',
+        'estado', 'total', 'con_nota', 'suma_notas'
+    )
+
+    grupos = {}
+    for (periodo_id, periodo_nombre, materia_id, codigo, nombre,
+         estado, total, con_nota, suma_notas) in filas:
+        grupo = grupos.setdefault((periodo_id, materia_id), {
+            'periodo_id': periodo_id,
+            'periodo': periodo_nombre,
+            'materia_id': materia_id,
+            'materia_codigo': codigo,
+            'materia': nombre,
+            'total': 0,
+            'por_estado': {},
+            'con_nota': 0,
+            'suma_notas': 0,
+        })
+        grupo['total'] += total
+        grupo['por_estado'][estado] = total
+        grupo['con_nota'] += con_nota
+        grupo['suma_notas'] += suma_notas
+
+    resultado = []
+    for grupo in grupos.values():
+        con_nota = grupo.pop('con_nota')
+        suma_notas = grupo.pop('suma_notas')
+        grupo['promedio_nota_final'] = round(float(suma_notas / con_nota), 2) if con_nota else None
+        resultado.append(grupo)
+    return resultado
@@ -2,9 +2,19 @@
 # Serializers para reportes - parámetros de filtrado, metadatos de archivos
 
 from rest_framework import serializers
+from .columnar import columnar_disponible
 from .models import ReporteGenerado
 
 
+def _validar_formato(value):
+    """Validar que el formato pedido se pueda generar en este servidor."""
+    if value == 'parquet' and not columnar_disponible():
+        raise serializers.ValidationError(
+            "La exportación Parquet no está disponible: falta instalar pyarrow."
+        )
+    return value
+
+
 class ReporteGeneradoSerializer(serializers.ModelSerializer):
     """Serializer para el modelo ReporteGenerado."""
     
@@ -14,6 +24,7 @@ class ReporteGeneradoSerializer(serializers.ModelSerializer):
             'id',
             'solicitante',
             'tipo',
+            'formato',
             'nombre_archivo',
             'ruta_archivo',
             'parametros',
@@ -25,7 +36,7 @@ class ReporteGeneradoSerializer(serializers.ModelSerializer):
             'completado_at'
         ]
         read_only_fields = [
-            'id', 'nombre_archivo', 'ruta_archivo', 'parametros', 
+            'id', 'formato', 'nombre_archivo', 'ruta_archivo', 'parametros', 
             'estado', 'registros_procesados', 'mensaje_error',
             'created_at', 'updated_at', 'completado_at'
         ]
@@ -75,6 +86,7 @@ class ReporteGeneradoDetalleSerializer(ReporteGeneradoSerializer):
     es_completado = serializers.BooleanField(read_only=True)
     es_error = serializers.BooleanField(read_only=True)
     es_pendiente = serializers.BooleanField(read_only=True)
+    metricas = serializers.JSONField(read_only=True)
     
     class Meta(ReporteGeneradoSerializer.Meta):
         fields = ReporteGeneradoSerializer.Meta.fields + [
@@ -82,7 +94,8 @@ class ReporteGeneradoDetalleSerializer(ReporteGeneradoSerializer):
             'tiempo_generacion',
             'es_completado',
             'es_error',
-            'es_pendiente'
+            'es_pendiente',
+            'metricas'
         ]
     
     def get_tiempo_generacion(self, obj):
@@ -178,6 +191,19 @@ class ReporteGeneralSerializer(serializers.Serializer):
         help_text="ID del período (opcional, si no se especifica se incluyen todos)"
     )
     
+    fragmentos = serializers.IntegerField(
+        default=1,
+        min_value=1,
+        max_value=32,
+        help_text="Cantidad de fragmentos a generar en paralelo (por defecto 1)"
+    )
+    
+    formato = serializers.ChoiceField(
+        choices=ReporteGenerado.FORMATO_CHOICES,
+        default='csv',
+        help_text="Formato del archivo: csv o parquet (solo detalle de inscripciones)"
+    )
+    
     def validate_periodo_id(self, value):
         """Validar que el período existe."""
         if value:
@@ -189,6 +215,114 @@ class ReporteGeneralSerializer(serializers.Serializer):
             except Periodo.DoesNotExist:
                 raise serializers.ValidationError("Período no encontrado.")
         return value
+    
+    def validate_formato(self, value):
+        """Validar que el formato esté disponible."""
+        return _validar_formato(value)
+
+
+class ReportePeriodoSerializer(serializers.Serializer):
+    """Serializer para solicitar reporte por período."""
+    
+    periodo_id = serializers.IntegerField(
+        help_text="ID del período para generar el reporte"
+    )
+    
+    formato = serializers.ChoiceField(
+        choices=ReporteGenerado.FORMATO_CHOICES,
+        default='csv',
+        help_text="Formato del archivo: csv o parquet"
+    )
+    
+    def validate_periodo_id(self, value):
+        """Validar que el período existe."""
+        from apps.materias.models import Periodo
+        
+        if not Periodo.objects.filter(id=value).exists():
+            raise serializers.ValidationError("Período no encontrado.")
+        return value
+    
+    def validate_formato(self, value):
+        """Validar que el formato esté disponible."""
+        return _validar_formato(value)
+
+
+class ReporteMateriaSerializer(serializers.Serializer):
+    """Serializer para solicitar reporte por materia."""
+    
+    materia_id = serializers.IntegerField(
+        help_text="ID de la materia para generar el reporte"
+    )
+    
+    formato = serializers.ChoiceField(
+        choices=ReporteGenerado.FORMATO_CHOICES,
+        default='csv',
+        help_text="Formato del archivo: csv o parquet"
+    )
+    
+    def validate_materia_id(self, value):
+        """Validar que la materia existe."""
+        from apps.materias.models import Materia
+        
+        if not Materia.objects.filter(id=value).exists():
+            raise serializers.ValidationError("Materia no encontrada.")
+        return value
+    
+    def validate_formato(self, value):
+        """Validar que el formato esté disponible."""
+        return _validar_formato(value)
+
+
+class ReporteLoteSerializer(serializers.Serializer):
+    """Serializer para solicitar el reporte de un lote de estudiantes."""
+    
+    estudiante_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False,
+        max_length=10000,
+        help_text="IDs de los estudiantes (opcional si se filtra por período o materia)"
+    )
+    
+    periodo_id = serializers.IntegerField(
+        required=False,
+        help_text="ID del período: filtra estudiantes y materias listadas (opcional)"
+    )
+    
+    materia_id = serializers.IntegerField(
+        required=False,
+        help_text="ID de una materia: incluye a sus estudiantes inscritos (opcional)"
+    )
+    
+    formato = serializers.ChoiceField(
+        choices=[('csv', 'CSV combinado'), ('zip', 'ZIP con un CSV por estudiante')],
+        default='csv',
+        help_text="Formato del archivo: csv o zip"
+    )
+    
+    def validate_periodo_id(self, value):
+        """Validar que el período existe."""
+        from apps.materias.models import Periodo
+        
+        if not Periodo.objects.filter(id=value).exists():
+            raise serializers.ValidationError("Período no encontrado.")
+        return value
+    
+    def validate_materia_id(self, value):
+        """Validar que la materia existe."""
+        from apps.materias.models import Materia
+        
+        if not Materia.objects.filter(id=value).exists():
+            raise serializers.ValidationError("Materia no encontrada.")
+        return value
+    
+    def validate(self, attrs):
+        """Validar que se indique una lista de estudiantes o un filtro."""
+        if not any(attrs.get(campo) for campo in ('estudiante_ids', 'periodo_id', 'materia_id')):
+            raise serializers.ValidationError(
+                "Debe indicar estudiante_ids o un filtro por periodo_id o materia_id."
+            )
+        return attrs
 
 
 class ReporteFiltroSerializer(serializers.Serializer):
@@ -234,6 +368,21 @@ class ReporteFiltroSerializer(serializers.Serializer):
         return attrs
 
 
+class ReporteLimpiezaSerializer(serializers.Serializer):
+    """Serializer para solicitar la limpieza de reportes antiguos."""
+    
+    dias = serializers.IntegerField(
+        min_value=1,
+        default=30,
+        help_text="Antigüedad mínima en días de los reportes a limpiar"
+    )
+    
+    expirar = serializers.BooleanField(
+        default=False,
+        help_text="Conservar las filas en estado expirado en vez de eliminarlas"
+    )
+
+
 class ReporteEstadisticasSerializer(serializers.Serializer):
     """Serializer para estadísticas de reportes."""
     
@@ -244,6 +393,7 @@ class ReporteEstadisticasSerializer(serializers.Serializer):
     promedio_tiempo_generacion = serializers.FloatField()
     reportes_por_tipo = serializers.DictField()
     reportes_por_estado = serializers.DictField()
+    rendimiento_por_tipo = serializers.DictField()
     
     class Meta:
         fields = [
@@ -253,5 +403,6 @@ class ReporteEstadisticasSerializer(serializers.Serializer):
             'reportes_error',
             'promedio_tiempo_generacion',
             'reportes_por_tipo',
-            'reportes_por_estado'
+            'reportes_por_estado',
+            'rendimiento_por_tipo'
         ] 
\ No newline at end of file
@@ -1,167 +1,434 @@
 import csv
+import io
 import os
-from django.conf import settings
+import shutil
+import time
+import uuid
+import zipfile
+from array import array
+from collections import defaultdict
 from django.utils import timezone
-from django.db.models import Avg, Count, Q, Sum
-from datetime import datetime
+from django.db.models import Avg, Count, Exists, Max, Min, OuterRef, Q, Subquery, Sum
 
 from .models import ReporteGenerado
+from .cache import calcular_huella, buscar_reporte_en_cache
+from .almacenamiento import abrir_destino, abrir_origen, almacenamiento_reportes, eliminar
+from .cola import clave_trabajo, prioridad_tipo
+from .instrumentacion import MedidorGeneracion
+from .resumenes import totales_inscripciones
+from .estadisticas_notas import (
+    LIMITES_HISTOGRAMA,
+    estadisticas_notas,
+    estadisticas_por_grupo,
+    resumir_notas,
+)
+from .compresion import SIN_COMPRESION, abrir_escritura, compresion_configurada, ruta_con_extension
+from .columnar import (
+    CAMPOS_INSCRIPCIONES,
+    TIPOS_COLUMNARES,
+    columnar_disponible,
+    esquema_inscripciones,
+    escribir_parquet,
+)
 from apps.users.models import User
 from apps.inscripciones.models import Inscripcion, Calificacion
 from apps.materias.models import Materia, Periodo
 
 
+# Cantidad de filas que se leen por lote desde la base de datos. Los reportes
+# se escriben a medida que llegan los lotes para que la memoria no crezca con
+# el número de inscripciones.
+CHUNK_SIZE = 2000
+
+ESTADOS_INSCRIPCION = dict(Inscripcion.ESTADO_CHOICES)
+TIPOS_CALIFICACION = dict(Calificacion.TIPO_CHOICES)
+
+# Estudiantes por consulta en los reportes por lote
+TAMANO_LOTE_ESTUDIANTES = 500
+
+# Columnas de cada materia en el reporte de estudiante
+CAMPOS_MATERIAS_ESTUDIANTE = (
+    'materia__nombre', 'materia__codigo', 'materia__creditos', 'periodo__nombre',
+    'materia__profesor_id', 'materia__profesor__first_name', 'materia__profesor__last_name',
+    'nota_final', 'estado', 'promedio_calificaciones'
+)
+
+ENCABEZADO_MATERIAS_ESTUDIANTE = [
+    'Estudiante',
+    'Materia',
+    'Código',
+    'Créditos',
+    'Período',
+    'Profesor',
+    'Calificación',
+    'Estado',
+    'Promedio Materia'
+]
+
+
+# Columnas de las secciones de distribución de notas, después de la del grupo
+ENCABEZADO_DISTRIBUCION = [
+    'Notas',
+    'Promedio',
+    'Mediana',
+    'Desviación',
+    'P25',
+    'P75',
+    'P90',
+    '% Aprobación',
+    'Histograma'
+]
+
+
+def _en_lotes(iterable, tamano=CHUNK_SIZE):
+    """Agrupar un iterable en listas de como máximo `tamano` elementos."""
+    lote = []
+    for elemento in iterable:
+        lote.append(elemento)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _nombre_completo(nombre, apellido):
+    """Replicar User.get_full_name() a partir de valores crudos."""
+    return f"{nombre or ''} {apellido or ''}".strip()
+
+
+def _fila_distribucion(grupo, notas):
+    """Fila con las estadísticas de notas de un grupo (ver estadisticas_notas.py)."""
+    def formato(valor):
+        return f"{valor:.2f}" if valor is not None else 'N/A'
+
+    cubetas = zip(LIMITES_HISTOGRAMA, LIMITES_HISTOGRAMA[1:], notas['histograma'])
+    return [
+        grupo,
+        notas['cantidad'],
+        formato(notas['promedio']),
+        formato(notas['mediana']),
+        formato(notas['desviacion']),
+        *(formato(valor) for valor in notas['percentiles'].values()),
+        f"{notas['porcentaje_aprobacion']:.1f}%" if notas['cantidad'] else 'N/A',
+        ' | '.join(f"{desde:g}-{hasta:g}: {cantidad}" for desde, hasta, cantidad in cubetas)
+    ]
+
+
+def _escribir_distribucion(writer, titulo, columna_grupo, por_grupo):
+    """Escribir una sección con la distribución de notas de cada grupo."""
+    writer.writerow([])  # Línea en blanco
+    writer.writerow([titulo])
+    writer.writerow([columna_grupo] + ENCABEZADO_DISTRIBUCION)
+    for grupo, notas in por_grupo.items():
+        writer.writerow(_fila_distribucion(grupo, notas))
+
+
+def materias_con_estadisticas(profesor, periodo_id=None):
+    """
+    Materias de un profesor anotadas con sus estadísticas de inscripciones.
+
+    Todo se resuelve en una sola consulta agrupada por materia, sin importar
+    cuántas materias tenga el profesor:
+        num_estudiantes: inscripciones de la materia
+        aprobados: inscripciones en estado aprobada
+        promedio_nota_final: promedio de las notas finales
+        promedio_calificaciones: promedio de todas las calificaciones registradas
+        tiene_pendientes: si alguna inscripción todavía no tiene calificaciones
+
+    Lo usan el reporte CSV del profesor y ProfesorReportAPIView.
+    """
+    filtro = Q(inscripciones__periodo_id=periodo_id) if periodo_id else Q()
+
+    inscripciones = Inscripcion.objects.filter(materia=OuterRef('pk'))
+    calificaciones = Calificacion.objects.filter(inscripcion__materia=OuterRef('pk'))
+    if periodo_id:
+        inscripciones = inscripciones.filter(periodo_id=periodo_id)
+        calificaciones = calificaciones.filter(inscripcion__periodo_id=periodo_id)
+
+    sin_calificaciones = inscripciones.filter(
+        ~Exists(Calificacion.objects.filter(inscripcion=OuterRef('pk')))
+    )
+
+    # El promedio de calificaciones va en subconsulta: unir calificaciones en
+    # la consulta principal multiplicaría las filas de inscripciones
+    promedio_calificaciones = calificaciones.values('inscripcion__materia').annotate(
+        promedio=Avg('nota')
+    ).values('promedio')
+
+    return Materia.objects.filter(profesor=profesor).annotate(
+        num_estudiantes=Count('inscripciones', filter=filtro),
+        aprobados=Count('inscripciones', filter=filtro & Q(inscripciones__estado='aprobada')),
+        promedio_nota_final=Avg('inscripciones__nota_final', filter=filtro),
+        promedio_calificaciones=Subquery(promedio_calificaciones),
+        tiene_pendientes=Exists(sin_calificaciones)
+    ).order_by('codigo')
+
+
 class ReporteService:
     """Servicio para generar reportes CSV del sistema académico."""
     
     def __init__(self, solicitante):
         self.solicitante = solicitante
-        self.reports_dir = os.path.join(settings.MEDIA_ROOT, 'reportes')
-        
-        # Crear directorio si no existe
-        if not os.path.exists(self.reports_dir):
-            os.makedirs(self.reports_dir)
+        # Medidor de la generación en curso (ver procesar_reporte)
+        self.medidor = None
+        # Archivo del reporte en curso, con el checksum de lo escrito
+        self.destino = None
+        self.almacenamiento = almacenamiento_reportes()
     
-    def generar_reporte_estudiante(self, estudiante_id, periodo_id=None):
+    def _crear_reporte(self, tipo, nombre_archivo, parametros, formato='csv'):
         """
-        Generar reporte CSV detallado de un estudiante.
-        
+        Crear el registro pendiente de un reporte y su nombre de destino.
+
+        ruta_archivo es el nombre del archivo dentro del almacenamiento de
+        reportes (ver almacenamiento.py), no una ruta del nodo: el worker que
+        lo escribe y el pod web que lo sirve pueden estar en nodos distintos.
+
+        El nombre lleva un prefijo aleatorio: dos reportes pedidos en
+        el mismo segundo no deben pisarse, porque otros reportes pueden estar
+        reutilizando ese archivo desde la cache.
+
+        Raises:
+            ValueError: Si se pide un formato que el tipo no admite, o Parquet sin pyarrow
+        """
+        parametros['generado_por'] = self.solicitante.username
+        compresion = compresion_configurada()
+
+        if formato == 'parquet':
+            if tipo not in TIPOS_COLUMNARES:
+                raise ValueError(f"El reporte de tipo '{tipo}' solo se puede exportar en CSV.")
+            if not columnar_disponible():
+                raise ValueError("La exportación Parquet requiere el paquete pyarrow.")
+        elif formato == 'zip' and tipo != 'lote':
+            raise ValueError("Solo los reportes por lote se pueden exportar en un zip.")
+
+        if formato != 'csv':
+            # Parquet y zip ya vienen comprimidos
+            compresion = SIN_COMPRESION
+            nombre_archivo = f"{os.path.splitext(nombre_archivo)[0]}.{formato}"
+
+        ruta_archivo = f"{uuid.uuid4().hex[:12]}_{nombre_archivo}"
+
+        return ReporteGenerado.objects.create(
+            solicitante=self.solicitante,
+            tipo=tipo,
+            nombre_archivo=nombre_archivo,
+            ruta_archivo=ruta_con_extension(ruta_archivo, compresion),
+            compresion=compresion,
+            formato=formato,
+            parametros=parametros,
+            clave_cola=clave_trabajo(tipo, parametros, formato),
+            prioridad=prioridad_tipo(tipo)
+        )
+
+    def procesar_reporte(self, reporte):
+        """
+        Generar el archivo de un reporte registrado previamente.
+
+        Se usa tanto desde la tarea de Celery como desde los métodos
+        generar_reporte_* síncronos. Si ya existe un reporte completado con
+        la misma huella (mismos parámetros y datos sin cambios) se reutiliza
+        su archivo en lugar de regenerarlo.
+
+        Las métricas de la generación (fases, consultas, filas/s y memoria)
+        quedan en reporte.metricas.
+
         Args:
-            estudiante_id: ID del estudiante
-            periodo_id: ID del período (opcional)
-        
+            reporte: ReporteGenerado en estado pendiente
+
         Returns:
-            ReporteGenerado: Instancia del reporte generado
+            ReporteGenerado: El mismo reporte, completado
         """
+        generadores = {
+            'estudiante': self._generar_estudiante,
+            'profesor': self._generar_profesor,
+            'general': self._generar_general,
+            'periodo': self._generar_periodo,
+            'materia': self._generar_materia,
+            'lote': self._generar_lote,
+        }
+
         try:
-            # Verificar que el estudiante existe
-            estudiante = User.objects.get(id=estudiante_id, role='estudiante')
+            if self.iniciar_generacion(reporte):
+                return reporte
             
-            # Crear registro del reporte
-            reporte = ReporteGenerado.objects.create(
-                solicitante=self.solicitante,
-                tipo='estudiante',
-                nombre_archivo=f"reporte_estudiante_{estudiante.username}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                parametros={
-                    'estudiante_id': estudiante_id,
-                    'periodo_id': periodo_id,
-                    'generado_por': self.solicitante.username
-                }
+            self.medidor = MedidorGeneracion()
+            with self.medidor.medir():
+                if reporte.formato == 'parquet':
+                    registros_procesados = self._generar_columnar(reporte)
+                else:
+                    registros_procesados = generadores[reporte.tipo](reporte)
+            self.medidor.sincronizar(reporte.ruta_archivo, self.almacenamiento)
+
+            reporte.checksum = self.destino.checksum
+            reporte.marcar_completado(
+                registros_procesados, metricas=self.medidor.resultado(registros_procesados)
             )
-            
-            reporte.marcar_generando()
-            
-            # Generar el archivo CSV
-            ruta_archivo = os.path.join(self.reports_dir, reporte.nombre_archivo)
-            
-            with open(ruta_archivo, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                
-                # Información del estudiante (header)
-                writer.writerow([
-                    f'REPORTE ACADÉMICO - {estudiante.get_full_name()}',
-                    f'Email: {estudiante.email}',
-                    f'Fecha: {timezone.now().strftime("%Y-%m-%d %H:%M")}'
-                ])
-                writer.writerow([])  # Línea en blanco
-                
-                # Obtener inscripciones
-                inscripciones_query = Inscripcion.objects.filter(estudiante=estudiante)
-                if periodo_id:
-                    inscripciones_query = inscripciones_query.filter(periodo_id=periodo_id)
-                
-                inscripciones = inscripciones_query.select_related(
-                    'materia', 'periodo', 'materia__profesor'
-                ).prefetch_related('calificaciones').order_by('periodo__nombre', 'materia__codigo')
-                
-                # Headers según requerimientos: Nombre, Materia, Calificación, Estado, Promedio
-                writer.writerow([
-                    'Estudiante',
-                    'Materia',
-                    'Código',
-                    'Créditos',
-                    'Período',
-                    'Profesor',
-                    'Calificación',
-                    'Estado',
-                    'Promedio Materia'
-                ])
-                
-                registros_procesados = 0
-                total_notas = 0
-                materias_con_nota = 0
-                
-                # Escribir datos de materias
-                for inscripcion in inscripciones:
-                    # Calcular promedio de calificaciones
-                    calificaciones = inscripcion.calificaciones.all()
-                    promedio_materia = calificaciones.aggregate(Avg('nota'))['nota__avg'] or 0
-                    
-                    # Determinar la calificación final
-                    calificacion_final = inscripcion.nota_final
-                    if calificacion_final is None and promedio_materia > 0:
-                        calificacion_final = promedio_materia
-                    
-                    calificacion_display = f"{calificacion_final:.1f}" if calificacion_final else "Pendiente"
-                    promedio_display = f"{promedio_materia:.1f}" if promedio_materia > 0 else "Sin calificar"
-                    
-                    writer.writerow([
-                        estudiante.get_full_name(),
-                        inscripcion.materia.nombre,
-                        inscripcion.materia.codigo,
-                        inscripcion.materia.creditos,
-                        inscripcion.periodo.nombre,
-                        inscripcion.materia.profesor.get_full_name() if inscripcion.materia.profesor else 'Por asignar',
-                        calificacion_display,
-                        inscripcion.get_estado_display(),
-                        promedio_display
-                    ])
-                    
-                    registros_procesados += 1
-                    
-                    # Sumar para promedio general
-                    if calificacion_final:
-                        total_notas += calificacion_final
-                        materias_con_nota += 1
-                
-                # Escribir resumen académico al final
-                writer.writerow([])  # Línea en blanco
-                writer.writerow(['RESUMEN ACADÉMICO'])
-                writer.writerow([])
-                
-                # Calcular promedio general
-                promedio_general = total_notas / materias_con_nota if materias_con_nota > 0 else 0
-                materias_aprobadas = sum(1 for insc in inscripciones if insc.estado == 'aprobada')
-                
-                writer.writerow(['Concepto', 'Valor'])
-                writer.writerow(['Total de materias', registros_procesados])
-                writer.writerow(['Materias aprobadas', materias_aprobadas])
-                writer.writerow(['Materias reprobadas', registros_procesados - materias_aprobadas])
-                writer.writerow(['Promedio general', f"{promedio_general:.2f}" if promedio_general > 0 else 'N/A'])
-                
-                writer.writerow([])  # Línea en blanco
-                writer.writerow(['INFORMACIÓN DEL REPORTE'])
-                writer.writerow(['Detalle', 'Información'])
-                writer.writerow(['Generado por', self.solicitante.get_full_name()])
-                writer.writerow(['Fecha de generación', timezone.now().strftime('%Y-%m-%d %H:%M:%S')])
-                writer.writerow(['Período filtrado', Periodo.objects.get(id=periodo_id).nombre if periodo_id else 'Todos los períodos'])
-                writer.writerow(['Registros procesados', registros_procesados])
-            
-            # Actualizar reporte
-            reporte.ruta_archivo = ruta_archivo
-            reporte.marcar_completado(registros_procesados)
-            
             return reporte
-            
+
         except User.DoesNotExist:
-            if 'reporte' in locals():
-                reporte.marcar_error("Estudiante no encontrado")
+            reporte.marcar_error("Usuario del reporte no encontrado")
             raise
         except Exception as e:
-            if 'reporte' in locals():
-                reporte.marcar_error(str(e))
+            reporte.marcar_error(str(e))
             raise
-    
+        finally:
+            self.medidor = None
+            self.destino = None
+
+    def _abrir_destino(self, reporte):
+        """Abrir en binario el archivo del reporte en el almacenamiento."""
+        self.destino = abrir_destino(reporte.ruta_archivo, self.almacenamiento)
+        return self.destino
+
+    def iniciar_generacion(self, reporte):
+        """
+        Pasar el reporte a generando y resolverlo desde la cache si se puede.
+
+        Returns:
+            bool: True si el reporte quedó completado con un archivo existente
+        """
+        reporte.marcar_generando()
+        
+        # La huella se toma antes de leer los datos: si algo cambia
+        # durante la generación, la próxima solicitud no coincidirá
+        reporte.huella = calcular_huella(
+            reporte.tipo, {**reporte.parametros, 'formato': reporte.formato}
+        )
+        en_cache = buscar_reporte_en_cache(reporte.huella, excluir_id=reporte.id)
+        if en_cache:
+            reporte.ruta_archivo = en_cache.ruta_archivo
+            reporte.compresion = en_cache.compresion
+            reporte.checksum = en_cache.checksum
+            reporte.marcar_completado(en_cache.registros_procesados)
+            return True
+        
+        return False
+
+    def generar_reporte_estudiante(self, estudiante_id, periodo_id=None):
+        """
+        Generar reporte CSV detallado de un estudiante.
+        
+        Args:
+            estudiante_id: ID del estudiante
+            periodo_id: ID del período (opcional)
+        
+        Returns:
+            ReporteGenerado: Instancia del reporte generado
+        """
+        reporte = self.crear_reporte_estudiante(estudiante_id, periodo_id)
+        return self.procesar_reporte(reporte)
+
+    def crear_reporte_estudiante(self, estudiante_id, periodo_id=None):
+        """
+        Registrar un reporte de estudiante pendiente de generación.
+
+        Raises:
+            User.DoesNotExist: Si el estudiante no existe
+        """
+        estudiante = User.objects.get(id=estudiante_id, role='estudiante')
+
+        return self._crear_reporte(
+            tipo='estudiante',
+            nombre_archivo=f"reporte_estudiante_{estudiante.username}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            parametros={
+                'estudiante_id': estudiante_id,
+                'periodo_id': periodo_id
+            }
+        )
+
+    def _generar_estudiante(self, reporte):
+        """Escribir el CSV de un reporte de estudiante. Retorna los registros procesados."""
+        estudiante = User.objects.get(id=reporte.parametros['estudiante_id'], role='estudiante')
+        periodo_id = reporte.parametros.get('periodo_id')
+
+        registros = self._materias_estudiantes(periodo_id).filter(
+            estudiante=estudiante
+        ).order_by('periodo__nombre', 'materia__codigo').values_list(
+            *CAMPOS_MATERIAS_ESTUDIANTE
+        ).iterator(chunk_size=CHUNK_SIZE)
+
+        with abrir_escritura(self._abrir_destino(reporte), reporte.compresion) as csvfile:
+            writer = csv.writer(csvfile)
+            return self._escribir_reporte_estudiante(
+                writer, estudiante, registros, self._nombre_periodo(periodo_id), reporte
+            )
+
+    def _escribir_reporte_estudiante(self, writer, estudiante, registros, periodo_nombre, reporte=None):
+        """
+        Escribir el reporte académico de un estudiante a partir de sus materias.
+
+        Args:
+            writer: csv.writer de destino
+            estudiante: User del estudiante
+            registros: Tuplas con CAMPOS_MATERIAS_ESTUDIANTE
+            periodo_nombre: Texto del período filtrado
+            reporte: Reporte al que se le publica el avance (opcional)
+
+        Returns:
+            int: Número de materias escritas
+        """
+        # Información del estudiante (header)
+        writer.writerow([
+            f'REPORTE ACADÉMICO - {estudiante.get_full_name()}',
+            f'Email: {estudiante.email}',
+            f'Fecha: {timezone.now().strftime("%Y-%m-%d %H:%M")}'
+        ])
+        writer.writerow([])  # Línea en blanco
+
+        # Headers según requerimientos: Nombre, Materia, Calificación, Estado, Promedio
+        writer.writerow(ENCABEZADO_MATERIAS_ESTUDIANTE)
+        
+        # Escribir datos de materias a medida que se leen
+        resumen = {'notas': array('d'), 'materias_aprobadas': 0}
+        registros_procesados = self._escribir_filas(
+            writer, self._filas_estudiante(estudiante.get_full_name(), registros, resumen), reporte
+        )
+
+        # Escribir resumen académico al final
+        writer.writerow([])  # Línea en blanco
+        writer.writerow(['RESUMEN ACADÉMICO'])
+        writer.writerow([])
+
+        materias_aprobadas, materias_reprobadas, promedio_general = self._resumen_academico(
+            registros_procesados, resumen
+        )
+
+        writer.writerow(['Concepto', 'Valor'])
+        writer.writerow(['Total de materias', registros_procesados])
+        writer.writerow(['Materias aprobadas', materias_aprobadas])
+        writer.writerow(['Materias reprobadas', materias_reprobadas])
+        writer.writerow(['Promedio general', promedio_general])
+        
+        writer.writerow([])  # Línea en blanco
+        writer.writerow(['INFORMACIÓN DEL REPORTE'])
+        writer.writerow(['Detalle', 'Información'])
+        writer.writerow(['Fecha de generación', timezone.now().strftime('%Y-%m-%d %H:%M:%S')])
+        writer.writerow(['Período filtrado', periodo_nombre])
+        writer.writerow(['Registros procesados', registros_procesados])
+
+        return registros_procesados
+
+    def _resumen_academico(self, total_materias, resumen):
+        """
+        Totales del resumen académico de un estudiante.
+
+        Returns:
+            tuple: (materias aprobadas, materias reprobadas, promedio general como texto)
+        """
+        promedio_general = resumir_notas(resumen['notas'])['promedio'] or 0
+        materias_aprobadas = resumen['materias_aprobadas']
+
+        return (
+            materias_aprobadas,
+            total_materias - materias_aprobadas,
+            f"{promedio_general:.2f}" if promedio_general > 0 else 'N/A'
+        )
+
+    def _nombre_periodo(self, periodo_id):
+        """Texto del período filtrado para la información del reporte."""
+        return Periodo.objects.get(id=periodo_id).nombre if periodo_id else 'Todos los períodos'
+
     def generar_reporte_profesor(self, profesor_id, periodo_id=None):
         """
         Generar reporte CSV detallado de un profesor.
@@ -173,526 +440,756 @@ class ReporteService:
         Returns:
             ReporteGenerado: Instancia del reporte generado
         """
-        try:
-            # Verificar que el profesor existe
-            profesor = User.objects.get(id=profesor_id, role='profesor')
+        reporte = self.crear_reporte_profesor(profesor_id, periodo_id)
+        return self.procesar_reporte(reporte)
+
+    def crear_reporte_profesor(self, profesor_id, periodo_id=None):
+        """
+        Registrar un reporte de profesor pendiente de generación.
+
+        Raises:
+            User.DoesNotExist: Si el profesor no existe
+        """
+        profesor = User.objects.get(id=profesor_id, role='profesor')
+
+        return self._crear_reporte(
+            tipo='profesor',
+            nombre_archivo=f"reporte_profesor_{profesor.username}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            parametros={
+                'profesor_id': profesor_id,
+                'periodo_id': periodo_id
+            }
+        )
+
+    def _generar_profesor(self, reporte):
+        """Escribir el CSV de un reporte de profesor. Retorna los registros procesados."""
+        profesor = User.objects.get(id=reporte.parametros['profesor_id'], role='profesor')
+        periodo_id = reporte.parametros.get('periodo_id')
+
+        with abrir_escritura(self._abrir_destino(reporte), reporte.compresion) as csvfile:
+            writer = csv.writer(csvfile)
             
-            # Crear registro del reporte
-            reporte = ReporteGenerado.objects.create(
-                solicitante=self.solicitante,
-                tipo='profesor',
-                nombre_archivo=f"reporte_profesor_{profesor.username}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                parametros={
-                    'profesor_id': profesor_id,
-                    'periodo_id': periodo_id,
-                    'generado_por': self.solicitante.username
-                }
-            )
+            # Escribir encabezados
+            writer.writerow([
+                'REPORTE ACADÉMICO - PROFESOR',
+                '',
+                '',
+                '',
+                '',
+                '',
+                '',
+                '',
+                '',
+                ''
+            ])
             
-            reporte.marcar_generando()
+            writer.writerow([
+                'Información del Profesor',
+                '',
+                '',
+                '',
+                '',
+                '',
+                '',
+                '',
+                '',
+                ''
+            ])
             
-            # Generar el archivo CSV
-            ruta_archivo = os.path.join(self.reports_dir, reporte.nombre_archivo)
+            writer.writerow([
+                'ID',
+                'Username',
+                'Nombre Completo',
+                'Email',
+                'Rol',
+                'Fecha de Registro',
+                'Estado',
+                '',
+                '',
+                ''
+            ])
             
-            with open(ruta_archivo, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                
-                # Escribir encabezados
-                writer.writerow([
-                    'REPORTE ACADÉMICO - PROFESOR',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    ''
-                ])
-                
-                writer.writerow([
-                    'Información del Profesor',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    ''
-                ])
-                
-                writer.writerow([
-                    'ID',
-                    'Username',
-                    'Nombre Completo',
-                    'Email',
-                    'Rol',
-                    'Fecha de Registro',
-                    'Estado',
-                    '',
-                    '',
-                    ''
-                ])
-                
-                # Información del profesor
-                writer.writerow([
-                    profesor.id,
-                    profesor.username,
-                    profesor.get_full_name(),
-                    profesor.email,
-                    profesor.get_role_display(),
-                    profesor.date_joined.strftime('%Y-%m-%d %H:%M'),
-                    'Activo' if profesor.is_active else 'Inactivo',
-                    '',
-                    '',
-                    ''
-                ])
-                
-                writer.writerow([])  # Línea en blanco
-                
-                # Obtener materias del profesor
-                materias_query = Materia.objects.filter(profesor=profesor)
-                materias = materias_query.select_related('periodo').order_by('codigo')
-                
-                # Escribir encabezados de materias
-                writer.writerow([
-                    'MATERIAS ASIGNADAS',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    ''
-                ])
-                
-                writer.writerow([
-                    'Código',
-                    'Nombre',
-                    'Créditos',
-                    'Descripción',
-                    'Estado',
-                    'Estudiantes Inscritos',
-                    'Promedio General',
-                    'Porcentaje Aprobación',
-                    '',
-                    ''
-                ])
-                
-                registros_procesados = 0
-                total_estudiantes = 0
-                total_promedio = 0
-                
-                # Escribir datos de materias
-                for materia in materias:
-                    # Obtener inscripciones de la materia
-                    inscripciones_query = Inscripcion.objects.filter(materia=materia)
-                    if periodo_id:
-                        inscripciones_query = inscripciones_query.filter(periodo_id=periodo_id)
-                    
-                    inscripciones = inscripciones_query.select_related('estudiante')
-                    
-                    # Calcular estadísticas
-                    num_estudiantes = inscripciones.count()
-                    aprobados = inscripciones.filter(estado='aprobada').count()
-                    promedio_materia = inscripciones.aggregate(Avg('nota_final'))['nota_final__avg'] or 0
-                    porcentaje_aprobacion = (aprobados / num_estudiantes * 100) if num_estudiantes > 0 else 0
-                    
-                    writer.writerow([
-                        materia.codigo,
-                        materia.nombre,
-                        materia.creditos,
-                        materia.descripcion or 'Sin descripción',
-                        'Activa' if materia.activa else 'Inactiva',
-                        num_estudiantes,
-                        f"{promedio_materia:.2f}" if promedio_materia > 0 else 'Sin calificaciones',
-                        f"{porcentaje_aprobacion:.1f}%",
-                        '',
-                        ''
-                    ])
-                    
-                    registros_procesados += 1
-                    total_estudiantes += num_estudiantes
-                    total_promedio += promedio_materia
-                
-                writer.writerow([])  # Línea en blanco
-                
-                # Escribir detalle de estudiantes por materia
-                writer.writerow([
-                    'DETALLE DE ESTUDIANTES POR MATERIA',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    ''
-                ])
-                
-                writer.writerow([
-                    'Materia',
-                    'Estudiante',
-                    'Email',
-                    'Estado',
-                    'Nota Final',
-                    'Calificaciones',
-                    'Fecha Inscripción',
-                    '',
-                    '',
-                    ''
-                ])
-                
-                for materia in materias:
-                    inscripciones_query = Inscripcion.objects.filter(materia=materia)
-                    if periodo_id:
-                        inscripciones_query = inscripciones_query.filter(periodo_id=periodo_id)
-                    
-                    inscripciones = inscripciones_query.select_related('estudiante').prefetch_related('calificaciones')
-                    
-                    for inscripcion in inscripciones:
-                        # Obtener calificaciones como texto
-                        calificaciones_texto = ', '.join([
-                            f"{c.get_tipo_display()}: {c.nota}/5.0" 
-                            for c in inscripcion.calificaciones.all()
-                        ])
-                        
-                        writer.writerow([
-                            f"{materia.codigo} - {materia.nombre}",
-                            inscripcion.estudiante.get_full_name(),
-                            inscripcion.estudiante.email,
-                            inscripcion.get_estado_display(),
-                            inscripcion.nota_final or 'Pendiente',
-                            calificaciones_texto,
-                            inscripcion.created_at.strftime('%Y-%m-%d'),
-                            '',
-                            '',
-                            ''
-                        ])
-                
-                writer.writerow([])  # Línea en blanco
-                
-                # Escribir resumen
-                writer.writerow([
-                    'RESUMEN DEL PROFESOR',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    ''
-                ])
-                
-                promedio_final = total_promedio / registros_procesados if registros_procesados > 0 else 0
-                
-                writer.writerow([
-                    'Total Materias',
-                    'Total Estudiantes',
-                    'Promedio General',
-                    'Materias Activas',
-                    'Materias Inactivas',
-                    '',
-                    '',
-                    '',
-                    '',
-                    ''
-                ])
-                
-                writer.writerow([
-                    registros_procesados,
-                    total_estudiantes,
-                    f"{promedio_final:.2f}" if promedio_final > 0 else 'N/A',
-                    materias.filter(activa=True).count(),
-                    materias.filter(activa=False).count(),
-                    '',
-                    '',
-                    '',
-                    '',
-                    ''
-                ])
-                
-                writer.writerow([])  # Línea en blanco
-                
-                # Información del reporte
-                writer.writerow([
-                    'INFORMACIÓN DEL REPORTE',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    ''
-                ])
+            # Información del profesor
+            writer.writerow([
+                profesor.id,
+                profesor.username,
+                profesor.get_full_name(),
+                profesor.email,
+                profesor.get_role_display(),
+                profesor.date_joined.strftime('%Y-%m-%d %H:%M'),
+                'Activo' if profesor.is_active else 'Inactivo',
+                '',
+                '',
+                ''
+            ])
+            
+            writer.writerow([])  # Línea en blanco
+            
+            # Materias del profesor con sus estadísticas en una sola consulta
+            materias = materias_con_estadisticas(profesor, periodo_id)
+            
+            # Escribir encabezados de materias
+            writer.writerow([
+                'MATERIAS ASIGNADAS',
+                '',
+                '',
+                '',
+                '',
+                '',
+                '',
+                '',
+                '',
+                ''
+            ])
+            
+            writer.writerow([
+                'Código',
+                'Nombre',
+                'Créditos',
+                'Descripción',
+                'Estado',
+                'Estudiantes Inscritos',
+                'Promedio General',
+                'Porcentaje Aprobación',
+                '',
+                ''
+            ])
+            
+            registros_procesados = 0
+            total_estudiantes = 0
+            total_promedio = 0
+            materias_activas = 0
+            
+            # Escribir datos de materias
+            for materia in materias:
+                num_estudiantes = materia.num_estudiantes
+                promedio_materia = materia.promedio_nota_final or 0
+                porcentaje_aprobacion = (materia.aprobados / num_estudiantes * 100) if num_estudiantes > 0 else 0
                 
                 writer.writerow([
-                    'Generado por',
-                    'Fecha de generación',
-                    'Período filtrado',
-                    'Registros procesados',
-                    '',
-                    '',
-                    '',
-                    '',
+                    materia.codigo,
+                    materia.nombre,
+                    materia.creditos,
+                    materia.descripcion or 'Sin descripción',
+                    materia.get_estado_display(),
+                    num_estudiantes,
+                    f"{promedio_materia:.2f}" if promedio_materia > 0 else 'Sin calificaciones',
+                    f"{porcentaje_aprobacion:.1f}%",
                     '',
                     ''
                 ])
                 
-                writer.writerow([
-                    self.solicitante.get_full_name(),
-                    timezone.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    Periodo.objects.get(id=periodo_id).nombre if periodo_id else 'Todos los períodos',
-                    registros_procesados,
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    ''
-                ])
+                registros_procesados += 1
+                total_estudiantes += num_estudiantes
+                total_promedio += promedio_materia
+                if materia.estado == 'activa':
+                    materias_activas += 1
             
-            # Actualizar reporte
-            reporte.ruta_archivo = ruta_archivo
-            reporte.marcar_completado(registros_procesados)
+            # Distribución de las notas finales de cada materia, en una consulta
+            inscripciones = Inscripcion.objects.filter(materia__profesor=profesor)
+            if periodo_id:
+                inscripciones = inscripciones.filter(periodo_id=periodo_id)
+            _escribir_distribucion(
+                writer, 'DISTRIBUCIÓN DE NOTAS POR MATERIA', 'Código',
+                estadisticas_por_grupo(inscripciones, 'materia__codigo')
+            )
             
-            return reporte
+            writer.writerow([])  # Línea en blanco
             
-        except User.DoesNotExist:
-            if 'reporte' in locals():
-                reporte.marcar_error("Profesor no encontrado")
-            raise
-        except Exception as e:
-            if 'reporte' in locals():
-                reporte.marcar_error(str(e))
-            raise
-    
-    def generar_reporte_general(self, periodo_id=None):
+            # Escribir detalle de estudiantes por materia
+            writer.writerow([
+                'DETALLE DE ESTUDIANTES POR MATERIA',
+                '',
+                '',
+                '',
+                '',
+                '',
+                '',
+                '',
+                '',
+                ''
+            ])
+            
+            writer.writerow([
+                'Materia',
+                'Estudiante',
+                'Email',
+                'Estado',
+                'Nota Final',
+                'Calificaciones',
+                'Fecha Inscripción',
+                '',
+                '',
+                ''
+            ])
+            
+            # Una sola consulta para todas las materias, escrita por lotes
+            self._escribir_filas(writer, self._filas_detalle_profesor(profesor, periodo_id), reporte)
+
+            writer.writerow([])  # Línea en blanco
+            
+            # Escribir resumen
+            writer.writerow([
+                'RESUMEN DEL PROFESOR',
+                '',
+                '',
+                '',
+                '',
+                '',
+                '',
+                '',
+                '',
+                ''
+            ])
+            
+            promedio_final = total_promedio / registros_procesados if registros_procesados > 0 else 0
+            
+            writer.writerow([
+                'Total Materias',
+                'Total Estudiantes',
+                'Promedio General',
+                'Materias Activas',
+                'Materias Inactivas',
+                '',
+                '',
+                '',
+                '',
+                ''
+            ])
+            
+            writer.writerow([
+                registros_procesados,
+                total_estudiantes,
+                f"{promedio_final:.2f}" if promedio_final > 0 else 'N/A',
+                materias_activas,
+                registros_procesados - materias_activas,
+                '',
+                '',
+                '',
+                '',
+                ''
+            ])
+            
+            writer.writerow([])  # Línea en blanco
+            
+            # Información del reporte
+            writer.writerow([
+                'INFORMACIÓN DEL REPORTE',
+                '',
+                '',
+                '',
+                '',
+                '',
+                '',
+                '',
+                '',
+                ''
+            ])
+            
+            writer.writerow([
+                'Fecha de generación',
+                'Período filtrado',
+                'Registros procesados',
+                '',
+                '',
+                '',
+                '',
+                '',
+                '',
+                ''
+            ])
+            
+            writer.writerow([
+                timezone.now().strftime('%Y-%m-%d %H:%M:%S'),
+                Periodo.objects.get(id=periodo_id).nombre if periodo_id else 'Todos los períodos',
+                registros_procesados,
+                '',
+                '',
+                '',
+                '',
+                '',
+                '',
+                ''
+            ])
+
+        return registros_procesados
+
+    def generar_reporte_general(self, periodo_id=None, formato='csv'):
+        """
+        Generar reporte general del sistema.
+        
+        Args:
+            periodo_id: ID del período (opcional)
+            formato: 'csv' o 'parquet'
+        
+        Returns:
+            ReporteGenerado: Instancia del reporte generado
+        """
+        reporte = self.crear_reporte_general(periodo_id, formato=formato)
+        return self.procesar_reporte(reporte)
+
+    def crear_reporte_general(self, periodo_id=None, fragmentos=1, formato='csv'):
+        """
+        Registrar un reporte general pendiente de generación.
+
+        Con fragmentos > 1 la tarea de Celery reparte el detalle de
+        inscripciones entre varios workers (ver tasks.generar_reporte_task).
+        En Parquet solo se exporta la tabla de inscripciones.
+        """
+        return self._crear_reporte(
+            tipo='general',
+            nombre_archivo=f"reporte_general_{timezone.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            parametros={
+                'periodo_id': periodo_id,
+                'fragmentos': fragmentos
+            },
+            formato=formato
+        )
+
+    def _generar_general(self, reporte):
+        """Escribir el CSV del reporte general. Retorna los registros procesados."""
+        periodo_id = reporte.parametros.get('periodo_id')
+
+        with abrir_escritura(self._abrir_destino(reporte), reporte.compresion) as csvfile:
+            writer = csv.writer(csvfile)
+            self._escribir_encabezado_general(writer, periodo_id)
+            registros_procesados = self._escribir_filas(
+                writer, self._filas_inscripciones_general(periodo_id), reporte
+            )
+            self._escribir_pie_general(writer, periodo_id)
+
+        return registros_procesados
+
+    def rangos_inscripciones(self, periodo_id=None, fragmentos=1):
+        """
+        Dividir el rango de ids de inscripciones en `fragmentos` tramos contiguos.
+
+        Returns:
+            list: Tuplas (desde, hasta) inclusivas, en orden; vacía si no hay inscripciones
+        """
+        inscripciones = Inscripcion.objects.all()
+        if periodo_id:
+            inscripciones = inscripciones.filter(periodo_id=periodo_id)
+
+        limites = inscripciones.aggregate(minimo=Min('id'), maximo=Max('id'))
+        if limites['minimo'] is None:
+            return []
+
+        minimo, maximo = limites['minimo'], limites['maximo']
+        tamano = -(-(maximo - minimo + 1) // fragmentos)  # División hacia arriba
+
+        return [
+            (desde, min(desde + tamano - 1, maximo))
+            for desde in range(minimo, maximo + 1, tamano)
+        ]
+
+    def escribir_fragmento_general(self, reporte, indice, desde, hasta):
+        """
+        Escribir en un archivo parcial el detalle de inscripciones con id en [desde, hasta].
+
+        El fragmento va al almacenamiento de reportes, así que la unión puede
+        correr en otro worker u otro nodo.
+
+        Returns:
+            tuple: (nombre del fragmento, registros escritos)
         """
-        Generar reporte CSV general del sistema.
+        ruta_fragmento = f"{reporte.ruta_archivo}.parte{indice}"
+
+        destino = abrir_destino(ruta_fragmento, self.almacenamiento)
+        with abrir_escritura(destino) as archivo:
+            writer = csv.writer(archivo)
+            registros = self._escribir_filas(
+                writer,
+                self._filas_inscripciones_general(reporte.parametros.get('periodo_id'), desde, hasta)
+            )
+
+        return ruta_fragmento, registros
+
+    def unir_fragmentos_general(self, reporte, fragmentos):
+        """
+        Armar el reporte general final con los fragmentos escritos en paralelo.
+
+        Args:
+            reporte: ReporteGenerado en estado generando
+            fragmentos: Lista de (nombre, registros) en el orden de los rangos
+
+        Returns:
+            int: Total de registros del detalle
+        """
+        periodo_id = reporte.parametros.get('periodo_id')
+        registros_procesados = 0
+
+        with abrir_escritura(self._abrir_destino(reporte), reporte.compresion) as csvfile:
+            writer = csv.writer(csvfile)
+            self._escribir_encabezado_general(writer, periodo_id)
+
+            for ruta_fragmento, registros in fragmentos:
+                origen = abrir_origen(ruta_fragmento, self.almacenamiento)
+                with io.TextIOWrapper(origen, encoding='utf-8', newline='') as fragmento:
+                    shutil.copyfileobj(fragmento, csvfile)
+                registros_procesados += registros
+
+            self._escribir_pie_general(writer, periodo_id)
+
+        for ruta_fragmento, _ in fragmentos:
+            eliminar(ruta_fragmento, self.almacenamiento)
+
+        return registros_procesados
+
+    def _escribir_encabezado_general(self, writer, periodo_id=None):
+        """Escribir las estadísticas del reporte general y el encabezado del detalle."""
+        # Escribir encabezados
+        writer.writerow([
+            'REPORTE GENERAL DEL SISTEMA ACADÉMICO',
+            '',
+            '',
+            '',
+            '',
+            '',
+            '',
+            '',
+            '',
+            ''
+        ])
         
-        Args:
-            periodo_id: ID del período (opcional)
+        # Estadísticas generales
+        writer.writerow([
+            'ESTADÍSTICAS GENERALES',
+            '',
+            '',
+            '',
+            '',
+            '',
+            '',
+            '',
+            '',
+            ''
+        ])
+        
+        # Obtener estadísticas
+        total_estudiantes = User.objects.filter(role='estudiante').count()
+        total_profesores = User.objects.filter(role='profesor').count()
+        total_materias = Materia.objects.count()
+
+        # Totales desde las filas resumen por período/materia/estado
+        resumen = totales_inscripciones(periodo_id)
+        total_inscripciones = resumen['total']
+        promedio_general = resumen['promedio'] or 0
+        aprobados = resumen['aprobados']
+        porcentaje_aprobacion = (aprobados / total_inscripciones * 100) if total_inscripciones > 0 else 0
+        
+        writer.writerow([
+            'Total Estudiantes',
+            'Total Profesores',
+            'Total Materias',
+            'Total Inscripciones',
+            'Promedio General',
+            'Porcentaje Aprobación',
+            '',
+            '',
+            '',
+            ''
+        ])
+        
+        writer.writerow([
+            total_estudiantes,
+            total_profesores,
+            total_materias,
+            total_inscripciones,
+            f"{promedio_general:.2f}" if promedio_general > 0 else 'N/A',
+            f"{porcentaje_aprobacion:.1f}%",
+            '',
+            '',
+            '',
+            ''
+        ])
+
+        # Distribución de las notas finales por período
+        inscripciones = Inscripcion.objects.all()
+        if periodo_id:
+            inscripciones = inscripciones.filter(periodo_id=periodo_id)
+        _escribir_distribucion(
+            writer, 'DISTRIBUCIÓN DE NOTAS POR PERÍODO', 'Período',
+            estadisticas_por_grupo(inscripciones, 'periodo__nombre')
+        )
+
+        writer.writerow([])  # Línea en blanco
+
+        # Detalle de inscripciones, escrito por lotes
+        writer.writerow(['DETALLE DE INSCRIPCIONES'])
+        writer.writerow([
+            'Estudiante', 'Materia', 'Código', 'Estado', 'Nota Final', 'Período'
+        ])
+
+    def _escribir_pie_general(self, writer, periodo_id=None):
+        """Escribir la sección final del reporte general."""
+        writer.writerow([])  # Línea en blanco
+
+        # Información del reporte
+        writer.writerow([
+            'INFORMACIÓN DEL REPORTE',
+            '',
+            '',
+            '',
+            '',
+            '',
+            '',
+            '',
+            '',
+            ''
+        ])
+        
+        writer.writerow([
+            'Fecha de generación',
+            'Período filtrado',
+            '',
+            '',
+            '',
+            '',
+            '',
+            '',
+            '',
+            ''
+        ])
         
+        writer.writerow([
+            timezone.now().strftime('%Y-%m-%d %H:%M:%S'),
+            Periodo.objects.get(id=periodo_id).nombre if periodo_id else 'Todos los períodos',
+            '',
+            '',
+            '',
+            '',
+            '',
+            '',
+            '',
+            ''
+        ])
+
+    def _escribir_filas(self, writer, filas, reporte=None):
+        """
+        Escribir en el CSV las filas producidas por un generador.
+
+        Las filas se escriben en lotes de CHUNK_SIZE, así que el archivo
+        crece por lotes sin acumular el reporte completo en memoria. Si se pasa
+        el reporte, se publica el avance cada CHUNK_SIZE filas para que
+        el endpoint de progreso lo pueda consultar.
+
         Returns:
-            ReporteGenerado: Instancia del reporte generado
+            int: Número de filas escritas
         """
-        try:
-            # Crear registro del reporte
-            reporte = ReporteGenerado.objects.create(
-                solicitante=self.solicitante,
-                tipo='general',
-                nombre_archivo=f"reporte_general_{timezone.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                parametros={
-                    'periodo_id': periodo_id,
-                    'generado_por': self.solicitante.username
-                }
-            )
-            
-            reporte.marcar_generando()
-            
-            # Generar el archivo CSV
-            ruta_archivo = os.path.join(self.reports_dir, reporte.nombre_archivo)
-            
-            with open(ruta_archivo, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                
-                # Escribir encabezados
-                writer.writerow([
-                    'REPORTE GENERAL DEL SISTEMA ACADÉMICO',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    ''
-                ])
-                
-                # Estadísticas generales
-                writer.writerow([
-                    'ESTADÍSTICAS GENERALES',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    ''
-                ])
-                
-                # Obtener estadísticas
-                total_estudiantes = User.objects.filter(role='estudiante').count()
-                total_profesores = User.objects.filter(role='profesor').count()
-                total_materias = Materia.objects.count()
-                total_inscripciones = Inscripcion.objects.count()
-                
-                if periodo_id:
-                    total_inscripciones = Inscripcion.objects.filter(periodo_id=periodo_id).count()
-                
-                promedio_general = Inscripcion.objects.aggregate(Avg('nota_final'))['nota_final__avg'] or 0
-                aprobados = Inscripcion.objects.filter(estado='aprobada').count()
-                porcentaje_aprobacion = (aprobados / total_inscripciones * 100) if total_inscripciones > 0 else 0
-                
-                writer.writerow([
-                    'Total Estudiantes',
-                    'Total Profesores',
-                    'Total Materias',
-                    'Total Inscripciones',
-                    'Promedio General',
-                    'Porcentaje Aprobación',
-                    '',
-                    '',
-                    '',
-                    ''
-                ])
-                
-                writer.writerow([
-                    total_estudiantes,
-                    total_profesores,
-                    total_materias,
-                    total_inscripciones,
-                    f"{promedio_general:.2f}" if promedio_general > 0 else 'N/A',
-                    f"{porcentaje_aprobacion:.1f}%",
-                    '',
-                    '',
-                    '',
-                    ''
-                ])
-                
-                writer.writerow([])  # Línea en blanco
-                
-                # Información del reporte
-                writer.writerow([
-                    'INFORMACIÓN DEL REPORTE',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    ''
-                ])
-                
-                writer.writerow([
-                    'Generado por',
-                    'Fecha de generación',
-                    'Período filtrado',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    '',
-                    ''
-                ])
-                
-                writer.writerow([
-                    self.solicitante.get_full_name(),
-                    timezone.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    Periodo.objects.get(id=periodo_id).nombre if periodo_id else 'Todos los períodos',
-                    '',
-                    '',
-                    '',
-                    '',
+        registros = 0
+        escritura = 0.0
+        # El tiempo de escritura se mide por lote, no por fila
+        for lote in _en_lotes(filas, CHUNK_SIZE):
+            inicio = time.perf_counter()
+            writer.writerows(lote)
+            escritura += time.perf_counter() - inicio
+            registros += len(lote)
+            if reporte is not None and len(lote) == CHUNK_SIZE:
+                reporte.actualizar_progreso(registros)
+
+        if self.medidor is not None:
+            self.medidor.sumar('escritura', escritura)
+        return registros
+
+    def _materias_estudiantes(self, periodo_id=None):
+        """
+        Inscripciones con el promedio de calificaciones anotado.
+
+        El promedio se calcula en la misma consulta con annotate, en lugar de
+        un aggregate por inscripción.
+        """
+        inscripciones = Inscripcion.objects.all()
+        if periodo_id:
+            inscripciones = inscripciones.filter(periodo_id=periodo_id)
+
+        return inscripciones.annotate(promedio_calificaciones=Avg('calificaciones__nota'))
+
+    def _filas_estudiante(self, nombre_estudiante, registros, resumen=None):
+        """
+        Generar las filas de materias del reporte de un estudiante.
+
+        `registros` son tuplas con CAMPOS_MATERIAS_ESTUDIANTE. Si se pasa el
+        diccionario `resumen`, se acumulan allí las notas (como floats en un
+        array) y las materias aprobadas para el resumen final.
+        """
+        for (materia_nombre, materia_codigo, creditos, periodo_nombre, profesor_id,
+             profesor_nombre, profesor_apellido, nota_final, estado, promedio) in registros:
+            promedio_materia = promedio or 0
+
+            # Determinar la calificación final
+            calificacion_final = nota_final
+            if calificacion_final is None and promedio_materia > 0:
+                calificacion_final = promedio_materia
+
+            if resumen is not None:
+                if calificacion_final:
+                    resumen['notas'].append(calificacion_final)
+                if estado == 'aprobada':
+                    resumen['materias_aprobadas'] += 1
+
+            yield [
+                nombre_estudiante,
+                materia_nombre,
+                materia_codigo,
+                creditos,
+                periodo_nombre,
+                _nombre_completo(profesor_nombre, profesor_apellido) if profesor_id else 'Por asignar',
+                f"{calificacion_final:.1f}" if calificacion_final else "Pendiente",
+                ESTADOS_INSCRIPCION.get(estado, estado),
+                f"{promedio_materia:.1f}" if promedio_materia > 0 else "Sin calificar"
+            ]
+
+    def _calificaciones_por_inscripcion(self, inscripcion_ids):
+        """
+        Obtener en una sola consulta el texto de calificaciones de un lote de inscripciones.
+
+        Returns:
+            dict: {inscripcion_id: 'Parcial 1: 4.00/5.0, Final: 3.50/5.0'}
+        """
+        textos = {}
+        calificaciones = Calificacion.objects.filter(
+            inscripcion_id__in=inscripcion_ids
+        ).order_by('inscripcion_id', 'tipo').values_list('inscripcion_id', 'tipo', 'nota')
+
+        for inscripcion_id, tipo, nota in calificaciones:
+            texto = f"{TIPOS_CALIFICACION.get(tipo, tipo)}: {nota}/5.0"
+            if inscripcion_id in textos:
+                textos[inscripcion_id] += f", {texto}"
+            else:
+                textos[inscripcion_id] = texto
+
+        return textos
+
+    def _filas_detalle_profesor(self, profesor, periodo_id=None):
+        """
+        Generar las filas de detalle de estudiantes de todas las materias de un profesor.
+
+        Se recorre una única consulta ordenada por materia; las calificaciones
+        se traen con una consulta por lote de inscripciones.
+        """
+        inscripciones = Inscripcion.objects.filter(materia__profesor=profesor)
+        if periodo_id:
+            inscripciones = inscripciones.filter(periodo_id=periodo_id)
+
+        filas = inscripciones.order_by('materia__codigo', 'id').values_list(
+            'id', 'materia__codigo', 'materia__nombre',
+            'estudiante__first_name', 'estudiante__last_name', 'estudiante__email',
+            'estado', 'nota_final', 'created_at'
+        ).iterator(chunk_size=CHUNK_SIZE)
+
+        for lote in _en_lotes(filas):
+            calificaciones = self._calificaciones_por_inscripcion([fila[0] for fila in lote])
+
+            for (inscripcion_id, materia_codigo, materia_nombre, nombre, apellido,
+                 email, estado, nota_final, created_at) in lote:
+                yield [
+                    f"{materia_codigo} - {materia_nombre}",
+                    _nombre_completo(nombre, apellido),
+                    email,
+                    ESTADOS_INSCRIPCION.get(estado, estado),
+                    nota_final or 'Pendiente',
+                    calificaciones.get(inscripcion_id, ''),
+                    created_at.strftime('%Y-%m-%d'),
                     '',
                     '',
                     ''
-                ])
-            
-            # Actualizar reporte
-            reporte.ruta_archivo = ruta_archivo
-            reporte.marcar_completado(1)
-            
-            return reporte
-            
-        except Exception as e:
-            if 'reporte' in locals():
-                reporte.marcar_error(str(e))
-            raise 
+                ]
+
+    def _filas_inscripciones_general(self, periodo_id=None, desde=None, hasta=None):
+        """
+        Generar las filas de detalle de todas las inscripciones del sistema.
+        `desde` y `hasta` limitan el rango de ids para la generación por fragmentos.
+        """
+        inscripciones = Inscripcion.objects.all()
+        if periodo_id:
+            inscripciones = inscripciones.filter(periodo_id=periodo_id)
+        if desde is not None:
+            inscripciones = inscripciones.filter(id__gte=desde, id__lte=hasta)
+
+        filas = inscripciones.order_by('id').values_list(
+            'estudiante__first_name', 'estudiante__last_name', 'materia__nombre',
+            'materia__codigo', 'estado', 'nota_final', 'periodo__nombre'
+        ).iterator(chunk_size=CHUNK_SIZE)
+
+        for nombre, apellido, materia_nombre, materia_codigo, estado, nota_final, periodo_nombre in filas:
+            yield [
+                _nombre_completo(nombre, apellido),
+                materia_nombre,
+                materia_codigo,
+                ESTADOS_INSCRIPCION.get(estado, estado),
+                nota_final or 'Pendiente',
+                periodo_nombre
+            ]
+
+    def _filas_materia(self, materia):
+        """Generar las filas de inscripciones de una materia."""
+        filas = Inscripcion.objects.filter(materia=materia).order_by('id').values_list(
+            'estudiante__first_name', 'estudiante__last_name', 'periodo__nombre',
+            'estado', 'nota_final'
+        ).iterator(chunk_size=CHUNK_SIZE)
+
+        for nombre, apellido, periodo_nombre, estado, nota_final in filas:
+            yield [
+                _nombre_completo(nombre, apellido),
+                periodo_nombre,
+                ESTADOS_INSCRIPCION.get(estado, estado),
+                nota_final or 'Pendiente'
+            ]
 
     def _calcular_estadisticas_estudiante(self, estudiante):
         """Calcular estadísticas de un estudiante."""
         inscripciones = Inscripcion.objects.filter(estudiante=estudiante)
         
-        total_materias = inscripciones.count()
-        materias_aprobadas = inscripciones.filter(estado='aprobada').count()
-        materias_reprobadas = inscripciones.filter(estado='reprobada').count()
-        
-        # Calcular promedio general
-        inscripciones_con_nota = inscripciones.filter(nota_final__isnull=False)
-        promedio_general = 0
-        if inscripciones_con_nota.exists():
-            promedio_general = inscripciones_con_nota.aggregate(
-                promedio=Avg('nota_final')
-            )['promedio'] or 0
+        totales = inscripciones.aggregate(
+            total_materias=Count('id'),
+            materias_aprobadas=Count('id', filter=Q(estado='aprobada')),
+            materias_reprobadas=Count('id', filter=Q(estado='reprobada')),
+            creditos_aprobados=Sum('materia__creditos', filter=Q(estado='aprobada'))
+        )
         
-        # Calcular créditos aprobados
-        creditos_aprobados = inscripciones.filter(
-            estado='aprobada'
-        ).aggregate(
-            total=Sum('materia__creditos')
-        )['total'] or 0
+        # Promedio y distribución de las notas finales
+        notas = estadisticas_notas(inscripciones)
         
         return {
-            'promedio_general': round(promedio_general, 2),
-            'total_materias': total_materias,
-            'materias_aprobadas': materias_aprobadas,
-            'materias_reprobadas': materias_reprobadas,
-            'creditos_aprobados': creditos_aprobados
+            'promedio_general': round(notas['promedio'] or 0, 2),
+            'total_materias': totales['total_materias'],
+            'materias_aprobadas': totales['materias_aprobadas'],
+            'materias_reprobadas': totales['materias_reprobadas'],
+            'creditos_aprobados': totales['creditos_aprobados'] or 0,
+            'distribucion_notas': notas
         }
     
     def _calcular_estadisticas_profesor(self, profesor):
         """Calcular estadísticas de un profesor."""
         materias = Materia.objects.filter(profesor=profesor)
         
-        total_materias = materias.count()
-        total_estudiantes = Inscripcion.objects.filter(
-            materia__profesor=profesor
-        ).count()
-        
-        # Calcular promedio de las materias
-        materias_con_promedio = materias.annotate(
-            promedio_materia=Avg('inscripciones__nota_final')
+        totales = materias.aggregate(
+            total_materias=Count('id'),
+            total_creditos=Sum('creditos')
         )
+        inscripciones = Inscripcion.objects.filter(materia__profesor=profesor)
         
-        promedio_materias = 0
-        if materias_con_promedio.exists():
-            promedios = [m.promedio_materia for m in materias_con_promedio if m.promedio_materia]
-            if promedios:
-                promedio_materias = sum(promedios) / len(promedios)
-        
-        # Calcular total de créditos
-        total_creditos = materias.aggregate(
-            total=Sum('creditos')
-        )['total'] or 0
+        # Promedio de los promedios de cada materia con notas
+        por_materia = estadisticas_por_grupo(inscripciones, 'materia_id')
+        promedios = [notas['promedio'] for notas in por_materia.values()]
+        promedio_materias = sum(promedios) / len(promedios) if promedios else 0
         
         return {
-            'total_materias': total_materias,
-            'total_estudiantes': total_estudiantes,
+            'total_materias': totales['total_materias'],
+            'total_estudiantes': inscripciones.count(),
             'promedio_materias': round(promedio_materias, 2),
-            'total_creditos': total_creditos
+            'total_creditos': totales['total_creditos'] or 0,
+            'distribucion_notas': estadisticas_notas(inscripciones)
         }
     
+    def _abrir_csv(self, nombre):
+        """Abrir un CSV sin comprimir en el almacenamiento de reportes."""
+        return abrir_escritura(abrir_destino(nombre, self.almacenamiento))
+    
     def _escribir_csv_estudiante(self, ruta_archivo, estudiante):
         """Escribir CSV para reporte de estudiante."""
-        with open(ruta_archivo, 'w', newline='', encoding='utf-8') as archivo:
+        with self._abrir_csv(ruta_archivo) as archivo:
             writer = csv.writer(archivo)
             
             # Escribir encabezados
@@ -701,20 +1198,25 @@ class ReporteService:
                 'Estado', 'Nota Final', 'Promedio', 'Calificaciones', 'Comentarios'
             ])
             
-            # Obtener inscripciones del estudiante
+            # Obtener inscripciones del estudiante por lotes
             inscripciones = Inscripcion.objects.filter(
                 estudiante=estudiante
-            ).select_related('materia', 'periodo', 'materia__profesor')
-            
-            for inscripcion in inscripciones:
+            ).order_by('id').values_list(
+                'materia__codigo', 'materia__nombre', 'materia__creditos', 'periodo__nombre',
+                'materia__profesor_id', 'materia__profesor__first_name',
+                'materia__profesor__last_name', 'estado', 'nota_final'
+            ).iterator(chunk_size=CHUNK_SIZE)
+
+            for (codigo, nombre, creditos, periodo_nombre, profesor_id, profesor_nombre,
+                 profesor_apellido, estado, nota_final) in inscripciones:
                 writer.writerow([
-                    inscripcion.materia.codigo,
-                    inscripcion.materia.nombre,
-                    inscripcion.materia.creditos,
-                    inscripcion.periodo.nombre,
-                    inscripcion.materia.profesor.get_full_name() if inscripcion.materia.profesor else 'Por asignar',
-                    inscripcion.get_estado_display(),
-                    inscripcion.nota_final or 'Pendiente',
+                    codigo,
+                    nombre,
+                    creditos,
+                    periodo_nombre,
+                    _nombre_completo(profesor_nombre, profesor_apellido) if profesor_id else 'Por asignar',
+                    ESTADOS_INSCRIPCION.get(estado, estado),
+                    nota_final or 'Pendiente',
                     '',  # Promedio específico
                     '',  # Calificaciones detalladas
                     ''   # Comentarios
@@ -722,7 +1224,7 @@ class ReporteService:
     
     def _escribir_csv_profesor(self, ruta_archivo, profesor):
         """Escribir CSV para reporte de profesor."""
-        with open(ruta_archivo, 'w', newline='', encoding='utf-8') as archivo:
+        with self._abrir_csv(ruta_archivo) as archivo:
             writer = csv.writer(archivo)
             
             # Escribir encabezados
@@ -731,28 +1233,22 @@ class ReporteService:
                 'Promedio Materia', 'Período'
             ])
             
-            # Obtener materias del profesor
-            materias = Materia.objects.filter(profesor=profesor)
-            
-            for materia in materias:
-                estudiantes_count = Inscripcion.objects.filter(materia=materia).count()
-                promedio = Inscripcion.objects.filter(
-                    materia=materia, 
-                    nota_final__isnull=False
-                ).aggregate(Avg('nota_final'))['nota_final__avg'] or 0
+            # Materias del profesor con sus estadísticas en una sola consulta
+            for materia in materias_con_estadisticas(profesor):
+                promedio = materia.promedio_nota_final or 0
                 
                 writer.writerow([
                     materia.codigo,
                     materia.nombre,
                     materia.creditos,
-                    estudiantes_count,
+                    materia.num_estudiantes,
                     f"{promedio:.2f}" if promedio > 0 else 'Sin calificaciones',
                     'Todos'  # Período
                 ])
     
     def _escribir_csv_general(self, ruta_archivo):
         """Escribir CSV para reporte general."""
-        with open(ruta_archivo, 'w', newline='', encoding='utf-8') as archivo:
+        with self._abrir_csv(ruta_archivo) as archivo:
             writer = csv.writer(archivo)
             
             # Escribir encabezados
@@ -760,20 +1256,8 @@ class ReporteService:
                 'Estudiante', 'Materia', 'Código', 'Estado', 'Nota Final', 'Período'
             ])
             
-            # Obtener todas las inscripciones
-            inscripciones = Inscripcion.objects.select_related(
-                'estudiante', 'materia', 'periodo'
-            )
-            
-            for inscripcion in inscripciones:
-                writer.writerow([
-                    inscripcion.estudiante.get_full_name(),
-                    inscripcion.materia.nombre,
-                    inscripcion.materia.codigo,
-                    inscripcion.get_estado_display(),
-                    inscripcion.nota_final or 'Pendiente',
-                    inscripcion.periodo.nombre
-                ])
+            # Escribir todas las inscripciones por lotes
+            self._escribir_filas(writer, self._filas_inscripciones_general())
     
     def _format_fecha(self, fecha):
         """Formatear fecha para el reporte."""
@@ -788,117 +1272,277 @@ class ReporteService:
         return 'N/A'
     
     def cleanup_old_reports(self, days=30):
-        """Limpiar reportes antiguos."""
-        from datetime import timedelta
-        from django.utils import timezone
-        
-        fecha_limite = timezone.now() - timedelta(days=days)
-        reportes_antiguos = ReporteGenerado.objects.filter(
-            created_at__lt=fecha_limite
-        )
-        
-        count = reportes_antiguos.count()
+        """Limpiar reportes antiguos, en cualquier estado, por lotes."""
+        from .limpieza import limpiar_reportes
         
-        # Eliminar archivos físicos
-        for reporte in reportes_antiguos:
-            if reporte.ruta_archivo and os.path.exists(reporte.ruta_archivo):
-                try:
-                    os.remove(reporte.ruta_archivo)
-                except OSError:
-                    pass
-        
-        # Eliminar registros de BD
-        reportes_antiguos.delete()
-        
-        return count
+        return limpiar_reportes(days)['reportes_procesados']
     
-    def generar_reporte_por_periodo(self, periodo_id):
+    def generar_reporte_por_periodo(self, periodo_id, formato='csv'):
         """Generar reporte por período."""
-        try:
-            periodo = Periodo.objects.get(id=periodo_id)
-            
-            reporte = ReporteGenerado.objects.create(
-                solicitante=self.solicitante,
-                tipo='periodo',
-                nombre_archivo=f"reporte_periodo_{periodo.nombre}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                parametros={
-                    'periodo_id': periodo_id,
-                    'generado_por': self.solicitante.username
-                }
+        reporte = self.crear_reporte_por_periodo(periodo_id, formato)
+        return self.procesar_reporte(reporte)
+
+    def crear_reporte_por_periodo(self, periodo_id, formato='csv'):
+        """Registrar un reporte por período pendiente de generación."""
+        periodo = Periodo.objects.get(id=periodo_id)
+
+        return self._crear_reporte(
+            tipo='periodo',
+            nombre_archivo=f"reporte_periodo_{periodo.nombre}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            parametros={
+                'periodo_id': periodo_id
+            },
+            formato=formato
+        )
+
+    def _generar_periodo(self, reporte):
+        """Escribir el CSV de un reporte por período. Retorna los registros procesados."""
+        periodo = Periodo.objects.get(id=reporte.parametros['periodo_id'])
+
+        with abrir_escritura(self._abrir_destino(reporte), reporte.compresion) as archivo:
+            writer = csv.writer(archivo)
+
+            writer.writerow([
+                'Estudiante', 'Materia', 'Código', 'Estado', 'Nota Final'
+            ])
+
+            # Misma fila del detalle general, sin la columna de período
+            filas = (fila[:5] for fila in self._filas_inscripciones_general(periodo.id))
+            registros_procesados = self._escribir_filas(writer, filas, reporte)
+
+            _escribir_distribucion(
+                writer, 'DISTRIBUCIÓN DE NOTAS POR MATERIA', 'Código',
+                estadisticas_por_grupo(
+                    Inscripcion.objects.filter(periodo=periodo), 'materia__codigo'
+                )
             )
-            
-            # Generar archivo CSV
-            ruta_archivo = os.path.join(self.reports_dir, reporte.nombre_archivo)
-            
-            with open(ruta_archivo, 'w', newline='', encoding='utf-8') as archivo:
-                writer = csv.writer(archivo)
-                
-                writer.writerow([
-                    'Estudiante', 'Materia', 'Código', 'Estado', 'Nota Final'
-                ])
-                
-                inscripciones = Inscripcion.objects.filter(
-                    periodo=periodo
-                ).select_related('estudiante', 'materia')
-                
-                for inscripcion in inscripciones:
-                    writer.writerow([
-                        inscripcion.estudiante.get_full_name(),
-                        inscripcion.materia.nombre,
-                        inscripcion.materia.codigo,
-                        inscripcion.get_estado_display(),
-                        inscripcion.nota_final or 'Pendiente'
-                    ])
-            
-            reporte.ruta_archivo = ruta_archivo
-            reporte.marcar_completado(inscripciones.count())
-            
-            return reporte
-            
-        except Periodo.DoesNotExist:
-            raise
-    
-    def generar_reporte_por_materia(self, materia_id):
+
+        return registros_procesados
+
+    def generar_reporte_por_materia(self, materia_id, formato='csv'):
         """Generar reporte por materia."""
-        try:
-            materia = Materia.objects.get(id=materia_id)
-            
-            reporte = ReporteGenerado.objects.create(
-                solicitante=self.solicitante,
-                tipo='materia',
-                nombre_archivo=f"reporte_materia_{materia.codigo}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                parametros={
-                    'materia_id': materia_id,
-                    'generado_por': self.solicitante.username
-                }
+        reporte = self.crear_reporte_por_materia(materia_id, formato)
+        return self.procesar_reporte(reporte)
+
+    def crear_reporte_por_materia(self, materia_id, formato='csv'):
+        """Registrar un reporte por materia pendiente de generación."""
+        materia = Materia.objects.get(id=materia_id)
+
+        return self._crear_reporte(
+            tipo='materia',
+            nombre_archivo=f"reporte_materia_{materia.codigo}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            parametros={
+                'materia_id': materia_id
+            },
+            formato=formato
+        )
+
+    def _generar_materia(self, reporte):
+        """Escribir el CSV de un reporte por materia. Retorna los registros procesados."""
+        materia = Materia.objects.get(id=reporte.parametros['materia_id'])
+
+        with abrir_escritura(self._abrir_destino(reporte), reporte.compresion) as archivo:
+            writer = csv.writer(archivo)
+
+            writer.writerow([
+                'Estudiante', 'Período', 'Estado', 'Nota Final'
+            ])
+
+            registros_procesados = self._escribir_filas(writer, self._filas_materia(materia), reporte)
+
+            _escribir_distribucion(
+                writer, 'DISTRIBUCIÓN DE NOTAS POR PERÍODO', 'Período',
+                estadisticas_por_grupo(
+                    Inscripcion.objects.filter(materia=materia), 'periodo__nombre'
+                )
             )
-            
-            # Generar archivo CSV
-            ruta_archivo = os.path.join(self.reports_dir, reporte.nombre_archivo)
-            
-            with open(ruta_archivo, 'w', newline='', encoding='utf-8') as archivo:
-                writer = csv.writer(archivo)
-                
+
+        return registros_procesados
+
+    def generar_reporte_lote(self, estudiante_ids=None, periodo_id=None, materia_id=None, formato='csv'):
+        """Generar el reporte académico de un lote de estudiantes."""
+        reporte = self.crear_reporte_lote(estudiante_ids, periodo_id, materia_id, formato)
+        return self.procesar_reporte(reporte)
+
+    def crear_reporte_lote(self, estudiante_ids=None, periodo_id=None, materia_id=None, formato='csv'):
+        """
+        Registrar un reporte por lote de estudiantes pendiente de generación.
+
+        Los estudiantes salen de la lista de ids o, si no se da, de las
+        inscripciones que cumplen el filtro de período y/o materia. El
+        conjunto se resuelve aquí para que la huella del reporte quede ligada
+        a estudiantes concretos. El período además limita las materias listadas.
+
+        Args:
+            estudiante_ids: IDs de los estudiantes (opcional)
+            periodo_id: ID del período (opcional)
+            materia_id: ID de una materia que cursan los estudiantes (opcional)
+            formato: 'csv' para un CSV combinado o 'zip' para un CSV por estudiante
+
+        Raises:
+            ValueError: Si ningún estudiante cumple los criterios
+        """
+        estudiantes = User.objects.filter(role='estudiante')
+        if estudiante_ids is not None:
+            estudiantes = estudiantes.filter(id__in=estudiante_ids)
+        else:
+            filtro = {}
+            if periodo_id:
+                filtro['inscripciones__periodo_id'] = periodo_id
+            if materia_id:
+                filtro['inscripciones__materia_id'] = materia_id
+            estudiantes = estudiantes.filter(**filtro)
+
+        ids = list(estudiantes.order_by('id').values_list('id', flat=True).distinct())
+        if not ids:
+            raise ValueError("Ningún estudiante cumple los criterios del reporte.")
+
+        return self._crear_reporte(
+            tipo='lote',
+            nombre_archivo=f"reporte_lote_{len(ids)}_estudiantes_{timezone.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            parametros={
+                'estudiante_ids': ids,
+                'periodo_id': periodo_id,
+                'materia_id': materia_id
+            },
+            formato=formato
+        )
+
+    def _generar_lote(self, reporte):
+        """
+        Escribir el reporte de un lote de estudiantes: un CSV combinado o un
+        zip con el reporte académico de cada estudiante.
+        """
+        estudiante_ids = reporte.parametros['estudiante_ids']
+        periodo_id = reporte.parametros.get('periodo_id')
+        periodo_nombre = self._nombre_periodo(periodo_id)
+        transcripciones = self._materias_por_estudiante(estudiante_ids, periodo_id)
+
+        if reporte.formato == 'zip':
+            return self._escribir_lote_zip(reporte, transcripciones, periodo_nombre)
+
+        with abrir_escritura(self._abrir_destino(reporte), reporte.compresion) as csvfile:
+            writer = csv.writer(csvfile)
+
+            writer.writerow([
+                'REPORTE ACADÉMICO POR LOTE',
+                f'Estudiantes: {len(estudiante_ids)}',
+                f'Fecha: {timezone.now().strftime("%Y-%m-%d %H:%M")}'
+            ])
+            writer.writerow([])
+            writer.writerow(['ID Estudiante'] + ENCABEZADO_MATERIAS_ESTUDIANTE)
+
+            # Detalle de materias de todos los estudiantes
+            resumenes = []
+            registros_procesados = 0
+            for indice, (estudiante, registros) in enumerate(transcripciones, start=1):
+                resumen = {'notas': array('d'), 'materias_aprobadas': 0}
+                filas = self._filas_estudiante(estudiante.get_full_name(), registros, resumen)
+                total_materias = self._escribir_filas(writer, ([estudiante.id] + fila for fila in filas))
+
+                registros_procesados += total_materias
+                resumenes.append((estudiante, total_materias, resumen))
+                if indice % TAMANO_LOTE_ESTUDIANTES == 0:
+                    reporte.actualizar_progreso(registros_procesados)
+
+            # Resumen académico por estudiante
+            writer.writerow([])
+            writer.writerow(['RESUMEN POR ESTUDIANTE'])
+            writer.writerow([
+                'ID Estudiante',
+                'Estudiante',
+                'Total de materias',
+                'Materias aprobadas',
+                'Materias reprobadas',
+                'Promedio general'
+            ])
+            for estudiante, total_materias, resumen in resumenes:
                 writer.writerow([
-                    'Estudiante', 'Período', 'Estado', 'Nota Final'
+                    estudiante.id,
+                    estudiante.get_full_name(),
+                    total_materias,
+                    *self._resumen_academico(total_materias, resumen)
                 ])
-                
-                inscripciones = Inscripcion.objects.filter(
-                    materia=materia
-                ).select_related('estudiante', 'periodo')
-                
-                for inscripcion in inscripciones:
-                    writer.writerow([
-                        inscripcion.estudiante.get_full_name(),
-                        inscripcion.periodo.nombre,
-                        inscripcion.get_estado_display(),
-                        inscripcion.nota_final or 'Pendiente'
-                    ])
-            
-            reporte.ruta_archivo = ruta_archivo
-            reporte.marcar_completado(inscripciones.count())
-            
-            return reporte
-            
-        except Materia.DoesNotExist:
-            raise 
\ No newline at end of file
+
+            writer.writerow([])
+            writer.writerow(['INFORMACIÓN DEL REPORTE'])
+            writer.writerow(['Detalle', 'Información'])
+            writer.writerow(['Fecha de generación', timezone.now().strftime('%Y-%m-%d %H:%M:%S')])
+            writer.writerow(['Período filtrado', periodo_nombre])
+            writer.writerow(['Registros procesados', registros_procesados])
+
+        return registros_procesados
+
+    def _escribir_lote_zip(self, reporte, transcripciones, periodo_nombre):
+        """Escribir un zip con un CSV por estudiante. Retorna las materias escritas."""
+        registros_procesados = 0
+
+        # El destino no admite seek: zipfile escribe cada entrada con data
+        # descriptor y el zip se puede subir por partes
+        with self._abrir_destino(reporte) as destino, \
+                zipfile.ZipFile(destino, 'w', compression=zipfile.ZIP_DEFLATED) as archivo_zip:
+            for indice, (estudiante, registros) in enumerate(transcripciones, start=1):
+                nombre = f"reporte_estudiante_{estudiante.username}.csv"
+                with io.TextIOWrapper(archivo_zip.open(nombre, 'w'), encoding='utf-8', newline='') as csvfile:
+                    registros_procesados += self._escribir_reporte_estudiante(
+                        csv.writer(csvfile), estudiante, registros, periodo_nombre
+                    )
+
+                if indice % TAMANO_LOTE_ESTUDIANTES == 0:
+                    reporte.actualizar_progreso(registros_procesados)
+
+        return registros_procesados
+
+    def _materias_por_estudiante(self, estudiante_ids, periodo_id=None):
+        """
+        Generar (estudiante, materias) para cada estudiante del lote, en orden de id.
+
+        Por cada grupo de TAMANO_LOTE_ESTUDIANTES se hacen dos consultas: los
+        usuarios y sus inscripciones con el promedio anotado. Las inscripciones
+        se agrupan en memoria por estudiante.
+        """
+        for ids in _en_lotes(estudiante_ids, TAMANO_LOTE_ESTUDIANTES):
+            estudiantes = User.objects.in_bulk(ids)
+
+            materias = defaultdict(list)
+            registros = self._materias_estudiantes(periodo_id).filter(
+                estudiante_id__in=ids
+            ).order_by('estudiante_id', 'periodo__nombre', 'materia__codigo').values_list(
+                'estudiante_id', *CAMPOS_MATERIAS_ESTUDIANTE
+            )
+            for estudiante_id, *registro in registros:
+                materias[estudiante_id].append(registro)
+
+            for estudiante_id in ids:
+                if estudiante_id in estudiantes:
+                    yield estudiantes[estudiante_id], materias[estudiante_id]
+
+    def _generar_columnar(self, reporte):
+        """
+        Escribir un reporte de inscripciones en Parquet con columnas tipadas.
+
+        Cada lote del queryset se escribe como un row group, así que el
+        archivo crece por lotes igual que los CSV.
+        """
+        inscripciones = Inscripcion.objects.all()
+        if reporte.tipo == 'materia':
+            inscripciones = inscripciones.filter(materia_id=reporte.parametros['materia_id'])
+        elif reporte.parametros.get('periodo_id'):
+            inscripciones = inscripciones.filter(periodo_id=reporte.parametros['periodo_id'])
+
+        registros = inscripciones.order_by('id').values_list(
+            *CAMPOS_INSCRIPCIONES
+        ).iterator(chunk_size=CHUNK_SIZE)
+        filas = (
+            (_nombre_completo(nombre, apellido), *resto)
+            for nombre, apellido, *resto in registros
+        )
+
+        with self._abrir_destino(reporte) as destino:
+            return escribir_parquet(
+                destino,
+                esquema_inscripciones(),
+                filas,
+                tamano_grupo=CHUNK_SIZE,
+                al_escribir_grupo=reporte.actualizar_progreso
+            )
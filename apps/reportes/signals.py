@@ -1,4 +1,63 @@
 # signals.py para la app reportes
-# Señales automáticas - notificar cuando se completa un reporte
+# Señales de reportes - invalidar estadísticas cacheadas y mantener resúmenes
 
-# TODO: señales cuando las necesitemos 
\ No newline at end of file
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from apps.inscripciones.models import Inscripcion
+from .models import ReporteGenerado
+from .estadisticas import invalidar_estadisticas
+from .resumenes import programar_recalculo
+
+
+@receiver(post_save, sender=ReporteGenerado)
+def reporte_guardado(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Invalidar las estadísticas cuando se crea un reporte o cambia su estado.
+    Las actualizaciones de progreso no pasan por save() y no invalidan nada.
+    """
+    if created or update_fields is None or 'estado' in update_fields:
+        invalidar_estadisticas()
+
+
+@receiver(post_delete, sender=ReporteGenerado)
+def reporte_eliminado(sender, instance, **kwargs):
+    """Invalidar las estadísticas cuando se elimina un reporte."""
+    invalidar_estadisticas()
+
+
+@receiver(pre_save, sender=Inscripcion)
+def inscripcion_por_guardar(sender, instance, update_fields=None, raw=False, **kwargs):
+    """
+    Si una inscripción cambia de período o materia, anotar el grupo de origen
+    para recalcularlo también después del save. Solo se consulta cuando el
+    save puede tocar esos campos.
+    """
+    instance._grupo_resumen_anterior = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not {'periodo', 'materia'} & set(update_fields):
+        return
+
+    anterior = Inscripcion.objects.filter(pk=instance.pk).values_list(
+        'periodo_id', 'materia_id'
+    ).first()
+    if anterior and anterior != (instance.periodo_id, instance.materia_id):
+        instance._grupo_resumen_anterior = anterior
+
+
+@receiver(post_save, sender=Inscripcion)
+def inscripcion_guardada(sender, instance, raw=False, **kwargs):
+    """Recalcular el resumen del grupo de la inscripción al confirmar la transacción."""
+    if raw:
+        return
+    anterior = getattr(instance, '_grupo_resumen_anterior', None)
+    if anterior:
+        programar_recalculo(*anterior)
+    programar_recalculo(instance.periodo_id, instance.materia_id)
+
+
+@receiver(post_delete, sender=Inscripcion)
+def inscripcion_eliminada(sender, instance, **kwargs):
+    """Recalcular el resumen del grupo de una inscripción eliminada."""
+    programar_recalculo(instance.periodo_id, instance.materia_id)
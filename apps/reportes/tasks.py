@@ -2,7 +2,9 @@
 # Tareas para generar reportes pesados en background, enviar por email
 
 # TODO: tareas cuando las necesitemos 
-from celery import shared_task
+import logging
+
+from celery import shared_task, chord
 from django.utils import timezone
 from apps.users.models import User
 from apps.materias.models import Materia
@@ -10,6 +12,8 @@ from apps.inscripciones.models import Inscripcion
 from apps.notificaciones.models import Notificacion
 from django.db import models
 
+logger = logging.getLogger(__name__)
+
 @shared_task
 def send_weekly_professor_summary():
     """
@@ -37,4 +41,253 @@ def send_weekly_professor_summary():
             tipo='recordatorio',
             titulo='Resumen académico semanal',
             mensaje=mensaje
-        ) 
\ No newline at end of file
+        ) 
+
+@shared_task
+def generar_reporte_task(reporte_id):
+    """
+    Generar en background el archivo de un reporte ya registrado.
+    La vista crea el ReporteGenerado en estado pendiente y lo pone en la
+    cola (ver cola.py), que despacha esta tarea; el avance queda en
+    registros_procesados para el endpoint de progreso. Al terminar se
+    despachan los reportes que esperaban un lugar.
+    """
+    from .cola import despachar_pendientes
+
+    try:
+        return _generar_reporte(reporte_id)
+    finally:
+        despachar_pendientes()
+
+
+def _generar_reporte(reporte_id):
+    """Cuerpo de generar_reporte_task."""
+    from .models import ReporteGenerado
+    from .services import ReporteService
+
+    try:
+        reporte = ReporteGenerado.objects.select_related('solicitante').get(id=reporte_id)
+    except ReporteGenerado.DoesNotExist:
+        return {
+            'error': f"Reporte {reporte_id} no encontrado",
+            'reporte_id': reporte_id
+        }
+
+    # Si otro worker ya lo tomó (reintentos, mensajes duplicados) no se regenera
+    if not reporte.es_pendiente:
+        return {
+            'reporte_id': reporte_id,
+            'estado': reporte.estado,
+            'mensaje': 'El reporte ya fue procesado'
+        }
+
+    if (reporte.tipo == 'general' and reporte.formato == 'csv'
+            and reporte.parametros.get('fragmentos', 1) > 1):
+        return _generar_general_fragmentado(reporte)
+
+    try:
+        ReporteService(reporte.solicitante).procesar_reporte(reporte)
+        return {
+            'reporte_id': reporte_id,
+            'estado': reporte.estado,
+            'registros_procesados': reporte.registros_procesados,
+            'fecha_ejecucion': timezone.now().isoformat()
+        }
+
+    except Exception as e:
+        # procesar_reporte ya dejó el reporte en estado error
+        return {
+            'error': f"Error generando reporte {reporte_id}: {e}",
+            'reporte_id': reporte_id,
+            'fecha_ejecucion': timezone.now().isoformat()
+        }
+
+
+def _generar_general_fragmentado(reporte):
+    """
+    Repartir el detalle del reporte general en un chord de Celery: cada
+    fragmento escribe un rango de ids de inscripciones en su propio archivo
+    y unir_fragmentos_general arma el archivo final en orden.
+    """
+    from .services import ReporteService
+
+    service = ReporteService(reporte.solicitante)
+
+    try:
+        if service.iniciar_generacion(reporte):
+            return {
+                'reporte_id': reporte.id,
+                'estado': reporte.estado,
+                'registros_procesados': reporte.registros_procesados,
+                'fecha_ejecucion': timezone.now().isoformat()
+            }
+
+        rangos = service.rangos_inscripciones(
+            reporte.parametros.get('periodo_id'),
+            reporte.parametros['fragmentos']
+        )
+    except Exception as e:
+        reporte.marcar_error(str(e))
+        return {
+            'error': f"Error generando reporte {reporte.id}: {e}",
+            'reporte_id': reporte.id,
+            'fecha_ejecucion': timezone.now().isoformat()
+        }
+
+    if not rangos:
+        return unir_fragmentos_general([], reporte.id)
+
+    chord(
+        generar_fragmento_general.s(reporte.id, indice, desde, hasta)
+        for indice, (desde, hasta) in enumerate(rangos)
+    )(unir_fragmentos_general.s(reporte.id))
+
+    return {
+        'reporte_id': reporte.id,
+        'estado': 'generando',
+        'fragmentos': len(rangos),
+        'fecha_ejecucion': timezone.now().isoformat()
+    }
+
+
+@shared_task
+def generar_fragmento_general(reporte_id, indice, desde, hasta):
+    """Escribir un fragmento del detalle del reporte general."""
+    from .instrumentacion import MedidorGeneracion
+    from .models import ReporteGenerado
+    from .services import ReporteService
+
+    try:
+        reporte = ReporteGenerado.objects.select_related('solicitante').get(id=reporte_id)
+        service = ReporteService(reporte.solicitante)
+        service.medidor = MedidorGeneracion()
+        with service.medidor.medir():
+            ruta, registros = service.escribir_fragmento_general(reporte, indice, desde, hasta)
+        return {
+            'indice': indice,
+            'ruta': ruta,
+            'registros': registros,
+            'metricas': service.medidor.resultado(registros)
+        }
+
+    except Exception as e:
+        return {
+            'error': f"Error en fragmento {indice} del reporte {reporte_id}: {e}",
+            'indice': indice
+        }
+
+
+@shared_task
+def unir_fragmentos_general(resultados, reporte_id):
+    """
+    Callback del chord: concatenar los fragmentos y completar el reporte.
+    Si algún fragmento falló el reporte queda en estado error.
+    """
+    from .cola import despachar_pendientes
+
+    try:
+        return _unir_fragmentos_general(resultados, reporte_id)
+    finally:
+        despachar_pendientes()
+
+
+def _unir_fragmentos_general(resultados, reporte_id):
+    """Cuerpo de unir_fragmentos_general."""
+    from .instrumentacion import MedidorGeneracion, combinar_metricas
+    from .models import ReporteGenerado
+    from .services import ReporteService
+
+    reporte = ReporteGenerado.objects.select_related('solicitante').get(id=reporte_id)
+    resultados = sorted(resultados, key=lambda resultado: resultado['indice'])
+    fragmentos = [(r['ruta'], r['registros']) for r in resultados if 'error' not in r]
+    errores = [r['error'] for r in resultados if 'error' in r]
+
+    try:
+        if errores:
+            raise RuntimeError('; '.join(errores))
+
+        service = ReporteService(reporte.solicitante)
+        service.medidor = MedidorGeneracion()
+        with service.medidor.medir():
+            registros_procesados = service.unir_fragmentos_general(reporte, fragmentos)
+        service.medidor.sincronizar(reporte.ruta_archivo, service.almacenamiento)
+        reporte.checksum = service.destino.checksum
+
+        # Métricas de los fragmentos más las de la unión
+        partes = [r['metricas'] for r in resultados if 'metricas' in r]
+        partes.append(service.medidor.resultado(registros_procesados))
+        reporte.marcar_completado(
+            registros_procesados, metricas=combinar_metricas(partes, registros_procesados)
+        )
+        return {
+            'reporte_id': reporte_id,
+            'estado': reporte.estado,
+            'registros_procesados': registros_procesados,
+            'fragmentos': len(fragmentos),
+            'fecha_ejecucion': timezone.now().isoformat()
+        }
+
+    except Exception as e:
+        from .almacenamiento import eliminar
+        for ruta, _ in fragmentos:
+            eliminar(ruta)
+        reporte.marcar_error(str(e))
+        return {
+            'error': f"Error uniendo fragmentos del reporte {reporte_id}: {e}",
+            'reporte_id': reporte_id,
+            'fecha_ejecucion': timezone.now().isoformat()
+        }
+
+
+@shared_task
+def limpiar_reportes_antiguos_task(dias=30, expirar=False):
+    """
+    Limpiar por lotes los reportes completados o con error de más de 'dias' días.
+    Con expirar=True las filas se conservan en estado 'expirado' para el historial.
+    """
+    from .limpieza import limpiar_reportes
+
+    try:
+        metricas = limpiar_reportes(dias, estados=['completado', 'error'], expirar=expirar)
+
+        mensaje = (
+            f"Limpieza de reportes completada: {metricas['reportes_procesados']} reportes, "
+            f"{metricas['archivos_eliminados']} archivos en {metricas['duracion_segundos']}s"
+        )
+        logger.info(mensaje)
+
+        return {
+            'mensaje': mensaje,
+            'dias': dias,
+            **metricas,
+            'fecha_ejecucion': timezone.now().isoformat()
+        }
+
+    except Exception as e:
+        error_msg = f"Error en tarea de limpieza de reportes: {e}"
+        logger.error(error_msg)
+        return {
+            'error': error_msg,
+            'reportes_procesados': 0,
+            'fecha_ejecucion': timezone.now().isoformat()
+        }
+
+
+@shared_task
+def actualizar_resumenes_task():
+    """
+    Recalcular los resúmenes de inscripciones modificadas desde la última corrida.
+    Complementa el recálculo por señales para los cambios hechos con update().
+    """
+    from .resumenes import actualizar_resumenes_modificados
+
+    try:
+        resultado = actualizar_resumenes_modificados()
+        resultado['fecha_ejecucion'] = timezone.now().isoformat()
+        return resultado
+
+    except Exception as e:
+        return {
+            'error': f"Error actualizando resúmenes de inscripciones: {e}",
+            'fecha_ejecucion': timezone.now().isoformat()
+        }
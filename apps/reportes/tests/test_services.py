@@ -6,9 +6,13 @@ import pytest
 import os
 import tempfile
 from decimal import Decimal
-from django.test import TestCase, override_settings
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.conf import settings
+from django.utils import timezone
 from unittest.mock import patch, Mock
+from apps.reportes.almacenamiento import existe
 from apps.reportes.services import ReporteService
 from apps.reportes.models import ReporteGenerado
 from apps.users.models import User
@@ -84,7 +88,7 @@ class TestReporteService(TestCase):
         """Test que init crea el directorio de reportes."""
         service = ReporteService(self.admin)
         
-        self.assertTrue(os.path.exists(service.reports_dir))
+        self.assertEqual(service.almacenamiento.location, os.path.join(settings.MEDIA_ROOT, 'reportes'))
         self.assertEqual(service.solicitante, self.admin)
     
     @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
@@ -99,7 +103,7 @@ class TestReporteService(TestCase):
         self.assertEqual(reporte.tipo, 'estudiante')
         self.assertIn('estudiante', reporte.nombre_archivo)
         self.assertEqual(reporte.parametros['estudiante_id'], self.estudiante.id)
-        self.assertTrue(os.path.exists(os.path.join(service.reports_dir, reporte.nombre_archivo)))
+        self.assertTrue(os.path.exists(os.path.join(service.almacenamiento.location, reporte.nombre_archivo)))
     
     @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
     def test_generar_reporte_estudiante_not_found(self):
@@ -129,7 +133,7 @@ class TestReporteService(TestCase):
         self.assertEqual(reporte.tipo, 'profesor')
         self.assertIn('profesor', reporte.nombre_archivo)
         self.assertEqual(reporte.parametros['profesor_id'], self.profesor.id)
-        self.assertTrue(os.path.exists(os.path.join(service.reports_dir, reporte.nombre_archivo)))
+        self.assertTrue(os.path.exists(os.path.join(service.almacenamiento.location, reporte.nombre_archivo)))
     
     @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
     def test_generar_reporte_profesor_not_found(self):
@@ -150,7 +154,7 @@ class TestReporteService(TestCase):
         self.assertEqual(reporte.solicitante, self.admin)
         self.assertEqual(reporte.tipo, 'general')
         self.assertIn('general', reporte.nombre_archivo)
-        self.assertTrue(os.path.exists(os.path.join(service.reports_dir, reporte.nombre_archivo)))
+        self.assertTrue(os.path.exists(os.path.join(service.almacenamiento.location, reporte.nombre_archivo)))
     
     @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
     def test_generar_reporte_por_periodo_success(self):
@@ -164,7 +168,7 @@ class TestReporteService(TestCase):
         self.assertEqual(reporte.tipo, 'periodo')
         self.assertIn('periodo', reporte.nombre_archivo)
         self.assertEqual(reporte.parametros['periodo_id'], self.periodo.id)
-        self.assertTrue(os.path.exists(os.path.join(service.reports_dir, reporte.nombre_archivo)))
+        self.assertTrue(os.path.exists(os.path.join(service.almacenamiento.location, reporte.nombre_archivo)))
     
     @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
     def test_generar_reporte_por_periodo_not_found(self):
@@ -186,7 +190,7 @@ class TestReporteService(TestCase):
         self.assertEqual(reporte.tipo, 'materia')
         self.assertIn('materia', reporte.nombre_archivo)
         self.assertEqual(reporte.parametros['materia_id'], self.materia.id)
-        self.assertTrue(os.path.exists(os.path.join(service.reports_dir, reporte.nombre_archivo)))
+        self.assertTrue(os.path.exists(os.path.join(service.almacenamiento.location, reporte.nombre_archivo)))
     
     @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
     def test_generar_reporte_por_materia_not_found(self):
@@ -227,7 +231,7 @@ class TestReporteService(TestCase):
     def test_escribir_csv_estudiante(self):
         """Test de escritura de CSV para estudiante."""
         service = ReporteService(self.admin)
-        temp_file = os.path.join(service.reports_dir, 'test_estudiante.csv')
+        temp_file = os.path.join(service.almacenamiento.location, 'test_estudiante.csv')
         
         service._escribir_csv_estudiante(temp_file, self.estudiante)
         
@@ -244,7 +248,7 @@ class TestReporteService(TestCase):
     def test_escribir_csv_profesor(self):
         """Test de escritura de CSV para profesor."""
         service = ReporteService(self.admin)
-        temp_file = os.path.join(service.reports_dir, 'test_profesor.csv')
+        temp_file = os.path.join(service.almacenamiento.location, 'test_profesor.csv')
         
         service._escribir_csv_profesor(temp_file, self.profesor)
         
@@ -260,7 +264,7 @@ class TestReporteService(TestCase):
     def test_escribir_csv_general(self):
         """Test de escritura de CSV general."""
         service = ReporteService(self.admin)
-        temp_file = os.path.join(service.reports_dir, 'test_general.csv')
+        temp_file = os.path.join(service.almacenamiento.location, 'test_general.csv')
         
         service._escribir_csv_general(temp_file)
         
@@ -336,12 +340,1801 @@ class TestReporteService(TestCase):
             service.generar_reporte_estudiante(99999)
         
         # Verificar que no se creó archivo corrupto
-        files_before = len(os.listdir(service.reports_dir))
+        os.makedirs(service.almacenamiento.location, exist_ok=True)
+        files_before = len(os.listdir(service.almacenamiento.location))
         try:
             service.generar_reporte_estudiante(99999)
         except User.DoesNotExist:
             pass
-        files_after = len(os.listdir(service.reports_dir))
+        files_after = len(os.listdir(service.almacenamiento.location))
         
         # No deberían haberse creado archivos adicionales
-        self.assertEqual(files_before, files_after) 
\ No newline at end of file
+        self.assertEqual(files_before, files_after) 
+
+class DatosReporteMixin:
+    """Profesor con dos materias y tres estudiantes calificados en ambas."""
+
+    def setUp(self):
+        """Configuración inicial para cada test."""
+        self.admin = User.objects.create_user(
+            username='admin',
+            email='admin@test.com',
+            password='password123',
+            role='admin'
+        )
+
+        self.profesor = User.objects.create_user(
+            username='profesor',
+            first_name='Ana',
+            last_name='Gómez',
+            email='profesor@test.com',
+            password='password123',
+            role='profesor'
+        )
+
+        self.periodo = Periodo.objects.create(
+            nombre='2024-1',
+            fecha_inicio=date.today(),
+            fecha_fin=date.today() + timedelta(days=120),
+            estado='inscripciones'
+        )
+
+        self.estudiantes = [
+            User.objects.create_user(
+                username=f'estudiante{i}',
+                first_name='Estudiante',
+                last_name=str(i),
+                email=f'estudiante{i}@test.com',
+                password='password123',
+                role='estudiante'
+            )
+            for i in range(3)
+        ]
+
+        self.materias = [
+            Materia.objects.create(
+                codigo=f'MAT10{i}',
+                nombre=f'Matemáticas {i}',
+                creditos=3,
+                profesor=self.profesor
+            )
+            for i in range(2)
+        ]
+
+        for estudiante in self.estudiantes:
+            for materia in self.materias:
+                inscripcion = Inscripcion.objects.create(
+                    estudiante=estudiante,
+                    materia=materia,
+                    periodo=self.periodo
+                )
+                Calificacion.objects.create(
+                    inscripcion=inscripcion,
+                    tipo='parcial_1',
+                    nota=Decimal('4.0'),
+                    peso=50
+                )
+
+        self.media_root = tempfile.mkdtemp()
+        ajustes = override_settings(MEDIA_ROOT=self.media_root)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def _ruta(self, reporte):
+        """Ruta en disco del archivo de un reporte (almacenamiento local)."""
+        return os.path.join(self.media_root, 'reportes', reporte.ruta_archivo)
+
+
+class TestReporteServiceStreaming(DatosReporteMixin, TransactionTestCase):
+    """Tests para la generación de reportes por lotes."""
+
+    def _leer(self, reporte):
+        with open(self._ruta(reporte), encoding='utf-8') as archivo:
+            return archivo.read()
+
+    def test_en_lotes_agrupa_por_tamano(self):
+        """Test que los lotes respetan el tamaño máximo."""
+        from apps.reportes.services import _en_lotes
+
+        lotes = list(_en_lotes(range(5), tamano=2))
+
+        self.assertEqual(lotes, [[0, 1], [2, 3], [4]])
+
+    def test_reporte_profesor_incluye_detalle_de_todas_las_materias(self):
+        """Test que el detalle del profesor incluye estudiantes y calificaciones."""
+        with override_settings(MEDIA_ROOT=self.media_root):
+            reporte = ReporteService(self.admin).generar_reporte_profesor(self.profesor.id)
+
+        contenido = self._leer(reporte)
+        self.assertEqual(reporte.estado, 'completado')
+        self.assertEqual(contenido.count('Parcial 1: 4.00/5.0'), 6)
+        self.assertIn('MAT101 - Matemáticas 1,Estudiante 2', contenido)
+
+    def test_detalle_profesor_no_hace_consultas_por_materia(self):
+        """Test que el detalle usa las mismas consultas sin importar las materias."""
+        service = ReporteService(self.admin)
+
+        with CaptureQueriesContext(connection) as consultas:
+            filas = list(service._filas_detalle_profesor(self.profesor))
+
+        self.assertEqual(len(filas), 6)
+        self.assertEqual(len(consultas), 2)
+
+    def test_reporte_general_escribe_detalle_de_inscripciones(self):
+        """Test que el reporte general incluye una fila por inscripción."""
+        with override_settings(MEDIA_ROOT=self.media_root):
+            reporte = ReporteService(self.admin).generar_reporte_general(
+                periodo_id=self.periodo.id
+            )
+
+        contenido = self._leer(reporte)
+        self.assertEqual(reporte.registros_procesados, 6)
+        self.assertIn('DETALLE DE INSCRIPCIONES', contenido)
+        self.assertIn('Estudiante 0,Matemáticas 0,MAT100,Aprobada,4.00,2024-1', contenido)
+
+    def test_reporte_estudiante_calcula_resumen(self):
+        """Test que el resumen del estudiante se acumula mientras se escriben las filas."""
+        with override_settings(MEDIA_ROOT=self.media_root):
+            reporte = ReporteService(self.admin).generar_reporte_estudiante(
+                self.estudiantes[0].id
+            )
+
+        contenido = self._leer(reporte)
+        self.assertEqual(reporte.registros_procesados, 2)
+        self.assertIn('Materias aprobadas,2', contenido)
+        self.assertIn('Promedio general,4.00', contenido)
+        self.assertIn('Ana Gómez', contenido)
+
+
+class TestGeneracionAsincrona(TransactionTestCase):
+    """Tests para la generación de reportes en background."""
+
+    def setUp(self):
+        """Configuración inicial para cada test."""
+        from rest_framework.test import APIClient
+
+        self.admin = User.objects.create_user(
+            username='admin',
+            email='admin@test.com',
+            password='password123',
+            role='admin'
+        )
+        self.estudiante = User.objects.create_user(
+            username='estudiante',
+            email='estudiante@test.com',
+            password='password123',
+            role='estudiante'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+        self.media_root = tempfile.mkdtemp()
+        ajustes = override_settings(MEDIA_ROOT=self.media_root)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def test_crear_reporte_queda_pendiente_con_ruta(self):
+        """Test que el registro se crea pendiente y con su ruta definitiva."""
+        with override_settings(MEDIA_ROOT=self.media_root):
+            reporte = ReporteService(self.admin).crear_reporte_estudiante(self.estudiante.id)
+
+        self.assertTrue(reporte.es_pendiente)
+        self.assertTrue(reporte.ruta_archivo.endswith(reporte.nombre_archivo))
+        self.assertFalse(os.path.isabs(reporte.ruta_archivo))
+        self.assertFalse(existe(reporte.ruta_archivo))
+
+    def test_generar_estudiante_responde_202_y_completa(self):
+        """Test que la vista encola la tarea y el reporte termina completado."""
+        with override_settings(MEDIA_ROOT=self.media_root):
+            response = self.client.post(
+                '/api/v1/reportes/reportes/generar_estudiante/',
+                {'estudiante_id': self.estudiante.id},
+                format='json'
+            )
+
+        self.assertEqual(response.status_code, 202)
+        reporte = ReporteGenerado.objects.get(id=response.data['reporte_id'])
+        self.assertTrue(reporte.es_completado)
+        self.assertTrue(existe(reporte.ruta_archivo))
+
+        progreso = self.client.get(f'/api/v1/reportes/reportes/{reporte.id}/progreso/')
+        self.assertEqual(progreso.data['estado'], 'completado')
+
+    def test_tarea_no_reprocesa_reporte_terminado(self):
+        """Test que la tarea ignora reportes que ya no están pendientes."""
+        from apps.reportes.tasks import generar_reporte_task
+
+        with override_settings(MEDIA_ROOT=self.media_root):
+            reporte = ReporteService(self.admin).generar_reporte_estudiante(self.estudiante.id)
+            resultado = generar_reporte_task(reporte.id)
+
+        self.assertEqual(resultado['estado'], 'completado')
+        self.assertEqual(resultado['mensaje'], 'El reporte ya fue procesado')
+
+    def test_tarea_marca_error(self):
+        """Test que un fallo durante la generación queda registrado en el reporte."""
+        from apps.reportes.tasks import generar_reporte_task
+
+        with override_settings(MEDIA_ROOT=self.media_root):
+            reporte = ReporteService(self.admin).crear_reporte_estudiante(self.estudiante.id)
+            self.estudiante.delete()
+            resultado = generar_reporte_task(reporte.id)
+
+        self.assertIn('error', resultado)
+        reporte.refresh_from_db()
+        self.assertTrue(reporte.es_error)
+
+
+class TestEstadisticasProfesor(DatosReporteMixin, TransactionTestCase):
+    """Tests para la agregación por materia del profesor."""
+
+    def setUp(self):
+        super().setUp()
+        # Una inscripción sin calificaciones deja la materia en curso
+        self.pendiente = User.objects.create_user(
+            username='pendiente',
+            email='pendiente@test.com',
+            password='password123',
+            role='estudiante'
+        )
+        Inscripcion.objects.create(
+            estudiante=self.pendiente,
+            materia=self.materias[1],
+            periodo=self.periodo
+        )
+
+    def test_materias_con_estadisticas(self):
+        """Test que las anotaciones coinciden con los datos por materia."""
+        from apps.reportes.services import materias_con_estadisticas
+
+        materias = list(materias_con_estadisticas(self.profesor))
+
+        self.assertEqual([m.codigo for m in materias], ['MAT100', 'MAT101'])
+        self.assertEqual([m.num_estudiantes for m in materias], [3, 4])
+        self.assertEqual([m.aprobados for m in materias], [3, 3])
+        self.assertEqual([m.tiene_pendientes for m in materias], [False, True])
+        self.assertEqual(materias[0].promedio_calificaciones, Decimal('4.0'))
+
+    def test_consultas_no_dependen_del_numero_de_materias(self):
+        """Test que las estadísticas se obtienen en una sola consulta."""
+        from apps.reportes.services import materias_con_estadisticas
+
+        for i in range(2, 6):
+            Materia.objects.create(
+                codigo=f'MAT10{i}',
+                nombre=f'Matemáticas {i}',
+                creditos=3,
+                profesor=self.profesor
+            )
+
+        with CaptureQueriesContext(connection) as consultas:
+            materias = list(materias_con_estadisticas(self.profesor, self.periodo.id))
+
+        self.assertEqual(len(materias), 6)
+        self.assertEqual(len(consultas), 1)
+
+    def test_csv_profesor_legado_en_una_consulta(self):
+        """Test que el escritor CSV de profesor usa la agregación y el almacenamiento."""
+        from apps.reportes.almacenamiento import abrir_origen
+
+        service = ReporteService(self.admin)
+        with CaptureQueriesContext(connection) as consultas:
+            service._escribir_csv_profesor('legado/profesor.csv', self.profesor)
+
+        self.assertEqual(len(consultas), 1)
+        with abrir_origen('legado/profesor.csv', service.almacenamiento) as archivo:
+            contenido = archivo.read().decode('utf-8')
+        self.assertIn('MAT100,Matemáticas 0,3,3,4.00,Todos', contenido)
+        self.assertIn('MAT101,Matemáticas 1,3,4,4.00,Todos', contenido)
+
+    def test_reporte_profesor_api_usa_agregacion(self):
+        """Test que el CSV del endpoint refleja el estado de cada materia."""
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.force_authenticate(user=self.admin)
+        response = client.get(f'/api/v1/reportes/profesor/{self.profesor.id}/')
+
+        contenido = b''.join(response.streaming_content).decode('utf-8')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Ana Gómez,Matemáticas 0,MAT100,3,3,4.00,Finalizada', contenido)
+        self.assertIn('Ana Gómez,Matemáticas 1,MAT101,3,4,4.00,En Curso', contenido)
+
+
+class TestCacheReportes(DatosReporteMixin, TransactionTestCase):
+    """Tests para la reutilización de reportes con la misma huella."""
+
+    def _generar_periodo(self):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            return ReporteService(self.admin).generar_reporte_por_periodo(self.periodo.id)
+
+    def test_reutiliza_archivo_si_los_datos_no_cambian(self):
+        """Test que una solicitud idéntica reutiliza el archivo existente."""
+        primero = self._generar_periodo()
+        segundo = self._generar_periodo()
+
+        self.assertNotEqual(primero.id, segundo.id)
+        self.assertEqual(primero.huella, segundo.huella)
+        self.assertEqual(segundo.ruta_archivo, primero.ruta_archivo)
+        self.assertEqual(segundo.registros_procesados, 6)
+
+    def test_regenera_si_cambia_una_calificacion(self):
+        """Test que un cambio en los datos invalida la huella."""
+        primero = self._generar_periodo()
+
+        calificacion = Calificacion.objects.first()
+        calificacion.nota = Decimal('2.0')
+        calificacion.save()
+
+        segundo = self._generar_periodo()
+        self.assertNotEqual(primero.huella, segundo.huella)
+        self.assertNotEqual(segundo.ruta_archivo, primero.ruta_archivo)
+
+    def test_regenera_si_cambia_un_nombre(self):
+        """Test que renombrar una materia, un período o un usuario invalida la huella."""
+        huellas = {self._generar_periodo().huella}
+
+        for objeto, campo, valor in (
+            (self.materias[0], 'nombre', 'Álgebra Lineal'),
+            (self.periodo, 'nombre', '2024-A'),
+            (self.estudiantes[0], 'first_name', 'Laura'),
+        ):
+            setattr(objeto, campo, valor)
+            objeto.save()
+            huellas.add(self._generar_periodo().huella)
+
+        self.assertEqual(len(huellas), 4)
+
+    def test_reutiliza_entre_solicitantes(self):
+        """Test que dos solicitantes distintos comparten una sola generación."""
+        with patch.object(ReporteService, '_generar_periodo', autospec=True,
+                          side_effect=ReporteService._generar_periodo) as generar:
+            primero = self._generar_periodo()
+            with override_settings(MEDIA_ROOT=self.media_root):
+                segundo = ReporteService(self.profesor).generar_reporte_por_periodo(self.periodo.id)
+
+        self.assertEqual(generar.call_count, 1)
+        self.assertNotEqual(primero.parametros['generado_por'], segundo.parametros['generado_por'])
+        self.assertEqual(segundo.huella, primero.huella)
+        self.assertEqual(segundo.ruta_archivo, primero.ruta_archivo)
+
+    def test_general_regenera_si_cambian_los_totales(self):
+        """Test que un estudiante, profesor o materia sin inscripciones invalida el reporte general."""
+        def generar_general():
+            with override_settings(MEDIA_ROOT=self.media_root):
+                return ReporteService(self.admin).generar_reporte_general()
+
+        huellas = {generar_general().huella}
+
+        nuevo_profesor = User.objects.create_user(
+            username='sin_materias', email='sin_materias@test.com',
+            password='password123', role='profesor'
+        )
+        huellas.add(generar_general().huella)
+        User.objects.create_user(
+            username='sin_inscripciones', email='sin_inscripciones@test.com',
+            password='password123', role='estudiante'
+        )
+        huellas.add(generar_general().huella)
+        Materia.objects.create(
+            codigo='MAT900', nombre='Sin inscripciones', creditos=3, profesor=nuevo_profesor
+        )
+        huellas.add(generar_general().huella)
+
+        self.assertEqual(len(huellas), 4)
+
+    def test_limpieza_conserva_archivos_compartidos(self):
+        """Test que limpiar un reporte viejo no borra el archivo de uno vigente."""
+        primero = self._generar_periodo()
+        segundo = self._generar_periodo()
+        ReporteGenerado.objects.filter(id=primero.id).update(
+            created_at=primero.created_at - timedelta(days=40)
+        )
+
+        eliminados = ReporteGenerado.limpiar_reportes_antiguos(dias=30)
+
+        self.assertEqual(eliminados, 1)
+        self.assertTrue(os.path.exists(self._ruta(segundo)))
+
+
+class TestReporteGeneralFragmentado(DatosReporteMixin, TransactionTestCase):
+    """Tests para la generación del reporte general por fragmentos."""
+
+    def _contenido(self, fragmentos):
+        from apps.reportes.tasks import generar_reporte_task
+
+        with override_settings(MEDIA_ROOT=self.media_root):
+            reporte = ReporteService(self.admin).crear_reporte_general(
+                periodo_id=self.periodo.id, fragmentos=fragmentos
+            )
+            generar_reporte_task(reporte.id)
+
+        reporte.refresh_from_db()
+        with open(self._ruta(reporte), encoding='utf-8') as archivo:
+            # La fecha de generación del pie cambia entre ejecuciones
+            return reporte, archivo.read().splitlines()[:-1]
+
+    def test_rangos_cubren_todas_las_inscripciones(self):
+        """Test que los rangos son contiguos y cubren todos los ids."""
+        ids = list(Inscripcion.objects.order_by('id').values_list('id', flat=True))
+
+        rangos = ReporteService(self.admin).rangos_inscripciones(fragmentos=4)
+
+        self.assertEqual(rangos[0][0], ids[0])
+        self.assertEqual(rangos[-1][1], ids[-1])
+        for (_, hasta), (desde, _) in zip(rangos, rangos[1:]):
+            self.assertEqual(desde, hasta + 1)
+
+    def test_fragmentado_produce_el_mismo_archivo(self):
+        """Test que el chord arma el mismo CSV que la generación secuencial."""
+        secuencial, lineas_secuencial = self._contenido(fragmentos=1)
+        Calificacion.objects.first().save()  # Nueva versión de datos: evita la cache
+        fragmentado, lineas_fragmentado = self._contenido(fragmentos=3)
+
+        self.assertTrue(fragmentado.es_completado)
+        self.assertEqual(fragmentado.registros_procesados, 6)
+        self.assertEqual(lineas_fragmentado, lineas_secuencial)
+        # Métricas de los fragmentos más la unión
+        self.assertEqual(fragmentado.metricas['workers'], 4)
+        self.assertEqual(fragmentado.metricas['registros'], 6)
+        self.assertEqual(
+            [n for n in os.listdir(os.path.dirname(self._ruta(fragmentado))) if '.parte' in n],
+            []
+        )
+
+
+class TestReportesComprimidos(DatosReporteMixin, TransactionTestCase):
+    """Tests para el almacenamiento comprimido y su descarga."""
+
+    def setUp(self):
+        super().setUp()
+        from rest_framework.test import APIClient
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def _generar(self):
+        with override_settings(MEDIA_ROOT=self.media_root, REPORTES_COMPRESION='gzip'):
+            return ReporteService(self.admin).generar_reporte_por_periodo(self.periodo.id)
+
+    def _url(self, reporte):
+        return f'/api/v1/reportes/reportes/{reporte.id}/descargar/'
+
+    def test_archivo_se_guarda_comprimido(self):
+        """Test que el archivo en disco es gzip y conserva el nombre de descarga."""
+        import gzip
+
+        reporte = self._generar()
+
+        self.assertEqual(reporte.compresion, 'gzip')
+        self.assertTrue(reporte.ruta_archivo.endswith('.csv.gz'))
+        self.assertTrue(reporte.nombre_archivo.endswith('.csv'))
+        with gzip.open(self._ruta(reporte), 'rt', encoding='utf-8') as archivo:
+            self.assertIn('MAT100', archivo.read())
+
+    def test_descarga_envia_bytes_comprimidos(self):
+        """Test que un cliente que acepta gzip recibe el archivo tal cual."""
+        reporte = self._generar()
+
+        response = self.client.get(self._url(reporte), HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        with open(self._ruta(reporte), 'rb') as archivo:
+            self.assertEqual(b''.join(response.streaming_content), archivo.read())
+
+    def test_descarga_descomprime_si_el_cliente_no_acepta_gzip(self):
+        """Test que sin Accept-Encoding el CSV se descomprime al vuelo."""
+        reporte = self._generar()
+
+        response = self.client.get(self._url(reporte), HTTP_ACCEPT_ENCODING='gzip;q=0')
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        contenido = b''.join(response.streaming_content).decode('utf-8')
+        self.assertIn('Estudiante 0,Matemáticas 0,MAT100,Aprobada,4.00', contenido)
+
+    def test_zstd_sin_libreria_usa_gzip(self):
+        """Test que pedir zstd sin la librería instalada cae en gzip."""
+        from apps.reportes import compresion
+
+        with override_settings(REPORTES_COMPRESION='zstd'), \
+                patch.object(compresion, 'zstandard', None):
+            self.assertEqual(compresion.compresion_configurada(), 'gzip')
+
+
+class TestDescargaCondicional(DatosReporteMixin, TransactionTestCase):
+    """Tests para ETag, Last-Modified y rangos en la descarga."""
+
+    def setUp(self):
+        super().setUp()
+        from rest_framework.test import APIClient
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+        with override_settings(MEDIA_ROOT=self.media_root):
+            self.reporte = ReporteService(self.admin).generar_reporte_por_periodo(self.periodo.id)
+        self.url = f'/api/v1/reportes/reportes/{self.reporte.id}/descargar/'
+        with open(self._ruta(self.reporte), 'rb') as archivo:
+            self.contenido = archivo.read()
+
+    def test_descarga_incluye_validadores(self):
+        """Test que la descarga envía ETag fuerte y Last-Modified."""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], f'"{self.reporte.checksum}"')
+        self.assertIn('Last-Modified', response)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_if_none_match_responde_304(self):
+        """Test que un ETag vigente evita reenviar el archivo."""
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_range_devuelve_contenido_parcial(self):
+        """Test que un rango de bytes responde 206 con esa porción."""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.contenido)}')
+        self.assertEqual(b''.join(response.streaming_content), self.contenido[10:20])
+
+    def test_range_sufijo_y_fuera_de_rango(self):
+        """Test de rangos por sufijo y rangos imposibles."""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-5')
+        self.assertEqual(b''.join(response.streaming_content), self.contenido[-5:])
+
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.contenido)}-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_if_range_desactualizado_envia_archivo_completo(self):
+        """Test que If-Range con otro ETag ignora el rango."""
+        response = self.client.get(
+            self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"otra-version"'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.contenido)
+
+
+class TestEstadisticasReportes(TransactionTestCase):
+    """Tests para las estadísticas agregadas de reportes."""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.admin = User.objects.create_user(
+            username='admin',
+            email='admin@test.com',
+            password='password123',
+            role='admin'
+        )
+        ahora = timezone.now()
+        for tipo, estado, segundos in [
+            ('general', 'completado', 10),
+            ('general', 'completado', 30),
+            ('periodo', 'error', None),
+            ('materia', 'pendiente', None),
+        ]:
+            reporte = ReporteGenerado.objects.create(
+                solicitante=self.admin,
+                tipo=tipo,
+                nombre_archivo=f'{tipo}.csv',
+                ruta_archivo=f'/tmp/{tipo}.csv',
+                estado=estado
+            )
+            if segundos:
+                ReporteGenerado.objects.filter(id=reporte.id).update(
+                    created_at=ahora - timedelta(seconds=segundos),
+                    completado_at=ahora
+                )
+
+    def test_calcula_todo_en_una_consulta(self):
+        """Test que conteos y promedio salen de un solo aggregate."""
+        from apps.reportes.estadisticas import calcular_estadisticas
+
+        with CaptureQueriesContext(connection) as consultas:
+            stats = calcular_estadisticas(ReporteGenerado.objects.all())
+
+        self.assertEqual(len(consultas), 1)
+        self.assertEqual(stats['total_reportes'], 4)
+        self.assertEqual(stats['reportes_completados'], 2)
+        self.assertEqual(stats['reportes_error'], 1)
+        self.assertEqual(stats['promedio_tiempo_generacion'], 20.0)
+        self.assertEqual(stats['reportes_por_tipo'], {'general': 2, 'periodo': 1, 'materia': 1})
+
+    def test_cache_se_invalida_al_cambiar_estado(self):
+        """Test que la cache se reutiliza hasta que un reporte cambia de estado."""
+        from apps.reportes.estadisticas import obtener_estadisticas
+
+        obtener_estadisticas(ReporteGenerado.objects.all(), 'todos')
+        with CaptureQueriesContext(connection) as consultas:
+            obtener_estadisticas(ReporteGenerado.objects.all(), 'todos')
+        self.assertEqual(len(consultas), 0)
+
+        ReporteGenerado.objects.get(estado='pendiente').marcar_error('falló')
+
+        stats = obtener_estadisticas(ReporteGenerado.objects.all(), 'todos')
+        self.assertEqual(stats['reportes_error'], 2)
+        self.assertEqual(stats['reportes_pendientes'], 0)
+
+
+class TestLimpiezaPorLotes(TransactionTestCase):
+    """Tests para la limpieza por lotes de reportes antiguos."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin',
+            email='admin@test.com',
+            password='password123',
+            role='admin'
+        )
+        self.directorio = os.path.join(tempfile.mkdtemp(), 'reportes')
+        os.makedirs(self.directorio)
+        ajustes = override_settings(MEDIA_ROOT=os.path.dirname(self.directorio))
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+        self.antiguos = []
+        for i in range(5):
+            ruta = f'reporte_{i}.csv'
+            with open(os.path.join(self.directorio, ruta), 'w') as archivo:
+                archivo.write('datos')
+            self.antiguos.append(ReporteGenerado.objects.create(
+                solicitante=self.admin,
+                tipo='general',
+                nombre_archivo=f'reporte_{i}.csv',
+                ruta_archivo=ruta,
+                estado='completado'
+            ))
+        ReporteGenerado.objects.update(created_at=timezone.now() - timedelta(days=40))
+
+        # Reporte reciente que reutiliza (cache) el archivo del primero
+        self.vigente = ReporteGenerado.objects.create(
+            solicitante=self.admin,
+            tipo='general',
+            nombre_archivo='reporte_0.csv',
+            ruta_archivo=self.antiguos[0].ruta_archivo,
+            estado='completado'
+        )
+
+    def test_elimina_por_lotes_con_metricas(self):
+        """Test que la limpieza procesa todos los lotes y reporta métricas."""
+        from apps.reportes.limpieza import limpiar_reportes
+
+        metricas = limpiar_reportes(30, tamano_lote=2, hilos=2)
+
+        self.assertEqual(metricas['reportes_procesados'], 5)
+        self.assertEqual(metricas['lotes'], 3)
+        self.assertEqual(metricas['archivos_eliminados'], 4)
+        self.assertEqual(metricas['archivos_conservados'], 1)
+        self.assertIn('reportes_por_segundo', metricas)
+        self.assertEqual(list(ReporteGenerado.objects.values_list('id', flat=True)), [self.vigente.id])
+        self.assertTrue(os.path.exists(os.path.join(self.directorio, self.vigente.ruta_archivo)))
+
+    def test_borra_un_delete_por_lote(self):
+        """Test que cada lote se borra con un DELETE, sin cargar instancias ni señales por fila."""
+        from django.db.models.signals import post_delete
+        from apps.reportes.limpieza import limpiar_reportes
+
+        eliminados = []
+
+        def contar(sender, instance, **kwargs):
+            eliminados.append(instance.pk)
+
+        post_delete.connect(contar, sender=ReporteGenerado)
+        self.addCleanup(post_delete.disconnect, contar, sender=ReporteGenerado)
+
+        with CaptureQueriesContext(connection) as consultas:
+            limpiar_reportes(30, tamano_lote=2, hilos=2)
+
+        borrados = [c['sql'] for c in consultas if c['sql'].startswith('DELETE FROM "reportes_generados"')]
+        instancias = [
+            c['sql'] for c in consultas
+            if c['sql'].startswith('SELECT') and '"nombre_archivo"' in c['sql']
+        ]
+        self.assertEqual(len(borrados), 3)
+        self.assertEqual(instancias, [])
+        self.assertEqual(eliminados, [])
+        self.assertEqual(ReporteGenerado.objects.count(), 1)
+
+    def test_expirar_conserva_las_filas(self):
+        """Test que con expirar=True las filas quedan en estado expirado."""
+        from apps.reportes.limpieza import limpiar_reportes
+
+        limpiar_reportes(30, expirar=True)
+
+        self.assertEqual(ReporteGenerado.objects.filter(estado='expirado').count(), 5)
+        self.assertFalse(os.path.exists(os.path.join(self.directorio, self.antiguos[1].ruta_archivo)))
+
+        # Una segunda pasada no vuelve a procesar los expirados
+        self.assertEqual(limpiar_reportes(30, expirar=True)['reportes_procesados'], 0)
+
+    def test_endpoint_encola_la_limpieza(self):
+        """Test que limpiar_antiguos responde 202 y ejecuta la tarea."""
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.force_authenticate(user=self.admin)
+        response = client.post('/api/v1/reportes/reportes/limpiar_antiguos/', {'dias': 30}, format='json')
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(ReporteGenerado.objects.count(), 1)
+
+    def test_endpoint_rechaza_dias_invalidos(self):
+        """Test que limpiar_antiguos responde 400 si dias no es un entero positivo."""
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.force_authenticate(user=self.admin)
+        for dias in ('abc', 0, -5):
+            response = client.post('/api/v1/reportes/reportes/limpiar_antiguos/', {'dias': dias}, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('dias', response.data)
+
+        self.assertEqual(ReporteGenerado.objects.count(), 6)
+
+
+class TestExportacionParquet(DatosReporteMixin, TransactionTestCase):
+    """Tests para la exportación columnar en Parquet."""
+
+    def setUp(self):
+        super().setUp()
+        from rest_framework.test import APIClient
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def test_parquet_con_columnas_tipadas_por_row_group(self):
+        """Test que el Parquet conserva tipos y escribe un row group por lote."""
+        pq = pytest.importorskip('pyarrow.parquet')
+        import pyarrow as pa
+
+        with override_settings(MEDIA_ROOT=self.media_root, REPORTES_COMPRESION='gzip'), \
+                patch('apps.reportes.services.CHUNK_SIZE', 4):
+            reporte = ReporteService(self.admin).generar_reporte_por_periodo(
+                self.periodo.id, formato='parquet'
+            )
+
+        self.assertEqual(reporte.estado, 'completado')
+        self.assertEqual(reporte.registros_procesados, 6)
+        self.assertEqual(reporte.compresion, 'ninguna')
+        self.assertTrue(reporte.ruta_archivo.endswith('.parquet'))
+
+        archivo = pq.ParquetFile(self._ruta(reporte))
+        self.assertEqual(archivo.metadata.num_row_groups, 2)
+        tabla = archivo.read()
+        self.assertEqual(tabla.schema.field('nota_final').type, pa.decimal128(4, 2))
+        self.assertEqual(tabla.schema.field('periodo_inicio').type, pa.date32())
+        self.assertEqual(tabla.column('estudiante')[0].as_py(), 'Estudiante 0')
+        self.assertEqual(tabla.column('nota_final')[0].as_py(), Decimal('4.00'))
+        self.assertEqual(tabla.column('estado')[0].as_py(), 'aprobada')
+
+    def test_parquet_y_csv_no_comparten_cache(self):
+        """Test que el formato forma parte de la huella del reporte."""
+        pytest.importorskip('pyarrow')
+
+        with override_settings(MEDIA_ROOT=self.media_root):
+            service = ReporteService(self.admin)
+            csv = service.generar_reporte_por_materia(self.materias[0].id)
+            parquet = service.generar_reporte_por_materia(self.materias[0].id, formato='parquet')
+
+        self.assertNotEqual(csv.huella, parquet.huella)
+        self.assertNotEqual(csv.ruta_archivo, parquet.ruta_archivo)
+        self.assertEqual(parquet.registros_procesados, 3)
+
+    def test_tipo_sin_formato_columnar(self):
+        """Test que los reportes de estudiante solo se exportan en CSV."""
+        with override_settings(MEDIA_ROOT=self.media_root):
+            with self.assertRaises(ValueError):
+                ReporteService(self.admin)._crear_reporte(
+                    'estudiante', 'reporte.csv', {}, formato='parquet'
+                )
+
+    def test_endpoint_rechaza_parquet_sin_pyarrow(self):
+        """Test que sin pyarrow la solicitud de Parquet responde 400."""
+        with patch('apps.reportes.serializers.columnar_disponible', return_value=False):
+            response = self.client.post(
+                '/api/v1/reportes/reportes/generar_periodo/',
+                {'periodo_id': self.periodo.id, 'formato': 'parquet'},
+                format='json'
+            )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('formato', response.data)
+        self.assertFalse(ReporteGenerado.objects.exists())
+
+    def test_profesor_descarga_parquet_de_su_materia(self):
+        """Test que el profesor genera el Parquet de su materia y lo descarga."""
+        pytest.importorskip('pyarrow')
+        self.client.force_authenticate(user=self.profesor)
+
+        with override_settings(MEDIA_ROOT=self.media_root):
+            response = self.client.post(
+                '/api/v1/reportes/reportes/generar_materia/',
+                {'materia_id': self.materias[1].id, 'formato': 'parquet'},
+                format='json'
+            )
+        self.assertEqual(response.status_code, 202)
+
+        descarga = self.client.get(
+            f"/api/v1/reportes/reportes/{response.data['reporte_id']}/descargar/"
+        )
+        self.assertEqual(descarga.status_code, 200)
+        self.assertEqual(descarga['Content-Type'], 'application/vnd.apache.parquet')
+        self.assertEqual(b''.join(descarga.streaming_content)[:4], b'PAR1')
+
+
+class TestReportesDirectosStreaming(DatosReporteMixin, TransactionTestCase):
+    """Tests para los CSV directos enviados en streaming."""
+
+    def setUp(self):
+        super().setUp()
+        from rest_framework.test import APIClient
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def test_reporte_estudiante_en_streaming(self):
+        """Test que el CSV del estudiante se envía por partes con su primera nota."""
+        estudiante = self.estudiantes[0]
+        inscripcion = Inscripcion.objects.get(estudiante=estudiante, materia=self.materias[0])
+        Calificacion.objects.create(
+            inscripcion=inscripcion,
+            tipo='parcial_2',
+            nota=Decimal('2.0'),
+            peso=Decimal('50')
+        )
+
+        response = self.client.get(f'/api/v1/reportes/estudiante/{estudiante.id}/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lineas = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(lineas[0], 'Nombre,Materia,Código,Créditos,Calificación,Estado,Promedio General')
+        # Promedio de las tres notas (4.0, 2.0, 4.0); la nota mostrada es la de parcial_1
+        self.assertIn('Estudiante 0,Matemáticas 0,MAT100,3,4.00,Aprobada,3.33', lineas)
+        self.assertEqual(len(lineas), 3)
+
+    def test_reporte_estudiante_no_depende_de_la_cantidad_de_materias(self):
+        """Test que las consultas del CSV no crecen con las inscripciones."""
+        estudiante = self.estudiantes[1]
+
+        def consultas_del_reporte():
+            with CaptureQueriesContext(connection) as consultas:
+                response = self.client.get(f'/api/v1/reportes/estudiante/{estudiante.id}/')
+                b''.join(response.streaming_content)
+            return len(consultas)
+
+        antes = consultas_del_reporte()
+        for i in range(3):
+            materia = Materia.objects.create(
+                codigo=f'FIS10{i}', nombre=f'Física {i}', creditos=2, profesor=self.profesor
+            )
+            Inscripcion.objects.create(estudiante=estudiante, materia=materia, periodo=self.periodo)
+
+        self.assertEqual(consultas_del_reporte(), antes)
+
+
+class TestReporteLoteEstudiantes(DatosReporteMixin, TransactionTestCase):
+    """Tests para el reporte de un lote de estudiantes."""
+
+    def setUp(self):
+        super().setUp()
+        self.ids = [estudiante.id for estudiante in self.estudiantes]
+
+    def test_materias_del_lote_en_dos_consultas(self):
+        """Test que usuarios e inscripciones del lote se traen en consultas masivas."""
+        service = ReporteService(self.admin)
+
+        with CaptureQueriesContext(connection) as consultas:
+            transcripciones = list(service._materias_por_estudiante(self.ids))
+
+        self.assertEqual(len(consultas), 2)
+        self.assertEqual([estudiante.id for estudiante, _ in transcripciones], self.ids)
+        self.assertTrue(all(len(materias) == 2 for _, materias in transcripciones))
+
+    def test_csv_combinado(self):
+        """Test que el CSV combinado lista el detalle y un resumen por estudiante."""
+        with override_settings(MEDIA_ROOT=self.media_root):
+            reporte = ReporteService(self.admin).generar_reporte_lote(estudiante_ids=self.ids)
+
+        self.assertEqual(reporte.tipo, 'lote')
+        self.assertEqual(reporte.registros_procesados, 6)
+        with open(self._ruta(reporte), encoding='utf-8') as archivo:
+            contenido = archivo.read()
+        self.assertIn(f'{self.ids[0]},Estudiante 0,Matemáticas 0,MAT100,3,2024-1,Ana Gómez,4.0,Aprobada,4.0', contenido)
+        self.assertIn(f'{self.ids[2]},Estudiante 2,2,2,0,4.00', contenido)
+
+    def test_zip_con_un_csv_por_estudiante(self):
+        """Test que el zip contiene el reporte académico de cada estudiante."""
+        import zipfile
+
+        with override_settings(MEDIA_ROOT=self.media_root, REPORTES_COMPRESION='gzip'):
+            reporte = ReporteService(self.admin).generar_reporte_lote(
+                periodo_id=self.periodo.id, formato='zip'
+            )
+
+        self.assertEqual(reporte.compresion, 'ninguna')
+        self.assertTrue(reporte.nombre_archivo.endswith('.zip'))
+        with zipfile.ZipFile(self._ruta(reporte)) as archivo_zip:
+            self.assertEqual(
+                sorted(archivo_zip.namelist()),
+                [f'reporte_estudiante_estudiante{i}.csv' for i in range(3)]
+            )
+            contenido = archivo_zip.read('reporte_estudiante_estudiante1.csv').decode('utf-8')
+        self.assertIn('REPORTE ACADÉMICO - Estudiante 1', contenido)
+        self.assertIn('Promedio general,4.00', contenido)
+
+    def test_filtro_sin_estudiantes(self):
+        """Test que un filtro sin estudiantes no registra el reporte."""
+        otra_materia = Materia.objects.create(
+            codigo='FIS100', nombre='Física', creditos=2, profesor=self.profesor
+        )
+
+        with self.assertRaises(ValueError):
+            ReporteService(self.admin).crear_reporte_lote(materia_id=otra_materia.id)
+        self.assertFalse(ReporteGenerado.objects.exists())
+
+    def test_endpoint_encola_un_solo_trabajo(self):
+        """Test que el endpoint genera el lote con una sola tarea."""
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.force_authenticate(user=self.profesor)
+
+        with override_settings(MEDIA_ROOT=self.media_root), \
+                patch('apps.reportes.tasks.generar_reporte_task.apply_async') as apply_async:
+            response = client.post(
+                '/api/v1/reportes/reportes/generar_lote/',
+                {'materia_id': self.materias[0].id},
+                format='json'
+            )
+            sin_criterios = client.post('/api/v1/reportes/reportes/generar_lote/', {}, format='json')
+
+        self.assertEqual(response.status_code, 202)
+        apply_async.assert_called_once_with((response.data['reporte_id'],), queue='reportes_pesados')
+        reporte = ReporteGenerado.objects.get(id=response.data['reporte_id'])
+        self.assertEqual(reporte.parametros['estudiante_ids'], self.ids)
+        self.assertEqual(sin_criterios.status_code, 400)
+
+
+class TestInstrumentacionReportes(DatosReporteMixin, TransactionTestCase):
+    """Tests para las métricas guardadas de cada generación."""
+
+    def setUp(self):
+        super().setUp()
+        from django.core.cache import cache
+        from rest_framework.test import APIClient
+
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+        with override_settings(MEDIA_ROOT=self.media_root):
+            self.reporte = ReporteService(self.admin).generar_reporte_por_periodo(self.periodo.id)
+
+    def test_generacion_guarda_metricas(self):
+        """Test que se guardan fases, consultas y filas por segundo."""
+        metricas = ReporteGenerado.objects.get(id=self.reporte.id).metricas
+
+        self.assertEqual(set(metricas['fases']), {'consulta', 'serializacion', 'escritura', 'fsync'})
+        self.assertEqual(metricas['registros'], 6)
+        self.assertGreater(metricas['consultas'], 0)
+        self.assertGreater(metricas['filas_por_segundo'], 0)
+        self.assertLessEqual(
+            sum(metricas['fases'].values()), metricas['duracion_segundos'] + 0.001
+        )
+
+    def test_escritura_medida_por_lote(self):
+        """Test que las filas se escriben y cronometran por lote de CHUNK_SIZE."""
+        from apps.reportes.instrumentacion import MedidorGeneracion
+
+        service = ReporteService(self.admin)
+        service.medidor = MedidorGeneracion()
+        writer = Mock()
+        reporte = Mock()
+
+        with patch('apps.reportes.services.CHUNK_SIZE', 4):
+            registros = service._escribir_filas(writer, ([i] for i in range(10)), reporte)
+
+        self.assertEqual(registros, 10)
+        self.assertEqual([len(c.args[0]) for c in writer.writerows.call_args_list], [4, 4, 2])
+        self.assertEqual([c.args[0] for c in reporte.actualizar_progreso.call_args_list], [4, 8])
+        self.assertGreaterEqual(service.medidor.fases['escritura'], 0)
+
+    def test_memoria_es_el_incremento_de_la_generacion(self):
+        """Test que se guarda cuánto subió el pico del proceso, no el pico acumulado."""
+        from apps.reportes import instrumentacion
+
+        medidor = instrumentacion.MedidorGeneracion()
+        with patch.object(instrumentacion, 'rss_pico_kb', side_effect=[90000, 90500]):
+            with medidor.medir():
+                pass
+            metricas = medidor.resultado(0)
+
+        self.assertEqual(metricas['rss_incremento_kb'], 500)
+        self.assertNotIn('rss_pico_kb', metricas)
+
+    def test_metricas_en_detalle_y_estadisticas(self):
+        """Test que el detalle y las estadísticas exponen las métricas."""
+        detalle = self.client.get(f'/api/v1/reportes/reportes/{self.reporte.id}/')
+        estadisticas = self.client.get('/api/v1/reportes/reportes/estadisticas/')
+
+        self.assertEqual(detalle.data['metricas']['registros'], 6)
+        rendimiento = estadisticas.data['rendimiento_por_tipo']
+        self.assertEqual(list(rendimiento), ['periodo'])
+        self.assertEqual(rendimiento['periodo']['reportes_medidos'], 1)
+        self.assertEqual(
+            rendimiento['periodo']['consultas_promedio'], self.reporte.metricas['consultas']
+        )
+
+
+class TestResumenesInscripciones(DatosReporteMixin, TransactionTestCase):
+    """Tests para las tablas resumen de inscripciones."""
+
+    def _resumen(self):
+        from apps.reportes.models import ResumenInscripciones
+
+        return {
+            (r.periodo_id, r.materia_id, r.estado): (r.total, r.con_nota, r.suma_notas)
+            for r in ResumenInscripciones.objects.all()
+        }
+
+    def _esperado(self):
+        from django.db.models import Count, Sum
+
+        filas = Inscripcion.objects.values('periodo_id', 'materia_id', 'estado').annotate(
+            total=Count('id'), con_nota=Count('nota_final'), suma=Sum('nota_final')
+        ).order_by()
+        return {
+            (f['periodo_id'], f['materia_id'], f['estado']): (f['total'], f['con_nota'], f['suma'] or 0)
+            for f in filas
+        }
+
+    def test_resumen_se_mantiene_al_guardar_y_eliminar(self):
+        """Test que altas, cambios, traslados y bajas actualizan los resúmenes."""
+        self.assertEqual(self._resumen(), self._esperado())
+
+        inscripcion = Inscripcion.objects.filter(materia=self.materias[0]).first()
+        inscripcion.estado = 'retirada'
+        inscripcion.save()
+        self.assertEqual(self._resumen(), self._esperado())
+
+        inscripcion.materia = Materia.objects.create(
+            codigo='FIS100', nombre='Física', creditos=2, profesor=self.profesor
+        )
+        inscripcion.save()
+        self.assertEqual(self._resumen(), self._esperado())
+
+        inscripcion.delete()
+        self.assertEqual(self._resumen(), self._esperado())
+
+    def test_un_recalculo_por_transaccion(self):
+        """Test que varios cambios del mismo grupo se recalculan una vez al confirmar."""
+        from django.db import transaction
+        from apps.reportes import resumenes
+
+        with patch.object(resumenes, 'recalcular_grupos', wraps=resumenes.recalcular_grupos) as recalcular:
+            with transaction.atomic():
+                for inscripcion in Inscripcion.objects.filter(materia=self.materias[0]):
+                    inscripcion.estado = 'reprobada'
+                    inscripcion.save()
+                self.assertEqual(recalcular.call_count, 0)
+
+        recalcular.assert_called_once_with({(self.periodo.id, self.materias[0].id)})
+        self.assertEqual(self._resumen(), self._esperado())
+
+    def test_tarea_delta_cubre_update(self):
+        """Test que la tarea periódica recoge los cambios hechos con update()."""
+        from django.core.cache import cache
+        from apps.reportes.tasks import actualizar_resumenes_task
+
+        cache.clear()
+        self.assertTrue(actualizar_resumenes_task()['reconstruccion_completa'])
+
+        Inscripcion.objects.filter(materia=self.materias[1]).update(
+            estado='cancelada', updated_at=timezone.now()
+        )
+        self.assertNotEqual(self._resumen(), self._esperado())
+
+        resultado = actualizar_resumenes_task()
+        self.assertFalse(resultado['reconstruccion_completa'])
+        self.assertEqual(resultado['grupos_recalculados'], 1)
+        self.assertEqual(self._resumen(), self._esperado())
+
+    def test_reporte_general_y_endpoint_leen_resumenes(self):
+        """Test que los totales salen de las filas resumen."""
+        from rest_framework.test import APIClient
+        from apps.reportes.resumenes import totales_inscripciones
+
+        totales = totales_inscripciones(self.periodo.id)
+        self.assertEqual(totales['total'], Inscripcion.objects.count())
+        self.assertEqual(totales['aprobados'], Inscripcion.objects.filter(estado='aprobada').count())
+
+        client = APIClient()
+        client.force_authenticate(user=self.admin)
+        response = client.get('/api/v1/reportes/reportes/resumen_inscripciones/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_inscripciones'], totales['total'])
+        self.assertEqual(
+            [m['materia_codigo'] for m in response.data['materias']], ['MAT100', 'MAT101']
+        )
+
+
+class TestAlmacenamientoReportes(DatosReporteMixin, TransactionTestCase):
+    """Tests para los backends de almacenamiento de los archivos de reportes."""
+
+    def setUp(self):
+        super().setUp()
+        from rest_framework.test import APIClient
+        from apps.reportes.almacenamiento import AlmacenamientoObjetosMemoria
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+        # Partes chicas para que un reporte de prueba ocupe varias
+        ajustes = override_settings(
+            REPORTES_ALMACENAMIENTO='memoria',
+            REPORTES_ALMACENAMIENTO_OPCIONES={'tamano_parte': 128, 'tamano_parte_minimo': 128}
+        )
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.addCleanup(AlmacenamientoObjetosMemoria.vaciar)
+
+    def _leer(self, reporte):
+        from apps.reportes.almacenamiento import almacenamiento_reportes
+
+        with almacenamiento_reportes().open(reporte.ruta_archivo) as archivo:
+            return archivo.read()
+
+    def test_memoria_sube_el_reporte_por_partes(self):
+        """Test que el reporte se sube en partes y no toca el disco local."""
+        import hashlib
+        from apps.reportes.almacenamiento import AlmacenamientoObjetosMemoria
+
+        subir_parte = AlmacenamientoObjetosMemoria.subir_parte
+        with patch.object(AlmacenamientoObjetosMemoria, 'subir_parte', autospec=True,
+                          side_effect=subir_parte) as partes:
+            reporte = ReporteService(self.admin).generar_reporte_por_periodo(self.periodo.id)
+
+        contenido = self._leer(reporte)
+        self.assertTrue(reporte.es_completado)
+        self.assertGreater(partes.call_count, 1)
+        self.assertIn('Estudiante 0,Matemáticas 0,MAT100,Aprobada,4.00', contenido.decode('utf-8'))
+        self.assertEqual(reporte.checksum, hashlib.sha256(contenido).hexdigest())
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, 'reportes')))
+
+    def test_multiparte_rechaza_partes_menores_al_minimo(self):
+        """Test que, como S3, solo la última parte puede ser menor al mínimo."""
+        from apps.reportes.almacenamiento import AlmacenamientoObjetosMemoria
+
+        almacenamiento = AlmacenamientoObjetosMemoria(tamano_parte_minimo=4)
+        subida = almacenamiento.iniciar_multiparte('a.csv')
+        almacenamiento.subir_parte(subida, 1, b'ab')
+        almacenamiento.subir_parte(subida, 2, b'cd')
+
+        with self.assertRaises(ValueError):
+            almacenamiento.completar_multiparte(subida)
+        self.assertFalse(almacenamiento.exists('a.csv'))
+
+    def test_descarga_desde_memoria_con_rango(self):
+        """Test que la descarga lee el objeto del almacenamiento, completo o por rango."""
+        reporte = ReporteService(self.admin).generar_reporte_por_periodo(self.periodo.id)
+        url = f'/api/v1/reportes/reportes/{reporte.id}/descargar/'
+        contenido = self._leer(reporte)
+
+        completo = self.client.get(url)
+        parcial = self.client.get(url, HTTP_RANGE='bytes=10-19')
+
+        self.assertEqual(b''.join(completo.streaming_content), contenido)
+        self.assertEqual(parcial.status_code, 206)
+        self.assertEqual(b''.join(parcial.streaming_content), contenido[10:20])
+
+    def test_comprimido_en_memoria_se_descomprime_al_descargar(self):
+        """Test que un reporte gzip en el almacenamiento de objetos se descomprime al vuelo."""
+        import gzip
+
+        with override_settings(REPORTES_COMPRESION='gzip'):
+            reporte = ReporteService(self.admin).generar_reporte_por_periodo(self.periodo.id)
+
+        response = self.client.get(
+            f'/api/v1/reportes/reportes/{reporte.id}/descargar/', HTTP_ACCEPT_ENCODING='identity'
+        )
+
+        contenido = b''.join(response.streaming_content)
+        self.assertEqual(contenido, gzip.decompress(self._leer(reporte)))
+        self.assertIn('MAT101', contenido.decode('utf-8'))
+
+    def test_fragmentos_pasan_por_el_almacenamiento(self):
+        """Test que el reporte fragmentado se arma sin archivos locales y borra sus partes."""
+        from apps.reportes.almacenamiento import almacenamiento_reportes
+        from apps.reportes.tasks import generar_reporte_task
+
+        reporte = ReporteService(self.admin).crear_reporte_general(
+            periodo_id=self.periodo.id, fragmentos=3
+        )
+        generar_reporte_task(reporte.id)
+        reporte.refresh_from_db()
+
+        self.assertTrue(reporte.es_completado)
+        self.assertEqual(reporte.registros_procesados, 6)
+        self.assertEqual(almacenamiento_reportes().listdir('')[1], [reporte.ruta_archivo])
+        self.assertEqual(self._leer(reporte).decode('utf-8').count('MAT100'), 3)
+
+    def test_zip_en_memoria(self):
+        """Test que el zip se escribe sobre un destino sin seek."""
+        import io
+        import zipfile
+
+        reporte = ReporteService(self.admin).generar_reporte_lote(
+            periodo_id=self.periodo.id, formato='zip'
+        )
+
+        with zipfile.ZipFile(io.BytesIO(self._leer(reporte))) as archivo_zip:
+            self.assertEqual(len(archivo_zip.namelist()), 3)
+            self.assertIsNone(archivo_zip.testzip())
+
+    def test_tmpfs_usa_su_directorio(self):
+        """Test que el backend tmpfs escribe en REPORTES_TMPFS_DIR."""
+        directorio = tempfile.mkdtemp()
+
+        with override_settings(REPORTES_ALMACENAMIENTO='tmpfs', REPORTES_ALMACENAMIENTO_OPCIONES={},
+                               REPORTES_TMPFS_DIR=directorio):
+            reporte = ReporteService(self.admin).generar_reporte_por_periodo(self.periodo.id)
+            self.assertTrue(existe(reporte.ruta_archivo))
+
+        self.assertTrue(os.path.exists(os.path.join(directorio, reporte.ruta_archivo)))
+
+    def test_ruta_absoluta_fuera_del_almacenamiento_no_existe(self):
+        """Test que una ruta absoluta antigua fuera del directorio cuenta como inexistente."""
+        with override_settings(REPORTES_ALMACENAMIENTO='local', REPORTES_ALMACENAMIENTO_OPCIONES={}):
+            self.assertFalse(existe(__file__))
+
+
+class TestColaReportes(DatosReporteMixin, TransactionTestCase):
+    """Tests para la cola de generación: deduplicación, límites y prioridades."""
+
+    def setUp(self):
+        super().setUp()
+        from rest_framework.test import APIClient
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def _en_curso(self, tipo='general', **parametros):
+        """Reporte despachado que sigue generándose."""
+        from apps.reportes.cola import clave_trabajo
+
+        return ReporteGenerado.objects.create(
+            solicitante=self.admin,
+            tipo=tipo,
+            nombre_archivo=f'{tipo}.csv',
+            ruta_archivo=f'{tipo}.csv',
+            parametros=parametros,
+            clave_cola=clave_trabajo(tipo, parametros),
+            estado='generando',
+            encolado_at=timezone.now()
+        )
+
+    def test_clave_ignora_quien_lo_pide(self):
+        """Test que dos solicitudes iguales de usuarios distintos comparten clave."""
+        from apps.reportes.cola import clave_trabajo
+
+        self.assertEqual(
+            clave_trabajo('general', {'periodo_id': 1, 'generado_por': 'a', 'fragmentos': 4}),
+            clave_trabajo('general', {'periodo_id': 1, 'generado_por': 'b'})
+        )
+        self.assertNotEqual(
+            clave_trabajo('general', {'periodo_id': 1}),
+            clave_trabajo('general', {'periodo_id': 1}, formato='parquet')
+        )
+
+    def test_duplicado_espera_y_reutiliza_el_archivo(self):
+        """Test que una solicitud igual a una en curso no lanza otra generación."""
+        from apps.reportes.cola import despachar_pendientes
+
+        lider = ReporteService(self.admin).generar_reporte_general(periodo_id=self.periodo.id)
+        # El líder sigue en curso para la cola mientras llega la segunda solicitud
+        ReporteGenerado.objects.filter(id=lider.id).update(estado='generando', encolado_at=timezone.now())
+
+        response = self.client.post(
+            '/api/v1/reportes/reportes/generar_general/', {'periodo_id': self.periodo.id}, format='json'
+        )
+        duplicado = ReporteGenerado.objects.get(id=response.data['reporte_id'])
+
+        self.assertEqual(response.data['cola'], 'duplicado')
+        self.assertEqual(duplicado.estado, 'pendiente')
+        self.assertIsNone(duplicado.encolado_at)
+
+        ReporteGenerado.objects.filter(id=lider.id).update(estado='completado')
+        self.assertEqual(despachar_pendientes(), 1)
+
+        duplicado.refresh_from_db()
+        self.assertTrue(duplicado.es_completado)
+        self.assertEqual(duplicado.ruta_archivo, lider.ruta_archivo)
+        self.assertEqual(duplicado.metricas, {})  # Resuelto desde la cache
+
+    def test_limite_de_concurrencia_por_tipo(self):
+        """Test que un tipo en su límite espera hasta que termine uno en curso."""
+        from apps.reportes.cola import despachar_pendientes
+
+        en_curso = [self._en_curso(periodo_id=i) for i in (100, 101)]
+
+        with override_settings(REPORTES_CONCURRENCIA={'general': 2}):
+            response = self.client.post('/api/v1/reportes/reportes/generar_general/', {}, format='json')
+            reporte = ReporteGenerado.objects.get(id=response.data['reporte_id'])
+
+            self.assertEqual(response.data['cola'], 'en_espera')
+            self.assertTrue(reporte.es_pendiente)
+
+            en_curso[0].marcar_completado()
+            despachar_pendientes()
+
+        reporte.refresh_from_db()
+        self.assertTrue(reporte.es_completado)
+
+    def test_despacho_por_prioridad_y_cola_dedicada(self):
+        """Test que los reportes de estudiante salen antes y por la cola interactiva."""
+        from apps.reportes.cola import despachar_pendientes
+
+        service = ReporteService(self.admin)
+        general = service.crear_reporte_general()
+        estudiante = service.crear_reporte_estudiante(self.estudiantes[0].id)
+        ReporteGenerado.objects.filter(id=general.id).update(prioridad=1)
+        ReporteGenerado.objects.filter(id=estudiante.id).update(prioridad=9)
+
+        with patch('apps.reportes.tasks.generar_reporte_task.apply_async') as apply_async:
+            self.assertEqual(despachar_pendientes(), 2)
+
+        self.assertEqual(apply_async.call_args_list[0].args, ((estudiante.id,),))
+        self.assertEqual(apply_async.call_args_list[0].kwargs, {'queue': 'reportes_interactivos'})
+        self.assertEqual(apply_async.call_args_list[1].kwargs, {'queue': 'reportes_pesados'})
+
+    def test_despachado_vencido_no_ocupa_lugar(self):
+        """Test que un reporte despachado hace demasiado no bloquea la cola."""
+        from apps.reportes.cola import estado_cola
+
+        viejo = self._en_curso(periodo_id=100)
+        ReporteGenerado.objects.filter(id=viejo.id).update(
+            encolado_at=timezone.now() - timedelta(hours=2)
+        )
+        self._en_curso(periodo_id=101)
+
+        response = self.client.get('/api/v1/reportes/reportes/cola/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['general']['en_curso'], 1)
+        self.assertEqual(response.data['general']['limite'], 2)
+        self.assertEqual(estado_cola()['estudiante']['cola'], 'reportes_interactivos')
+
+    def test_despachado_vencido_pendiente_se_reenvia(self):
+        """Test que un reporte despachado que ningún worker tomó se vuelve a enviar."""
+        from apps.reportes.cola import despachar_pendientes, estado_cola
+
+        perdido = ReporteService(self.admin).crear_reporte_estudiante(self.estudiantes[0].id)
+        vencido = timezone.now() - timedelta(hours=2)
+        ReporteGenerado.objects.filter(id=perdido.id).update(encolado_at=vencido)
+        self.assertEqual(estado_cola()['estudiante']['en_espera'], 1)
+
+        with patch('apps.reportes.tasks.generar_reporte_task.apply_async') as apply_async:
+            self.assertEqual(despachar_pendientes(), 1)
+            # Recién reenviado vuelve a ocupar su lugar y no se envía otra vez
+            self.assertEqual(despachar_pendientes(), 0)
+
+        self.assertEqual(apply_async.call_args_list[0].args, ((perdido.id,),))
+        perdido.refresh_from_db()
+        self.assertGreater(perdido.encolado_at, vencido)
+        self.assertEqual(estado_cola()['estudiante']['en_curso'], 1)
+
+    def test_generando_vencido_pasa_a_error(self):
+        """Test que un reporte que quedó generándose tras el vencimiento termina en error."""
+        from apps.reportes.cola import despachar_pendientes
+
+        colgado = self._en_curso(periodo_id=100)
+        ReporteGenerado.objects.filter(id=colgado.id).update(
+            encolado_at=timezone.now() - timedelta(hours=2)
+        )
+        reciente = self._en_curso(periodo_id=101)
+
+        despachar_pendientes()
+
+        colgado.refresh_from_db()
+        reciente.refresh_from_db()
+        self.assertTrue(colgado.es_error)
+        self.assertTrue(colgado.mensaje_error)
+        self.assertEqual(reciente.estado, 'generando')
+
+
+class TestColasDespliegue(TestCase):
+    """Tests que cada cola a la que se envían reportes tiene un worker en docker-compose."""
+
+    def _colas_consumidas(self):
+        import shlex
+        import yaml
+
+        with open(settings.BASE_DIR / 'docker-compose.yml') as archivo:
+            servicios = yaml.safe_load(archivo)['services']
+
+        colas = set()
+        for servicio in servicios.values():
+            argumentos = shlex.split(servicio.get('command', ''))
+            if 'worker' not in argumentos:
+                continue
+            # Sin -Q el worker solo lee la cola por defecto
+            lista = 'celery'
+            for indice, argumento in enumerate(argumentos):
+                if argumento in ('-Q', '--queues'):
+                    lista = argumentos[indice + 1]
+                elif argumento.startswith('--queues='):
+                    lista = argumento.split('=', 1)[1]
+            colas.update(lista.split(','))
+        return colas
+
+    def test_colas_enrutadas_tienen_worker(self):
+        """Test que las colas de REPORTES_COLAS, CELERY_TASK_ROUTES y la cola por defecto se consumen."""
+        from apps.reportes.cola import COLA_PESADA
+
+        enrutadas = (
+            set(settings.REPORTES_COLAS.values())
+            | {COLA_PESADA}
+            | {ruta['queue'] for ruta in settings.CELERY_TASK_ROUTES.values()}
+            | {'celery'}
+        )
+
+        self.assertEqual(enrutadas - self._colas_consumidas(), set())
+
+
+class TestPaginacionHistorial(DatosReporteMixin, TransactionTestCase):
+    """Tests para la paginación por cursor y los filtros de fecha del historial."""
+
+    def setUp(self):
+        super().setUp()
+        from rest_framework.test import APIClient
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+        # 25 reportes; de a cinco comparten created_at para forzar empates
+        base = timezone.now() - timedelta(days=1)
+        for i in range(25):
+            reporte = ReporteGenerado.objects.create(
+                solicitante=self.admin,
+                tipo='general',
+                nombre_archivo=f'reporte_{i}.csv',
+                ruta_archivo=f'reporte_{i}.csv',
+                estado='completado'
+            )
+            ReporteGenerado.objects.filter(id=reporte.id).update(
+                created_at=base + timedelta(minutes=i // 5)
+            )
+        self.esperados = list(
+            ReporteGenerado.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+
+    def _ids(self, response):
+        return [reporte['id'] for reporte in response.data['results']]
+
+    def test_recorre_todas_las_paginas_sin_saltos_ni_repetidos(self):
+        """Test que el cursor avanza por (created_at, id) aunque haya empates."""
+        url = '/api/v1/reportes/reportes/?page_size=10'
+        vistos = []
+        paginas = 0
+
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            vistos.extend(self._ids(response))
+            url = response.data['next']
+            paginas += 1
+
+        self.assertEqual(vistos, self.esperados)
+        self.assertEqual(paginas, 3)
+
+    def test_enlace_anterior_vuelve_a_la_pagina_previa(self):
+        """Test que previous devuelve la misma página que se vio antes."""
+        primera = self.client.get('/api/v1/reportes/reportes/?page_size=10')
+        segunda = self.client.get(primera.data['next'])
+        de_vuelta = self.client.get(segunda.data['previous'])
+
+        self.assertIsNone(primera.data['previous'])
+        self.assertEqual(self._ids(segunda), self.esperados[10:20])
+        self.assertEqual(self._ids(de_vuelta), self.esperados[:10])
+        self.assertIsNone(de_vuelta.data['previous'])
+
+    def test_pagina_profunda_no_usa_offset(self):
+        """Test que la consulta de una página profunda filtra por la posición del cursor."""
+        primera = self.client.get('/api/v1/reportes/reportes/?page_size=10')
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(primera.data['next'])
+
+        sql = [c['sql'] for c in consultas.captured_queries if 'reportes_generados' in c['sql']][-1]
+        self.assertNotIn('OFFSET', sql.upper())
+        self.assertIn('"created_at" <=', sql)
+
+    def test_cursor_invalido_responde_404(self):
+        """Test que un cursor manipulado no produce un error 500."""
+        import base64
+
+        cursor = base64.b64encode(b'p=no-es-una-fecha').decode('ascii')
+        response = self.client.get(f'/api/v1/reportes/reportes/?cursor={cursor}')
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_filtro_de_fechas_por_rango(self):
+        """Test que fecha_desde y fecha_hasta incluyen el día completo en la zona local."""
+        from datetime import datetime, time
+
+        ultimo = ReporteGenerado.objects.get(id=self.esperados[0])
+        dia = date(2024, 3, 10)
+        ReporteGenerado.objects.filter(id=ultimo.id).update(
+            created_at=timezone.make_aware(datetime.combine(dia, time(23, 59)))
+        )
+
+        mismo_dia = self.client.get(
+            '/api/v1/reportes/reportes/', {'fecha_desde': '2024-03-10', 'fecha_hasta': '2024-03-10'}
+        )
+        dia_siguiente = self.client.get(
+            '/api/v1/reportes/reportes/', {'fecha_desde': '2024-03-11', 'fecha_hasta': '2024-03-11'}
+        )
+
+        self.assertEqual(self._ids(mismo_dia), [ultimo.id])
+        self.assertEqual(self._ids(dia_siguiente), [])
+
+
+class TestBusquedaReportes(DatosReporteMixin, TransactionTestCase):
+    """Tests para la búsqueda de reportes por nombre de archivo."""
+
+    def setUp(self):
+        super().setUp()
+        from rest_framework.test import APIClient
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+        for nombre in ['reporte_general_20240301.csv', 'reporte_profesor_ana_20240301.csv',
+                       'reporte_estudiante_juan_20240302.csv']:
+            ReporteGenerado.objects.create(
+                solicitante=self.admin,
+                tipo=nombre.split('_')[1],
+                nombre_archivo=nombre,
+                ruta_archivo=nombre,
+                estado='completado'
+            )
+
+    def _nombres(self, response):
+        return [reporte['nombre_archivo'] for reporte in response.data['results']]
+
+    def test_busca_subcadenas_con_el_indice_fts(self):
+        """Test que la búsqueda encuentra subcadenas del nombre a través de la tabla FTS5."""
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get('/api/v1/reportes/reportes/buscar/', {'q': 'profe'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._nombres(response), ['reporte_profesor_ana_20240301.csv'])
+        self.assertEqual(response.data['count'], 1)
+        sql = ' '.join(c['sql'] for c in consultas.captured_queries)
+        self.assertIn('reportes_generados_fts', sql)
+        self.assertNotIn('LIKE', sql.upper())
+
+    def test_resultados_paginados(self):
+        """Test que la búsqueda devuelve páginas en lugar de la lista completa."""
+        response = self.client.get('/api/v1/reportes/reportes/buscar/', {'q': '2024', 'page_size': 2})
+
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_indice_se_actualiza_al_modificar_y_borrar(self):
+        """Test que los triggers mantienen la tabla FTS5 al día."""
+        reporte = ReporteGenerado.objects.get(nombre_archivo__startswith='reporte_general')
+        reporte.nombre_archivo = 'reporte_periodo_2024-1.csv'
+        reporte.save()
+        ReporteGenerado.objects.filter(nombre_archivo__startswith='reporte_estudiante').delete()
+
+        general = self.client.get('/api/v1/reportes/reportes/buscar/', {'q': 'general'})
+        periodo = self.client.get('/api/v1/reportes/reportes/buscar/', {'q': 'periodo'})
+        estudiante = self.client.get('/api/v1/reportes/reportes/buscar/', {'q': 'estudiante'})
+
+        self.assertEqual(self._nombres(general), [])
+        self.assertEqual(self._nombres(periodo), ['reporte_periodo_2024-1.csv'])
+        self.assertEqual(self._nombres(estudiante), [])
+
+    def test_texto_corto_usa_icontains(self):
+        """Test que con menos de tres caracteres se busca sin índice de trigramas."""
+        response = self.client.get('/api/v1/reportes/reportes/buscar/', {'q': 'ju'})
+
+        self.assertEqual(self._nombres(response), ['reporte_estudiante_juan_20240302.csv'])
+
+    def test_sin_parametro_q_responde_400(self):
+        """Test que la búsqueda exige el parámetro q."""
+        response = self.client.get('/api/v1/reportes/reportes/buscar/')
+
+        self.assertEqual(response.status_code, 400)
+
+
+class TestEstadisticasNotas(DatosReporteMixin, TransactionTestCase):
+    """Tests para las estadísticas de notas sobre arreglos compactos."""
+
+    def setUp(self):
+        super().setUp()
+        # MAT100: 1.5, 3.0, 5.0 - MAT101: 2.0, 3.5, 4.0
+        notas = {
+            self.materias[0].id: [Decimal('1.5'), Decimal('3.0'), Decimal('5.0')],
+            self.materias[1].id: [Decimal('2.0'), Decimal('3.5'), Decimal('4.0')],
+        }
+        for materia_id, valores in notas.items():
+            inscripciones = Inscripcion.objects.filter(materia_id=materia_id).order_by('estudiante_id')
+            for inscripcion, nota in zip(inscripciones, valores):
+                Inscripcion.objects.filter(id=inscripcion.id).update(nota_final=nota)
+
+    def test_estadisticas_de_todas_las_notas(self):
+        """Test de promedio, mediana, desviación, percentiles, histograma y aprobación."""
+        import statistics
+        from apps.reportes.estadisticas_notas import estadisticas_notas
+
+        notas = estadisticas_notas(Inscripcion.objects.all())
+        valores = [1.5, 2.0, 3.0, 3.5, 4.0, 5.0]
+
+        self.assertEqual(notas['cantidad'], 6)
+        self.assertAlmostEqual(notas['promedio'], statistics.fmean(valores))
+        self.assertAlmostEqual(notas['mediana'], 3.25)
+        self.assertAlmostEqual(notas['desviacion'], statistics.pstdev(valores))
+        self.assertEqual((notas['minimo'], notas['maximo']), (1.5, 5.0))
+        self.assertAlmostEqual(notas['percentiles']['p25'], 2.25)
+        # 3.0 cae en [3, 4) y 5.0 en la última cubeta, cerrada
+        self.assertEqual(notas['histograma'], [0, 1, 1, 2, 2])
+        self.assertEqual(notas['aprobados'], 4)
+        self.assertAlmostEqual(notas['porcentaje_aprobacion'], 400 / 6)
+
+    def test_por_grupo_en_una_consulta(self):
+        """Test que las estadísticas por materia salen de una sola consulta."""
+        from apps.reportes.estadisticas_notas import estadisticas_por_grupo
+
+        with CaptureQueriesContext(connection) as consultas:
+            por_materia = estadisticas_por_grupo(Inscripcion.objects.all(), 'materia__codigo')
+
+        self.assertEqual(len(consultas), 1)
+        self.assertEqual(list(por_materia), ['MAT100', 'MAT101'])
+        self.assertEqual(por_materia['MAT100']['mediana'], 3.0)
+        self.assertEqual(por_materia['MAT101']['aprobados'], 2)
+
+    def test_sin_notas(self):
+        """Test que sin notas la cantidad es 0 y el resto queda vacío."""
+        from apps.reportes.estadisticas_notas import estadisticas_notas, estadisticas_por_grupo
+
+        vacio = Inscripcion.objects.none()
+
+        self.assertEqual(estadisticas_notas(vacio)['cantidad'], 0)
+        self.assertIsNone(estadisticas_notas(vacio)['promedio'])
+        self.assertEqual(estadisticas_por_grupo(vacio, 'materia_id'), {})
+
+    def test_numpy_y_array_dan_lo_mismo(self):
+        """Test que el cálculo con numpy coincide con el de array('d')."""
+        pytest.importorskip('numpy')
+        from apps.reportes import estadisticas_notas as modulo
+
+        grupos, valores, inicios = modulo.cargar_notas(Inscripcion.objects.all(), 'materia_id')
+        con_numpy = modulo._estadisticas_numpy(valores, inicios)
+        sin_numpy = modulo._estadisticas_python(valores, inicios)
+
+        for a, b in zip(con_numpy, sin_numpy):
+            self.assertEqual(a['histograma'], b['histograma'])
+            self.assertEqual(a['aprobados'], b['aprobados'])
+            for clave in ('promedio', 'mediana', 'desviacion', 'minimo', 'maximo'):
+                self.assertAlmostEqual(a[clave], b[clave])
+            for clave, valor in a['percentiles'].items():
+                self.assertAlmostEqual(valor, b['percentiles'][clave])
+
+    def test_reportes_incluyen_la_distribucion(self):
+        """Test que los reportes de profesor, materia y período escriben la distribución."""
+        service = ReporteService(self.admin)
+        reportes = [
+            service.generar_reporte_profesor(self.profesor.id),
+            service.generar_reporte_por_materia(self.materias[0].id),
+            service.generar_reporte_por_periodo(self.periodo.id),
+        ]
+
+        for reporte in reportes:
+            with open(self._ruta(reporte), encoding='utf-8') as archivo:
+                contenido = archivo.read()
+            self.assertIn('DISTRIBUCIÓN DE NOTAS POR', contenido)
+
+        with open(self._ruta(reportes[0]), encoding='utf-8') as archivo:
+            contenido = archivo.read()
+        self.assertIn('MAT100,3,3.17,3.00,1.43,2.25,4.00,4.60,66.7%,0-1: 0 | 1-2: 1 | 2-3: 0 | 3-4: 1 | 4-5: 1', contenido)
+
+    def test_endpoint_distribucion_notas(self):
+        """Test del endpoint de distribución de notas para dashboards."""
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.force_authenticate(user=self.admin)
+
+        response = client.get('/api/v1/reportes/reportes/distribucion_notas/', {'agrupar': 'profesor'})
+        invalido = client.get('/api/v1/reportes/reportes/distribucion_notas/', {'agrupar': 'aula'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['general']['cantidad'], 6)
+        self.assertEqual(response.data['grupos'][0]['grupo'], 'profesor')
+        self.assertEqual(response.data['grupos'][0]['promedio'], 3.17)
+        self.assertEqual(invalido.status_code, 400)
+
+
+class TestBenchmarkReportes(TransactionTestCase):
+    """Tests para el comando benchmark_reportes con un conjunto de datos mínimo."""
+
+    DATOS = {'estudiantes': 12, 'materias': 4, 'inscripciones': 30, 'profesores': 2}
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        ajustes = override_settings(MEDIA_ROOT=self.media_root)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.referencia = os.path.join(self.media_root, 'referencia.json')
+
+    def _ejecutar(self, **opciones):
+        from io import StringIO
+        from django.core.management import call_command
+
+        salida = StringIO()
+        call_command(
+            'benchmark_reportes', forzar=True, stdout=salida,
+            **{**self.DATOS, **opciones}
+        )
+        return salida.getvalue()
+
+    def test_carga_datos_y_mide_todos_los_casos(self):
+        """Test que los datos se cargan en bloque y cada caso queda medido."""
+        from apps.reportes import benchmark
+
+        salida = self._ejecutar(guardar_referencia=self.referencia)
+        referencia = benchmark.leer_referencia(self.referencia)
+
+        self.assertEqual(referencia['datos'], self.DATOS)
+        self.assertEqual(set(referencia['resultados']), set(benchmark.casos()))
+        for metricas in referencia['resultados'].values():
+            self.assertGreater(metricas['consultas'], 0)
+            self.assertGreater(metricas['memoria_pico_kb'], 0)
+        self.assertEqual(Inscripcion.objects.count(), 30)
+        self.assertIn('reporte_general', salida)
+        # Los reportes medidos no quedan registrados
+        self.assertFalse(ReporteGenerado.objects.exists())
+
+    def test_falla_si_empeora_respecto_de_la_referencia(self):
+        """Test que una regresión mayor al umbral hace fallar el comando."""
+        import json
+        from django.core.management.base import CommandError
+
+        self._ejecutar(casos='reporte_materia', guardar_referencia=self.referencia)
+        with open(self.referencia, encoding='utf-8') as archivo:
+            referencia = json.load(archivo)
+        referencia['resultados']['reporte_materia']['consultas'] -= 1
+        with open(self.referencia, 'w', encoding='utf-8') as archivo:
+            json.dump(referencia, archivo)
+
+        with self.assertRaisesMessage(CommandError, 'regresiones'):
+            self._ejecutar(casos='reporte_materia', referencia=self.referencia)
+
+    def test_comparar_tolera_el_ruido(self):
+        """Test que las diferencias dentro del umbral o del margen no cuentan."""
+        from apps.reportes.benchmark import comparar
+
+        base = {'caso': {'segundos': 1.0, 'consultas': 10, 'memoria_pico_kb': 50000}}
+
+        self.assertEqual(comparar({'caso': {'segundos': 1.2, 'consultas': 10, 'memoria_pico_kb': 50000}}, base, 0.25), [])
+        self.assertEqual(len(comparar({'caso': {'segundos': 1.5, 'consultas': 11, 'memoria_pico_kb': 90000}}, base, 0.25)), 3)
+        rapido = {'caso': {'segundos': 0.01, 'consultas': 10, 'memoria_pico_kb': 10}}
+        self.assertEqual(comparar({'caso': {'segundos': 0.03, 'consultas': 10, 'memoria_pico_kb': 20}}, rapido, 0.25), [])
+
+    def test_exige_forzar_sin_debug(self):
+        """Test que sin DEBUG el comando no escribe datos salvo con --forzar."""
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+
+        with self.assertRaisesMessage(CommandError, '--forzar'):
+            call_command('benchmark_reportes', **self.DATOS)
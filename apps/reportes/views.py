@@ -1,15 +1,15 @@
-import os
-import csv
-from django.http import HttpResponse, FileResponse
 from django.conf import settings
 from rest_framework import status, viewsets, views
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q, Count, Avg
+from django.db.models import Avg, OuterRef, Subquery
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, time, timedelta
 
+from .almacenamiento import existe
+from .cola import encolar_reporte, estado_cola
+from .paginacion import PaginacionKeyset
 from .models import ReporteGenerado
 from .serializers import (
     ReporteGeneradoSerializer,
@@ -18,13 +18,54 @@ from .serializers import (
     ReporteEstudianteSerializer,
     ReporteProfesorSerializer,
     ReporteGeneralSerializer,
+    ReportePeriodoSerializer,
+    ReporteMateriaSerializer,
+    ReporteLoteSerializer,
     ReporteFiltroSerializer,
+    ReporteLimpiezaSerializer,
     ReporteEstadisticasSerializer
 )
-from .services import ReporteService
+from .services import CHUNK_SIZE, ReporteService, materias_con_estadisticas
+from .descargas import respuesta_csv_en_streaming, respuesta_descarga
+from .estadisticas import obtener_estadisticas
+from .estadisticas_notas import LIMITES_HISTOGRAMA, estadisticas_notas, estadisticas_por_grupo
+from .resumenes import resumen_por_materia, totales_inscripciones
+from .tasks import limpiar_reportes_antiguos_task
+from apps.common.busqueda import BusquedaTexto, PaginacionBusqueda
 from apps.users.permissions import IsAdminUser, IsProfesorUser
 
 
+# Índices creados en la migración 0012_reportegenerado_busqueda
+BUSQUEDA_REPORTES = BusquedaTexto('reportes_generados', ['nombre_archivo'], modo='subcadena')
+
+
+# Agrupaciones de /reportes/distribucion_notas/ y el campo que las resuelve
+AGRUPACIONES_NOTAS = {
+    'materia': 'materia__codigo',
+    'periodo': 'periodo__nombre',
+    'profesor': 'materia__profesor__username',
+}
+
+
+def _redondear_notas(notas):
+    """Estadísticas de notas con los valores redondeados a dos decimales."""
+    def redondear(valor):
+        return round(valor, 2) if isinstance(valor, float) else valor
+
+    return {
+        clave: (
+            {nombre: redondear(valor) for nombre, valor in dato.items()}
+            if isinstance(dato, dict) else redondear(dato)
+        )
+        for clave, dato in notas.items()
+    }
+
+
+def _inicio_del_dia(fecha):
+    """Medianoche de la fecha en la zona horaria actual."""
+    return timezone.make_aware(datetime.combine(fecha, time.min))
+
+
 class ReporteViewSet(viewsets.ModelViewSet):
     """ViewSet para gestión de reportes generados."""
     
@@ -32,6 +73,7 @@ class ReporteViewSet(viewsets.ModelViewSet):
     queryset = ReporteGenerado.objects.all()
     serializer_class = ReporteGeneradoSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = PaginacionKeyset
     
     def get_serializer_class(self):
         """Retornar el serializer apropiado según la acción."""
@@ -79,14 +121,18 @@ class ReporteViewSet(viewsets.ModelViewSet):
             if filtros.get('solicitante_id'):
                 queryset = queryset.filter(solicitante_id=filtros['solicitante_id'])
             
+            # Rangos sobre created_at (no created_at__date, que envuelve la
+            # columna en una función y no usa los índices)
             if filtros.get('fecha_desde'):
-                queryset = queryset.filter(created_at__date__gte=filtros['fecha_desde'])
+                queryset = queryset.filter(created_at__gte=_inicio_del_dia(filtros['fecha_desde']))
             
             if filtros.get('fecha_hasta'):
-                queryset = queryset.filter(created_at__date__lte=filtros['fecha_hasta'])
+                queryset = queryset.filter(
+                    created_at__lt=_inicio_del_dia(filtros['fecha_hasta'] + timedelta(days=1))
+                )
         
-        # Ordenar por fecha de creación (más recientes primero)
-        queryset = queryset.order_by('-created_at')
+        # Más recientes primero; la paginación por cursor fija el orden (created_at, id)
+        queryset = queryset.order_by('-created_at', '-id')
         
         # Paginar resultados
         page = self.paginate_queryset(queryset)
@@ -97,6 +143,26 @@ class ReporteViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
     
+    def _encolar_reporte(self, reporte):
+        """
+        Encolar la generación de un reporte ya registrado.
+        Responde 202 de inmediato; el avance se consulta en /progreso/.
+        
+        El reporte puede quedar esperando en la cola si su tipo llegó al
+        límite de generaciones simultáneas o si ya se está generando uno
+        igual, cuyo archivo reutilizará (ver cola.py).
+        """
+        cola = encolar_reporte(reporte)
+        reporte.refresh_from_db()
+        
+        return Response({
+            'mensaje': 'Reporte en cola de generación',
+            'reporte_id': reporte.id,
+            'nombre_archivo': reporte.nombre_archivo,
+            'estado': reporte.estado,
+            'cola': cola
+        }, status=status.HTTP_202_ACCEPTED)
+    
     @action(detail=False, methods=['post'])
     def generar_estudiante(self, request):
         """Generar reporte CSV de un estudiante."""
@@ -110,19 +176,14 @@ class ReporteViewSet(viewsets.ModelViewSet):
                         status=status.HTTP_403_FORBIDDEN
                     )
                 
-                # Generar reporte
+                # Registrar el reporte y generarlo en background
                 service = ReporteService(request.user)
-                reporte = service.generar_reporte_estudiante(
+                reporte = service.crear_reporte_estudiante(
                     estudiante_id=serializer.validated_data['estudiante_id'],
                     periodo_id=serializer.validated_data.get('periodo_id')
                 )
                 
-                return Response({
-                    'mensaje': 'Reporte generado exitosamente',
-                    'reporte_id': reporte.id,
-                    'nombre_archivo': reporte.nombre_archivo,
-                    'estado': reporte.estado
-                }, status=status.HTTP_201_CREATED)
+                return self._encolar_reporte(reporte)
                 
             except ValueError as e:
                 return Response(
@@ -150,19 +211,14 @@ class ReporteViewSet(viewsets.ModelViewSet):
                         status=status.HTTP_403_FORBIDDEN
                     )
                 
-                # Generar reporte
+                # Registrar el reporte y generarlo en background
                 service = ReporteService(request.user)
-                reporte = service.generar_reporte_profesor(
+                reporte = service.crear_reporte_profesor(
                     profesor_id=serializer.validated_data['profesor_id'],
                     periodo_id=serializer.validated_data.get('periodo_id')
                 )
                 
-                return Response({
-                    'mensaje': 'Reporte generado exitosamente',
-                    'reporte_id': reporte.id,
-                    'nombre_archivo': reporte.nombre_archivo,
-                    'estado': reporte.estado
-                }, status=status.HTTP_201_CREATED)
+                return self._encolar_reporte(reporte)
                 
             except ValueError as e:
                 return Response(
@@ -190,19 +246,132 @@ class ReporteViewSet(viewsets.ModelViewSet):
                         status=status.HTTP_403_FORBIDDEN
                     )
                 
-                # Generar reporte
+                # Registrar el reporte y generarlo en background
                 service = ReporteService(request.user)
-                reporte = service.generar_reporte_general(
-                    periodo_id=serializer.validated_data.get('periodo_id')
+                reporte = service.crear_reporte_general(
+                    periodo_id=serializer.validated_data.get('periodo_id'),
+                    fragmentos=serializer.validated_data['fragmentos'],
+                    formato=serializer.validated_data['formato']
+                )
+                
+                return self._encolar_reporte(reporte)
+                
+            except ValueError as e:
+                return Response(
+                    {'error': str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            except Exception as e:
+                return Response(
+                    {'error': f'Error al generar reporte: {str(e)}'},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                )
+        
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=False, methods=['post'])
+    def generar_periodo(self, request):
+        """Generar reporte de inscripciones de un período (CSV o Parquet)."""
+        serializer = ReportePeriodoSerializer(data=request.data)
+        if serializer.is_valid():
+            try:
+                # Verificar permisos (solo admins pueden generar reportes por período)
+                if not request.user.is_admin:
+                    return Response(
+                        {'error': 'Solo los administradores pueden generar reportes por período.'},
+                        status=status.HTTP_403_FORBIDDEN
+                    )
+                
+                # Registrar el reporte y generarlo en background
+                service = ReporteService(request.user)
+                reporte = service.crear_reporte_por_periodo(
+                    periodo_id=serializer.validated_data['periodo_id'],
+                    formato=serializer.validated_data['formato']
                 )
                 
-                return Response({
-                    'mensaje': 'Reporte general generado exitosamente',
-                    'reporte_id': reporte.id,
-                    'nombre_archivo': reporte.nombre_archivo,
-                    'estado': reporte.estado
-                }, status=status.HTTP_201_CREATED)
+                return self._encolar_reporte(reporte)
                 
+            except ValueError as e:
+                return Response(
+                    {'error': str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            except Exception as e:
+                return Response(
+                    {'error': f'Error al generar reporte: {str(e)}'},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                )
+        
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=False, methods=['post'])
+    def generar_materia(self, request):
+        """Generar reporte de inscripciones de una materia (CSV o Parquet)."""
+        serializer = ReporteMateriaSerializer(data=request.data)
+        if serializer.is_valid():
+            try:
+                from apps.materias.models import Materia
+                
+                # Verificar permisos (admins o el profesor asignado a la materia)
+                materia = Materia.objects.get(id=serializer.validated_data['materia_id'])
+                if not (request.user.is_admin or
+                        (request.user.is_profesor and materia.profesor_id == request.user.id)):
+                    return Response(
+                        {'error': 'No tiene permisos para generar el reporte de esta materia.'},
+                        status=status.HTTP_403_FORBIDDEN
+                    )
+                
+                # Registrar el reporte y generarlo en background
+                service = ReporteService(request.user)
+                reporte = service.crear_reporte_por_materia(
+                    materia_id=materia.id,
+                    formato=serializer.validated_data['formato']
+                )
+                
+                return self._encolar_reporte(reporte)
+                
+            except ValueError as e:
+                return Response(
+                    {'error': str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            except Exception as e:
+                return Response(
+                    {'error': f'Error al generar reporte: {str(e)}'},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                )
+        
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=False, methods=['post'])
+    def generar_lote(self, request):
+        """Generar en un solo trabajo los reportes de un lote de estudiantes."""
+        serializer = ReporteLoteSerializer(data=request.data)
+        if serializer.is_valid():
+            try:
+                # Verificar permisos
+                if not (request.user.is_admin or request.user.is_profesor):
+                    return Response(
+                        {'error': 'No tienes permisos para generar reportes de estudiantes.'},
+                        status=status.HTTP_403_FORBIDDEN
+                    )
+                
+                # Registrar el reporte y generarlo en background
+                service = ReporteService(request.user)
+                reporte = service.crear_reporte_lote(
+                    estudiante_ids=serializer.validated_data.get('estudiante_ids'),
+                    periodo_id=serializer.validated_data.get('periodo_id'),
+                    materia_id=serializer.validated_data.get('materia_id'),
+                    formato=serializer.validated_data['formato']
+                )
+                
+                return self._encolar_reporte(reporte)
+                
+            except ValueError as e:
+                return Response(
+                    {'error': str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             except Exception as e:
                 return Response(
                     {'error': f'Error al generar reporte: {str(e)}'},
@@ -229,7 +398,7 @@ class ReporteViewSet(viewsets.ModelViewSet):
                 )
             
             # Verificar que el archivo existe
-            if not reporte.ruta_archivo or not os.path.exists(reporte.ruta_archivo):
+            if not existe(reporte.ruta_archivo):
                 return Response(
                     {
                         'error': 'El archivo del reporte no se encuentra.',
@@ -239,14 +408,8 @@ class ReporteViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            # Crear respuesta de archivo
-            response = FileResponse(
-                open(reporte.ruta_archivo, 'rb'),
-                content_type='text/csv'
-            )
-            response['Content-Disposition'] = f'attachment; filename="{reporte.nombre_archivo}"'
-            
-            return response
+            # Crear respuesta de archivo (comprimido o no según el cliente)
+            return respuesta_descarga(request, reporte)
             
         except ReporteGenerado.DoesNotExist:
             return Response(
@@ -266,52 +429,26 @@ class ReporteViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @action(detail=True, methods=['get'])
+    def progreso(self, request, pk=None):
+        """Consultar el avance de un reporte que se genera en background."""
+        reporte = self.get_object()
+        
+        return Response({
+            'reporte_id': reporte.id,
+            'estado': reporte.estado,
+            'registros_procesados': reporte.registros_procesados,
+            'mensaje_error': reporte.mensaje_error,
+            'completado_at': reporte.completado_at
+        })
+    
     @action(detail=False, methods=['get'])
     def estadisticas(self, request):
         """Obtener estadísticas de reportes."""
         try:
-            queryset = self.get_queryset()
-            
-            # Estadísticas básicas
-            total_reportes = queryset.count()
-            reportes_completados = queryset.filter(estado='completado').count()
-            reportes_pendientes = queryset.filter(estado='pendiente').count()
-            reportes_error = queryset.filter(estado='error').count()
-            
-            # Promedio de tiempo de generación
-            reportes_con_tiempo = queryset.filter(
-                estado='completado',
-                completado_at__isnull=False
-            )
-            
-            if reportes_con_tiempo.exists():
-                tiempos = [
-                    (r.completado_at - r.created_at).total_seconds()
-                    for r in reportes_con_tiempo
-                ]
-                promedio_tiempo = sum(tiempos) / len(tiempos)
-            else:
-                promedio_tiempo = 0
-            
-            # Reportes por tipo
-            reportes_por_tipo = dict(
-                queryset.values('tipo').annotate(count=Count('id')).values_list('tipo', 'count')
-            )
-            
-            # Reportes por estado
-            reportes_por_estado = dict(
-                queryset.values('estado').annotate(count=Count('id')).values_list('estado', 'count')
-            )
-            
-            stats = {
-                'total_reportes': total_reportes,
-                'reportes_completados': reportes_completados,
-                'reportes_pendientes': reportes_pendientes,
-                'reportes_error': reportes_error,
-                'promedio_tiempo_generacion': round(promedio_tiempo, 2),
-                'reportes_por_tipo': reportes_por_tipo,
-                'reportes_por_estado': reportes_por_estado
-            }
+            # Una sola consulta agregada, cacheada unos segundos por alcance
+            alcance = 'todos' if request.user.is_admin else f'usuario:{request.user.id}'
+            stats = obtener_estadisticas(self.get_queryset(), alcance)
             
             serializer = ReporteEstadisticasSerializer(stats)
             return Response(serializer.data)
@@ -322,6 +459,81 @@ class ReporteViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @action(detail=False, methods=['get'])
+    def resumen_inscripciones(self, request):
+        """Totales de inscripciones por período y materia, desde las tablas resumen."""
+        if not request.user.is_admin:
+            return Response(
+                {'error': 'Solo los administradores pueden consultar el resumen de inscripciones.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        periodo_id = request.query_params.get('periodo_id')
+        if periodo_id and not periodo_id.isdigit():
+            return Response(
+                {'error': 'periodo_id debe ser un número entero.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        totales = totales_inscripciones(periodo_id)
+        return Response({
+            'total_inscripciones': totales['total'],
+            'aprobadas': totales['aprobados'],
+            'promedio_nota_final': round(float(totales['promedio']), 2) if totales['promedio'] is not None else None,
+            'materias': resumen_por_materia(periodo_id)
+        })
+    
+    @action(detail=False, methods=['get'])
+    def distribucion_notas(self, request):
+        """Distribución de notas finales por materia, período o profesor."""
+        if not request.user.is_admin:
+            return Response(
+                {'error': 'Solo los administradores pueden consultar la distribución de notas.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        agrupar = request.query_params.get('agrupar', 'materia')
+        if agrupar not in AGRUPACIONES_NOTAS:
+            return Response(
+                {'error': f'agrupar debe ser uno de: {", ".join(AGRUPACIONES_NOTAS)}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        periodo_id = request.query_params.get('periodo_id')
+        if periodo_id and not periodo_id.isdigit():
+            return Response(
+                {'error': 'periodo_id debe ser un número entero.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        from apps.inscripciones.models import Inscripcion
+        
+        inscripciones = Inscripcion.objects.all()
+        if periodo_id:
+            inscripciones = inscripciones.filter(periodo_id=periodo_id)
+        
+        por_grupo = estadisticas_por_grupo(inscripciones, AGRUPACIONES_NOTAS[agrupar])
+        return Response({
+            'agrupar': agrupar,
+            'limites_histograma': LIMITES_HISTOGRAMA,
+            'general': _redondear_notas(estadisticas_notas(inscripciones)),
+            'grupos': [
+                {'grupo': grupo, **_redondear_notas(notas)}
+                for grupo, notas in por_grupo.items()
+            ]
+        })
+    
+    @action(detail=False, methods=['get'])
+    def cola(self, request):
+        """Reportes en curso y en espera por tipo, con su límite y cola de Celery."""
+        if not request.user.is_admin:
+            return Response(
+                {'error': 'Solo los administradores pueden consultar la cola de reportes.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        return Response(estado_cola())
+    
     @action(detail=False, methods=['post'])
     def limpiar_antiguos(self, request):
         """Limpiar reportes antiguos (solo administradores)."""
@@ -331,14 +543,23 @@ class ReporteViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
+        serializer = ReporteLimpiezaSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
         try:
-            dias = request.data.get('dias', 30)
-            count = ReporteGenerado.limpiar_reportes_antiguos(dias)
+            dias = serializer.validated_data['dias']
+            expirar = serializer.validated_data['expirar']
+            
+            # La limpieza corre por lotes en background; la respuesta no espera
+            tarea = limpiar_reportes_antiguos_task.delay(dias, expirar)
             
             return Response({
-                'mensaje': f'Se eliminaron {count} reportes antiguos (más de {dias} días)',
-                'reportes_eliminados': count
-            })
+                'mensaje': f'Limpieza de reportes de más de {dias} días en cola',
+                'tarea_id': tarea.id,
+                'dias': dias,
+                'expirar': expirar
+            }, status=status.HTTP_202_ACCEPTED)
             
         except Exception as e:
             return Response(
@@ -355,7 +576,7 @@ class ReporteViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def buscar(self, request):
-        """Buscar reportes por nombre de archivo."""
+        """Buscar reportes por nombre de archivo, de los más relevantes a los menos."""
         query = request.query_params.get('q', '')
         
         if not query:
@@ -364,13 +585,14 @@ class ReporteViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        reportes = self.get_queryset().filter(
-            Q(nombre_archivo__icontains=query) |
-            Q(tipo__icontains=query)
-        )
+        # El nombre de archivo incluye el tipo (reporte_general_...), así que
+        # buscar el tipo también lo encuentra
+        reportes = BUSQUEDA_REPORTES.filtrar(self.get_queryset(), query)
         
-        serializer = self.get_serializer(reportes, many=True)
-        return Response(serializer.data)
+        paginador = PaginacionBusqueda()
+        pagina = paginador.paginate_queryset(reportes, request, view=self)
+        serializer = self.get_serializer(pagina, many=True)
+        return paginador.get_paginated_response(serializer.data)
 
 
 # Endpoints específicos para reportes protegidos
@@ -475,6 +697,93 @@ class ReporteProfesorViewSet(viewsets.ViewSet):
 
 
 # Nuevos endpoints que cumplen exactamente con los requisitos del PDF
+def _filas_reporte_estudiante(estudiante):
+    """
+    Filas del CSV directo de un estudiante, en una sola pasada.
+
+    El promedio general sale de estadisticas_notas y la nota de cada materia
+    de una subconsulta, así que las inscripciones se recorren una vez con
+    un iterador y sin cargar todas las calificaciones en memoria.
+    """
+    from apps.inscripciones.models import Inscripcion, Calificacion
+    
+    yield [
+        'Nombre',
+        'Materia',
+        'Código',
+        'Créditos',
+        'Calificación',
+        'Estado',
+        'Promedio General'
+    ]
+    
+    # Calcular promedio general
+    promedio_general = estadisticas_notas(
+        Calificacion.objects.filter(inscripcion__estudiante=estudiante), campo_nota='nota'
+    )['promedio'] or 0.0
+    
+    # Primera calificación de cada inscripción (mismo orden que Calificacion.Meta)
+    primera_nota = Calificacion.objects.filter(
+        inscripcion=OuterRef('pk')
+    ).order_by('tipo').values('nota')[:1]
+    
+    inscripciones = Inscripcion.objects.filter(
+        estudiante=estudiante
+    ).annotate(
+        nota=Subquery(primera_nota)
+    ).values_list(
+        'materia__nombre', 'materia__codigo', 'materia__creditos', 'nota'
+    )
+    
+    nombre = f"{estudiante.first_name} {estudiante.last_name}"
+    
+    # Escribir datos
+    for materia_nombre, codigo, creditos, nota in inscripciones.iterator(chunk_size=CHUNK_SIZE):
+        estado = 'Aprobada' if nota and nota >= 3.0 else 'Reprobada' if nota else 'Pendiente'
+        
+        yield [
+            nombre,
+            materia_nombre,
+            codigo,
+            creditos,
+            f"{nota:.2f}" if nota else '',
+            estado,
+            f"{promedio_general:.2f}"
+        ]
+
+
+def _filas_reporte_profesor(profesor):
+    """Filas del CSV directo de un profesor, una por materia."""
+    yield [
+        'Nombre Profesor',
+        'Materia',
+        'Código',
+        'Créditos',
+        'Estudiantes Inscritos',
+        'Promedio Materia',
+        'Estado'
+    ]
+    
+    nombre = f"{profesor.first_name} {profesor.last_name}"
+    
+    # Materias del profesor con sus estadísticas en una sola consulta
+    for materia in materias_con_estadisticas(profesor).iterator(chunk_size=CHUNK_SIZE):
+        promedio_materia = materia.promedio_calificaciones or 0.0
+        
+        # Finalizada cuando todas las inscripciones tienen calificaciones
+        estado = 'En Curso' if materia.tiene_pendientes else 'Finalizada'
+        
+        yield [
+            nombre,
+            materia.nombre,
+            materia.codigo,
+            materia.creditos,
+            materia.num_estudiantes,
+            f"{promedio_materia:.2f}",
+            estado
+        ]
+
+
 class EstudianteReportAPIView(views.APIView):
     """
     Endpoint específico para generar reportes CSV de estudiantes.
@@ -486,7 +795,6 @@ class EstudianteReportAPIView(views.APIView):
         """Generar y retornar CSV del estudiante directamente."""
         try:
             from apps.users.models import User
-            from apps.inscripciones.models import Inscripcion, Calificacion
             
             # Verificar permisos
             if not (request.user.role == 'admin' or request.user.role == 'profesor'):
@@ -504,57 +812,11 @@ class EstudianteReportAPIView(views.APIView):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            # Crear respuesta CSV
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = f'attachment; filename="reporte_estudiante_{estudiante.username}_{timezone.now().strftime("%Y%m%d")}.csv"'
-            
-            writer = csv.writer(response)
-            
-            # Headers del CSV
-            writer.writerow([
-                'Nombre',
-                'Materia',
-                'Código',
-                'Créditos',
-                'Calificación',
-                'Estado',
-                'Promedio General'
-            ])
-            
-            # Obtener inscripciones del estudiante
-            inscripciones = Inscripcion.objects.filter(
-                estudiante=estudiante
-            ).select_related(
-                'materia',
-                'periodo'
-            ).prefetch_related('calificaciones')
-            
-            # Calcular promedio general
-            calificaciones_con_nota = []
-            for inscripcion in inscripciones:
-                for calificacion in inscripcion.calificaciones.all():
-                    if calificacion.nota is not None:
-                        calificaciones_con_nota.append(calificacion.nota)
-            
-            promedio_general = sum(calificaciones_con_nota) / len(calificaciones_con_nota) if calificaciones_con_nota else 0.0
-            
-            # Escribir datos
-            for inscripcion in inscripciones:
-                calificacion = inscripcion.calificaciones.first()
-                nota = calificacion.nota if calificacion else None
-                estado = 'Aprobada' if nota and nota >= 3.0 else 'Reprobada' if nota else 'Pendiente'
-                
-                writer.writerow([
-                    f"{estudiante.first_name} {estudiante.last_name}",
-                    inscripcion.materia.nombre,
-                    inscripcion.materia.codigo,
-                    inscripcion.materia.creditos,
-                    nota if nota else '',
-                    estado,
-                    f"{promedio_general:.2f}"
-                ])
-            
-            return response
+            # Enviar el CSV a medida que se generan las filas
+            return respuesta_csv_en_streaming(
+                _filas_reporte_estudiante(estudiante),
+                f'reporte_estudiante_{estudiante.username}_{timezone.now().strftime("%Y%m%d")}.csv'
+            )
             
         except Exception as e:
             return Response(
@@ -574,8 +836,6 @@ class ProfesorReportAPIView(views.APIView):
         """Generar y retornar CSV del profesor directamente."""
         try:
             from apps.users.models import User
-            from apps.materias.models import Materia
-            from apps.inscripciones.models import Inscripcion
             
             # Verificar permisos (solo admins pueden generar reportes de profesores)
             if not request.user.role == 'admin':
@@ -593,67 +853,14 @@ class ProfesorReportAPIView(views.APIView):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            # Crear respuesta CSV
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = f'attachment; filename="reporte_profesor_{profesor.username}_{timezone.now().strftime("%Y%m%d")}.csv"'
-            
-            writer = csv.writer(response)
-            
-            # Headers del CSV
-            writer.writerow([
-                'Nombre Profesor',
-                'Materia',
-                'Código',
-                'Créditos',
-                'Estudiantes Inscritos',
-                'Promedio Materia',
-                'Estado'
-            ])
-            
-            # Obtener materias del profesor
-            materias = Materia.objects.filter(
-                profesor=profesor
-            ).prefetch_related(
-                'inscripciones__calificaciones',
-                'inscripciones__estudiante'
+            # Enviar el CSV a medida que se generan las filas
+            return respuesta_csv_en_streaming(
+                _filas_reporte_profesor(profesor),
+                f'reporte_profesor_{profesor.username}_{timezone.now().strftime("%Y%m%d")}.csv'
             )
             
-            # Escribir datos por materia
-            for materia in materias:
-                inscripciones = materia.inscripciones.all()
-                estudiantes_inscritos = inscripciones.count()
-                
-                # Calcular promedio de la materia
-                calificaciones = []
-                for inscripcion in inscripciones:
-                    for calificacion in inscripcion.calificaciones.all():
-                        if calificacion.nota is not None:
-                            calificaciones.append(calificacion.nota)
-                
-                promedio_materia = sum(calificaciones) / len(calificaciones) if calificaciones else 0.0
-                
-                # Determinar estado
-                todos_calificados = all(
-                    any(cal.nota is not None for cal in insc.calificaciones.all()) 
-                    for insc in inscripciones
-                ) if inscripciones.exists() else True
-                
-                estado = 'Finalizada' if todos_calificados else 'En Curso'
-                
-                writer.writerow([
-                    f"{profesor.first_name} {profesor.last_name}",
-                    materia.nombre,
-                    materia.codigo,
-                    materia.creditos,
-                    estudiantes_inscritos,
-                    f"{promedio_materia:.2f}",
-                    estado
-                ])
-            
-            return response
-            
         except Exception as e:
             return Response(
                 {'error': f'Error al generar reporte: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            ) 
\ No newline at end of file
+            )
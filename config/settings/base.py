@@ -193,6 +193,67 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'America/Bogota'
 
+# Los fragmentos del reporte general corren junto a los demás reportes pesados
+CELERY_TASK_ROUTES = {
+    'apps.reportes.tasks.generar_fragmento_general': {'queue': 'reportes_pesados'},
+    'apps.reportes.tasks.unir_fragmentos_general': {'queue': 'reportes_pesados'},
+}
+
+# Reportes: formato de almacenamiento de los archivos ('ninguna', 'gzip' o 'zstd')
+REPORTES_COMPRESION = config('REPORTES_COMPRESION', default='ninguna')
+
+# Reportes: dónde se guardan los archivos ('local', 'tmpfs', 'memoria' o la
+# ruta de una clase Storage, por ejemplo 'storages.backends.s3.S3Storage').
+# Con web y workers en nodos distintos hace falta un almacenamiento compartido.
+REPORTES_ALMACENAMIENTO = config('REPORTES_ALMACENAMIENTO', default='local')
+
+# Reportes: argumentos para la clase del almacenamiento (bucket, location, ...)
+REPORTES_ALMACENAMIENTO_OPCIONES = {}
+
+# Reportes: directorio del almacenamiento 'tmpfs'
+REPORTES_TMPFS_DIR = config('REPORTES_TMPFS_DIR', default='/dev/shm/reportes')
+
+# Reportes: bytes por parte al subir archivos en partes (multipart)
+REPORTES_TAMANO_PARTE = config('REPORTES_TAMANO_PARTE', default=8 * 1024 * 1024, cast=int)
+
+# Reportes: cola de generación (ver apps/reportes/cola.py). Cada tipo va a
+# una cola de Celery propia para que los reportes pesados no demoren a los
+# interactivos. Algún worker tiene que consumir cada cola (ver los servicios
+# celery y celery-reportes-pesados de docker-compose.yml)
+REPORTES_COLAS = {
+    'estudiante': 'reportes_interactivos',
+    'profesor': 'reportes_interactivos',
+    'materia': 'reportes_interactivos',
+    'periodo': 'reportes_pesados',
+    'lote': 'reportes_pesados',
+    'general': 'reportes_pesados',
+}
+
+# Reportes: orden de despacho de los que esperan lugar (mayor va primero)
+REPORTES_PRIORIDADES = {
+    'estudiante': 9,
+    'profesor': 8,
+    'materia': 6,
+    'periodo': 3,
+    'lote': 3,
+    'general': 1,
+}
+
+# Reportes: generaciones simultáneas por tipo (los tipos ausentes no tienen límite)
+REPORTES_CONCURRENCIA = {
+    'periodo': 2,
+    'lote': 2,
+    'general': 2,
+}
+
+# Reportes: segundos tras los que un reporte despachado sin terminar deja de
+# ocupar su lugar en la cola (worker caído); si sigue pendiente se reenvía y
+# si quedó generándose pasa a error
+REPORTES_COLA_VENCIMIENTO = config('REPORTES_COLA_VENCIMIENTO', default=3600, cast=int)
+
+# Reportes: segundos que se cachean las estadísticas del dashboard
+REPORTES_ESTADISTICAS_TTL = config('REPORTES_ESTADISTICAS_TTL', default=30, cast=int)
+
 # Swagger/ReDoc settings
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {